@@ -4,6 +4,12 @@
 # Overall Role and Purpose:
 # - Processes scraped content to extract structured data.
 # - Utilizes an LLM guided by system and human message templates.
+# - Coalesces identical in-flight extraction requests (same model, parameters and messages) across jobs.
+# - Packs several short articles into one request (up to a token budget) so the long system prompt is sent once per batch.
+# - Falls back to single-article requests for any article whose batched result is missing or unparseable.
+# - Runs each request through the extraction model ladder, escalating when output fails JSON or schema validation.
+# - With `EXTRACTION_FORMAT="compact"`, asks for short keys and positional arrays and expands them locally before validation.
+# - In "batch" LLM execution mode, submits every article to the offline batch API and streams results back by custom ID.
 
 # Expected Inputs:
 # - `SharedState` with `articles`.
@@ -19,17 +25,41 @@ import asyncio
 import json
 import logging
 from models.state import SharedState
-from prompts.article_extraction_prompt import ARTICLE_EXTRACTION_SYSTEM_PROMPT, ARTICLE_EXTRACTION_HUMAN_PROMPT
-import openai
+from prompts.article_extraction_prompt import (
+    ARTICLE_EXTRACTION_SYSTEM_PROMPT,
+    ARTICLE_EXTRACTION_COMPACT_SYSTEM_PROMPT,
+    ARTICLE_EXTRACTION_HUMAN_PROMPT,
+    ARTICLE_EXTRACTION_BATCH_INSTRUCTIONS,
+    ARTICLE_EXTRACTION_BATCH_ARTICLE,
+)
+from tools.single_flight import SingleFlight, request_key
+from tools.llm_batch import get_batch_llm_client
+from tools.model_cascade import run_cascade
+from tools.extraction_schema import is_valid_extraction
+from tools.compact_extraction import expand_extraction
+from tools.job_control import charge_llm_usage
+from tools.cassette import chat_completion
+from tools.fair_scheduler import stage_slot
 
 logger = logging.getLogger(__name__)
 
+# Shared by all jobs so the same article sent at the same moment costs one completion
+_in_flight = SingleFlight()
+
 async def article_extraction_agent(state: SharedState):
     state.add_log("Starting article extraction.", level="INFO")
+    if state.config.LLM_EXECUTION_MODE == "batch":
+        await extract_articles_offline(state)
+        state.add_log(f"Extracted data from {len(state.extracted_data)} articles.", level="INFO")
+        return
     tasks = []
     semaphore = asyncio.Semaphore(5)  # Limit concurrency to 5
-    for url, content in state.articles.items():
-        tasks.append(extract_article_data(url, content, state, semaphore))
+    for batch in plan_batches(state.articles, state.config):
+        if len(batch) == 1:
+            url, content = batch[0]
+            tasks.append(extract_article_data(url, content, state, semaphore))
+        else:
+            tasks.append(extract_article_batch(batch, state, semaphore))
     await asyncio.gather(*tasks)
     state.add_log(f"Extracted data from {len(state.extracted_data)} articles.", level="INFO")
 
@@ -37,7 +67,7 @@ async def extract_article_data(url: str, content: str, state: SharedState, semap
     async with semaphore:
         # Generate the prompt messages
         prompt_messages = [
-            {"role": "system", "content": ARTICLE_EXTRACTION_SYSTEM_PROMPT},
+            {"role": "system", "content": system_prompt(state.config)},
             {"role": "user", "content": ARTICLE_EXTRACTION_HUMAN_PROMPT.format(url=url, article_text=content)}
         ]
         extracted_data = await call_llm(prompt_messages, state.config, state)
@@ -46,20 +76,159 @@ async def extract_article_data(url: str, content: str, state: SharedState, semap
         else:
             state.add_log(f"Failed to extract data from {url}.", level="ERROR")
 
+async def extract_articles_offline(state: SharedState):
+    urls = {}
+    requests = []
+    for index, (url, content) in enumerate(state.articles.items()):
+        custom_id = f"extract-{index}"
+        urls[custom_id] = url
+        requests.append((custom_id, {
+            # Offline runs have no per-request escalation, so use the strongest model of the ladder
+            "model": state.config.EXTRACTION_MODELS[-1],
+            "messages": [
+                {"role": "system", "content": system_prompt(state.config)},
+                {"role": "user", "content": ARTICLE_EXTRACTION_HUMAN_PROMPT.format(url=url, article_text=content)},
+            ],
+            "temperature": state.config.LLM_TEMPERATURE,
+            "max_tokens": state.config.LLM_MAX_TOKENS,
+        }))
+    if not requests:
+        return
+
+    client = get_batch_llm_client(state.config)
+    async for custom_id, assistant_message, error in client.run(requests, name="extraction"):
+        url = urls.get(custom_id)
+        if url is None:
+            continue
+        if error:
+            state.add_log(f"Batch extraction failed for {url}: {error}", level="ERROR")
+            continue
+        try:
+            extracted_data = expand_extraction(json.loads(assistant_message))
+        except json.JSONDecodeError as e:
+            state.add_log(f"JSON parsing error for {url}: {e}", level="ERROR")
+            continue
+        if not is_valid_extraction(extracted_data):
+            state.add_log(f"Extracted data for {url} does not match the extraction schema: {str(extracted_data)[:200]}", level="ERROR")
+            continue
+        state.extracted_data[url] = extracted_data
+
+def system_prompt(config) -> str:
+    if config.EXTRACTION_FORMAT == "compact":
+        return ARTICLE_EXTRACTION_COMPACT_SYSTEM_PROMPT
+    return ARTICLE_EXTRACTION_SYSTEM_PROMPT
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English prose
+    return len(text) // 4 + 1
+
+def plan_batches(articles: dict, config) -> list:
+    """Group short articles into batches that fit the token budget; long articles get a batch of their own."""
+    if not config.EXTRACTION_BATCHING:
+        return [[(url, content)] for url, content in articles.items()]
+    batches = []
+    current, current_tokens = [], 0
+    for url, content in articles.items():
+        tokens = estimate_tokens(content)
+        if tokens > config.EXTRACTION_SHORT_ARTICLE_TOKENS:
+            batches.append([(url, content)])
+            continue
+        if current and (
+            current_tokens + tokens > config.EXTRACTION_BATCH_TOKEN_BUDGET
+            or len(current) >= config.EXTRACTION_BATCH_MAX_ARTICLES
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append((url, content))
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+async def extract_article_batch(batch: list, state: SharedState, semaphore):
+    keyed = {f"A{index}": (url, content) for index, (url, content) in enumerate(batch, start=1)}
+    async with semaphore:
+        prompt_messages = [
+            {"role": "system", "content": system_prompt(state.config) + ARTICLE_EXTRACTION_BATCH_INSTRUCTIONS},
+            {"role": "user", "content": "\n".join(
+                ARTICLE_EXTRACTION_BATCH_ARTICLE.format(key=key, url=url, article_text=content)
+                for key, (url, content) in keyed.items()
+            )},
+        ]
+        results = await call_llm_batch(prompt_messages, len(batch), state.config, state)
+
+    missing = []
+    for key, (url, content) in keyed.items():
+        data = results.get(key)
+        if isinstance(data, dict) and data:
+            state.extracted_data[url] = data
+        else:
+            missing.append((url, content))
+    if missing:
+        state.add_log(f"Batched extraction returned no result for {len(missing)} of {len(batch)} articles; retrying individually.", level="WARNING")
+        await asyncio.gather(*[extract_article_data(url, content, state, semaphore) for url, content in missing])
+
+async def call_llm_batch(prompt_messages: list, article_count: int, config, state: SharedState) -> dict:
+    """Return {key: extracted data} for a batched request; an empty dict when the response can't be parsed."""
+    max_tokens = config.LLM_MAX_TOKENS * article_count
+
+    def accept(assistant_message):
+        # Escalate unless every article in the batch came back valid
+        try:
+            results = parse_batch_results(assistant_message)
+        except json.JSONDecodeError:
+            return None
+        valid = {key: data for key, data in results.items() if is_valid_extraction(data)}
+        return valid if len(valid) == article_count else None
+
+    try:
+        results, assistant_message = await run_cascade(
+            "extraction_batch",
+            config.EXTRACTION_MODELS,
+            lambda model: complete_once(prompt_messages, config, model, max_tokens),
+            accept,
+        )
+        if results is not None:
+            return results
+        # Keep whatever the strongest model got right; the rest is retried article by article
+        return {key: data for key, data in parse_batch_results(assistant_message).items() if is_valid_extraction(data)}
+    except json.JSONDecodeError as e:
+        state.add_log(f"JSON parsing error for article batch: {e}", level="WARNING")
+        logger.error(f"JSON parsing error for article batch: {e}")
+        return {}
+    except Exception as e:
+        state.add_log(f"OpenAI API error: {e}", level="ERROR")
+        logger.error(f"OpenAI API error: {e}")
+        return {}
+
+def parse_batch_results(assistant_message: str) -> dict:
+    text = assistant_message.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        if text.startswith("json"):
+            text = text[len("json"):]
+    items = json.loads(text)
+    if isinstance(items, dict):
+        items = items.get("results", [])
+    return {
+        str(item["key"]): expand_extraction(item.get("data"))
+        for item in items
+        if isinstance(item, dict) and "key" in item
+    }
+
 async def call_llm(prompt_messages: list, config, state: SharedState):
     try:
-        openai.api_key = config.OPENAI_API_KEY
-        response = await openai.ChatCompletion.acreate(
-            model=config.LLM_MODEL_NAME,
-            messages=prompt_messages,
-            temperature=config.LLM_TEMPERATURE,
-            max_tokens=config.LLM_MAX_TOKENS,
-            n=1,
-            stop=None,
+        extracted_data, assistant_message = await run_cascade(
+            "extraction",
+            config.EXTRACTION_MODELS,
+            lambda model: complete_once(prompt_messages, config, model),
+            parse_extraction,
         )
-        assistant_message = response.choices[0].message['content'].strip()
-        # Try to parse the response as JSON
-        extracted_data = json.loads(assistant_message)
+        if extracted_data is None:
+            # Surface the parse or schema error of the strongest model's answer
+            extracted_data = expand_extraction(json.loads(assistant_message))
+            state.add_log(f"Extracted data does not match the extraction schema: {str(extracted_data)[:200]}", level="ERROR")
+            return None
         return extracted_data
     except json.JSONDecodeError as e:
         state.add_log(f"JSON parsing error for article: {e}", level="ERROR")
@@ -68,4 +237,34 @@ async def call_llm(prompt_messages: list, config, state: SharedState):
     except Exception as e:
         state.add_log(f"OpenAI API error: {e}", level="ERROR")
         logger.error(f"OpenAI API error: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def parse_extraction(assistant_message: str):
+    try:
+        data = json.loads(assistant_message)
+    except json.JSONDecodeError:
+        return None
+    data = expand_extraction(data)
+    return data if is_valid_extraction(data) else None
+
+async def complete_once(prompt_messages: list, config, model: str, max_tokens: int = None) -> str:
+    """Coalesce identical in-flight requests for the same model and parameters."""
+    max_tokens = max_tokens or config.LLM_MAX_TOKENS
+    key = request_key(model, config.LLM_TEMPERATURE, max_tokens, prompt_messages)
+    return await _in_flight.do(key, lambda: complete(prompt_messages, config, max_tokens, model=model))
+
+async def complete(prompt_messages: list, config, max_tokens: int = None, model: str = None) -> str:
+    import openai
+
+    openai.api_key = config.OPENAI_API_KEY
+    async with stage_slot("llm", config):
+        response = await chat_completion(
+            model=model or config.LLM_MODEL_NAME,
+            messages=prompt_messages,
+            temperature=config.LLM_TEMPERATURE,
+            max_tokens=max_tokens or config.LLM_MAX_TOKENS,
+            n=1,
+            stop=None,
+        )
+    charge_llm_usage(model or config.LLM_MODEL_NAME, response)
+    return response.choices[0].message['content'].strip()
@@ -3,40 +3,55 @@
 
 # Overall Role and Purpose:
 # - Uploads the validated data to the knowledge graph database (e.g., Neo4j).
-# - Executes Cypher queries to merge nodes and relationships.
-# - Logs every successful upload and details about what was merged.
+# - Hands every reviewed payload to the process-wide upload service, which batches and commits writes of all jobs.
+# - Logs every article as soon as it is committed (or has failed) and details about what was merged.
+# - Stamps each payload with its source URL and content hash, and records the hash once the article is committed,
+#   so an unchanged article is skipped the next time its URL is scraped.
 
 # Expected Inputs:
 # - `SharedState` with `reviewed_data`.
-# - `Config` with database connection details.
+# - `Config` with database connection details and upload batching settings.
 
 # Expected Outputs:
 # - Data is inserted into the knowledge graph.
+# - Marks each committed URL as uploaded in the state (and releases its payload).
 # - Sets `upload_complete` to `True` in the state upon successful upload.
 # - Logs details of each upload.
 
+import asyncio
 import logging
 from models.state import SharedState
-from tools.database import KnowledgeGraphUploader
+from tools.upload_service import get_upload_service
+from tools.content_hashes import record_uploaded
 
 logger = logging.getLogger(__name__)
 
 async def knowledge_graph_uploader_agent(state: SharedState):
     state.add_log("Starting knowledge graph upload.", level="INFO")
-    uploader = KnowledgeGraphUploader(
-        uri=state.config.NEO4J_URI,
-        user=state.config.NEO4J_USER,
-        password=state.config.NEO4J_PASSWORD,
-    )
-    for url, data in state.reviewed_data.items():
-        try:
-            success, message = await uploader.upload_data(data, state)
-            if success:
-                state.add_log(f"Successfully uploaded data from {url}. Details: {message}", level="INFO")
-            else:
-                state.add_log(f"Failed to upload data from {url}. Error: {message}", level="ERROR")
-        except Exception as e:
-            state.add_log(f"Exception during upload for {url}: {e}", level="ERROR")
-            logger.error(f"Exception during upload for {url}: {e}")
+    service = get_upload_service(state.config)
+    futures = []
+    for url in list(state.reviewed_data):
+        future = service.submit(with_source(state.reviewed_data[url], url, state.content_hash(url)))
+        future.add_done_callback(lambda done, url=url: report_upload(state, url, done))
+        futures.append(future)
+    # Cancelling the job cancels the futures, which drops payloads that are still queued
+    await asyncio.gather(*futures)
     state.upload_complete = True
     state.add_log("Knowledge graph upload complete.", level="INFO")
+
+def with_source(data: dict, url: str, digest: str) -> dict:
+    """Copy of the payload whose Article carries the scraped URL and the hash of the text it was extracted from."""
+    return {**data, "Article": {**(data.get("Article") or {}), "Source URL": url, "Content Hash": digest}}
+
+def report_upload(state: SharedState, url: str, future: asyncio.Future):
+    if future.cancelled():
+        return
+    success, message = future.result()
+    if success:
+        record_uploaded(state.config, url, state.content_hash(url))
+        # Uploaded data lives in the graph now; free its payloads
+        state.mark_uploaded(url)
+        state.add_log(f"Successfully uploaded data from {url}. Details: {message}", level="INFO")
+    else:
+        state.add_log(f"Failed to upload data from {url}. Error: {message}", level="ERROR")
+        logger.error(f"Failed to upload data from {url}: {message}")
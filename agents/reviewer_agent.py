@@ -4,6 +4,8 @@
 # Overall Role and Purpose:
 # - Reviews the extracted data for quality and correctness.
 # - Uses an LLM guided by `REVIEW_PROMPT` to validate data.
+# - Runs each review through the review model ladder; an unparseable or negative verdict from a cheaper model is escalated.
+# - In "batch" LLM execution mode, submits all reviews to the offline batch API and streams verdicts back by custom ID.
 
 # Expected Inputs:
 # - `SharedState` with `extracted_data`.
@@ -13,30 +15,94 @@
 # - Updates `reviewed_data` in the state with data that passed the review.
 # - Logs any issues found during the review.
 
+import json
 from models.state import SharedState
-from prompts.review_prompt import REVIEW_PROMPT
-import openai
+from prompts import review_prompt
+from tools.llm_batch import get_batch_llm_client
+from tools.model_cascade import run_cascade
+from tools.job_control import charge_llm_usage
+from tools.cassette import chat_completion
+from tools.fair_scheduler import stage_slot
 
 async def reviewer_agent(state: SharedState):
     state.add_log("Starting data review.")
+    if state.config.LLM_EXECUTION_MODE == "batch":
+        await review_offline(state)
+        state.add_log(f"Reviewed and approved data for {len(state.reviewed_data)} articles.")
+        return
     for url, data in state.extracted_data.items():
-        prompt = REVIEW_PROMPT.format(extracted_data=data)
-        review_result = await call_llm(prompt, state.config)
+        prompt = review_prompt.REVIEW_PROMPT.format(extracted_data=data)
+        review_result = await review(prompt, state.config)
         if is_valid(review_result):
             state.reviewed_data[url] = data
         else:
             state.add_log(f"Data for {url} failed review: {review_result}")
     state.add_log(f"Reviewed and approved data for {len(state.reviewed_data)} articles.")
 
+async def review_offline(state: SharedState):
+    urls = {}
+    requests = []
+    for index, (url, data) in enumerate(state.extracted_data.items()):
+        custom_id = f"review-{index}"
+        urls[custom_id] = url
+        requests.append((custom_id, {
+            "model": state.config.REVIEW_MODELS[-1],
+            "messages": [{"role": "user", "content": review_prompt.REVIEW_PROMPT.format(extracted_data=data)}],
+            "max_tokens": 200,
+        }))
+    if not requests:
+        return
+
+    client = get_batch_llm_client(state.config)
+    async for custom_id, review_result, error in client.run(requests, name="review"):
+        url = urls.get(custom_id)
+        if url is None:
+            continue
+        if error:
+            state.add_log(f"Batch review failed for {url}: {error}", level="ERROR")
+        elif is_valid(review_result):
+            state.reviewed_data[url] = state.extracted_data[url]
+        else:
+            state.add_log(f"Data for {url} failed review: {review_result}")
+
+async def review(prompt: str, config) -> str:
+    def accept(review_result):
+        # Only a parseable, all-valid verdict is trusted without a second opinion
+        statuses = review_statuses(review_result)
+        if statuses and all(status == "Valid" for status in statuses):
+            return review_result
+        return None
+
+    _, review_result = await run_cascade("review", config.REVIEW_MODELS, lambda model: call_llm(prompt, config, model), accept)
+    return review_result
+
+def review_statuses(review_result: str) -> list:
+    """Status values of a JSON review, or an empty list if the review isn't parseable JSON."""
+    text = review_result.strip().strip("`")
+    if text.startswith("json"):
+        text = text[len("json"):]
+    try:
+        review_data = json.loads(text).get("Review", {})
+        return [section.get("Status") for section in review_data.values()]
+    except (ValueError, AttributeError):
+        return []
+
 def is_valid(review_result: str) -> bool:
-    # Implement logic to determine if data is valid based on review_result
-    return "Valid" in review_result  # Placeholder
-
-async def call_llm(prompt: str, config):
-    openai.api_key = config.LLM_API_KEY
-    response = await openai.Completion.create(
-        engine=config.LLM_MODEL_NAME,
-        prompt=prompt,
-        max_tokens=200,
-    )
-    return response.choices[0].text.strip()
+    statuses = review_statuses(review_result)
+    if statuses:
+        return all(status == "Valid" for status in statuses)
+    return "Valid" in review_result and "Invalid" not in review_result
+
+async def call_llm(prompt: str, config, model: str = None) -> str:
+    import openai
+
+    openai.api_key = config.OPENAI_API_KEY
+    async with stage_slot("llm", config):
+        response = await chat_completion(
+            model=model or config.LLM_MODEL_NAME,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=200,
+            n=1,
+        )
+    charge_llm_usage(model or config.LLM_MODEL_NAME, response)
+    return response.choices[0].message['content'].strip()
@@ -11,10 +11,12 @@
 # Expected Outputs:
 # - Updates the `next_step` in the state.
 # - Invokes the next agent based on the workflow logic.
+# - Ends early when every scraped article is unchanged since its last upload.
+# - `run_workflow` drives a job's state to the end; used by the API process and by pipeline workers.
 
 import logging
 from models.state import SharedState
-from agents.url_generation_agent import url_generation_agent
+from agents.url_generation_agent import url_generation_agent, streaming_url_generation_agent
 from agents.scraper_selection_agent import scraper_selection_agent
 from agents.article_extraction_agent import article_extraction_agent
 from agents.reviewer_agent import reviewer_agent
@@ -27,7 +29,24 @@ async def router_agent(state: SharedState):
 
     # Use a loop to progress through the workflow until completion
     while state.next_step != "end":
-        if state.next_step == "url_generation":
+        if state.next_step == "url_generation" and state.config.STREAM_URLS:
+            # URL generation feeds scraper selection and scraping directly as search results arrive
+            await streaming_url_generation_agent(state)
+            if state.articles:
+                state.next_step = "article_extraction"
+            elif state.progress()["unchanged"]:
+                state.add_log("Every scraped article is unchanged since its last upload. Ending workflow.", level="INFO")
+                # The graph already holds all of them
+                state.upload_complete = True
+                state.next_step = "end"
+            elif state.urls_to_be_processed:
+                state.add_log("No articles could be scraped. Ending workflow.", level="ERROR")
+                state.next_step = "end"
+            else:
+                state.add_log("No URLs to process. Ending workflow.", level="ERROR")
+                state.next_step = "end"
+
+        elif state.next_step == "url_generation":
             await url_generation_agent(state)
             # After the agent runs, update next_step based on the new state
             if state.urls_to_be_processed:
@@ -46,14 +65,22 @@ async def router_agent(state: SharedState):
 
         elif state.next_step == "article_extraction":
             await article_extraction_agent(state)
+            # Article text is not needed past extraction; only its content hash stays on the record
+            state.release_articles()
             if state.extracted_data:
                 state.next_step = "review"
+            elif 0 < state.progress()["unchanged"] == state.progress()["scraped"]:
+                state.add_log("Every scraped article is unchanged since its last upload. Ending workflow.", level="INFO")
+                # The graph already holds all of them
+                state.upload_complete = True
+                state.next_step = "end"
             else:
                 state.add_log("No extracted data. Ending workflow.", level="ERROR")
                 state.next_step = "end"
 
         elif state.next_step == "review":
             await reviewer_agent(state)
+            state.release_unreviewed()
             if state.reviewed_data:
                 state.next_step = "knowledge_graph_upload"
             else:
@@ -72,4 +99,15 @@ async def router_agent(state: SharedState):
             state.add_log("Unknown next step. Ending workflow.", level="ERROR")
             state.next_step = "end"
 
-    state.add_log("Workflow complete.", level="INFO")
\ No newline at end of file
+    state.add_log("Workflow complete.", level="INFO")
+
+async def run_workflow(state: SharedState):
+    try:
+        while True:
+            await router_agent(state)
+            if state.next_step == "end":
+                state.add_log("Workflow complete", level="INFO")
+                break
+    except Exception as e:
+        state.add_log(f"Error in run_workflow: {e}", level="ERROR")
+        logger.error(f"Error in run_workflow: {e}")
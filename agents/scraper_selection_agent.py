@@ -3,21 +3,34 @@
 
 # Overall Role and Purpose:
 # - Determines the most appropriate scraper for each URL.
-# - Currently defaults to using `JinaScraper` as it's effective for text extraction.
+# - Consults the per-domain `ScraperRouter`, which learns from past success rate, latency and content quality.
+# - Domains without history start with the local scraper and fall back to `JinaScraper`.
+# - Accepts either the finished URL list or a live stream of URLs from URL generation.
 
 # Expected Inputs:
-# - `SharedState` with `urls_to_be_processed`.
+# - `SharedState` with `urls_to_be_processed`, or an async stream of URLs.
 
 # Expected Outputs:
-# - Updates `scraper_choices` in the state, mapping each URL to a scraper.
+# - Updates `scraper_choices` in the state, mapping each URL to its preferred scraper.
 
 from models.state import SharedState
 from agents.scraping_agent import scraping_agent
+from tools.scraping.scraper_router import get_scraper_router
 
-async def scraper_selection_agent(state: SharedState):
+async def scraper_selection_agent(state: SharedState, urls=None):
     state.add_log("Selecting appropriate scrapers for each URL.")
-    for url in state.urls_to_be_processed:
-        # For simplicity, we'll default to using JinaScraper
-        state.scraper_choices[url] = "jina_scraper"
+    router = get_scraper_router(state.config.SCRAPER_ROUTING_PATH)
+    if urls is None:
+        for url in state.urls_to_be_processed:
+            state.scraper_choices[url] = router.rank(url)[0]
+        state.add_log(f"Scraper choices: {state.scraper_choices}")
+        await scraping_agent(state)
+        return
+
+    async def select(stream):
+        async for url in stream:
+            state.scraper_choices[url] = router.rank(url)[0]
+            yield url
+
+    await scraping_agent(state, urls=select(urls))
     state.add_log(f"Scraper choices: {state.scraper_choices}")
-    await scraping_agent(state)
@@ -3,57 +3,86 @@
 
 # Overall Role and Purpose:
 # - Scrapes the content of articles using the selected scrapers.
-# - Asynchronously fetches content for each URL.
+# - Asynchronously fetches content for each URL through the per-domain politeness scheduler.
+# - Falls back to the next-best scraper from the routing table when the chosen one fails.
+# - Feeds every attempt's outcome back into the routing table.
+# - Compares each scraped article's content hash with its last upload; unchanged articles skip the later stages.
 
 # Expected Inputs:
-# - `SharedState` with `urls_to_be_processed` and `scraper_choices`.
+# - `SharedState` with `urls_to_be_processed` and `scraper_choices`, or an async stream of selected URLs.
 
 # Expected Outputs:
 # - Updates `articles` in the state with scraped content.
+# - Updates `scraper_choices` with the scraper that actually produced each article.
+# - Marks URLs whose content is unchanged since their last upload (they are not added to `articles`).
+# - Logs URLs skipped because robots.txt disallows them.
 
-import asyncio
 import logging
+import time
 from models.state import SharedState
+from models.url_records import content_hash
 from tools.scraping.jina_scraper import JinaScraper
+from tools.scraping.local_scraper import LocalScraper
 from tools.scraping.web_base_loader_scraper import WebBaseLoaderScraper
+from tools.scraping.scraper_router import get_scraper_router
+from tools.scraping.politeness import get_politeness_scheduler
+from tools.fair_scheduler import stage_slot
+from tools.content_hashes import is_unchanged
 
 logger = logging.getLogger(__name__)
 
-async def scraping_agent(state: SharedState):
+SCRAPER_FACTORIES = {
+    "local_scraper": lambda config: LocalScraper(user_agent=config.USER_AGENT, timeout=config.LOCAL_SCRAPER_TIMEOUT),
+    "jina_scraper": lambda config: JinaScraper(api_key=config.JINA_API_KEY),
+    "web_base_loader_scraper": lambda config: WebBaseLoaderScraper(),
+}
+
+async def scraping_agent(state: SharedState, urls=None):
     state.add_log("Starting article scraping.", level="INFO")
-    tasks = []
-    semaphore = asyncio.Semaphore(5)  # Limit concurrency to 5
-    for url in state.urls_to_be_processed:
-        scraper_name = state.scraper_choices.get(url)
-        if scraper_name == "jina_scraper":
-            tasks.append(scrape_with_jina(url, state, semaphore))
-        elif scraper_name == "web_base_loader_scraper":
-            tasks.append(scrape_with_web_base_loader(url, state, semaphore))
-    await asyncio.gather(*tasks)
+    router = get_scraper_router(state.config.SCRAPER_ROUTING_PATH)
+    scheduler = get_politeness_scheduler(state.config)
+    if urls is None:
+        urls = [url for url in state.urls_to_be_processed if url in state.scraper_choices]
+    disallowed = await scheduler.run(urls, lambda url: scrape_in_pool(url, state, router))
+    for url in disallowed:
+        state.add_log(f"Skipping {url}: disallowed by robots.txt.", level="WARNING")
+    router.save()
     state.add_log(f"Scraped {len(state.articles)} articles.", level="INFO")
 
-async def scrape_with_jina(url: str, state: SharedState, semaphore):
-    async with semaphore:
-        scraper = JinaScraper(api_key=state.config.JINA_API_KEY)
-        try:
-            content = await scraper.scrape(url)
-            if content:
-                state.articles[url] = content
+async def scrape_in_pool(url: str, state: SharedState, router):
+    # The shared scrape pool hands slots to interactive jobs ahead of bulk jobs
+    async with stage_slot("scrape", state.config):
+        await scrape_url(url, state, router)
+
+async def scrape_url(url: str, state: SharedState, router):
+    # Preferred scraper first, then the rest in routing order as fallbacks
+    preferred = state.scraper_choices[url]
+    candidates = [preferred] + [name for name in router.rank(url) if name != preferred]
+    for scraper_name in candidates:
+        factory = SCRAPER_FACTORIES.get(scraper_name)
+        if factory is None:
+            continue
+        content = await scrape_with(scraper_name, factory(state.config), url, state, router)
+        if content:
+            state.scraper_choices[url] = scraper_name
+            digest = content_hash(content)
+            if state.config.CHANGE_DETECTION and await is_unchanged(state.config, url, digest):
+                state.mark_unchanged(url, digest)
+                state.add_log(f"Skipping {url}: content unchanged since its last upload.", level="INFO")
             else:
-                state.add_log(f"Failed to scrape {url} with JinaScraper.", level="ERROR")
-        except Exception as e:
-            state.add_log(f"Error scraping {url} with JinaScraper: {e}", level="ERROR")
-            logger.error(f"Error scraping {url} with JinaScraper: {e}")
-
-async def scrape_with_web_base_loader(url: str, state: SharedState, semaphore):
-    async with semaphore:
-        scraper = WebBaseLoaderScraper()
-        try:
-            content = await scraper.scrape(url)
-            if content:
                 state.articles[url] = content
-            else:
-                state.add_log(f"Failed to scrape {url} with WebBaseLoaderScraper.", level="ERROR")
-        except Exception as e:
-            state.add_log(f"Error scraping {url} with WebBaseLoaderScraper: {e}", level="ERROR")
-            logger.error(f"Error scraping {url} with WebBaseLoaderScraper: {e}")
+            return
+    state.add_log(f"Failed to scrape {url} with any scraper.", level="ERROR")
+
+async def scrape_with(scraper_name: str, scraper, url: str, state: SharedState, router):
+    start = time.monotonic()
+    content = None
+    try:
+        content = await scraper.scrape(url)
+        if not content:
+            state.add_log(f"Failed to scrape {url} with {scraper_name}.", level="WARNING")
+    except Exception as e:
+        state.add_log(f"Error scraping {url} with {scraper_name}: {e}", level="WARNING")
+        logger.error(f"Error scraping {url} with {scraper_name}: {e}")
+    router.record(url, scraper_name, bool(content), time.monotonic() - start, content)
+    return content
@@ -3,8 +3,14 @@
 
 # Overall Role and Purpose:
 # - Generates URLs for articles based on search terms.
-# - Uses an LLM prompt to develop the most effective 5 search terms.
-# - Decides whether to use the General URL Generation Agent or the Contextual URL Generation Agent based on reasoning using provided descriptions.
+# - Plans the search with a single LLM call that returns the 5 most effective search terms and the search engine choice.
+# - Runs the planning call through the planning model ladder, escalating when the plan is not valid JSON.
+# - Memoizes query plans by normalized user query so repeated queries can skip the LLM entirely.
+# - In "hedged" search mode, queries Google CSE and Tavily at once and keeps what answers by a deadline.
+# - In "planned" search mode, runs either the General or the Contextual URL Generation Agent as planned.
+# - Merges per-term result lists with reciprocal-rank fusion, deduplicated by normalized URL.
+# - In streaming mode, hands URLs to scraping as searches return them and stops once the job's URL budget is filled.
+# - Serves repeated search terms from the shared search result cache.
 
 # Expected Inputs:
 # - `SharedState` with the user query.
@@ -17,29 +23,35 @@
 import asyncio
 import logging
 from models.state import SharedState
+from agents.scraper_selection_agent import scraper_selection_agent
 from tools.searching.google_cse import GoogleCSE
 from tools.searching.tavily_search import TavilySearch
-from prompts.search_term_generation_prompt import SEARCH_TERM_GENERATION_PROMPT
-from prompts.search_agent_selection_prompt import SEARCH_AGENT_SELECTION_PROMPT
-import openai
+from tools.searching.search_cache import get_search_cache
+from tools.searching.rank_fusion import reciprocal_rank_fusion, normalize_url
+from tools.query_plan_cache import get_query_plan_cache
+from tools.model_cascade import run_cascade
+from tools.job_control import charge_llm_usage
+from tools.cassette import chat_completion
+from tools.fair_scheduler import stage_slot
+from prompts.query_planning_prompt import QUERY_PLANNING_HUMAN_PROMPT, planning_system_prompt
 import json
 
 logger = logging.getLogger(__name__)
 
+SEARCH_ENGINES = {
+    "google_cse": lambda config: GoogleCSE(api_key=config.GOOGLE_CSE_API_KEY, cx=config.GOOGLE_CSE_CX),
+    "tavily": lambda config: TavilySearch(api_key=config.TAVILY_API_KEY),
+}
+
 async def url_generation_agent(state: SharedState):
     try:
-        # Generate 5 search terms using LLM
-        search_terms = await generate_search_terms(state.user_query, state.config, state)
-        state.search_terms = search_terms
-
-        if not search_terms:
-            state.add_log("No search terms could be generated.", level="ERROR")
-            state.next_step = "end"
+        plan = await plan_search(state)
+        if plan is None:
             return
 
-        # Decide whether to use general or contextual agent using LLM
-        agent_choice = await decide_search_agent(state.user_query, search_terms, state.config, state)
-        if agent_choice == "Contextual":
+        if state.config.SEARCH_MODE == "hedged":
+            await hedged_url_generation_agent(state)
+        elif plan["search_agent"] == "Contextual":
             state.add_log("Decided to use Contextual URL Generation Agent.", level="INFO")
             await contextual_url_generation_agent(state)
         else:
@@ -49,105 +61,219 @@ async def url_generation_agent(state: SharedState):
         state.add_log(f"Error in url_generation_agent: {e}", level="ERROR")
         logger.error(f"Error in url_generation_agent: {e}")
 
-async def generate_search_terms(user_query: str, config, state: SharedState):
-    try:
-        prompt = SEARCH_TERM_GENERATION_PROMPT.format(query=user_query)
-        # Call LLM to generate search terms
+async def plan_search(state: SharedState):
+    # Plan the search (terms + engine) in one LLM call, or reuse a memoized plan
+    plan = await plan_query(state.user_query, state.config, state)
+    state.search_terms = plan["search_terms"]
+    if not state.search_terms:
+        state.add_log("No search terms could be generated.", level="ERROR")
+        state.next_step = "end"
+        return None
+    return plan
+
+async def plan_query(user_query: str, config, state: SharedState) -> dict:
+    cache = get_query_plan_cache(config)
+    if config.REUSE_QUERY_PLANS:
+        cached_plan = await cache.get(user_query)
+        if cached_plan:
+            state.add_log("Reusing cached query plan.", level="INFO")
+            return cached_plan
+
+    messages = [
+        {"role": "system", "content": planning_system_prompt()},
+        {"role": "user", "content": QUERY_PLANNING_HUMAN_PROMPT.format(user_query=user_query)},
+    ]
+
+    async def call(model):
+        import openai
+
         openai.api_key = config.OPENAI_API_KEY
         openai.api_base = config.OPENAI_API_BASE
-        response = await openai.ChatCompletion.acreate(
-            model=config.LLM_MODEL_NAME,
-            messages=[
-                {"role": "system", "content": "You are an assistant that generates effective search terms based on user queries."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=config.LLM_TEMPERATURE,
-            max_tokens=50,
-            n=1,
-        )
-        search_terms_text = response.choices[0].message['content'].strip()
-        # Parse the response to get a list of search terms
-        if "No search terms could be generated." in search_terms_text:
-            return []
-        search_terms = [term.strip() for term in search_terms_text.split(',') if term.strip()]
-        return search_terms
-    except Exception as e:
-        state.add_log(f"Error in generate_search_terms: {e}", level="ERROR")
-        logger.error(f"Error in generate_search_terms: {e}")
-        return []
+        async with stage_slot("llm", config):
+            response = await chat_completion(
+                model=model,
+                messages=messages,
+                temperature=config.LLM_TEMPERATURE,
+                max_tokens=150,
+                n=1,
+            )
+        charge_llm_usage(model, response)
+        return response.choices[0].message['content'].strip()
+
+    def accept(plan_text):
+        # Only a well-formed JSON plan with search terms counts as confident
+        try:
+            data = json.loads(strip_code_fence(plan_text))
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, dict) or not data.get("search_terms"):
+            return None
+        return parse_query_plan(plan_text)
 
-async def decide_search_agent(user_query: str, search_terms: list, config, state: SharedState):
     try:
-        # Prepare the prompt with the descriptions
-        tavily_description = """[Tavily description here]"""
-        google_cse_description = """[Google CSE description here]"""
-
-        # Create the prompt
-        prompt = SEARCH_AGENT_SELECTION_PROMPT.format(
-            user_query=user_query,
-            search_terms=", ".join(search_terms),
-            tavily_description=tavily_description,
-            google_cse_description=google_cse_description
-        )
-
-        # Call LLM to decide which agent to use
-        response = await openai.ChatCompletion.acreate(
-            model=config.LLM_MODEL_NAME,
-            messages=[
-                {"role": "system", "content": "You are an assistant that decides which search engine is better suited for a given query based on their descriptions."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=config.LLM_TEMPERATURE,
-            max_tokens=10,
-            n=1,
-        )
-        decision_text = response.choices[0].message['content'].strip()
-
-        if "Contextual" in decision_text:
-            return "Contextual"
-        else:
-            return "General"
+        plan, plan_text = await run_cascade("planning", config.PLANNING_MODELS, call, accept)
+        if plan is None:
+            plan = parse_query_plan(plan_text)
     except Exception as e:
-        state.add_log(f"Error in decide_search_agent: {e}", level="ERROR")
-        logger.error(f"Error in decide_search_agent: {e}")
-        return "General"  # Default to General if error occurs
+        state.add_log(f"Error in plan_query: {e}", level="ERROR")
+        logger.error(f"Error in plan_query: {e}")
+        return {"search_terms": [], "search_agent": "General"}
+
+    if plan["search_terms"]:
+        await cache.put(user_query, plan)
+    return plan
+
+def strip_code_fence(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        if text.startswith("json"):
+            text = text[len("json"):]
+    return text
+
+def parse_query_plan(plan_text: str) -> dict:
+    """Parse the planner's JSON answer; tolerates code fences and falls back to a comma-separated term list."""
+    try:
+        data = json.loads(strip_code_fence(plan_text))
+    except json.JSONDecodeError:
+        data = None
+
+    if isinstance(data, dict):
+        terms = data.get("search_terms") or []
+        agent = data.get("search_agent", "General")
+    elif "No search terms could be generated." in plan_text:
+        terms, agent = [], "General"
+    else:
+        terms, agent = plan_text.split(","), "General"
+
+    search_terms = [str(term).strip() for term in terms if str(term).strip()]
+    return {
+        "search_terms": search_terms,
+        "search_agent": "Contextual" if "Contextual" in str(agent) else "General",
+    }
 
 async def general_url_generation_agent(state: SharedState):
     state.add_log("Starting general URL generation using Google CSE.", level="INFO")
-    search_terms = state.search_terms
-    urls = []
-    semaphore = asyncio.Semaphore(5)  # Limit concurrency to 5
-    async def fetch_urls(term):
-        async with semaphore:
-            cse = GoogleCSE(api_key=state.config.GOOGLE_CSE_API_KEY, cx=state.config.GOOGLE_CSE_CX)
-            try:
-                results = await cse.search(term)
-                urls.extend(results)
-            except Exception as e:
-                state.add_log(f"Error during Google CSE search for term '{term}': {e}", level="ERROR")
-
-    tasks = [fetch_urls(term) for term in search_terms]
-    await asyncio.gather(*tasks)
-    # Limit to 15 URLs
-    state.urls_to_be_processed = list(set(urls))[:15]
+    ranked_lists = await search_terms_with("google_cse", state)
+    state.urls_to_be_processed = reciprocal_rank_fusion(ranked_lists, limit=state.url_budget)
     state.add_log(f"Generated {len(state.urls_to_be_processed)} URLs.", level="INFO")
 
 async def contextual_url_generation_agent(state: SharedState):
     state.add_log("Starting contextual URL generation using Tavily API.", level="INFO")
-    search_terms = state.search_terms
-    urls = []
+    ranked_lists = await search_terms_with("tavily", state)
+    state.urls_to_be_processed = reciprocal_rank_fusion(ranked_lists, limit=state.url_budget)
+    state.add_log(f"Generated {len(state.urls_to_be_processed)} URLs.", level="INFO")
+
+async def hedged_url_generation_agent(state: SharedState):
+    state.add_log("Starting hedged URL generation using Google CSE and Tavily API.", level="INFO")
+    ranked_lists = [ranked async for ranked in completed_searches(list(SEARCH_ENGINES), state)]
+    state.urls_to_be_processed = reciprocal_rank_fusion(ranked_lists, limit=state.url_budget)
+    state.add_log(f"Generated {len(state.urls_to_be_processed)} URLs.", level="INFO")
+
+async def streaming_url_generation_agent(state: SharedState):
+    """Plan the search, then hand URLs to scraper selection and scraping as soon as searches return them."""
+    try:
+        plan = await plan_search(state)
+        if plan is None:
+            return
+        state.add_log(f"Streaming up to {state.url_budget} URLs into scraping.", level="INFO")
+        await scraper_selection_agent(state, urls=stream_urls(state, search_engines_for(plan, state)))
+        state.add_log(f"Generated {len(state.urls_to_be_processed)} URLs.", level="INFO")
+    except Exception as e:
+        state.add_log(f"Error in streaming_url_generation_agent: {e}", level="ERROR")
+        logger.error(f"Error in streaming_url_generation_agent: {e}")
+
+async def stream_urls(state: SharedState, engines: list):
+    """Yield distinct URLs in arrival order until the job's URL budget is filled, then cancel remaining searches."""
+    seen = set()
+    searches = completed_searches(engines, state)
+    try:
+        async for ranked in searches:
+            for url in ranked:
+                key = normalize_url(url)
+                if key in seen:
+                    continue
+                seen.add(key)
+                state.urls_to_be_processed.append(url)
+                yield url
+                if len(seen) >= state.url_budget:
+                    state.add_log("URL budget filled; cancelling remaining searches.", level="INFO")
+                    return
+    finally:
+        await searches.aclose()
+
+async def completed_searches(engines: list, state: SharedState):
+    """Yield each term's ranked URL list as soon as its search finishes.
+
+    Searches still running once SEARCH_HEDGE_DEADLINE has passed and at least one engine has
+    answered every term without an error are cancelled, as are all pending searches when the
+    consumer stops early. Failed searches are logged and yield nothing.
+    """
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + state.config.SEARCH_HEDGE_DEADLINE
+    engine_tasks = {
+        engine: {asyncio.create_task(fetch_term(engine, term, state)): term for term in state.search_terms}
+        for engine in engines
+    }
+    task_engines = {task: engine for engine, tasks in engine_tasks.items() for task in tasks}
+    failed_engines = set()
+    pending = set(task_engines)
+    try:
+        while pending:
+            remaining = deadline_at - loop.time()
+            engine_finished = any(
+                engine not in failed_engines and all(task.done() for task in tasks)
+                for engine, tasks in engine_tasks.items()
+            )
+            if remaining <= 0 and engine_finished:
+                state.add_log(f"Ignored {len(pending)} search requests still running at the hedge deadline.", level="INFO")
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining if remaining > 0 else None, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                engine = task_engines[task]
+                if task.exception() is not None:
+                    failed_engines.add(engine)
+                    log_search_error(engine, engine_tasks[engine][task], task.exception(), state)
+                    continue
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+def search_engines_for(plan: dict, state: SharedState) -> list:
+    if state.config.SEARCH_MODE == "hedged":
+        return list(SEARCH_ENGINES)
+    return ["tavily"] if plan["search_agent"] == "Contextual" else ["google_cse"]
+
+async def search_terms_with(engine: str, state: SharedState):
     semaphore = asyncio.Semaphore(5)  # Limit concurrency to 5
     async def fetch_urls(term):
         async with semaphore:
-            tavily = TavilySearch(api_key=state.config.TAVILY_API_KEY)
-            try:
-                results = await tavily.search(term)
-                urls.extend(results)
-            except Exception as e:
-                state.add_log(f"Error during Tavily search for term '{term}': {e}", level="ERROR")
-
-    tasks = [fetch_urls(term) for term in search_terms]
-    await asyncio.gather(*tasks)
-    # Limit to 15 URLs
-    state.urls_to_be_processed = list(set(urls))[:15]
-    state.add_log(f"Generated {len(state.urls_to_be_processed)} URLs.", level="INFO")
+            return await search_term_with(engine, term, state)
+
+    return await asyncio.gather(*[fetch_urls(term) for term in state.search_terms])
+
+async def search_term_with(engine: str, term: str, state: SharedState):
+    """Ranked URLs for one term from one engine (through the search cache); errors yield an empty list."""
+    try:
+        return await fetch_term(engine, term, state)
+    except Exception as e:
+        log_search_error(engine, term, e, state)
+        return []
+
+async def fetch_term(engine: str, term: str, state: SharedState):
+    """Ranked URLs for one term from one engine (through the search cache); errors propagate."""
+    cache = get_search_cache(state.config)
+    searcher = SEARCH_ENGINES[engine](state.config)
+    return await cache.get_or_fetch(engine, term, lambda: search_in_pool(searcher, term, state.config))
+
+def log_search_error(engine: str, term: str, error: Exception, state: SharedState):
+    state.add_log(f"Error during {engine} search for term '{term}': {error}", level="ERROR")
+
+async def search_in_pool(searcher, term: str, config):
+    # Cache misses wait for a slot in the shared search pool, in priority order
+    async with stage_slot("search", config):
+        return await searcher.search(term)
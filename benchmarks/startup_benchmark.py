@@ -0,0 +1,107 @@
+# File: startup_benchmark.py
+# Directory: POLITICAL_ADVISOR/benchmarks/
+
+# Overall Role and Purpose:
+# - Tracks cold-start cost of the API process: how long `import server` takes, how long the lifespan startup
+#   (including the optional warm-up) takes, and the latency of the first request.
+# - Also reports the cost a first job pays for dependencies that are imported lazily, and flags heavy modules
+#   that `import server` pulled in eagerly (a regression of the lazy imports).
+# - Every measurement runs in a fresh interpreter, so nothing is already cached in `sys.modules`.
+
+# Expected Inputs:
+# - `--runs` fresh interpreters per measurement, `--warmup` to enable WARMUP_ON_STARTUP,
+#   `--output` to append the result as one JSON line (for tracking over time).
+
+# Expected Outputs:
+# - A JSON summary (median/min/max seconds per measurement) printed to stdout.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported by `import server`; each is loaded when its scraper or backend is first used
+HEAVY_MODULES = ["openai", "neo4j", "langchain_community", "langchain_core", "aiohttp", "bs4", "jsonschema"]
+
+PROBE = r"""
+import json, os, sys, time
+started = time.perf_counter()
+import server
+imported = time.perf_counter() - started
+eager = [name for name in json.loads(os.environ["HEAVY_MODULES"]) if name in sys.modules]
+
+from fastapi.testclient import TestClient
+started = time.perf_counter()
+with TestClient(server.app) as client:
+    startup = time.perf_counter() - started
+    started = time.perf_counter()
+    client.get("/api/config")
+    first_request = time.perf_counter() - started
+    started = time.perf_counter()
+    client.get("/api/config")
+    second_request = time.perf_counter() - started
+
+# What the first job pays for dependencies that were not imported (or warmed up) yet
+started = time.perf_counter()
+for name in json.loads(os.environ["HEAVY_MODULES"]):
+    if name != "langchain_community":
+        __import__(name)
+from tools.warmup import warm_prompts
+warm_prompts()
+first_use = time.perf_counter() - started
+
+print(json.dumps({
+    "import": imported,
+    "startup": startup,
+    "first_request": first_request,
+    "second_request": second_request,
+    "first_use_imports": first_use,
+    "eager_heavy_modules": eager,
+}))
+"""
+
+
+def run_probe(warmup: bool) -> dict:
+    env = dict(os.environ, HEAVY_MODULES=json.dumps(HEAVY_MODULES), WARMUP_ON_STARTUP="true" if warmup else "false")
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples: list) -> dict:
+    summary = {}
+    for key in ("import", "startup", "first_request", "second_request", "first_use_imports"):
+        values = [sample[key] for sample in samples]
+        summary[key] = {
+            "median": round(statistics.median(values), 4),
+            "min": round(min(values), 4),
+            "max": round(max(values), 4),
+        }
+    summary["eager_heavy_modules"] = sorted({name for sample in samples for name in sample["eager_heavy_modules"]})
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import, startup and first-request latency of the API server.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure (default: 5).")
+    parser.add_argument("--warmup", action="store_true", help="Run with WARMUP_ON_STARTUP enabled.")
+    parser.add_argument("--output", default=None, help="Append the summary as a JSON line to this file.")
+    args = parser.parse_args()
+
+    samples = [run_probe(args.warmup) for _ in range(args.runs)]
+    summary = {"timestamp": time.time(), "runs": args.runs, "warmup": args.warmup, **summarize(samples)}
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary) + "\n")
+    if summary["eager_heavy_modules"]:
+        print(f"Heavy modules imported eagerly by server: {summary['eager_heavy_modules']}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,22 @@ class Config:
         self.JINA_API_KEY = os.getenv("JINA_API_KEY")
         self.USER_AGENT = os.getenv("USER_AGENT", "Mozilla/5.0 (compatible; MyAppBot/1.0)")
 
+        # Scraping configurations
+        self.SCRAPER_ROUTING_PATH = os.getenv("SCRAPER_ROUTING_PATH", "scraper_routing.json")
+        self.LOCAL_SCRAPER_TIMEOUT = float(os.getenv("LOCAL_SCRAPER_TIMEOUT", "15"))
+        self.SCRAPE_MAX_CONCURRENCY = int(os.getenv("SCRAPE_MAX_CONCURRENCY", "5"))
+        self.SCRAPE_DOMAIN_CONCURRENCY = int(os.getenv("SCRAPE_DOMAIN_CONCURRENCY", "2"))
+        self.SCRAPE_DOMAIN_MIN_DELAY = float(os.getenv("SCRAPE_DOMAIN_MIN_DELAY", "1.0"))
+        self.RESPECT_ROBOTS_TXT = os.getenv("RESPECT_ROBOTS_TXT", "true").lower() == "true"
+        self.ROBOTS_CACHE_SIZE = int(os.getenv("ROBOTS_CACHE_SIZE", "512"))
+        self.ROBOTS_CACHE_TTL = float(os.getenv("ROBOTS_CACHE_TTL", "86400"))
+
+        # Search result cache configurations (TTLs in seconds; an empty path keeps the cache in memory only)
+        self.SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "search_cache.sqlite3")
+        self.SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "21600"))
+        self.SEARCH_CACHE_BREAKING_TTL = float(os.getenv("SEARCH_CACHE_BREAKING_TTL", "900"))
+        self.SEARCH_CACHE_STALE_TTL = float(os.getenv("SEARCH_CACHE_STALE_TTL", "86400"))
+
         # OpenAI LLM configurations
         self.OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
         self.OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
@@ -37,5 +53,105 @@ class Config:
         self.LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "500"))
         self.LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
 
+        # Model ladders per stage, cheapest first; a stage escalates only when output fails validation
+        self.LLM_CHEAP_MODEL_NAME = os.getenv("LLM_CHEAP_MODEL_NAME", "gpt-4o-mini")
+        self.PLANNING_MODELS = self._model_ladder("PLANNING_MODELS")
+        self.EXTRACTION_MODELS = self._model_ladder("EXTRACTION_MODELS")
+        self.REVIEW_MODELS = self._model_ladder("REVIEW_MODELS")
+
+        # "realtime" calls chat completions directly; "batch" runs extraction and review through the offline batch API
+        self.LLM_EXECUTION_MODE = os.getenv("LLM_EXECUTION_MODE", "realtime")
+        self.LLM_BATCH_API_BASE = os.getenv("LLM_BATCH_API_BASE", self.OPENAI_API_BASE)
+        self.LLM_BATCH_DIR = os.getenv("LLM_BATCH_DIR", "llm_batches")
+        self.LLM_BATCH_POLL_INTERVAL = float(os.getenv("LLM_BATCH_POLL_INTERVAL", "30"))
+        self.LLM_BATCH_COMPLETION_WINDOW = os.getenv("LLM_BATCH_COMPLETION_WINDOW", "24h")
+
+        # "verbose" asks the LLM for the full extraction template; "compact" asks for short keys and positional arrays
+        self.EXTRACTION_FORMAT = os.getenv("EXTRACTION_FORMAT", "verbose")
+
+        # Batched article extraction (token counts are estimates)
+        self.EXTRACTION_BATCHING = os.getenv("EXTRACTION_BATCHING", "true").lower() == "true"
+        self.EXTRACTION_SHORT_ARTICLE_TOKENS = int(os.getenv("EXTRACTION_SHORT_ARTICLE_TOKENS", "1500"))
+        self.EXTRACTION_BATCH_TOKEN_BUDGET = int(os.getenv("EXTRACTION_BATCH_TOKEN_BUDGET", "6000"))
+        self.EXTRACTION_BATCH_MAX_ARTICLES = int(os.getenv("EXTRACTION_BATCH_MAX_ARTICLES", "4"))
+
+        # Query planning configurations
+        self.QUERY_PLAN_CACHE_PATH = os.getenv("QUERY_PLAN_CACHE_PATH", "query_plans.json")
+        # Most query plans kept; the least recently used plan is dropped first
+        self.QUERY_PLAN_CACHE_SIZE = int(os.getenv("QUERY_PLAN_CACHE_SIZE", "1000"))
+        self.REUSE_QUERY_PLANS = os.getenv("REUSE_QUERY_PLANS", "true").lower() == "true"
+        # "hedged" queries every search engine at once; "planned" uses the engine picked by the query plan
+        self.SEARCH_MODE = os.getenv("SEARCH_MODE", "hedged")
+        self.SEARCH_HEDGE_DEADLINE = float(os.getenv("SEARCH_HEDGE_DEADLINE", "3.0"))
+        # Start scraping URLs as soon as searches return them instead of after every search finishes
+        self.STREAM_URLS = os.getenv("STREAM_URLS", "true").lower() == "true"
+        self.URL_BUDGET = int(os.getenv("URL_BUDGET", "15"))
+
+        # Per-job limits (0 = unlimited); a start_search request can override each of them
+        self.JOB_DEADLINE_SECONDS = float(os.getenv("JOB_DEADLINE_SECONDS", "0"))
+        self.JOB_MAX_TOKENS = int(os.getenv("JOB_MAX_TOKENS", "0"))
+        self.JOB_MAX_COST_USD = float(os.getenv("JOB_MAX_COST_USD", "0"))
+        # USD per 1K prompt:completion tokens, used to charge job cost budgets
+        self.LLM_PRICES = os.getenv("LLM_PRICES", "gpt-4=0.03:0.06,gpt-4o-mini=0.00015:0.0006")
+        # Admission control: jobs beyond MAX_RUNNING_JOBS wait in a queue of MAX_QUEUED_JOBS, further requests get 429
+        self.MAX_RUNNING_JOBS = int(os.getenv("MAX_RUNNING_JOBS", "4"))
+        self.MAX_QUEUED_JOBS = int(os.getenv("MAX_QUEUED_JOBS", "20"))
+        # Seed (seconds) for the job duration used in wait estimates until real jobs have finished
+        self.JOB_DURATION_ESTIMATE = float(os.getenv("JOB_DURATION_ESTIMATE", "120"))
+        # Process-wide worker slots per stage, shared by all jobs and granted by weighted-fair priority
+        # (uploads go through the single-writer upload service instead)
+        self.STAGE_CONCURRENCY = os.getenv("STAGE_CONCURRENCY", "search=8,scrape=10,llm=8")
+        # Relative share of each priority class when classes compete for the admission queue and stage slots
+        self.PRIORITY_WEIGHTS = os.getenv("PRIORITY_WEIGHTS", "interactive=4,bulk=1")
+        # "inline" runs jobs inside the API process; "queue" hands them to worker processes (worker.py) through the job queue
+        self.JOB_EXECUTION = os.getenv("JOB_EXECUTION", "inline")
+        # "sqlite" or "package.module:factory" for another backend
+        self.JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "sqlite")
+        self.JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "job_queue.sqlite3")
+        self.JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        self.WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", str(os.cpu_count() or 1)))
+        self.WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))
+        self.WORKER_LEASE_SECONDS = float(os.getenv("WORKER_LEASE_SECONDS", "60"))
+        self.WORKER_HEARTBEAT_INTERVAL = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "2"))
+        self.WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "1"))
+        # Article text and extraction JSON kept in memory per job; older payloads spill to disk beyond this
+        self.JOB_MEMORY_BUDGET_MB = float(os.getenv("JOB_MEMORY_BUDGET_MB", "64"))
+        # Directory for spilled payloads (empty = system temp directory); removed when the job ends
+        self.PAYLOAD_SPILL_DIR = os.getenv("PAYLOAD_SPILL_DIR", "")
+        # Knowledge graph writes of all jobs are batched by one writer: articles per transaction,
+        # seconds the oldest queued article may wait for a fuller batch, and retries of transient Neo4j errors
+        self.UPLOAD_BATCH_SIZE = int(os.getenv("UPLOAD_BATCH_SIZE", "20"))
+        self.UPLOAD_FLUSH_INTERVAL = float(os.getenv("UPLOAD_FLUSH_INTERVAL", "0.5"))
+        self.UPLOAD_MAX_RETRIES = int(os.getenv("UPLOAD_MAX_RETRIES", "5"))
+        self.UPLOAD_RETRY_BACKOFF = float(os.getenv("UPLOAD_RETRY_BACKOFF", "0.5"))
+        # Map extracted stakeholder names to existing ones ("Sen. Jane Doe" -> "Jane Doe") before uploading;
+        # the threshold is the minimum similarity (0-1) for a fuzzy match
+        self.ENTITY_RESOLUTION = os.getenv("ENTITY_RESOLUTION", "true").lower() == "true"
+        self.ENTITY_MATCH_THRESHOLD = float(os.getenv("ENTITY_MATCH_THRESHOLD", "0.88"))
+        # Pre-import dependencies, build prompt templates and pre-open HTTP/Neo4j pools at startup
+        self.WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() == "true"
+        # Seconds each warm-up step may take before it is skipped
+        self.WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "10"))
+        # Skip extraction, review and upload of articles whose content is unchanged since they were last uploaded
+        self.CHANGE_DETECTION = os.getenv("CHANGE_DETECTION", "true").lower() == "true"
+        # SQLite file remembering the content hash of every uploaded URL ("" keeps them in memory only)
+        self.CONTENT_HASH_PATH = os.getenv("CONTENT_HASH_PATH", "content_hashes.sqlite3")
+        # "neo4j" writes reviewed payloads to the graph; "export" spools them to JSONL for a bulk import (tools/bulk_export.py)
+        self.UPLOAD_MODE = os.getenv("UPLOAD_MODE", "neo4j").lower()
+        # Directory receiving the spooled payloads in export mode
+        self.EXPORT_SPOOL_DIR = os.getenv("EXPORT_SPOOL_DIR", "export_spool")
+        # Cached graph read results (stakeholder neighborhoods, issue timelines, quote lookups) kept per process
+        self.GRAPH_CACHE_SIZE = int(os.getenv("GRAPH_CACHE_SIZE", "1000"))
+        # Seconds a cached graph read is served; bounds staleness from writes made by other processes (workers)
+        self.GRAPH_CACHE_TTL = float(os.getenv("GRAPH_CACHE_TTL", "300"))
+        # Finished jobs kept for status queries
+        self.JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "100"))
+
+    def _model_ladder(self, key: str) -> list:
+        default = f"{self.LLM_CHEAP_MODEL_NAME},{self.LLM_MODEL_NAME}"
+        models = [model.strip() for model in os.getenv(key, default).split(",") if model.strip()]
+        # Drop repeats (e.g. when the cheap and strong model are the same)
+        return list(dict.fromkeys(models))
+
     def get(self, key: str, default: Any = None) -> Any:
         return getattr(self, key, default)
@@ -10,7 +10,7 @@ function SearchInterface() {
       const response = await fetch('/api/start_search', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ searchTerm, isContextual }),
+        body: JSON.stringify({ searchTerm, isContextual, priority: 'interactive' }),
       });
       if (response.ok) {
         // Handle successful initiation
@@ -5,6 +5,9 @@
 # - Defines the `SharedState` class.
 # - Manages the state data shared across agents during the workflow.
 # - Holds data like search terms, URLs, articles, extracted data, reviewed data, logs, and configuration.
+# - Per-URL data lives in a compact record store (`models/url_records.py`); `urls_to_be_processed`, `scraper_choices`,
+#   `articles`, `extracted_data` and `reviewed_data` are list/dict views over it, so bulky payloads can be released
+#   or spilled to disk once downstream stages are done with them.
 
 # Expected Inputs:
 # - Initialization parameters like `search_terms`.
@@ -18,20 +21,33 @@
 # Directory: my_app/models/
 
 import logging
-from typing import List, Dict
-from pydantic import BaseModel, ConfigDict
+from typing import List, Dict, Optional
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 from config.config import Config
+from models.url_records import (
+    ArticlesView,
+    ExtractedDataView,
+    ReviewedDataView,
+    ScraperChoicesView,
+    UrlListView,
+    UrlRecordStore,
+)
 
 logger = logging.getLogger(__name__)
 
+# Per-URL containers of `SharedState`, backed by its record store
+PER_URL_VIEWS = {
+    "urls_to_be_processed": UrlListView,  # URLs selected for this job
+    "scraper_choices": ScraperChoicesView,  # URL to scraper mapping
+    "articles": ArticlesView,  # URL to article content
+    "extracted_data": ExtractedDataView,  # URL to extracted data
+    "reviewed_data": ReviewedDataView,  # URL to reviewed data
+}
+
 class SharedState(BaseModel):
     search_terms: List[str] = []
     user_query: str = ""
-    urls_to_be_processed: List[str] = []
-    scraper_choices: Dict[str, str] = {}  # URL to scraper mapping
-    articles: Dict[str, str] = {}  # URL to article content
-    extracted_data: Dict[str, Dict] = {}  # URL to extracted data
-    reviewed_data: Dict[str, Dict] = {}  # URL to reviewed data
+    url_budget: int = 15  # Maximum number of URLs to process for this job
     upload_complete: bool = False
     next_step: str = "url_generation"
     logs: List[str] = []
@@ -39,6 +55,78 @@ class SharedState(BaseModel):
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    _records: UrlRecordStore = PrivateAttr(default_factory=UrlRecordStore)
+
+    def __init__(self, **data):
+        per_url = {name: data.pop(name) for name in list(data) if name in PER_URL_VIEWS}
+        super().__init__(**data)
+        self._configure_payloads(self.config)
+        for name, value in per_url.items():
+            setattr(self, name, value)
+
+    def __setattr__(self, name, value):
+        # `state.articles = {...}` replaces that field's contents for every URL
+        if name in PER_URL_VIEWS:
+            getattr(self, name).replace(value)
+            return
+        super().__setattr__(name, value)
+        if name == "config":
+            self._configure_payloads(value)
+
+    @property
+    def urls_to_be_processed(self) -> UrlListView:
+        return UrlListView(self._records)
+
+    @property
+    def scraper_choices(self) -> ScraperChoicesView:
+        return ScraperChoicesView(self._records)
+
+    @property
+    def articles(self) -> ArticlesView:
+        return ArticlesView(self._records)
+
+    @property
+    def extracted_data(self) -> ExtractedDataView:
+        return ExtractedDataView(self._records)
+
+    @property
+    def reviewed_data(self) -> ReviewedDataView:
+        return ReviewedDataView(self._records)
+
+    @property
+    def records(self) -> UrlRecordStore:
+        return self._records
+
+    def progress(self) -> Dict[str, int]:
+        """URLs that reached each stage, including those whose payloads were already released."""
+        return self._records.progress()
+
+    def release_articles(self):
+        self._records.release_articles()
+
+    def release_unreviewed(self):
+        self._records.release_unreviewed()
+
+    def mark_uploaded(self, url: str):
+        self._records.mark_uploaded(url)
+
+    def mark_unchanged(self, url: str, digest: str):
+        """Scraped content matches the last upload of `url`; it is not extracted or uploaded again."""
+        self._records.mark_unchanged(url, digest)
+
+    def content_hash(self, url: str) -> Optional[str]:
+        record = self._records.records.get(url)
+        return record.content_hash if record is not None else None
+
+    def release_payloads(self):
+        self._records.release_all()
+
+    def _configure_payloads(self, config):
+        if config is None:
+            return
+        budget_mb = getattr(config, "JOB_MEMORY_BUDGET_MB", 64)
+        self._records.payloads.configure(int(budget_mb * 1024 * 1024), getattr(config, "PAYLOAD_SPILL_DIR", None))
+
     def add_log(self, message: str, level: str = "INFO"):
         self.logs.append(f"{level}: {message}")
         # Log with appropriate severity
@@ -58,11 +146,8 @@ class SharedState(BaseModel):
     def reset(self):
         self.search_terms = []
         self.user_query = ""
-        self.urls_to_be_processed = []
-        self.scraper_choices = {}
-        self.articles = {}
-        self.extracted_data = {}
-        self.reviewed_data = {}
+        self.url_budget = 15
+        self._records.close()
         self.upload_complete = False
         self.next_step = "url_generation"
         self.logs = []
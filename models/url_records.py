@@ -0,0 +1,397 @@
+# File: url_records.py
+# Directory: my_app/models/
+
+# Overall Role and Purpose:
+# - Defines the compact per-URL record store behind `SharedState`.
+# - One slotted `UrlRecord` per URL holds the furthest stage reached, per-stage timestamps, the scraper used,
+#   the article's content hash and references to its bulky payloads.
+# - Bulky payloads (article text, extraction JSON) live in a `PayloadStore` that keeps at most a memory budget resident,
+#   spills older payloads to disk beyond it, and drops payloads once downstream stages are done with them.
+# - Exposes the familiar containers (`urls_to_be_processed`, `scraper_choices`, `articles`, `extracted_data`,
+#   `reviewed_data`) as live views over the records, so agents keep reading and writing them as before.
+
+# Expected Inputs:
+# - URLs, scraper names, article text and extraction data written by the agents.
+# - Memory budget and spill directory from the configuration (JOB_MEMORY_BUDGET_MB, PAYLOAD_SPILL_DIR).
+
+# Expected Outputs:
+# - Dict/list-like views of the per-URL data and per-stage progress counts.
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unicodedata
+import weakref
+from array import array
+from collections import OrderedDict
+from collections.abc import MutableMapping, Sequence
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Stages in pipeline order; a record's `stage` is the furthest one reached
+STAGES = ("listed", "selected", "scraped", "extracted", "reviewed", "uploaded")
+LISTED, SELECTED, SCRAPED, EXTRACTED, REVIEWED, UPLOADED = range(len(STAGES))
+
+
+def content_hash(text: str) -> str:
+    """Digest of the article text with Unicode forms and whitespace normalized (scrapers differ in both)."""
+    normalized = " ".join(unicodedata.normalize("NFKC", text).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class UrlRecord:
+    __slots__ = (
+        "url", "stage", "listed", "scraper", "content_hash", "unchanged", "article_ref", "extraction_ref", "reviewed_ref",
+        "times",
+    )
+
+    def __init__(self, url: str):
+        self.url = url
+        self.stage = -1
+        self.listed = False  # Part of `urls_to_be_processed`
+        self.scraper: Optional[str] = None
+        self.content_hash: Optional[str] = None
+        self.unchanged = False  # Scraped content identical to the last upload: skips the later stages
+        self.article_ref: Optional[int] = None
+        self.extraction_ref: Optional[int] = None
+        self.reviewed_ref: Optional[int] = None
+        self.times = array("d", [0.0] * len(STAGES))  # Time each stage was reached (0 = not yet)
+
+    def reach(self, stage: int):
+        self.stage = max(self.stage, stage)
+        if not self.times[stage]:
+            self.times[stage] = time.time()
+
+    def reached(self, stage: int) -> bool:
+        return self.times[stage] > 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "stage": STAGES[self.stage] if self.stage >= 0 else None,
+            "scraper": self.scraper,
+            "content_hash": self.content_hash,
+            "unchanged": self.unchanged,
+            "times": {STAGES[i]: t for i, t in enumerate(self.times) if t},
+        }
+
+
+class PayloadStore:
+    """Holds bulky payloads by reference, resident up to `budget` bytes and spilled to disk beyond it."""
+
+    def __init__(self, budget: int = 64 * 1024 * 1024, spill_dir: str = None):
+        self.budget = budget
+        self.spill_dir = spill_dir
+        self.resident_bytes = 0
+        self.spilled = 0
+        self._resident: "OrderedDict[int, tuple]" = OrderedDict()  # ref -> (payload, size), oldest first
+        self._on_disk: Dict[int, str] = {}
+        self._next_ref = 0
+        self._directory: Optional[str] = None
+        self._cleanup = None
+
+    def configure(self, budget: int, spill_dir: str = None):
+        self.budget = budget
+        self.spill_dir = spill_dir or None
+        self._enforce_budget()
+
+    def put(self, payload: Any) -> int:
+        ref = self._next_ref
+        self._next_ref += 1
+        size = len(payload) if isinstance(payload, str) else len(json.dumps(payload, default=str))
+        self._resident[ref] = (payload, size)
+        self.resident_bytes += size
+        self._enforce_budget()
+        return ref
+
+    def get(self, ref: int) -> Any:
+        entry = self._resident.get(ref)
+        if entry is not None:
+            return entry[0]
+        # Spilled payloads are read back on demand but not made resident again
+        with open(self._on_disk[ref], "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def is_resident(self, ref: Optional[int], payload: Any) -> bool:
+        """Whether `payload` itself (not an equal copy) is held in memory under `ref`."""
+        entry = self._resident.get(ref)
+        return entry is not None and entry[0] is payload
+
+    def release(self, ref: Optional[int]):
+        if ref is None:
+            return
+        entry = self._resident.pop(ref, None)
+        if entry is not None:
+            self.resident_bytes -= entry[1]
+            return
+        path = self._on_disk.pop(ref, None)
+        if path is not None:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def close(self):
+        self._resident.clear()
+        self._on_disk.clear()
+        self.resident_bytes = 0
+        if self._cleanup is not None:
+            self._cleanup()
+            self._cleanup = None
+            self._directory = None
+
+    def _enforce_budget(self):
+        while self.resident_bytes > self.budget and len(self._resident) > 1:
+            ref, (payload, size) = self._resident.popitem(last=False)
+            path = os.path.join(self._spill_directory(), f"{ref}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, default=str)
+            self._on_disk[ref] = path
+            self.resident_bytes -= size
+            self.spilled += 1
+
+    def _spill_directory(self) -> str:
+        if self._directory is None:
+            if self.spill_dir:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            self._directory = tempfile.mkdtemp(prefix="payloads-", dir=self.spill_dir)
+            # Removed with the store even if the job never calls close()
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self._directory, True)
+        return self._directory
+
+
+class UrlRecordStore:
+    def __init__(self):
+        self.records: "OrderedDict[str, UrlRecord]" = OrderedDict()
+        self.payloads = PayloadStore()
+
+    def record(self, url: str) -> UrlRecord:
+        record = self.records.get(url)
+        if record is None:
+            record = self.records[url] = UrlRecord(url)
+        return record
+
+    def set_article(self, url: str, text: str):
+        record = self.record(url)
+        self.payloads.release(record.article_ref)
+        record.article_ref = self.payloads.put(text)
+        record.content_hash = content_hash(text)
+        record.reach(SCRAPED)
+
+    def mark_unchanged(self, url: str, digest: str):
+        record = self.record(url)
+        record.content_hash = digest
+        record.unchanged = True
+        record.reach(SCRAPED)
+
+    def set_extraction(self, url: str, data: dict):
+        record = self.record(url)
+        self._drop_extraction(record)
+        record.extraction_ref = self.payloads.put(data)
+        record.reach(EXTRACTED)
+
+    def set_reviewed(self, url: str, data: dict):
+        record = self.record(url)
+        if record.reviewed_ref is not None and record.reviewed_ref != record.extraction_ref:
+            self.payloads.release(record.reviewed_ref)
+        # Approved data is usually the extraction itself: share its payload instead of storing a copy
+        if record.extraction_ref is not None and self.payloads.is_resident(record.extraction_ref, data):
+            record.reviewed_ref = record.extraction_ref
+        else:
+            record.reviewed_ref = self.payloads.put(data)
+        record.reach(REVIEWED)
+
+    def mark_uploaded(self, url: str):
+        """The article is in the graph: nothing downstream needs its payloads any more."""
+        record = self.record(url)
+        record.reach(UPLOADED)
+        self.release_article(record)
+        self._drop_extraction(record)
+
+    def release_article(self, record: UrlRecord):
+        self.payloads.release(record.article_ref)
+        record.article_ref = None
+
+    def release_articles(self):
+        """Drop article text once extraction is done with it (the content hash is kept)."""
+        for record in self.records.values():
+            self.release_article(record)
+
+    def release_unreviewed(self):
+        """Drop extractions that failed review; approved ones stay until they are uploaded."""
+        for record in self.records.values():
+            if record.reviewed_ref is None:
+                self._drop_extraction(record)
+
+    def _drop_extraction(self, record: UrlRecord):
+        if record.reviewed_ref is not None and record.reviewed_ref != record.extraction_ref:
+            self.payloads.release(record.reviewed_ref)
+        self.payloads.release(record.extraction_ref)
+        record.extraction_ref = None
+        record.reviewed_ref = None
+
+    def progress(self) -> Dict[str, int]:
+        """How many URLs reached each stage (also counting payloads that were already released)."""
+        counts = {"urls": sum(1 for record in self.records.values() if record.listed)}
+        for stage in (SCRAPED, EXTRACTED, REVIEWED, UPLOADED):
+            counts[STAGES[stage]] = sum(1 for record in self.records.values() if record.reached(stage))
+        counts["unchanged"] = sum(1 for record in self.records.values() if record.unchanged)
+        return counts
+
+    def release_all(self):
+        """Drop every payload (the job is over); records and progress counts stay for status queries."""
+        for record in self.records.values():
+            self.release_article(record)
+            self._drop_extraction(record)
+        self.payloads.close()
+
+    def close(self):
+        self.records.clear()
+        self.payloads.close()
+
+
+class UrlListView(Sequence):
+    """`urls_to_be_processed`: the listed URLs in the order they were added."""
+
+    def __init__(self, store: UrlRecordStore):
+        self._store = store
+
+    def _urls(self) -> List[str]:
+        return [url for url, record in self._store.records.items() if record.listed]
+
+    def __getitem__(self, index):
+        return self._urls()[index]
+
+    def __len__(self) -> int:
+        return sum(1 for record in self._store.records.values() if record.listed)
+
+    def __contains__(self, url) -> bool:
+        record = self._store.records.get(url)
+        return record is not None and record.listed
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._urls())
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other) if isinstance(other, (list, tuple, Sequence)) else NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self._urls())
+
+    def append(self, url: str):
+        record = self._store.record(url)
+        record.listed = True
+        record.reach(LISTED)
+
+    def extend(self, urls):
+        for url in urls:
+            self.append(url)
+
+    def replace(self, urls):
+        for record in self._store.records.values():
+            record.listed = False
+        self.extend(urls)
+
+
+class _RecordView(MutableMapping):
+    """Dict-like view of one per-URL field; only URLs that currently hold a value are keys."""
+
+    def __init__(self, store: UrlRecordStore):
+        self._store = store
+
+    def _has(self, record: UrlRecord) -> bool:
+        raise NotImplementedError
+
+    def _get(self, record: UrlRecord):
+        raise NotImplementedError
+
+    def __getitem__(self, url):
+        record = self._store.records.get(url)
+        if record is None or not self._has(record):
+            raise KeyError(url)
+        return self._get(record)
+
+    def __iter__(self) -> Iterator[str]:
+        return (url for url, record in list(self._store.records.items()) if self._has(record))
+
+    def __len__(self) -> int:
+        return sum(1 for record in self._store.records.values() if self._has(record))
+
+    def __contains__(self, url) -> bool:
+        record = self._store.records.get(url)
+        return record is not None and self._has(record)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def replace(self, mapping):
+        for url in list(self):
+            del self[url]
+        for url, value in dict(mapping).items():
+            self[url] = value
+
+
+class ScraperChoicesView(_RecordView):
+    def _has(self, record):
+        return record.scraper is not None
+
+    def _get(self, record):
+        return record.scraper
+
+    def __setitem__(self, url, scraper):
+        record = self._store.record(url)
+        record.scraper = scraper
+        record.reach(SELECTED)
+
+    def __delitem__(self, url):
+        self._store.records[url].scraper = None
+
+
+class ArticlesView(_RecordView):
+    def _has(self, record):
+        return record.article_ref is not None
+
+    def _get(self, record):
+        return self._store.payloads.get(record.article_ref)
+
+    def __setitem__(self, url, text):
+        self._store.set_article(url, text)
+
+    def __delitem__(self, url):
+        self._store.release_article(self._store.records[url])
+
+
+class ExtractedDataView(_RecordView):
+    def _has(self, record):
+        return record.extraction_ref is not None
+
+    def _get(self, record):
+        return self._store.payloads.get(record.extraction_ref)
+
+    def __setitem__(self, url, data):
+        self._store.set_extraction(url, data)
+
+    def __delitem__(self, url):
+        self._store._drop_extraction(self._store.records[url])
+
+
+class ReviewedDataView(_RecordView):
+    def _has(self, record):
+        return record.reviewed_ref is not None
+
+    def _get(self, record):
+        return self._store.payloads.get(record.reviewed_ref)
+
+    def __setitem__(self, url, data):
+        self._store.set_reviewed(url, data)
+
+    def __delitem__(self, url):
+        record = self._store.records[url]
+        if record.reviewed_ref != record.extraction_ref:
+            self._store.payloads.release(record.reviewed_ref)
+        record.reviewed_ref = None
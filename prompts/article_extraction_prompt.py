@@ -7,11 +7,13 @@
 
 # Expected Inputs:
 # - Article text to be processed.
+# - For batched extraction, several short articles with per-article delimiters and keys.
+# - `ARTICLE_EXTRACTION_COMPACT_SYSTEM_PROMPT` asks for the compact wire format instead of the verbose JSON template.
 
 # Expected Outputs:
 # - A formatted prompt string ready for use with the LLM.
 
-from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+from prompts.lazy_templates import lazy_templates
 
 ARTICLE_EXTRACTION_SYSTEM_PROMPT = """Task:
 Ingest the following article text and extract data to populate a knowledge graph. Categorize the data into the following entities:
@@ -170,13 +172,70 @@ Accuracy: Double-check all extracted data for correctness.
 Note: Replace the placeholder text with the actual data extracted from the article. If certain information is not available, you may omit that field or set its value to null.
 """
 
+# Same extraction with the compact wire format (short keys, positional arrays), expanded locally by tools/compact_extraction.py
+ARTICLE_EXTRACTION_COMPACT_SYSTEM_PROMPT = """Task:
+Ingest the following article text and extract data to populate a knowledge graph: the article, its stakeholders (with their quotes), events, facts, issues, documents, controversies and institutions.
+Be precise and thorough; only extract what the article states.
+
+Output Format (compact JSON):
+Respond with one JSON object using these short keys. Every entity is a positional array; keep the field order exactly.
+Use null for an unknown field and omit a key or leave its array empty when the article has no such entity. Dates are "mm/dd/yyyy".
+
+"a": [title, url, date published]
+"s": stakeholders, each [name, type, employer, institution, role, is_author, [event titles], related controversy summary, [[quote text, quote context], ...]]
+  - type: "P" for a person, "O" for an organization
+  - employer: organization the person works for; institution: institution the person has a role in; role: their role there
+  - is_author: 1 if the stakeholder wrote the article, else 0
+  - quote context: brief context explaining the quote's usage in the article
+"e": events, each [title, date, short description, [participant names]]
+"f": facts, each [fact as stated, one-sentence summary, detailed description]
+"i": issues, each [title (e.g. "Affordable Housing"), inferred objective]
+"d": documents, each [document title, reason it was mentioned]
+"c": controversies, each [one-sentence summary, detailed description, type] with type "L" (legal), "S" (social) or "M" (moral)
+"n": institutions, each [name, type] where type names the kind of institution (e.g. "local legislative governmental", "think tank", "political party")
+
+Example:
+{"a":["Council passes budget","https://example.com/budget","03/14/2024"],
+"s":[["Jane Doe","P",null,"City Council","Council Member",0,["Budget Vote"],null,[["We kept our promise.","After the vote"]]]],
+"e":[["Budget Vote","03/13/2024","Council approves the annual budget",["Jane Doe"]]],
+"f":[],"i":[["City Budget","Fund city services"]],"d":[],"c":[],"n":[["City Council","local legislative governmental"]]}
+
+Output only the JSON object: no code fences, comments or extra text.
+"""
+
 ARTICLE_EXTRACTION_HUMAN_PROMPT = """Article URL: {url}
 
 Article Text:
 {article_text}
 """
 
-ARTICLE_EXTRACTION_PROMPT = ChatPromptTemplate.from_messages([
-    SystemMessagePromptTemplate.from_template(ARTICLE_EXTRACTION_SYSTEM_PROMPT),
-    HumanMessagePromptTemplate.from_template(ARTICLE_EXTRACTION_HUMAN_PROMPT)
-])
\ No newline at end of file
+# Appended to the system prompt when several articles are packed into one request
+ARTICLE_EXTRACTION_BATCH_INSTRUCTIONS = """
+Batch Mode:
+The user message contains several articles. Each article starts with a line "=== ARTICLE <key> ===" and ends with a line "=== END ARTICLE <key> ===".
+Extract each article independently, exactly as described above, without mixing information between articles.
+Respond with a single JSON array holding one object per article, in any order:
+[
+  {"key": "<key>", "data": <the JSON object for that article, following the structure above>}
+]
+Do not include any text outside the JSON array.
+"""
+
+ARTICLE_EXTRACTION_BATCH_ARTICLE = """=== ARTICLE {key} ===
+Article URL: {url}
+
+Article Text:
+{article_text}
+=== END ARTICLE {key} ===
+"""
+
+def _article_extraction_prompt():
+    from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+
+    return ChatPromptTemplate.from_messages([
+        SystemMessagePromptTemplate.from_template(ARTICLE_EXTRACTION_SYSTEM_PROMPT),
+        HumanMessagePromptTemplate.from_template(ARTICLE_EXTRACTION_HUMAN_PROMPT)
+    ])
+
+# ARTICLE_EXTRACTION_PROMPT is built on first access
+__getattr__ = lazy_templates(__name__, {"ARTICLE_EXTRACTION_PROMPT": _article_extraction_prompt})
@@ -0,0 +1,46 @@
+# File: lazy_templates.py
+# Directory: my_app/prompts/
+
+# Overall Role and Purpose:
+# - Builds the LangChain prompt templates of the prompt modules on first access instead of at import time,
+#   so importing the server does not pay for `langchain_core`.
+# - `warm_prompt_templates` builds every registered template ahead of the first request (server warm-up).
+
+# Expected Inputs:
+# - A prompt module's name and a mapping of template names to functions building them.
+
+# Expected Outputs:
+# - A module-level `__getattr__` that builds and caches each template on first access.
+
+import importlib
+import sys
+from typing import Callable, Dict, List
+
+# Prompt modules with lazily built templates -> template names
+_registry: Dict[str, List[str]] = {}
+
+
+def lazy_templates(module_name: str, builders: Dict[str, Callable[[], object]]):
+    """Return a module `__getattr__` building each template once and caching it as a module attribute."""
+    _registry[module_name] = list(builders)
+
+    def __getattr__(name: str):
+        builder = builders.get(name)
+        if builder is None:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        template = builder()
+        setattr(sys.modules[module_name], name, template)
+        return template
+
+    return __getattr__
+
+
+def warm_prompt_templates(modules: List[str] = None) -> int:
+    """Build the templates of the given (default: all registered) prompt modules; returns how many were built."""
+    built = 0
+    for module_name in modules or list(_registry):
+        module = importlib.import_module(module_name)
+        for name in _registry.get(module_name, []):
+            getattr(module, name)
+            built += 1
+    return built
@@ -0,0 +1,67 @@
+# File: query_planning_prompt.py
+# Directory: my_app/prompts/
+
+# Overall Role and Purpose:
+# - Provides the prompt template for planning a search in a single LLM call.
+# - Asks for both the search terms and the search engine choice as one JSON object.
+
+# Expected Inputs:
+# - User query, descriptions of Tavily and Google CSE.
+
+# Expected Outputs:
+# - A formatted prompt string to be used with the LLM to produce the query plan.
+
+from functools import lru_cache
+from prompts.lazy_templates import lazy_templates
+
+TAVILY_DESCRIPTION = """Searches the open web and ranks results by relevance to the meaning of the query.
+Best for broad, contextual or analytical questions, background research and topics outside New York politics."""
+
+GOOGLE_CSE_DESCRIPTION = """Searches a curated list of New York political news outlets.
+Best for specific New York politicians, institutions, legislation, elections and recent local news."""
+
+QUERY_PLANNING_SYSTEM_PROMPT = """
+You plan searches for news articles about political topics.
+
+1. Generate 5 search terms that would be effective for finding relevant news articles about the user's topic.
+2. Decide which search engine is better suited to retrieve relevant URLs for those terms.
+
+Available Search Engines:
+
+"Contextual" - Tavily Search API:
+{tavily_description}
+
+"General" - New York Politics News Aggregator (Custom Google CSE):
+{google_cse_description}
+
+Respond with a single JSON object and nothing else:
+{{"search_terms": ["term 1", "term 2", "term 3", "term 4", "term 5"], "search_agent": "General" or "Contextual"}}
+
+If you cannot generate search terms, respond with {{"search_terms": [], "search_agent": "General"}}.
+"""
+
+QUERY_PLANNING_HUMAN_PROMPT = """
+User Query:
+"{user_query}"
+"""
+
+@lru_cache(maxsize=1)
+def planning_system_prompt() -> str:
+    """The system prompt with the search engine descriptions filled in (the same for every query)."""
+    return QUERY_PLANNING_SYSTEM_PROMPT.format(
+        tavily_description=TAVILY_DESCRIPTION,
+        google_cse_description=GOOGLE_CSE_DESCRIPTION,
+    )
+
+def _query_planning_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", QUERY_PLANNING_SYSTEM_PROMPT),
+            ("human", QUERY_PLANNING_HUMAN_PROMPT),
+        ]
+    )
+
+# QUERY_PLANNING_PROMPT is built on first access
+__getattr__ = lazy_templates(__name__, {"QUERY_PLANNING_PROMPT": _query_planning_prompt})
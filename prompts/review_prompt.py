@@ -11,7 +11,7 @@
 # Expected Outputs:
 # - A formatted prompt string ready for use with the LLM.
 
-from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+from prompts.lazy_templates import lazy_templates
 
 REVIEW_SYSTEM_PROMPT = """
 You are tasked with reviewing the following JSON data. Analyze it based on the following criteria:
@@ -42,34 +42,34 @@ You are tasked with reviewing the following JSON data. Analyze it based on the f
 Your output should follow this structure:
 
 ```json
-{
-    "Review": {
-        "Syntax": {
+{{
+    "Review": {{
+        "Syntax": {{
             "Status": "Valid" or "Invalid",
             "Errors": [
-                {"Problem": "Describe syntax issue", "Correction": "Provide corrected syntax"}
+                {{"Problem": "Describe syntax issue", "Correction": "Provide corrected syntax"}}
             ]
-        },
-        "Entity Classification": {
+        }},
+        "Entity Classification": {{
             "Status": "Valid" or "Invalid",
             "Errors": [
-                {"Problem": "Describe classification issue", "Correction": "Provide corrected classification"}
+                {{"Problem": "Describe classification issue", "Correction": "Provide corrected classification"}}
             ]
-        },
-        "Relationship Accuracy": {
+        }},
+        "Relationship Accuracy": {{
             "Status": "Valid" or "Invalid",
             "Errors": [
-                {"Problem": "Describe relationship issue", "Correction": "Provide corrected relationship"}
+                {{"Problem": "Describe relationship issue", "Correction": "Provide corrected relationship"}}
             ]
-        },
-        "Consistency": {
+        }},
+        "Consistency": {{
             "Status": "Valid" or "Invalid",
             "Errors": [
-                {"Problem": "Describe consistency issue", "Correction": "Provide corrected consistency"}
+                {{"Problem": "Describe consistency issue", "Correction": "Provide corrected consistency"}}
             ]
-        }
-    }
-}
+        }}
+    }}
+}}
 
 """
 
@@ -77,16 +77,15 @@ REVIEW_HUMAN_PROMPT = """
 {extracted_data}
 """
 
-REVIEW_PROMPT = ChatPromptTemplate.from_messages(
-    [
-        ("system", REVIEW_SYSTEM_PROMPT),
-        ("human", REVIEW_HUMAN_PROMPT),
-    ]
-)
-
-ReviewPrompt = ChatPromptTemplate.from_messages(
-    [
-        ("system", REVIEW_SYSTEM_PROMPT),
-        ("human", REVIEW_HUMAN_PROMPT),
-    ]
-)
+def _review_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", REVIEW_SYSTEM_PROMPT),
+            ("human", REVIEW_HUMAN_PROMPT),
+        ]
+    )
+
+# REVIEW_PROMPT and ReviewPrompt are built on first access
+__getattr__ = lazy_templates(__name__, {"REVIEW_PROMPT": _review_prompt, "ReviewPrompt": _review_prompt})
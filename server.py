@@ -1,14 +1,33 @@
 # File: server.py
 # Directory: POLITICAL_ADVISOR/
 
+import time
+
+_import_started = time.perf_counter()
+
 import asyncio
 import logging
-from fastapi import FastAPI, BackgroundTasks
+import math
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from models.state import SharedState
 from config.config import Config
-from agents.router_agent import router_agent
+from agents.router_agent import run_workflow
+from tools.model_cascade import cascade_metrics
+from tools.job_control import JobControl, job_from_request, parse_prices
+from tools.job_queue import get_job_queue
+from tools.admission_control import AdmissionController, QueueFull
+from tools.fair_scheduler import parse_weights, stage_snapshot
+from tools.database import close_neo4j_drivers
+from tools.graph_queries import get_graph_reader, graph_cache_snapshot
+from tools.http_pool import close_http_sessions
+from tools.upload_service import close_upload_services, upload_snapshot
+from tools.warmup import warm_up
 
 # Configure logging
 logging.basicConfig(
@@ -18,7 +37,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.WARMUP_ON_STARTUP:
+        # Before serving, so the first request finds dependencies imported and connection pools open
+        startup_timings["warmup"] = await warm_up(config)
+    yield
+    # Stop queued and running jobs so their connections are closed cleanly
+    await admission.shutdown()
+    # Commit uploads still queued before the Neo4j driver goes away
+    await close_upload_services()
+    await close_http_sessions()
+    await close_neo4j_drivers()
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow CORS (adjust origins as needed)
 app.add_middleware(
@@ -29,51 +61,226 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global state and config
+# Global config; every job gets its own state
 config = Config()
-state = SharedState()
-state.config = config  # Pass config to state
+jobs: "OrderedDict[str, JobControl]" = OrderedDict()  # Job ID to job, oldest first
+llm_prices = parse_prices(config.LLM_PRICES)
+startup_timings = {"import_seconds": None, "warmup": None}
 
 class SearchRequest(BaseModel):
     user_query: str
+    url_budget: Optional[int] = None  # Defaults to URL_BUDGET from the configuration
+    # Per-job limits; default to JOB_DEADLINE_SECONDS, JOB_MAX_TOKENS and JOB_MAX_COST_USD (0 = unlimited)
+    deadline_seconds: Optional[float] = None
+    max_tokens: Optional[int] = None
+    max_cost_usd: Optional[float] = None
+    # "interactive" (analyst searches) is served ahead of "bulk" (scheduled refreshes) in every stage
+    priority: Literal["interactive", "bulk"] = "interactive"
 
 @app.post("/api/start_search")
-async def start_search(request: SearchRequest, background_tasks: BackgroundTasks):
+async def start_search(request: SearchRequest):
     try:
-        # Reset the state
-        state.reset()
-        state.user_query = request.user_query
-        state.add_log(f"Received search request: {request.user_query}", level="INFO")
-
-        # Start the workflow in the background
-        background_tasks.add_task(run_workflow)
-        return {"message": "Search initiated successfully."}
+        job_id = uuid.uuid4().hex
+        if job_queue is not None:
+            return await enqueue_job(job_id, request)
+        job = job_from_request(job_id, request.model_dump(), config, llm_prices)
+        # Start the workflow in the background, or queue it while MAX_RUNNING_JOBS are running
+        ticket = admission.submit(job)
+        register_job(job)
+        job.state.add_log(f"Received search request: {request.user_query}", level="INFO")
+        if ticket["status"] == "queued":
+            job.state.add_log(f"Job queued at position {ticket['queue_position']}; estimated wait {ticket['estimated_wait']:.0f}s.", level="INFO")
+        return {"message": "Search initiated successfully.", "job_id": job.job_id, **ticket}
+    except QueueFull as e:
+        logger.warning(f"Rejected search request: {e}")
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+            content={"message": "Too many searches in progress; try again later.", "retry_after": e.retry_after},
+        )
     except Exception as e:
         logger.error(f"Error in start_search: {e}")
         return {"message": "Failed to initiate search.", "error": str(e)}
 
-async def run_workflow():
-    try:
-        while True:
-            await router_agent(state)
-            if state.next_step == "end":
-                state.add_log("Workflow complete", level="INFO")
-                break
-    except Exception as e:
-        state.add_log(f"Error in run_workflow: {e}", level="ERROR")
-        logger.error(f"Error in run_workflow: {e}")
+async def enqueue_job(job_id: str, request: SearchRequest):
+    # Worker mode: the durable queue is bounded the same way as the in-process one
+    # (queue calls block on the database, so they run in a worker thread)
+    depth = (await asyncio.to_thread(job_queue.stats))["queue_depth"]
+    if depth >= config.MAX_QUEUED_JOBS:
+        raise QueueFull(config.JOB_DURATION_ESTIMATE * math.ceil((depth + 1) / max(1, config.MAX_RUNNING_JOBS)))
+    await asyncio.to_thread(job_queue.enqueue, job_id, request.model_dump(), request.priority)
+    return {"message": "Search initiated successfully.", "job_id": job_id, "status": "queued", "queue_position": depth + 1}
+
+def register_job(job: JobControl):
+    jobs[job.job_id] = job
+    # Forget the oldest finished jobs beyond the history size
+    finished = [job_id for job_id, known in jobs.items() if known.finished]
+    for job_id in finished[:max(0, len(jobs) - config.JOB_HISTORY_SIZE)]:
+        del jobs[job_id]
+
+def get_job(job_id: Optional[str] = None) -> JobControl:
+    # Without an ID, the most recently started job
+    if job_id is None:
+        if not jobs:
+            raise HTTPException(status_code=404, detail="No jobs have been started.")
+        return next(reversed(jobs.values()))
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return jobs[job_id]
+
+def get_queued_job(job_id: Optional[str] = None) -> dict:
+    """A job record from the job queue (worker mode), shaped like an in-process job summary."""
+    if job_id is None:
+        latest = job_queue.list(limit=1)
+        if not latest:
+            raise HTTPException(status_code=404, detail="No jobs have been started.")
+        job_id = latest[0]["id"]
+    record = job_queue.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return queued_job_summary(record)
+
+def queued_job_summary(record: dict) -> dict:
+    summary = record["summary"] or {}
+    return {
+        **summary,
+        "job_id": record["id"],
+        "priority": record["priority"],
+        "status": record["status"],
+        "next_step": summary.get("next_step", "url_generation"),
+        "upload_complete": summary.get("upload_complete", False),
+        "created_at": record["created_at"],
+        "started_at": record["started_at"],
+        "finished_at": record["finished_at"],
+        "worker": record["worker"],
+        "attempts": record["attempts"],
+        "queue_position": record.get("queue_position"),
+    }
+
+if config.JOB_EXECUTION == "queue":
+    # Jobs run in worker processes (worker.py); this process only enqueues and reports
+    job_queue = get_job_queue(config)
+else:
+    job_queue = None
+
+admission = AdmissionController(
+    run_workflow,
+    max_running=config.MAX_RUNNING_JOBS,
+    max_queued=config.MAX_QUEUED_JOBS,
+    duration_estimate=config.JOB_DURATION_ESTIMATE,
+    weights=parse_weights(config.PRIORITY_WEIGHTS),
+)
 
 @app.get("/api/job_status")
-def get_job_status():
-    # Return the current state status
+def get_job_status(job_id: Optional[str] = None):
+    if job_queue is not None:
+        summary = get_queued_job(job_id)
+        return {key: summary[key] for key in ("job_id", "status", "next_step", "upload_complete", "queue_position", "worker")}
+    job = get_job(job_id)
     return {
-        "next_step": state.next_step,
-        "upload_complete": state.upload_complete,
+        "job_id": job.job_id,
+        "status": job.status,
+        "next_step": job.state.next_step,
+        "upload_complete": job.state.upload_complete,
+        **admission.ticket(job),
     }
 
 @app.get("/api/logs")
-def get_logs():
-    return {"logs": state.logs}
+def get_logs(job_id: Optional[str] = None, since: int = 0):
+    # `since` skips log lines the caller already has
+    if job_queue is not None:
+        return {"logs": job_queue.logs(get_queued_job(job_id)["job_id"], since)}
+    return {"logs": get_job(job_id).state.logs[since:]}
+
+@app.get("/api/jobs")
+def list_jobs():
+    if job_queue is not None:
+        return {"jobs": [queued_job_summary(record) for record in job_queue.list(limit=config.JOB_HISTORY_SIZE)]}
+    return {"jobs": [job.summary() for job in jobs.values()]}
+
+@app.get("/api/jobs/{job_id}")
+def get_job_summary(job_id: str):
+    if job_queue is not None:
+        return get_queued_job(job_id)
+    job = get_job(job_id)
+    return {**job.summary(), **admission.ticket(job)}
+
+@app.get("/api/queue")
+def get_queue():
+    # Running jobs, queue depth and observed/estimated wait times
+    if job_queue is not None:
+        return job_queue.stats()
+    return admission.snapshot()
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    if job_queue is not None:
+        # Queued jobs are cancelled at once; running ones by their worker at its next heartbeat
+        status = await asyncio.to_thread(job_queue.request_cancel, job_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+        return {"message": "Job cancellation requested.", "job": await asyncio.to_thread(get_queued_job, job_id)}
+    job = get_job(job_id)
+    # Cancels the workflow task and with it every in-flight scrape, LLM call and Neo4j transaction
+    # (async so the cancellation happens on the event loop thread)
+    if not job.cancel():
+        return {"message": f"Job already {job.status}.", "job": job.summary()}
+    return {"message": "Job cancellation requested.", "job": job.summary()}
+
+@app.get("/api/scheduler")
+def get_scheduler():
+    # Slots in use, waiters and grants per priority class for each stage pool
+    return {"stages": stage_snapshot()}
+
+@app.get("/api/uploads")
+async def get_uploads():
+    # Batches committed, articles written, transient retries and queued payloads of the upload service
+    return {"uploads": upload_snapshot()}
+
+async def read_graph(read):
+    try:
+        result = await read
+    except Exception as e:
+        logger.error(f"Graph read failed: {e}")
+        raise HTTPException(status_code=503, detail="The knowledge graph is unavailable.")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Not found in the knowledge graph.")
+    return result
+
+@app.get("/api/graph/stakeholder")
+async def get_stakeholder_neighborhood(name: str, limit: int = Query(50, ge=1, le=500)):
+    # Connections, recent articles and most co-mentioned stakeholders of one stakeholder
+    return await read_graph(get_graph_reader(config).stakeholder_neighborhood(name, limit))
+
+@app.get("/api/graph/issue_timeline")
+async def get_issue_timeline(title: str, limit: int = Query(100, ge=1, le=500)):
+    # Articles about an issue, newest first, with the stakeholders and events each mentions
+    return await read_graph(get_graph_reader(config).issue_timeline(title, limit))
+
+@app.get("/api/graph/trending_issues")
+async def get_trending_issues(days: int = Query(7, ge=1, le=365), limit: int = Query(20, ge=1, le=500)):
+    # Issues with the most article mentions over the last `days` days (today included)
+    return await read_graph(get_graph_reader(config).trending_issues(days, limit))
+
+@app.get("/api/graph/quote")
+async def get_quote(text: str):
+    # A quote (matched on its normalized text) with its speakers and the articles citing it
+    return await read_graph(get_graph_reader(config).quote_lookup(text))
+
+@app.get("/api/graph/cache")
+async def get_graph_cache():
+    # Entries, hits, misses and evictions of the graph read cache
+    return {"cache": graph_cache_snapshot()}
+
+@app.get("/api/cascade_metrics")
+def get_cascade_metrics():
+    # Per-stage call counts, escalation rates and the models that produced accepted outputs
+    return {"stages": cascade_metrics.snapshot()}
+
+@app.get("/api/startup")
+def get_startup():
+    # Seconds spent importing this module and per warm-up step (None when warm-up is off or a step failed)
+    return startup_timings
 
 @app.get("/api/config")
 def get_config():
@@ -86,10 +293,19 @@ def get_config():
         "LLM_MODEL_NAME": config.LLM_MODEL_NAME,
         "LLM_MAX_TOKENS": config.LLM_MAX_TOKENS,
         "LLM_TEMPERATURE": config.LLM_TEMPERATURE,
+        "PLANNING_MODELS": config.PLANNING_MODELS,
+        "EXTRACTION_MODELS": config.EXTRACTION_MODELS,
+        "REVIEW_MODELS": config.REVIEW_MODELS,
+        "EXTRACTION_FORMAT": config.EXTRACTION_FORMAT,
+        "JOB_EXECUTION": config.JOB_EXECUTION,
+        "WARMUP_ON_STARTUP": config.WARMUP_ON_STARTUP,
+        "UPLOAD_MODE": config.UPLOAD_MODE,
         # Include other non-sensitive config parameters as needed
     }
     return {"config": config_data}
 
+startup_timings["import_seconds"] = round(time.perf_counter() - _import_started, 4)
+
 # To run the app using Uvicorn:
 # if __name__ == "__main__":
 #     import uvicorn
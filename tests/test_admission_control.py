@@ -0,0 +1,93 @@
+# File: test_admission_control.py
+# Directory: tests/
+
+"""
+Unit Test for admission control on job submission
+Test Objective:
+- Verify that at most `max_running` jobs run at once and up to `max_queued` more wait in a FIFO queue.
+- Verify that submissions beyond the queue are rejected with a retry estimate (HTTP 429 with Retry-After).
+- Verify that queued jobs start as running jobs finish and that cancelled queued jobs give their place up.
+Expected Results:
+- Tickets report running/queued status, queue position and estimated wait.
+- Queue depth and wait times are exposed through `snapshot()` and `/api/queue`.
+Variables Used:
+- Stand-in workflows that wait on an event instead of running the pipeline.
+"""
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from models.state import SharedState
+from tools.job_control import JobControl
+from tools.admission_control import AdmissionController, QueueFull
+
+def make_job(job_id):
+    return JobControl(job_id, SharedState())
+
+class TestAdmissionController:
+    @pytest.mark.asyncio
+    async def test_queue_and_reject(self):
+        release = asyncio.Event()
+
+        async def workflow(state):
+            await release.wait()
+
+        controller = AdmissionController(workflow, max_running=1, max_queued=1, duration_estimate=60)
+        first, second, third = make_job("1"), make_job("2"), make_job("3")
+
+        assert controller.submit(first)["status"] == "running"
+        ticket = controller.submit(second)
+        assert ticket["status"] == "queued" and ticket["queue_position"] == 1
+        assert 59 <= ticket["estimated_wait"] <= 60
+        with pytest.raises(QueueFull) as rejected:
+            controller.submit(third)
+        assert rejected.value.retry_after > 0
+        assert controller.snapshot()["queue_depth"] == 1 and controller.snapshot()["rejected"] == 1
+
+        release.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert first.status == "completed" and second.status == "completed"
+        assert controller.snapshot()["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_job_leaves_queue(self):
+        release = asyncio.Event()
+
+        async def workflow(state):
+            await release.wait()
+
+        controller = AdmissionController(workflow, max_running=1, max_queued=1)
+        running, queued = make_job("1"), make_job("2")
+        controller.submit(running)
+        controller.submit(queued)
+
+        assert queued.cancel()
+        assert queued.status == "cancelled"
+        assert controller.submit(make_job("3"))["queue_position"] == 1
+        await controller.shutdown()
+        assert running.status == "cancelled"
+
+class TestStartSearchBackpressure:
+    def test_429_when_queue_full(self):
+        import server
+
+        async def workflow(state):
+            await asyncio.sleep(10)
+
+        server.admission = AdmissionController(workflow, max_running=1, max_queued=1, duration_estimate=30)
+        with TestClient(server.app) as client:
+            first = client.post("/api/start_search", json={"user_query": "city budget"}).json()
+            second = client.post("/api/start_search", json={"user_query": "school board"}).json()
+            third = client.post("/api/start_search", json={"user_query": "zoning"})
+            queue = client.get("/api/queue").json()
+            cancelled = client.post(f"/api/jobs/{second['job_id']}/cancel").json()
+
+        assert first["status"] == "running"
+        assert second["status"] == "queued" and second["queue_position"] == 1
+        assert third.status_code == 429 and int(third.headers["Retry-After"]) >= 1
+        assert queue["running"] == 1 and queue["queue_depth"] == 1
+        assert cancelled["job"]["status"] == "cancelled"
+
+if __name__ == '__main__':
+    pytest.main()
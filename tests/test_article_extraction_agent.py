@@ -5,18 +5,22 @@
 Unit Test for article_extraction_agent
 Test Objective:
 - Verify that the agent correctly extracts data from articles.
+- Verify that short articles are batched into one request and split back per URL.
 Expected Results:
 - Extracted data is stored in the state.
 - Errors are handled gracefully.
+- An unparseable batch falls back to one request per article.
 Variables Used:
 - Mocked OpenAI API responses.
 """
 
+import json
 import pytest
 from unittest.mock import AsyncMock, patch
-from agents.article_extraction_agent import article_extraction_agent
+from agents.article_extraction_agent import article_extraction_agent, plan_batches
 from models.state import SharedState
 from config import config  # Import Config if it's a class, or import necessary config values
+from config.config import Config
 
 class TestArticleExtractionAgent:
     @pytest.mark.asyncio
@@ -50,5 +54,49 @@ class TestArticleExtractionAgent:
         assert state.extracted_data["http://example.com"]["Article"]["URL"] == "http://example.com"
         assert state.extracted_data["http://example.com"]["Article"]["Date Published"] == "01/01/2023"
 
+class TestBatchedExtraction:
+    def make_state(self):
+        state = SharedState()
+        state.config = Config()
+        state.config.EXTRACTION_MODELS = ["test-model"]
+        state.articles = {
+            f"http://example.com/{i}": f"Short article number {i} about the city budget." for i in range(3)
+        }
+        return state
+
+    def test_plan_batches(self):
+        cfg = Config()
+        cfg.EXTRACTION_SHORT_ARTICLE_TOKENS = 100
+        cfg.EXTRACTION_BATCH_TOKEN_BUDGET = 1000
+        cfg.EXTRACTION_BATCH_MAX_ARTICLES = 2
+        articles = {"short1": "a" * 40, "long": "b" * 4000, "short2": "c" * 40, "short3": "d" * 40}
+        batches = [[url for url, _ in batch] for batch in plan_batches(articles, cfg)]
+        assert batches == [["long"], ["short1", "short2"], ["short3"]]
+
+    @pytest.mark.asyncio
+    async def test_batch_results_split_per_url(self):
+        state = self.make_state()
+        response = json.dumps([
+            {"key": f"A{i + 1}", "data": {"Article": {"Title": f"Story {i}"}}} for i in range(3)
+        ])
+        with patch('agents.article_extraction_agent.complete', new_callable=AsyncMock, return_value=response) as mock_complete:
+            await article_extraction_agent(state)
+
+        assert mock_complete.call_count == 1
+        assert state.extracted_data["http://example.com/2"]["Article"]["Title"] == "Story 2"
+        assert "=== ARTICLE A3 ===" in mock_complete.call_args[0][0][1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_parse_failure_falls_back_to_single_calls(self):
+        state = self.make_state()
+        single = '{"Article": {"Title": "Single"}}'
+        with patch('agents.article_extraction_agent.complete', new_callable=AsyncMock,
+                   side_effect=["not json"] + [single] * 3) as mock_complete:
+            await article_extraction_agent(state)
+
+        assert mock_complete.call_count == 4
+        assert len(state.extracted_data) == 3
+        assert all(data["Article"]["Title"] == "Single" for data in state.extracted_data.values())
+
 if __name__ == '__main__':
     pytest.main()
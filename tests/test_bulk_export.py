@@ -0,0 +1,116 @@
+# File: test_bulk_export.py
+# Directory: tests/
+
+"""
+Unit Test for the bulk offline import path
+Test Objective:
+- Verify that spooled payloads are exported to deduplicated node and relationship CSV files for neo4j-admin.
+- Verify that deduplication works across sorted runs spilled to disk.
+- Verify that exported rows are read back into the parameters of the reconcile MERGEs.
+- Verify that the export-mode uploader appends payloads to a JSONL spool.
+Expected Results:
+- Every node and relationship appears once, with the last non-null properties and the first quote text.
+- Files have neo4j-admin headers (`:ID(Label)`, `:START_ID`, `:END_ID`, `:TYPE`) and the manifest counts rows.
+Variables Used:
+- Two payloads sharing a stakeholder, a quote and an issue, written to a temporary spool.
+"""
+
+import csv
+import json
+import os
+import pytest
+from tools.bulk_export import (
+    ExternalSorter, PayloadSpool, export, node_merge_query, node_rows, read_csv_rows, relationship_merge_query,
+    relationship_rows,
+)
+from tools.entity_resolution import AliasIndex
+from tools.merge_keys import merge_key
+
+PAYLOADS = [
+    {
+        "Article": {"Title": "Budget passes", "URL": "https://example.com/a", "Date Published": "2024-05-01", "Text": "..."},
+        "Stakeholders": [{"Name": "Sen. Jane Doe", "Type": "Politician",
+                          "Relationships": {"has_role_in": "Senate", "has_role": "Chair"},
+                          "Quotes": [{"Text": "We will balance the budget."}]}],
+        "Issues": [{"Title": "Budget", "Objective": None}],
+    },
+    {
+        "Article": {"Title": "Budget reactions", "URL": "https://example.com/b", "Date Published": "2024-05-02"},
+        "Stakeholders": [{"Name": "Senator Doe", "Type": None,
+                          "Quotes": [{"Text": "We will  balance the BUDGET."}]}],
+        "Issues": [{"Title": "Budget", "Objective": "Balance the budget"}],
+    },
+]
+
+def read_csv(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+class TestBulkExport:
+    def write_spool(self, tmp_path):
+        path = tmp_path / "reviewed.jsonl"
+        path.write_text("".join(json.dumps(p) + "\n" for p in PAYLOADS) + "not json\n", encoding="utf-8")
+        return str(path)
+
+    def test_export_deduplicates(self, tmp_path):
+        output = str(tmp_path / "out")
+        os.makedirs(output)
+        manifest = export([self.write_spool(tmp_path)], output, AliasIndex(), run_mb=0.0001)  # Spill every row
+
+        assert manifest["payloads"] == 2 and manifest["invalid"] == 1
+        assert manifest["nodes"] == {"Article": 2, "Institution": 1, "Issue": 1, "Quote": 1, "Stakeholder": 1}
+        assert manifest["relationships"]["Stakeholder_MENTIONED_IN_Article"] == 2
+        assert manifest["relationships"]["Stakeholder_SAID_Quote"] == 1
+        assert "--nodes=" in manifest["import_command"] and "--multiline-fields=true" in manifest["import_command"]
+
+        stakeholders = read_csv(os.path.join(output, "nodes", "Stakeholder.csv"))
+        assert stakeholders == [["name:ID(Stakeholder)", "type", "aliases:string[]", ":LABEL"],
+                                ["Sen. Jane Doe", "Politician", "Senator Doe", "Stakeholder"]]
+        quotes = read_csv(os.path.join(output, "nodes", "Quote.csv"))
+        assert quotes[1][:2] == [merge_key("We will balance the budget."), "We will balance the budget."]
+        issues = read_csv(os.path.join(output, "nodes", "Issue.csv"))
+        assert issues[1] == ["Budget", "Balance the budget", "Issue"]
+        roles = read_csv(os.path.join(output, "relationships", "Stakeholder_HAS_ROLE_IN_Institution.csv"))
+        assert roles == [[":START_ID(Stakeholder)", ":END_ID(Institution)", ":TYPE", "has_role"],
+                         ["Sen. Jane Doe", "Senate", "HAS_ROLE_IN", "Chair"]]
+        assert os.listdir(output) and not [name for name in os.listdir(output) if name.startswith("bulk-export-")]
+
+    def test_reconcile_rows(self, tmp_path):
+        output = str(tmp_path / "out")
+        os.makedirs(output)
+        export([self.write_spool(tmp_path)], output, AliasIndex())
+
+        header, rows = next(read_csv_rows(os.path.join(output, "nodes", "Stakeholder.csv"), 10))
+        assert node_rows("Stakeholder", header, rows) == [
+            {"key": "Sen. Jane Doe", "create": {}, "aliases": ["Senator Doe"], "props": {"type": "Politician"}},
+        ]
+        header, rows = next(read_csv_rows(os.path.join(output, "nodes", "Quote.csv"), 10))
+        assert node_rows("Quote", header, rows)[0]["create"] == {"text": "We will balance the budget."}
+        header, rows = next(read_csv_rows(os.path.join(output, "relationships", "Stakeholder_HAS_ROLE_IN_Institution.csv"), 10))
+        assert relationship_rows(header, rows) == [{"start": "Sen. Jane Doe", "end": "Senate", "props": {"has_role": "Chair"}}]
+
+        assert "ON CREATE SET n.text = row.create.text" in node_merge_query("Quote")
+        assert "n.aliases" in node_merge_query("Stakeholder")
+        assert "MERGE (a)-[r:HAS_ROLE_IN]->(b)" in relationship_merge_query("HAS_ROLE_IN", "Stakeholder", "Institution")
+
+    def test_external_sorter_merges_runs(self, tmp_path):
+        sorter = ExternalSorter(str(tmp_path), "rows", run_bytes=1)
+        for key, value in [("b", 1), ("a", 2), ("b", 3), ("c", 4), ("a", 5)]:
+            sorter.add([key], {"value": value})
+
+        assert [(key, [p["value"] for p in props]) for key, props in sorter.grouped()] == [
+            (["a"], [2, 5]), (["b"], [1, 3]), (["c"], [4]),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_spool_appends_payloads(self, tmp_path):
+        spool = PayloadSpool(str(tmp_path / "spool"))
+        await spool.prepare()
+        await spool.upload_batch(PAYLOADS[:1])
+        await spool.upload_batch(PAYLOADS[1:])
+
+        with open(spool.path, encoding="utf-8") as f:
+            assert [json.loads(line)["Article"]["Title"] for line in f] == ["Budget passes", "Budget reactions"]
+
+if __name__ == '__main__':
+    pytest.main()
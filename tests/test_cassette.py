@@ -0,0 +1,204 @@
+# File: test_cassette.py
+# Directory: tests/
+
+"""
+Unit Test for record/replay of outbound interactions
+Test Objective:
+- Verify that HTTP, LLM and Cypher interactions are recorded with their requests, outcomes and timings.
+- Verify that a replayed cassette serves identical requests in recorded order, raises recorded errors again
+  and reports requests it does not hold.
+- Verify that replay at recorded speed takes as long as the live calls did, and that secrets stay out of the cassette.
+- Verify that requests built from the wall clock (upload day of undated articles) match when replayed on a later day.
+Expected Results:
+- A recorded cassette saved to disk replays the same responses without calling the live functions.
+- Replayed LLM responses support the attribute access of the client's response objects.
+- Replayed Cypher statements return their recorded rows through `single()`, `data()` and async iteration.
+Variables Used:
+- Temporary cassette files, fake live calls, a fake Neo4j driver and a patched chat completion call.
+"""
+
+import asyncio
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+import pytest
+from tools.cassette import (
+    Cassette, CassetteDriver, CassetteMiss, CassetteTransaction, RecordedError, chat_completion, through_cassette,
+    use_cassette, wall_clock,
+)
+from tools import graph_aggregates
+from tools.graph_aggregates import ARTICLE_MENTIONS_QUERY, ISSUE_DAY_QUERY, update_aggregates
+from tools.searching.google_cse import GoogleCSE
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def data(self):
+        return self.rows
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def run(self, query, **params):
+        self.driver.queries.append((query, params))
+        return FakeResult([{"name": "Doe", "count": len(self.driver.queries)}])
+
+    async def execute_write(self, work, *args, **kwargs):
+        return await work(self, *args, **kwargs)
+
+class FakeTransaction:
+    def __init__(self, after):
+        self.after = after
+        self.queries = []
+
+    async def run(self, query, **params):
+        self.queries.append((query, params))
+        return FakeResult(self.after if query == ARTICLE_MENTIONS_QUERY else [])
+
+class LaterDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(days=3)
+
+class FakeDriver:
+    def __init__(self):
+        self.queries = []
+
+    def session(self, **kwargs):
+        return FakeSession(self)
+
+def replayed(cassette, speed="fast"):
+    cassette.save()
+    return Cassette(cassette.path, "replay", speed)
+
+class TestRecordReplay:
+    @pytest.mark.asyncio
+    async def test_round_trip(self, tmp_path):
+        cassette = Cassette(str(tmp_path / "job.jsonl.gz"))
+        live = AsyncMock(side_effect=[{"n": 1}, {"n": 2}, ValueError("boom")])
+        with use_cassette(cassette):
+            assert await through_cassette("http", {"url": "http://a"}, live) == {"n": 1}
+            assert await through_cassette("http", {"url": "http://a"}, live) == {"n": 2}
+            with pytest.raises(ValueError):
+                await through_cassette("http", {"url": "http://b"}, live)
+
+        replay = replayed(cassette)
+        with use_cassette(replay):
+            assert await through_cassette("http", {"url": "http://a"}, live) == {"n": 1}
+            assert await through_cassette("http", {"url": "http://a"}, live) == {"n": 2}
+            with pytest.raises(RecordedError, match="boom"):
+                await through_cassette("http", {"url": "http://b"}, live)
+            with pytest.raises(CassetteMiss):
+                await through_cassette("http", {"url": "http://a"}, live)
+
+        assert live.await_count == 3
+        assert replay.summary()["kinds"]["http"]["calls"] == 3 and replay.summary()["kinds"]["http"]["errors"] == 1
+        assert replay.misses == 1 and replay.unused() == 0
+
+    @pytest.mark.asyncio
+    async def test_recorded_speed(self, tmp_path):
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        cassette = Cassette(str(tmp_path / "job.jsonl.gz"))
+        with use_cassette(cassette):
+            await through_cassette("http", {"url": "http://a"}, slow)
+
+        for speed, at_least, below in [("recorded", 0.05, None), ("fast", 0.0, 0.05)]:
+            with use_cassette(replayed(cassette, speed)):
+                started = time.perf_counter()
+                assert await through_cassette("http", {"url": "http://a"}, slow) == "ok"
+                elapsed = time.perf_counter() - started
+            assert elapsed >= at_least and (below is None or elapsed < below)
+
+    @pytest.mark.asyncio
+    async def test_without_cassette_calls_live(self):
+        live = AsyncMock(return_value="live")
+        assert await through_cassette("http", {"url": "http://a"}, live) == "live"
+
+class TestInteractions:
+    @pytest.mark.asyncio
+    async def test_llm_response_objects(self, tmp_path):
+        response = {"choices": [{"message": {"content": " Valid "}}], "usage": {"prompt_tokens": 12, "completion_tokens": 3}}
+        cassette = Cassette(str(tmp_path / "job.jsonl.gz"))
+        with use_cassette(cassette), patch('openai.ChatCompletion.acreate', new_callable=AsyncMock, return_value=response):
+            await chat_completion(model="gpt-4o-mini", messages=[{"role": "user", "content": "Review"}], n=1)
+
+        with use_cassette(replayed(cassette)), patch('openai.ChatCompletion.acreate', new_callable=AsyncMock) as live:
+            replayed_response = await chat_completion(model="gpt-4o-mini", messages=[{"role": "user", "content": "Review"}], n=1)
+            live.assert_not_awaited()
+        assert replayed_response.choices[0].message['content'].strip() == "Valid"
+        assert replayed_response.get("usage")["prompt_tokens"] == 12
+
+    @pytest.mark.asyncio
+    async def test_cypher_statements(self, tmp_path):
+        cassette = Cassette(str(tmp_path / "job.jsonl.gz"))
+        driver = FakeDriver()
+
+        async def work(tx, title):
+            result = await tx.run("MATCH (a:Article {title: $title}) RETURN a", title=title)
+            return [record.data() async for record in result]
+
+        async with CassetteDriver(driver, cassette).session() as session:
+            record = await (await session.run("MATCH (s:Stakeholder) RETURN s.name AS name")).single()
+            rows = await session.execute_write(work, "A")
+        assert record["name"] == "Doe" and rows == [{"name": "Doe", "count": 2}]
+
+        replay = replayed(cassette)
+        async with CassetteDriver(None, replay).session() as session:
+            record = await (await session.run("MATCH (s:Stakeholder) RETURN s.name AS name")).single()
+            assert record.data() == {"name": "Doe", "count": 1}
+            assert await session.execute_write(work, "A") == [{"name": "Doe", "count": 2}]
+        assert len(driver.queries) == 2
+        assert [entry["request"]["params"] for entry in replay.entries] == [{}, {"title": "A"}]
+
+    @pytest.mark.asyncio
+    async def test_replay_on_a_later_day(self, tmp_path, monkeypatch):
+        undated = [{"title": "A", "stakeholders": ["Doe"], "issues": ["Budget"], "date_published": "last Tuesday",
+                    "activity_day": None, "aggregated": False}]
+        cassette = Cassette(str(tmp_path / "job.jsonl.gz"))
+        tx = FakeTransaction(undated)
+        with use_cassette(cassette):
+            await update_aggregates(CassetteTransaction(tx, cassette), ["A"], {})
+        recorded_day = [params for query, params in tx.queries if query == ISSUE_DAY_QUERY][0]["rows"][0]["day"]
+
+        # Replayed three days later
+        real_time = time.time
+        monkeypatch.setattr(time, "time", lambda: real_time() + 3 * 86400)
+        monkeypatch.setattr(graph_aggregates, "datetime", LaterDatetime)
+        replay = replayed(cassette)
+        with use_cassette(replay):
+            assert abs(wall_clock() - cassette.meta["recorded_at"]) < 60
+            await update_aggregates(CassetteTransaction(None, replay), ["A"], {})
+        assert replay.misses == 0 and replay.unused() == 0
+        assert recorded_day == time.strftime("%Y-%m-%d", time.gmtime(cassette.meta["recorded_at"]))
+
+    @pytest.mark.asyncio
+    async def test_search_replays_without_secrets(self, tmp_path):
+        path = str(tmp_path / "job.jsonl.gz")
+        entry = {
+            "kind": "http",
+            "request": {"url": "https://www.googleapis.com/customsearch/v1", "params": {"cx": "cx", "q": "budget", "num": 10}},
+            "response": {"items": [{"link": "http://example.com/1"}]},
+            "started": 0.0,
+            "duration": 0.2,
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"meta": {}}) + "\n" + json.dumps(entry) + "\n")
+
+        with use_cassette(Cassette(path, "replay")):
+            assert await GoogleCSE(api_key="secret", cx="cx").search("budget") == ["http://example.com/1"]
+
+if __name__ == '__main__':
+    pytest.main()
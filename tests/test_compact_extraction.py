@@ -0,0 +1,91 @@
+# File: test_compact_extraction.py
+# Directory: tests/
+
+"""
+Unit Test for the compact extraction wire format
+Test Objective:
+- Verify that compact extraction output expands into the structure `KnowledgeGraphUploader.upload_batch` expects.
+- Verify that article extraction in "compact" format sends the compact prompt and stores expanded data.
+Expected Results:
+- Short keys and positional arrays map onto the verbose keys; type codes are spelled out.
+- Article title and date are filled into stakeholder relationships and quotes.
+- Missing fields become None and missing sections become empty lists.
+- Verbose output passes through unchanged; null lists in it are valid.
+Variables Used:
+- A hand-written compact extraction and a mocked LLM completion.
+"""
+
+import json
+import pytest
+from unittest.mock import patch, AsyncMock
+from models.state import SharedState
+from config.config import Config
+from agents.article_extraction_agent import article_extraction_agent
+from tools.compact_extraction import expand_extraction
+from tools.extraction_schema import is_valid_extraction
+
+COMPACT = {
+    "a": ["Council passes budget", "https://example.com/budget", "03/14/2024"],
+    "s": [
+        ["Jane Doe", "P", None, "City Council", "Council Member", 0, ["Budget Vote"], None,
+         [["We kept our promise.", "After the vote"]]],
+        ["Daily Ledger", "O", None, None, None, 1],
+    ],
+    "e": [["Budget Vote", "03/13/2024", "Council approves the annual budget", ["Jane Doe"]]],
+    "c": [["Budget dispute", "Members disagreed on cuts", "S"]],
+    "n": [["City Council", "local legislative governmental"]],
+}
+
+class TestCompactExtraction:
+    def test_expand(self):
+        data = expand_extraction(COMPACT)
+
+        assert data["Article"] == {
+            "Title": "Council passes budget", "URL": "https://example.com/budget", "Date Published": "03/14/2024"
+        }
+        jane, ledger = data["Stakeholders"]
+        assert jane["Type"] == "Person"
+        assert jane["Relationships"] == {
+            "mentioned_in": "Council passes budget",
+            "is_employed_by": None,
+            "has_role_in": "City Council",
+            "has_role": "Council Member",
+            "is_author": None,
+            "participated_in": ["Budget Vote"],
+            "related_to": None,
+        }
+        assert jane["Quotes"] == [{"Text": "We kept our promise.", "Date Recorded": "03/14/2024", "Context": "After the vote"}]
+        assert ledger["Type"] == "Organization"
+        assert ledger["Relationships"]["is_author"] == "Daily Ledger"
+        assert ledger["Relationships"]["participated_in"] == [] and ledger["Quotes"] == []
+        assert data["Events"][0]["Participants"] == ["Jane Doe"]
+        assert data["Controversies"][0]["Controversy Type"] == "Social"
+        assert data["Facts"] == [] and data["Documents"] == []
+        assert is_valid_extraction(data)
+
+    def test_null_lists_are_valid(self):
+        # The verbose prompt allows any field to be omitted or null
+        assert is_valid_extraction({"Article": {"Title": "Story"}, "Events": None, "Facts": None})
+        assert is_valid_extraction({"Article": {"Title": "Story"}, "Stakeholders": [{"Name": "Jane Doe", "Quotes": None}]})
+        assert not is_valid_extraction({"Article": {"Title": "Story"}, "Events": "none"})
+
+    def test_verbose_passes_through(self):
+        verbose = {"Article": {"Title": "Story"}}
+        assert expand_extraction(verbose) is verbose
+
+    @pytest.mark.asyncio
+    async def test_agent_in_compact_format(self):
+        state = SharedState()
+        state.config = Config()
+        state.config.EXTRACTION_FORMAT = "compact"
+        state.config.EXTRACTION_MODELS = ["test-model"]
+        state.articles = {"https://example.com/budget": "The council passed the budget."}
+        with patch('agents.article_extraction_agent.complete', new_callable=AsyncMock,
+                   return_value=json.dumps(COMPACT)) as mock_complete:
+            await article_extraction_agent(state)
+
+        assert '"a": [title, url, date published]' in mock_complete.call_args[0][0][0]["content"]
+        assert state.extracted_data["https://example.com/budget"] == expand_extraction(COMPACT)
+
+if __name__ == '__main__':
+    pytest.main()
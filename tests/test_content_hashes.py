@@ -0,0 +1,139 @@
+# File: test_content_hashes.py
+# Directory: tests/
+
+"""
+Unit Test for content-hash change detection
+Test Objective:
+- Verify that content hashes ignore whitespace and Unicode-form differences between scrapes.
+- Verify that uploaded hashes are remembered across processes (SQLite) and compared right after scraping.
+- Verify that unchanged articles skip the later stages and changed ones are diff-merged on upload.
+Expected Results:
+- An article scraped with the same text as its last upload is marked unchanged and not added to `articles`.
+- Payloads carry their source URL and content hash; a changed article's stale links are pruned before the merge.
+- Only a re-upload from the same URL prunes; another URL with the same title is merged additively.
+Variables Used:
+- A temporary hash store, a fake scraper and router, and a fake write transaction.
+"""
+
+import pytest
+from config.config import Config
+from models.state import SharedState
+from models.url_records import content_hash
+from agents import scraping_agent
+from agents.knowledge_graph_uploader_agent import with_source
+from tools.content_hashes import ContentHashStore, get_content_hash_store, is_unchanged, record_uploaded
+from tools.database import PRUNE_STALE_LINKS_QUERY, KnowledgeGraphUploader
+from tools.graph_aggregates import aggregate_deltas, ArticleMentions
+
+def make_config(tmp_path):
+    config = Config()
+    config.CONTENT_HASH_PATH = str(tmp_path / "hashes.sqlite3")
+    config.UPLOAD_MODE = "export"  # No graph fallback
+    return config
+
+class FakeScraper:
+    def __init__(self, content):
+        self.content = content
+
+    async def scrape(self, url):
+        return self.content
+
+class FakeRouter:
+    def rank(self, url):
+        return []
+
+    def record(self, *args):
+        pass
+
+class FakeResult:
+    async def __aiter__(self):
+        for record in []:
+            yield record
+
+class FakeTransaction:
+    def __init__(self):
+        self.queries = []
+
+    async def run(self, query, **params):
+        self.queries.append((query, params))
+        return FakeResult()
+
+class TestContentHashes:
+    def test_hash_normalizes_whitespace(self):
+        assert content_hash("Budget  passes\n\nSenate votes") == content_hash(" Budget passes Senate votes ")
+        assert content_hash("Ｂudget passes") == content_hash("Budget passes")
+        assert content_hash("Budget passes") != content_hash("Budget fails")
+
+    def test_store_persists(self, tmp_path):
+        path = str(tmp_path / "hashes.sqlite3")
+        ContentHashStore(path).put("http://a", "abc")
+        assert ContentHashStore(path).get("http://a") == "abc"
+        assert ContentHashStore(path).get("http://b") is None
+
+    @pytest.mark.asyncio
+    async def test_is_unchanged(self, tmp_path):
+        config = make_config(tmp_path)
+        assert not await is_unchanged(config, "http://a", content_hash("Text"))
+        record_uploaded(config, "http://a", content_hash("Text"))
+        assert await is_unchanged(config, "http://a", content_hash("Text "))
+        assert not await is_unchanged(config, "http://a", content_hash("New text"))
+
+class TestPipeline:
+    @pytest.mark.asyncio
+    async def test_unchanged_article_is_skipped(self, tmp_path, monkeypatch):
+        config = make_config(tmp_path)
+        get_content_hash_store(config).put("http://a", content_hash("Same text"))
+        monkeypatch.setitem(scraping_agent.SCRAPER_FACTORIES, "fake", lambda config: FakeScraper("Same  text"))
+        state = SharedState()
+        state.config = config
+        state.scraper_choices["http://a"] = "fake"
+        state.scraper_choices["http://b"] = "fake"
+
+        await scraping_agent.scrape_url("http://a", state, FakeRouter())
+        await scraping_agent.scrape_url("http://b", state, FakeRouter())
+
+        assert list(state.articles) == ["http://b"]
+        assert state.progress()["unchanged"] == 1 and state.progress()["scraped"] == 2
+        assert state.content_hash("http://a") == content_hash("Same text")
+
+    def test_payload_carries_source(self):
+        data = {"Article": {"Title": "A"}, "Issues": []}
+        stamped = with_source(data, "http://a", "abc")
+        assert stamped["Article"] == {"Title": "A", "Source URL": "http://a", "Content Hash": "abc"}
+        assert data["Article"] == {"Title": "A"}
+
+    @pytest.mark.asyncio
+    async def test_changed_article_is_diff_merged(self):
+        tx = FakeTransaction()
+        payload = {"Article": {"Title": "A", "Source URL": "http://a", "Content Hash": "abc"}, "Stakeholders": [{"Name": "Doe"}]}
+
+        await KnowledgeGraphUploader._run_batch(tx, [payload])
+
+        prune = [params for query, params in tx.queries if query == PRUNE_STALE_LINKS_QUERY]
+        assert prune == [
+            {"title": "A", "source_url": "http://a", "content_hash": "abc", "keep": ["Article|A", "Stakeholder|Doe"]},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_same_title_from_another_url_is_not_a_revision(self):
+        # Wire copy of article "A" first uploaded from http://a: the prune only matches the article's own source URL
+        assert "MATCH (article:Article {title: $title, source_url: $source_url})" in PRUNE_STALE_LINKS_QUERY
+        tx = FakeTransaction()
+        wire_copy = {"Article": {"Title": "A", "Source URL": "http://b", "Content Hash": "def"}, "Stakeholders": []}
+        unknown_source = {"Article": {"Title": "A", "Content Hash": "def"}, "Stakeholders": []}
+
+        await KnowledgeGraphUploader._run_batch(tx, [wire_copy, unknown_source])
+
+        prune = [params for query, params in tx.queries if query == PRUNE_STALE_LINKS_QUERY]
+        assert [params["source_url"] for params in prune] == ["http://b"]
+
+    def test_pruned_mentions_are_subtracted(self):
+        before = {"A": ArticleMentions(frozenset(["Doe", "Roe"]), frozenset(["Budget"]), "2024-05-01")}
+        after = {"A": ArticleMentions(frozenset(["Doe", "Poe"]), frozenset(), "2024-05-01")}
+        pairs, days, _ = aggregate_deltas(before, after)
+
+        assert pairs == [{"a": "Doe", "b": "Poe", "delta": 1}, {"a": "Doe", "b": "Roe", "delta": -1}]
+        assert days == [{"issue": "Budget", "day": "2024-05-01", "delta": -1}]
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,146 @@
+# File: test_entity_resolution.py
+# Directory: tests/
+
+"""
+Unit Test for the stakeholder alias index
+Test Objective:
+- Verify that title, initial and spelling variants of a stakeholder name resolve to one canonical name.
+- Verify that ambiguous names (a bare surname shared by several stakeholders) are left unresolved.
+- Verify that payload stakeholders and event participants are rewritten to canonical names.
+- Verify that the index warms from the names and aliases recorded in the graph.
+- Verify that distinct people differing in their given name, and people and organizations, are not merged.
+- Verify that organization names keep their titles, so offices and bodies stay apart.
+Expected Results:
+- "Senator Doe", "J. Doe" and "Jane Dooe" resolve to "Sen. Jane Doe"; "Doe" resolves to nothing once John Doe exists.
+- "Mary Kelly" does not resolve to "Mark Kelly", nor "Don Smith" to "Dan Smith", nor the organization "Ford" to "Gerald Ford".
+- "Office of the Governor", "Office of the Attorney General" and "New York City Council" stay separate organizations.
+- The payload copy uses canonical names and the aliases seen are reported per canonical name.
+Variables Used:
+- Sample stakeholder names, a minimal extraction payload and a fake Neo4j driver.
+"""
+
+import pytest
+from tools.entity_resolution import AliasIndex, compatible, name_tokens, resolve_stakeholders
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in self.records:
+            yield type("Record", (), {"data": lambda self, record=record: record})()
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query, skip, limit):
+        return FakeResult(self.rows[skip:skip + limit])
+
+class FakeDriver:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def session(self):
+        return FakeSession(self.rows)
+
+class TestAliasIndex:
+    def test_name_tokens(self):
+        assert name_tokens("Sen. Jane Doe") == ["jane", "doe"]
+        assert name_tokens("Mayor José  García-López") == ["jose", "garcia", "lopez"]
+        assert name_tokens("The Mayor") == ["the", "mayor"]
+        assert name_tokens("Office of the Governor", "organization") == ["office", "of", "the", "governor"]
+        assert compatible(["j", "doe"], ["jane", "doe"])
+        assert not compatible(["jane", "doe"], ["jane", "roe"])
+
+    def test_variants_resolve_to_canonical_name(self):
+        index = AliasIndex()
+        assert index.canonicalize("Sen. Jane Doe") == "Sen. Jane Doe"
+        for variant in ["Jane Doe", "Senator Doe", "J. Doe", "Jane Dooe", "JANE DOE"]:
+            assert index.canonicalize(variant) == "Sen. Jane Doe"
+        assert index.resolve("Richard Roe") is None
+        assert len(index) == 1
+
+    def test_ambiguous_surname_is_not_resolved(self):
+        index = AliasIndex()
+        index.add("Jane Doe")
+        index.add("John Doe")
+        assert index.resolve("Doe") is None
+        assert index.resolve("John Doe") == "John Doe"
+        assert index.resolve("J. Doe") is None
+
+    def test_different_given_names_are_not_merged(self):
+        index = AliasIndex()
+        index.add("Mark Kelly")
+        index.add("Dan Smith")
+        assert index.resolve("Mary Kelly") is None
+        assert index.resolve("Don Smith") is None
+        assert index.canonicalize("Mary Kelly") == "Mary Kelly"
+        # Surname typos are still corrected
+        assert index.resolve("Mark Kely") == "Mark Kelly" and index.resolve("Dan Smyth") == "Dan Smith"
+
+    def test_person_and_organization_are_not_merged(self):
+        index = AliasIndex()
+        index.add("Gerald Ford", kind="person")
+        assert index.resolve("Ford", kind="organization") is None
+        assert index.resolve("Ford", kind="person") == "Gerald Ford"
+
+        data = {"Stakeholders": [{"Name": "Ford", "Type": "Organization"}, {"Name": "President Ford", "Type": "Person"}]}
+        resolved, aliases = resolve_stakeholders(data, index)
+        assert [s["Name"] for s in resolved["Stakeholders"]] == ["Ford", "Gerald Ford"]
+        assert aliases == {"Gerald Ford": {"President Ford"}}
+
+    def test_organizations_keep_their_titles(self):
+        index = AliasIndex()
+        for name in ("Office of the Governor", "Office of the Attorney General", "New York City"):
+            assert index.canonicalize(name, kind="organization") == name
+        assert index.canonicalize("New York City Council", kind="organization") == "New York City Council"
+        assert index.resolve("office of the governor", kind="organization") == "Office of the Governor"
+        assert index.resolve("Office of the Mayor", kind="organization") is None
+        assert len(index) == 4
+
+        data = {
+            "Stakeholders": [{"Name": "Office of the Attorney General", "Type": "Organization"}],
+            "Events": [{"Name": "Hearing", "Participants": ["Office of the Governor", "New York City Council"]}],
+        }
+        resolved, _ = resolve_stakeholders(data, index)
+        assert resolved["Stakeholders"][0]["Name"] == "Office of the Attorney General"
+        assert resolved["Events"][0]["Participants"] == ["Office of the Governor", "New York City Council"]
+        assert len(index) == 4
+
+    def test_resolve_stakeholders(self):
+        index = AliasIndex()
+        index.add("Jane Doe")
+        data = {
+            "Stakeholders": [{"Name": "Senator Doe", "Quotes": []}, {"Name": "Richard Roe"}],
+            "Events": [{"Name": "Hearing", "Participants": ["J. Doe", "Richard Roe"]}],
+        }
+        resolved, aliases = resolve_stakeholders(data, index)
+
+        assert [s["Name"] for s in resolved["Stakeholders"]] == ["Jane Doe", "Richard Roe"]
+        assert resolved["Events"][0]["Participants"] == ["Jane Doe", "Richard Roe"]
+        assert aliases == {"Jane Doe": {"Senator Doe", "J. Doe"}}
+        assert data["Stakeholders"][0]["Name"] == "Senator Doe"
+
+    @pytest.mark.asyncio
+    async def test_warm_from_graph(self):
+        rows = [{"name": "Jane Doe", "aliases": ["Janie"], "type": "Person"}, {"name": "Richard Roe", "aliases": None},
+                {"name": None, "aliases": None}]
+        index = AliasIndex()
+
+        assert await index.warm(FakeDriver(rows), batch_size=2) == 2
+        assert index.resolve("Janie") == "Jane Doe"
+        assert index.resolve("Rep. Richard Roe") == "Richard Roe"
+        assert index.resolve("Doe", kind="organization") is None and index.resolve("Doe", kind="person") == "Jane Doe"
+
+if __name__ == '__main__':
+    pytest.main()
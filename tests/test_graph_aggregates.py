@@ -0,0 +1,135 @@
+# File: test_graph_aggregates.py
+# Directory: tests/
+
+"""
+Unit Test for the incrementally maintained co-mention and issue-activity counters
+Test Objective:
+- Verify that publication dates are turned into ISO activity days.
+- Verify that the counter deltas count each article once, also when it is uploaded again or its date changes.
+- Verify that the counters are updated in the same transaction as the article merges.
+- Verify that a rebuild dates articles like the upload transaction, so it reproduces the incremental counters.
+Expected Results:
+- A new article adds 1 per stakeholder pair and per issue on its day; re-uploading it adds only what is new.
+- A changed publication date moves the article's issue mentions to the new day.
+- The upload transaction reads mentions, merges the articles, then writes the counters.
+- Rebuilt issue-day counts equal the incremental ones, undated articles included.
+Variables Used:
+- Article mention records as returned by ARTICLE_MENTIONS_QUERY and a fake write transaction.
+"""
+
+import pytest
+from tools.database import KnowledgeGraphUploader
+from tools.graph_aggregates import (
+    ARTICLE_DAY_QUERY, ARTICLE_MENTIONS_QUERY, CO_MENTION_QUERY, ISSUE_DAY_QUERY, ArticleMentions, activity_day,
+    aggregate_deltas, counted_mentions, current_mentions,
+)
+from tools.rebuild_aggregates import article_day_rows
+
+def mentions(stakeholders=(), issues=(), day=None):
+    return ArticleMentions(frozenset(stakeholders), frozenset(issues), day)
+
+class FakeRecord:
+    def __init__(self, data):
+        self._data = data
+
+    def data(self):
+        return self._data
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    async def __aiter__(self):
+        for record in self.records:
+            yield FakeRecord(record)
+
+class FakeTransaction:
+    def __init__(self, before, after):
+        self.reads = [before, after]
+        self.queries = []
+
+    async def run(self, query, **params):
+        self.queries.append((query, params))
+        return FakeResult(self.reads.pop(0) if query == ARTICLE_MENTIONS_QUERY else [])
+
+class TestActivityDay:
+    def test_formats(self):
+        assert activity_day("2024-05-01") == "2024-05-01"
+        assert activity_day("2024-05-01T22:30:00Z") == "2024-05-01"
+        assert activity_day("May 1, 2024") == "2024-05-01"
+        assert activity_day("05/01/2024") == "2024-05-01"
+        assert activity_day("last Tuesday") is None and activity_day(None) is None
+
+class TestAggregateDeltas:
+    def test_new_article(self):
+        pairs, days, articles = aggregate_deltas({}, {"A": mentions(["Roe", "Doe", "Poe"], ["Budget"], "2024-05-01")})
+
+        assert pairs == [
+            {"a": "Doe", "b": "Poe", "delta": 1}, {"a": "Doe", "b": "Roe", "delta": 1}, {"a": "Poe", "b": "Roe", "delta": 1},
+        ]
+        assert days == [{"issue": "Budget", "day": "2024-05-01", "delta": 1}]
+        assert articles == [{"title": "A", "day": "2024-05-01"}]
+
+    def test_reupload_counts_only_new_mentions(self):
+        before = {"A": mentions(["Doe", "Roe"], ["Budget"], "2024-05-01")}
+        after = {"A": mentions(["Doe", "Roe", "Poe"], ["Budget", "Taxes"], "2024-05-01")}
+        pairs, days, _ = aggregate_deltas(before, after)
+
+        assert pairs == [{"a": "Doe", "b": "Poe", "delta": 1}, {"a": "Poe", "b": "Roe", "delta": 1}]
+        assert days == [{"issue": "Taxes", "day": "2024-05-01", "delta": 1}]
+        assert aggregate_deltas(after, after)[:2] == ([], [])
+
+    def test_date_change_moves_issue_mentions(self):
+        before = {"A": mentions(["Doe"], ["Budget"], "2024-05-01")}
+        after = {"A": mentions(["Doe"], ["Budget"], "2024-05-02")}
+        _, days, _ = aggregate_deltas(before, after)
+
+        assert days == [
+            {"issue": "Budget", "day": "2024-05-01", "delta": -1}, {"issue": "Budget", "day": "2024-05-02", "delta": 1},
+        ]
+
+    def test_uncounted_article_is_counted_in_full(self):
+        record = {"title": "A", "stakeholders": ["Doe", "Roe"], "issues": ["Budget"], "date_published": "2024-05-01",
+                  "activity_day": None, "aggregated": False}
+        assert counted_mentions(record) == mentions()
+        assert article_day_rows([{"id": "4:x:1", **record}], "2024-06-01") == [{"id": "4:x:1", "day": "2024-05-01"}]
+
+    def test_rebuild_matches_incremental_counters(self):
+        records = [
+            {"title": "A", "stakeholders": ["Doe"], "issues": ["Budget"], "date_published": "May 1, 2024", "activity_day": None},
+            {"title": "B", "stakeholders": ["Doe"], "issues": ["Budget", "Taxes"], "date_published": "last Tuesday",
+             "activity_day": None},
+            {"title": "C", "stakeholders": ["Roe"], "issues": ["Taxes"], "date_published": None, "activity_day": "2024-05-20"},
+        ]
+        today = "2024-06-01"
+        _, incremental, _ = aggregate_deltas({}, {record["title"]: current_mentions(record, today) for record in records})
+
+        # What REBUILD_ISSUE_DAYS_QUERY counts from the days MARK_ARTICLES_QUERY sets
+        days = {row["id"]: row["day"] for row in article_day_rows([{"id": r["title"], **r} for r in records], today)}
+        rebuilt = {}
+        for record in records:
+            for issue in record["issues"]:
+                rebuilt[(issue, days[record["title"]])] = rebuilt.get((issue, days[record["title"]]), 0) + 1
+
+        assert {(row["issue"], row["day"]): row["delta"] for row in incremental} == rebuilt
+        assert rebuilt[("Budget", today)] == 1
+
+class TestUploadTransaction:
+    @pytest.mark.asyncio
+    async def test_counters_in_upload_transaction(self):
+        before = []
+        after = [{"title": "A", "stakeholders": ["Doe", "Roe"], "issues": ["Budget"], "date_published": "May 1, 2024",
+                  "activity_day": None, "aggregated": False}]
+        tx = FakeTransaction(before, after)
+        payload = {"Article": {"Title": "A"}, "Stakeholders": [{"Name": "Doe"}, {"Name": "Roe"}], "Issues": [{"Title": "Budget"}]}
+
+        await KnowledgeGraphUploader._run_batch(tx, [payload])
+
+        queries = [query for query, _ in tx.queries]
+        assert queries[0] == ARTICLE_MENTIONS_QUERY
+        assert queries[-4:] == [ARTICLE_MENTIONS_QUERY, CO_MENTION_QUERY, ISSUE_DAY_QUERY, ARTICLE_DAY_QUERY]
+        assert tx.queries[-3][1]["rows"] == [{"a": "Doe", "b": "Roe", "delta": 1}]
+        assert tx.queries[-2][1]["rows"] == [{"issue": "Budget", "day": "2024-05-01", "delta": 1}]
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,168 @@
+# File: test_graph_queries.py
+# Directory: tests/
+
+"""
+Unit Test for the cached graph read queries
+Test Objective:
+- Verify that repeated reads are served from the cache without querying Neo4j.
+- Verify that invalidating an entity evicts exactly the cached results built from it.
+- Verify that a result read while its entities were being written is not cached.
+- Verify that the entity tags of an upload payload cover the nodes and counters it merges.
+Expected Results:
+- The fake driver sees one query per distinct read until an upload touches an entity of that read.
+- Results of unrelated entities stay cached; the cache stays within its size limit.
+Variables Used:
+- A fake Neo4j driver returning canned records and counting queries, and a minimal extraction payload.
+"""
+
+import asyncio
+import pytest
+from config.config import Config
+from tools.graph_queries import (
+    ISSUE_ACTIVITY_TAG, GraphReadCache, GraphReader, entity_tags, get_graph_reader, invalidate_graph_cache,
+)
+from tools.merge_keys import merge_key, with_merge_keys
+
+class FakeRecord:
+    def __init__(self, data):
+        self._data = data
+
+    def data(self):
+        return self._data
+
+class FakeResult:
+    def __init__(self, data):
+        self._data = data
+
+    async def single(self):
+        return FakeRecord(self._data) if self._data is not None else None
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query, **params):
+        self.driver.queries.append(params)
+        if self.driver.gate is not None:
+            await self.driver.gate.wait()
+        return FakeResult(self.driver.respond(params))
+
+class FakeDriver:
+    def __init__(self):
+        self.queries = []
+        self.gate = None
+
+    def session(self):
+        return FakeSession(self)
+
+    def respond(self, params):
+        if params.get("name") == "Jane Doe":
+            return {
+                "stakeholder": {"name": "Jane Doe", "type": "Politician", "aliases": []},
+                "connections": [{"relationship": "HAS_ROLE_IN", "label": "Institution", "node": {"name": "Senate"}}],
+                "articles": [{"title": "Budget passes", "url": "https://example.com/a", "date_published": "2024-05-01"}],
+                "co_mentioned": [{"name": "Richard Roe", "type": "Politician", "articles": 1}],
+            }
+        if params.get("title") == "Budget":
+            return {"issue": {"title": "Budget", "objective": None}, "articles": []}
+        if params.get("key") == merge_key("We will balance the budget."):
+            return {"quote": {"text": "We will balance the budget."}, "speakers": ["Jane Doe"], "articles": []}
+        return None
+
+class TestGraphReadCache:
+    @pytest.mark.asyncio
+    async def test_repeated_reads_are_cached(self):
+        driver = FakeDriver()
+        reader = GraphReader(driver, GraphReadCache())
+
+        first = await reader.stakeholder_neighborhood("Jane Doe")
+        second = await reader.stakeholder_neighborhood("Jane Doe")
+        quote = await reader.quote_lookup("  we will balance the BUDGET. ")
+        await reader.quote_lookup("We will balance the budget.")
+
+        assert first is second and first["stakeholder"]["name"] == "Jane Doe"
+        assert quote["speakers"] == ["Jane Doe"]
+        assert len(driver.queries) == 2
+        assert reader.cache.snapshot()["hits"] == 2
+        assert await reader.stakeholder_neighborhood("Nobody") is None
+        assert await reader.quote_lookup("   ") is None
+
+    @pytest.mark.asyncio
+    async def test_invalidation_is_per_entity(self):
+        driver = FakeDriver()
+        reader = GraphReader(driver, GraphReadCache())
+        await reader.stakeholder_neighborhood("Jane Doe")
+        await reader.issue_timeline("Budget")
+
+        # The neighborhood depends on its connections and co-mentioned stakeholders too
+        assert reader.cache.invalidate([("Institution", "Senate")]) == 1
+        assert reader.cache.invalidate([("Stakeholder", "Jane Doe")]) == 0
+        await reader.issue_timeline("Budget")
+        assert len(driver.queries) == 2
+        await reader.stakeholder_neighborhood("Jane Doe")
+        assert len(driver.queries) == 3
+
+    @pytest.mark.asyncio
+    async def test_read_racing_a_write_is_not_cached(self):
+        driver = FakeDriver()
+        driver.gate = asyncio.Event()
+        reader = GraphReader(driver, GraphReadCache())
+
+        read = asyncio.create_task(reader.issue_timeline("Budget"))
+        while not driver.queries:
+            await asyncio.sleep(0)
+        reader.cache.invalidate([("Issue", "Budget")])
+        driver.gate.set()
+        await read
+
+        assert len(reader.cache) == 0
+        await reader.issue_timeline("Budget")
+        assert len(reader.cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_size_limit_and_ttl(self):
+        driver = FakeDriver()
+        reader = GraphReader(driver, GraphReadCache(max_entries=2, ttl=0))
+        for limit in (1, 2, 3):
+            await reader.issue_timeline("Budget", limit)
+        assert len(reader.cache) == 2
+        await reader.issue_timeline("Budget", 3)  # Expired at once with a TTL of 0
+        assert len(driver.queries) == 4
+
+    @pytest.mark.asyncio
+    async def test_uploads_invalidate_the_loop_reader(self):
+        config = Config()
+        config.NEO4J_URI = "bolt://127.0.0.1:1"
+        reader = get_graph_reader(config)
+        reader.driver = FakeDriver()
+        await reader.issue_timeline("Budget")
+
+        payload = with_merge_keys({"Article": {"Title": "Budget passes"}, "Issues": [{"Title": "Budget"}]})
+        assert invalidate_graph_cache(entity_tags(payload)) == 1
+
+class TestEntityTags:
+    def test_payload_tags(self):
+        payload = with_merge_keys({
+            "Article": {"Title": "Budget passes"},
+            "Stakeholders": [{"Name": "Jane Doe", "Relationships": {"has_role_in": "Senate", "related_to": "Budget fight"},
+                              "Quotes": [{"Text": "We will balance the budget."}]}],
+            "Events": [{"Title": "Vote", "Participants": ["Richard Roe"]}],
+            "Issues": [{"Title": "Budget"}],
+            "Documents": [{"Document Title": "Budget bill"}],
+        })
+
+        assert entity_tags(payload) == {
+            ("Article", "Budget passes"), ("Stakeholder", "Jane Doe"), ("Stakeholder", "Richard Roe"),
+            ("Institution", "Senate"), ("Controversy", merge_key("Budget fight")),
+            ("Quote", merge_key("We will balance the budget.")), ("Event", "Vote"), ("Issue", "Budget"),
+            ("Document", "Budget bill"), ISSUE_ACTIVITY_TAG,
+        }
+
+if __name__ == '__main__':
+    pytest.main()
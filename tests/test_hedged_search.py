@@ -0,0 +1,120 @@
+# File: test_hedged_search.py
+# Directory: tests/
+
+"""
+Unit Test for reciprocal-rank fusion, hedged URL generation and URL streaming
+Test Objective:
+- Verify that ranked lists are fused and deduplicated by normalized URL.
+- Verify that hedged search keeps the engines that answered and ignores stragglers after the deadline.
+- Verify that the URL stream stops at the job's URL budget and cancels the searches still running.
+Expected Results:
+- URLs ranked highly by several lists come first; tracking parameters, www and trailing slashes don't create duplicates.
+- A slow engine is cancelled once the deadline has passed and a faster engine has finished.
+- An engine whose searches failed does not end the wait for an engine still running.
+- The stream yields distinct URLs up to the budget and records them in the state.
+Variables Used:
+- Synthetic ranked lists and a patched per-term search with per-engine delays.
+"""
+
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+from models.state import SharedState
+from config.config import Config
+from agents.url_generation_agent import hedged_url_generation_agent, stream_urls
+from tools.searching.rank_fusion import reciprocal_rank_fusion, normalize_url
+
+class TestRankFusion:
+    def test_fusion_order_and_dedup(self):
+        fused = reciprocal_rank_fusion([
+            ["http://a.com/1", "http://b.com/2", "http://c.com/3"],
+            ["https://www.b.com/2/?utm_source=x", "http://a.com/1", "http://d.com/4"],
+        ])
+        assert fused[:2] == ["http://a.com/1", "http://b.com/2"]
+        assert len(fused) == 4
+
+    def test_limit(self):
+        assert reciprocal_rank_fusion([[f"http://a.com/{i}" for i in range(30)]], limit=15) == [
+            f"http://a.com/{i}" for i in range(15)
+        ]
+
+    def test_normalize_url(self):
+        assert normalize_url("HTTP://WWW.Example.com/story/?b=2&a=1&fbclid=z#top") == "https://example.com/story?a=1&b=2"
+
+class TestHedgedSearch:
+    @pytest.mark.asyncio
+    async def test_stragglers_ignored_after_deadline(self):
+        state = SharedState()
+        state.config = Config()
+        state.config.SEARCH_HEDGE_DEADLINE = 0.05
+        state.search_terms = ["term one", "term two"]
+        cancelled = []
+
+        async def fake_search(engine, term, state):
+            if engine == "tavily":
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(term)
+                    raise
+            return [f"http://{engine}.example.com/{term.replace(' ', '-')}"]
+
+        with patch('agents.url_generation_agent.fetch_term', new=fake_search):
+            started = time.monotonic()
+            await hedged_url_generation_agent(state)
+            elapsed = time.monotonic() - started
+
+        assert elapsed < 1
+        assert sorted(cancelled) == ["term one", "term two"]
+        assert sorted(state.urls_to_be_processed) == [
+            "http://google_cse.example.com/term-one",
+            "http://google_cse.example.com/term-two",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_failed_engine_does_not_end_the_wait(self):
+        state = SharedState()
+        state.config = Config()
+        state.config.SEARCH_HEDGE_DEADLINE = 0.01
+        state.search_terms = ["term one"]
+
+        async def fake_search(engine, term, state):
+            if engine == "google_cse":
+                raise RuntimeError("quota exceeded")
+            await asyncio.sleep(0.1)
+            return [f"http://{engine}.example.com/{term.replace(' ', '-')}"]
+
+        with patch('agents.url_generation_agent.fetch_term', new=fake_search):
+            await hedged_url_generation_agent(state)
+
+        assert state.urls_to_be_processed == ["http://tavily.example.com/term-one"]
+        assert any("quota exceeded" in log for log in state.logs)
+
+class TestURLStream:
+    @pytest.mark.asyncio
+    async def test_stops_at_budget_and_cancels_searches(self):
+        state = SharedState()
+        state.config = Config()
+        state.url_budget = 3
+        state.search_terms = ["fast", "slow"]
+        cancelled = []
+
+        async def fake_search(engine, term, state):
+            if term == "slow":
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(engine)
+                    raise
+            return [f"http://{engine}.example.com/{i}" for i in range(2)] + ["http://shared.example.com/story"]
+
+        with patch('agents.url_generation_agent.fetch_term', new=fake_search):
+            started = time.monotonic()
+            urls = [url async for url in stream_urls(state, ["google_cse", "tavily"])]
+            elapsed = time.monotonic() - started
+
+        assert elapsed < 1
+        assert len(urls) == 3
+        assert state.urls_to_be_processed == urls
+        assert sorted(cancelled) == ["google_cse", "tavily"]
@@ -0,0 +1,115 @@
+# File: test_job_control.py
+# Directory: tests/
+
+"""
+Unit Test for per-job deadlines, budgets and cancellation
+Test Objective:
+- Verify that a job is stopped when it is cancelled, runs past its deadline or exceeds its token/cost budget.
+- Verify that stopping a job cancels the work it has in flight and records partial results.
+Expected Results:
+- The job status reflects why it stopped; in-flight child tasks receive CancelledError.
+- Partial results report how far each stage got.
+- LLM usage is charged only to the job running in the current task.
+Variables Used:
+- A stand-in workflow that fills part of the state and then waits on a child task.
+"""
+
+import asyncio
+import pytest
+from models.state import SharedState
+from tools.job_control import JobControl, charge_llm_usage, parse_prices
+
+def make_job(**limits):
+    state = SharedState()
+    state.next_step = "article_extraction"
+    return JobControl("job-1", state, prices={"model": (1.0, 2.0)}, **limits)
+
+class StandInWorkflow:
+    def __init__(self, usage=None):
+        self.usage = usage
+        self.started = asyncio.Event()
+        self.child_cancelled = False
+
+    async def __call__(self, state):
+        state.articles = {"http://example.com/a": "text", "http://example.com/b": "text"}
+        state.extracted_data = {"http://example.com/a": {"Article": {"Title": "A"}}}
+        await asyncio.gather(self.child())
+
+    async def child(self):
+        # Stands in for an in-flight scrape or LLM call spawned by the workflow
+        try:
+            if self.usage:
+                charge_llm_usage("model", {"usage": self.usage})
+            self.started.set()
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            self.child_cancelled = True
+            raise
+
+class TestJobControl:
+    @pytest.mark.asyncio
+    async def test_cancel_tears_down_in_flight_work(self):
+        job = make_job()
+        workflow = StandInWorkflow()
+        runner = asyncio.create_task(job.run(workflow))
+        await workflow.started.wait()
+
+        assert job.cancel()
+        await runner
+
+        assert job.status == "cancelled"
+        assert workflow.child_cancelled
+        assert job.partial_results == {
+            "stopped_at": "article_extraction", "urls": 0, "articles": 2,
+            "extracted": 1, "reviewed": 0, "uploaded": 0, "unchanged": 0, "upload_complete": False,
+        }
+        assert not job.cancel()
+
+    @pytest.mark.asyncio
+    async def test_deadline(self):
+        job = make_job(deadline=0.05)
+        workflow = StandInWorkflow()
+        await asyncio.wait_for(job.run(workflow), timeout=2)
+
+        assert job.status == "timed_out"
+        assert workflow.child_cancelled
+
+    @pytest.mark.asyncio
+    async def test_token_budget(self):
+        job = make_job(max_tokens=100)
+        workflow = StandInWorkflow(usage={"prompt_tokens": 80, "completion_tokens": 40})
+        await asyncio.wait_for(job.run(workflow), timeout=2)
+
+        assert job.status == "over_budget"
+        assert job.tokens_used == 120
+        assert "Token budget" in job.reason
+
+    @pytest.mark.asyncio
+    async def test_cost_budget(self):
+        job = make_job(max_cost=0.1)
+        workflow = StandInWorkflow(usage={"prompt_tokens": 50, "completion_tokens": 50})
+        await asyncio.wait_for(job.run(workflow), timeout=2)
+
+        assert job.status == "over_budget"
+        assert job.cost_used == pytest.approx(0.15)
+
+    @pytest.mark.asyncio
+    async def test_completed(self):
+        job = make_job(deadline=5)
+
+        async def workflow(state):
+            charge_llm_usage("model", {"usage": {"prompt_tokens": 3, "completion_tokens": 2}})
+            state.next_step = "end"
+
+        await job.run(workflow)
+        assert job.status == "completed"
+        assert job.tokens_used == 5 and job.partial_results is None
+        # Outside a job, usage is not charged anywhere
+        charge_llm_usage("model", {"usage": {"prompt_tokens": 3, "completion_tokens": 2}})
+        assert job.tokens_used == 5
+
+    def test_parse_prices(self):
+        assert parse_prices("gpt-4=0.03:0.06, cheap=0.001,broken=x") == {"gpt-4": (0.03, 0.06), "cheap": (0.001, 0.001)}
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,211 @@
+# File: test_job_queue.py
+# Directory: tests/
+
+"""
+Unit Test for the durable job queue and pipeline workers
+Test Objective:
+- Verify that the SQLite job queue hands each job to one worker, in priority order, under a lease.
+- Verify that jobs of dead workers are re-queued after their lease expires and given up after too many attempts.
+- Verify that a worker runs claimed jobs and reports status, logs and cancellation through the queue.
+- Verify that a stalled worker whose job was re-claimed stops running it and no longer writes to it.
+- Verify that the worker's queue calls run outside the event loop thread.
+Expected Results:
+- Interactive jobs are claimed before older bulk jobs when the worker prefers interactive.
+- Queued jobs are cancelled at once; running jobs are cancelled by their worker at the next heartbeat.
+- Status summaries and log lines written by the worker are readable from the queue.
+Variables Used:
+- A temporary SQLite queue, a fake clock and a stand-in workflow.
+"""
+
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+from config.config import Config
+from tools.job_queue import LeaseLost, SQLiteJobQueue
+from worker import PipelineWorker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_queue(tmp_path, clock=None, max_attempts=3):
+    return SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"), max_attempts=max_attempts, clock=clock or FakeClock())
+
+class TestSQLiteJobQueue:
+    def test_claim_order_and_single_claim(self, tmp_path):
+        clock = FakeClock()
+        queue = make_queue(tmp_path, clock)
+        queue.enqueue("bulk-1", {"user_query": "refresh"}, "bulk")
+        clock.now += 1
+        queue.enqueue("interactive-1", {"user_query": "analyst"}, "interactive")
+
+        first = queue.claim("w1", 30, ["interactive", "bulk"])
+        second = queue.claim("w2", 30, ["interactive", "bulk"])
+        assert (first["id"], second["id"]) == ("interactive-1", "bulk-1")
+        assert first["payload"] == {"user_query": "analyst"} and first["attempts"] == 1
+        assert queue.claim("w3", 30, ["interactive", "bulk"]) is None
+        assert queue.stats()["running"] == 2 and queue.stats()["busy_workers"] == 2
+
+    def test_expired_lease_is_requeued_then_failed(self, tmp_path):
+        clock = FakeClock()
+        queue = make_queue(tmp_path, clock, max_attempts=2)
+        queue.enqueue("job", {"user_query": "q"})
+
+        assert queue.claim("w1", 30, ["interactive"])["attempts"] == 1
+        clock.now += 31
+        assert queue.claim("w2", 30, ["interactive"])["attempts"] == 2
+        clock.now += 31
+        assert queue.claim("w3", 30, ["interactive"]) is None
+        assert queue.get("job")["status"] == "failed"
+
+    def test_heartbeat_logs_and_cancel(self, tmp_path):
+        queue = make_queue(tmp_path)
+        queue.enqueue("queued", {"user_query": "q"})
+        queue.enqueue("running", {"user_query": "q"})
+        queue.claim("w1", 30, ["interactive"])  # Claims "queued" (oldest)
+        queue.enqueue("other", {"user_query": "q"})
+
+        assert queue.request_cancel("other") == "cancelled"
+        assert queue.request_cancel("missing") is None
+        assert not queue.heartbeat("queued", "w1", 30, {"next_step": "review"}, ["INFO: a", "INFO: b"])
+        assert queue.request_cancel("queued") == "running"
+        assert queue.heartbeat("queued", "w1", 30, {"next_step": "review"}, ["INFO: c"])
+
+        queue.finish("queued", "w1", "cancelled", {"next_step": "review"}, ["WARNING: stopped"])
+        record = queue.get("queued")
+        assert record["status"] == "cancelled" and record["summary"] == {"next_step": "review"}
+        assert queue.logs("queued") == ["INFO: a", "INFO: b", "INFO: c", "WARNING: stopped"]
+        assert queue.logs("queued", since=3) == ["WARNING: stopped"]
+        assert queue.get("running")["queue_position"] == 1
+
+    def test_heartbeat_after_lease_taken_over(self, tmp_path):
+        clock = FakeClock()
+        queue = make_queue(tmp_path, clock)
+        queue.enqueue("job", {"user_query": "q"})
+        queue.claim("w1", 30, ["interactive"])
+        clock.now += 31
+        queue.claim("w2", 30, ["interactive"])
+
+        with pytest.raises(LeaseLost):
+            queue.heartbeat("job", "w1", 30, {"next_step": "review"}, ["INFO: from w1"])
+        queue.finish("job", "w1", "completed", {"next_step": "end"}, ["INFO: w1 done"])
+        assert not queue.heartbeat("job", "w2", 30, {"next_step": "scraping"}, ["INFO: from w2"])
+
+        record = queue.get("job")
+        assert record["worker"] == "w2" and record["status"] == "running"
+        assert record["summary"] == {"next_step": "scraping"}
+        assert queue.logs("job") == ["INFO: from w2"]
+
+class TestPipelineWorker:
+    def make_worker(self, tmp_path):
+        config = Config()
+        config.WORKER_POLL_INTERVAL = 0.01
+        config.WORKER_HEARTBEAT_INTERVAL = 0.01
+        queue = SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"))
+        return PipelineWorker(config, queue, worker_id="w1", concurrency=2), queue
+
+    @pytest.mark.asyncio
+    async def test_runs_jobs_and_reports(self, tmp_path):
+        worker, queue = self.make_worker(tmp_path)
+        queue.enqueue("job-1", {"user_query": "city budget", "priority": "bulk"}, "bulk")
+
+        async def workflow(state):
+            state.add_log(f"Searching for {state.user_query}")
+            state.next_step = "end"
+
+        stop = asyncio.Event()
+        with patch("worker.run_workflow", workflow):
+            runner = asyncio.create_task(worker.run(stop))
+            for _ in range(200):
+                if queue.get("job-1")["status"] == "completed":
+                    break
+                await asyncio.sleep(0.01)
+            stop.set()
+            await runner
+
+        record = queue.get("job-1")
+        assert record["status"] == "completed" and record["worker"] == "w1"
+        assert record["summary"]["priority"] == "bulk"
+        assert "INFO: Searching for city budget" in queue.logs("job-1")
+
+    @pytest.mark.asyncio
+    async def test_cancel_running_job(self, tmp_path):
+        worker, queue = self.make_worker(tmp_path)
+        queue.enqueue("job-1", {"user_query": "q"})
+        started = asyncio.Event()
+
+        async def workflow(state):
+            state.next_step = "article_extraction"
+            started.set()
+            await asyncio.sleep(10)
+
+        with patch("worker.run_workflow", workflow):
+            claimed = queue.claim("w1", 30, ["interactive"])
+            running = asyncio.create_task(worker.run_job(claimed))
+            await started.wait()
+            queue.request_cancel("job-1")
+            job = await asyncio.wait_for(running, timeout=2)
+
+        assert job.status == "cancelled"
+        record = queue.get("job-1")
+        assert record["status"] == "cancelled"
+        assert record["summary"]["partial_results"]["stopped_at"] == "article_extraction"
+
+    @pytest.mark.asyncio
+    async def test_lost_lease_cancels_job(self, tmp_path):
+        worker, queue = self.make_worker(tmp_path)
+        queue.enqueue("job-1", {"user_query": "q"})
+        started = asyncio.Event()
+
+        async def workflow(state):
+            started.set()
+            await asyncio.sleep(10)
+
+        with patch("worker.run_workflow", workflow):
+            claimed = queue.claim("w1", 30, ["interactive"])
+            running = asyncio.create_task(worker.run_job(claimed))
+            await started.wait()
+            # Another worker took the job over (as after an expired lease)
+            with queue._connect() as conn:
+                conn.execute("UPDATE jobs SET worker = 'w2' WHERE id = 'job-1'")
+            job = await asyncio.wait_for(running, timeout=2)
+
+        assert job.status == "cancelled" and job.reason == "Lease lost to another worker."
+        record = queue.get("job-1")
+        assert record["worker"] == "w2" and record["status"] == "running"
+        assert not [line for line in queue.logs("job-1") if "Claimed by worker w1" in line]
+
+    @pytest.mark.asyncio
+    async def test_queue_calls_run_off_the_loop(self, tmp_path):
+        worker, queue = self.make_worker(tmp_path)
+        queue.enqueue("job-1", {"user_query": "q"})
+        threads = {}
+        for name in ("claim", "heartbeat", "finish"):
+            def tracked(*args, call=getattr(queue, name), name=name):
+                threads.setdefault(name, threading.get_ident())
+                return call(*args)
+            setattr(queue, name, tracked)
+
+        async def workflow(state):
+            await asyncio.sleep(0.05)
+            state.next_step = "end"
+
+        stop = asyncio.Event()
+        with patch("worker.run_workflow", workflow):
+            runner = asyncio.create_task(worker.run(stop))
+            for _ in range(200):
+                if queue.get("job-1")["status"] == "completed":
+                    break
+                await asyncio.sleep(0.01)
+            stop.set()
+            await runner
+
+        assert set(threads) == {"claim", "heartbeat", "finish"}
+        assert threading.get_ident() not in threads.values()
+
+if __name__ == '__main__':
+    pytest.main()
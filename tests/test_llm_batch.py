@@ -0,0 +1,148 @@
+# File: test_llm_batch.py
+# Directory: tests/
+
+"""
+Integration Test for offline batch LLM execution
+Test Objective:
+- Verify that BatchLLMClient uploads a JSONL request file, creates a batch, polls it and streams results by custom ID.
+- Verify that article extraction in "batch" execution mode fills `extracted_data` from the batch output.
+- Verify that the token usage of batch results is charged to the running job.
+Expected Results:
+- Every request comes back under its custom ID; failed requests carry an error instead of content.
+- Extracted data is stored per URL; unparseable results and results that don't match the schema are logged and skipped.
+Variables Used:
+- A local stand-in for an OpenAI-compatible batch API (files, batches, polling, output download).
+"""
+
+import json
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from models.state import SharedState
+from config.config import Config
+from agents.article_extraction_agent import article_extraction_agent
+from tools.job_control import JobControl, current_job
+from tools.llm_batch import BatchLLMClient
+
+class StandInBatchServer:
+    """Answers each chat request with the user message echoed back; marks 'fail' requests as errors."""
+
+    def __init__(self):
+        self.files = {}
+        self.batches = {}
+        self.polls = 0
+        app = web.Application()
+        app.router.add_post("/v1/files", self.upload)
+        app.router.add_post("/v1/batches", self.create_batch)
+        app.router.add_get("/v1/batches/{batch_id}", self.get_batch)
+        app.router.add_get("/v1/files/{file_id}/content", self.download)
+        self.runner = web.AppRunner(app)
+
+    async def start(self):
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    async def upload(self, request):
+        form = await request.post()
+        file_id = f"file-{len(self.files)}"
+        self.files[file_id] = form["file"].file.read().decode()
+        return web.json_response({"id": file_id, "purpose": form["purpose"]})
+
+    async def create_batch(self, request):
+        payload = await request.json()
+        lines = [json.loads(line) for line in self.files[payload["input_file_id"]].splitlines()]
+        output = []
+        for line in lines:
+            content = line["body"]["messages"][-1]["content"]
+            if "fail" in content:
+                output.append({"custom_id": line["custom_id"], "response": {"status_code": 500, "body": {}}, "error": None})
+            else:
+                body = {
+                    "model": line["body"]["model"],
+                    "choices": [{"message": {"role": "assistant", "content": self.answer(content)}}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 5},
+                }
+                output.append({"custom_id": line["custom_id"], "response": {"status_code": 200, "body": body}, "error": None})
+        output_id = f"file-{len(self.files)}"
+        self.files[output_id] = "\n".join(json.dumps(record) for record in output)
+        batch_id = f"batch-{len(self.batches)}"
+        self.batches[batch_id] = {"id": batch_id, "status": "in_progress", "output_file_id": output_id}
+        return web.json_response(self.batches[batch_id])
+
+    async def get_batch(self, request):
+        batch = self.batches[request.match_info["batch_id"]]
+        self.polls += 1
+        if self.polls >= 2:
+            batch["status"] = "completed"
+        return web.json_response(batch)
+
+    async def download(self, request):
+        return web.Response(text=self.files[request.match_info["file_id"]])
+
+    @staticmethod
+    def answer(content):
+        if "Article URL:" not in content:
+            return content
+        url = content.split("Article URL:")[1].split()[0]
+        if "garbled" in content:
+            return "not json"
+        if "untitled" in content:
+            return json.dumps({"Article": {"URL": url}})
+        return json.dumps({"Article": {"Title": f"Title for {url}", "URL": url}})
+
+@pytest_asyncio.fixture
+async def batch_server():
+    server = StandInBatchServer()
+    api_base = await server.start()
+    yield server, api_base
+    await server.stop()
+
+class TestBatchLLMClient:
+    @pytest.mark.asyncio
+    async def test_round_trip(self, batch_server, tmp_path):
+        server, api_base = batch_server
+        client = BatchLLMClient(api_base, api_key="test", work_dir=str(tmp_path), poll_interval=0.01)
+        requests = [
+            ("ok-1", {"model": "m", "messages": [{"role": "user", "content": "hello"}]}),
+            ("bad-1", {"model": "m", "messages": [{"role": "user", "content": "please fail"}]}),
+        ]
+        results = {custom_id: (content, error) async for custom_id, content, error in client.run(requests)}
+
+        assert results["ok-1"] == ("hello", None)
+        assert results["bad-1"][0] is None and "HTTP 500" in results["bad-1"][1]
+        assert server.polls == 2
+        assert len(list(tmp_path.glob("*.jsonl"))) == 1
+
+    @pytest.mark.asyncio
+    async def test_extraction_in_batch_mode(self, batch_server, tmp_path):
+        _, api_base = batch_server
+        state = SharedState()
+        state.config = Config()
+        state.config.LLM_EXECUTION_MODE = "batch"
+        state.config.LLM_BATCH_API_BASE = api_base
+        state.config.LLM_BATCH_DIR = str(tmp_path)
+        state.config.LLM_BATCH_POLL_INTERVAL = 0.01
+        state.articles = {
+            "http://example.com/a": "Council passes budget.",
+            "http://example.com/b": "garbled article",
+            "http://example.com/c": "untitled article",
+        }
+        job = JobControl("job-1", state, prices={state.config.EXTRACTION_MODELS[-1]: (1.0, 2.0)})
+        token = current_job.set(job)
+        try:
+            await article_extraction_agent(state)
+        finally:
+            current_job.reset(token)
+
+        assert state.extracted_data == {
+            "http://example.com/a": {"Article": {"Title": "Title for http://example.com/a", "URL": "http://example.com/a"}}
+        }
+        assert any("JSON parsing error for http://example.com/b" in log for log in state.logs)
+        assert any("Extracted data for http://example.com/c does not match" in log for log in state.logs)
+        assert job.tokens_used == 45
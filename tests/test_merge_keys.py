@@ -0,0 +1,51 @@
+# File: test_merge_keys.py
+# Directory: tests/
+
+"""
+Unit Test for the hashed merge keys of long-text entities
+Test Objective:
+- Verify that texts differing only in whitespace, case or typographic quotes share a merge key.
+- Verify that keys are added to upload payloads without changing the stored payload.
+- Verify that the backfill computes the same keys as the uploader and skips blank texts.
+Expected Results:
+- Equivalent texts yield the same 64-character digest; different texts do not.
+- Every quote, fact, controversy and `related_to` in the payload copy carries its key.
+Variables Used:
+- Sample quote texts and a minimal extraction payload.
+"""
+
+import pytest
+from tools.merge_keys import merge_key, normalize_text, with_merge_keys
+from tools.backfill_merge_keys import key_rows
+
+class TestMergeKeys:
+    def test_equivalent_texts_share_key(self):
+        key = merge_key("We will  balance the budget.")
+        assert len(key) == 64
+        assert merge_key(" we will balance\nthe BUDGET. ") == key
+        assert merge_key("“We’ll” — balance") == merge_key('"we\'ll" - balance')
+        assert merge_key("We will raise taxes.") != key
+        assert merge_key("   ") is None and merge_key(None) is None
+        assert normalize_text("A B") == "a b"
+
+    def test_with_merge_keys_copies_payload(self):
+        data = {
+            "Article": {"Title": "A"},
+            "Stakeholders": [{"Name": "Mayor", "Relationships": {"related_to": "Budget fight"},
+                              "Quotes": [{"Text": "We will balance the budget."}]}],
+            "Facts": [{"Fact": "The deficit is $2B."}],
+            "Controversies": [{"Summary": "Budget  fight"}],
+        }
+        keyed = with_merge_keys(data)
+
+        assert keyed["Stakeholders"][0]["Quotes"][0]["Key"] == merge_key("We will balance the budget.")
+        assert keyed["Facts"][0]["Key"] == merge_key("The deficit is $2B.")
+        assert keyed["Controversies"][0]["Key"] == keyed["Stakeholders"][0]["Relationships"]["related_to_key"]
+        assert "Key" not in data["Facts"][0] and "related_to_key" not in data["Stakeholders"][0]["Relationships"]
+
+    def test_backfill_rows(self):
+        rows = key_rows([{"id": "4:x:1", "text": "Quote  one"}, {"id": "4:x:2", "text": " "}])
+        assert rows == [{"id": "4:x:1", "key": merge_key("quote one")}]
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,66 @@
+# File: test_model_cascade.py
+# Directory: tests/
+
+"""
+Unit Test for the model cascade
+Test Objective:
+- Verify that stages try the cheap model first and escalate only on rejected output or errors.
+- Verify that escalation metrics are recorded per stage.
+Expected Results:
+- Accepted cheap output is returned without calling the strong model.
+- Rejected output or an API error moves on to the next model.
+- When every model is rejected, the strongest model's raw output is returned unparsed.
+- Review verdicts are judged on their parsed statuses.
+Variables Used:
+- A fake model call returning canned outputs per model.
+"""
+
+import pytest
+from tools.model_cascade import run_cascade, cascade_metrics
+from agents.reviewer_agent import is_valid
+
+def fake_call(outputs, calls):
+    async def call(model):
+        calls.append(model)
+        output = outputs[model]
+        if isinstance(output, Exception):
+            raise output
+        return output
+    return call
+
+def parse_int(text):
+    return int(text) if text.isdigit() else None
+
+class TestModelCascade:
+    def setup_method(self):
+        cascade_metrics.reset()
+
+    @pytest.mark.asyncio
+    async def test_cheap_model_accepted(self):
+        calls = []
+        parsed, raw = await run_cascade("stage", ["cheap", "strong"], fake_call({"cheap": "1", "strong": "2"}, calls), parse_int)
+        assert (parsed, raw, calls) == (1, "1", ["cheap"])
+        assert cascade_metrics.snapshot()["stage"]["escalation_rate"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_escalates_on_rejection_and_error(self):
+        calls = []
+        outputs = {"cheap": "not a number", "mid": RuntimeError("model unavailable"), "strong": "3"}
+        parsed, _ = await run_cascade("stage", ["cheap", "mid", "strong"], fake_call(outputs, calls), parse_int)
+        assert parsed == 3
+        assert calls == ["cheap", "mid", "strong"]
+        stats = cascade_metrics.snapshot()["stage"]
+        assert stats["escalations"] == 1 and stats["models"] == {"strong": 1}
+
+    @pytest.mark.asyncio
+    async def test_all_rejected_returns_last_raw(self):
+        parsed, raw = await run_cascade("stage", ["cheap", "strong"], fake_call({"cheap": "x", "strong": "y"}, []), parse_int)
+        assert (parsed, raw) == (None, "y")
+        assert cascade_metrics.snapshot()["stage"]["rejected"] == 1
+
+    def test_review_verdicts(self):
+        valid = '{"Review": {"Syntax": {"Status": "Valid"}, "Consistency": {"Status": "Valid"}}}'
+        invalid = '{"Review": {"Syntax": {"Status": "Valid"}, "Consistency": {"Status": "Invalid"}}}'
+        assert is_valid(valid)
+        assert not is_valid(invalid)
+        assert not is_valid("Status: Invalid")
@@ -0,0 +1,119 @@
+# File: test_politeness.py
+# Directory: tests/
+
+"""
+Unit Test for PolitenessScheduler and RobotsCache
+Test Objective:
+- Verify that the scheduler interleaves domains, honours per-domain concurrency and delay, and skips disallowed URLs.
+Expected Results:
+- Domains are started round-robin rather than one domain's backlog first.
+- No domain ever has more requests in flight than its limit.
+- Consecutive requests to one domain are spaced by at least the minimum delay.
+- URLs disallowed by robots.txt are returned instead of scraped, and crawl-delay raises the spacing.
+- URLs from an async stream are scraped as they arrive, before the stream is exhausted.
+- Slots of idle domains are dropped by the periodic sweep; slots still in flight or delayed are kept.
+Variables Used:
+- A fake worker that records start times and a pre-filled robots.txt cache.
+"""
+
+import asyncio
+import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import pytest
+from tools.scraping import politeness
+from tools.scraping.politeness import PolitenessScheduler, RobotsCache
+
+def make_urls(domain, count):
+    return [f"https://{domain}/article-{i}" for i in range(count)]
+
+class RecordingWorker:
+    def __init__(self, duration=0.01):
+        self.duration = duration
+        self.started = []
+        self.active = {}
+        self.max_active = {}
+
+    async def __call__(self, url):
+        domain = urlparse(url).netloc
+        self.started.append((time.monotonic(), url))
+        self.active[domain] = self.active.get(domain, 0) + 1
+        self.max_active[domain] = max(self.max_active.get(domain, 0), self.active[domain])
+        await asyncio.sleep(self.duration)
+        self.active[domain] -= 1
+
+class TestPolitenessScheduler:
+    @pytest.mark.asyncio
+    async def test_round_robin_and_concurrency(self):
+        scheduler = PolitenessScheduler(max_concurrency=4, domain_concurrency=1, domain_min_delay=0.0)
+        worker = RecordingWorker(duration=0.02)
+        urls = make_urls("a.example.com", 4) + make_urls("b.example.com", 4)
+        disallowed = await scheduler.run(urls, worker)
+
+        assert disallowed == []
+        assert len(worker.started) == 8
+        assert max(worker.max_active.values()) == 1
+        first_two = {urlparse(url).netloc for _, url in worker.started[:2]}
+        assert first_two == {"a.example.com", "b.example.com"}
+
+    @pytest.mark.asyncio
+    async def test_min_delay(self):
+        scheduler = PolitenessScheduler(max_concurrency=5, domain_concurrency=5, domain_min_delay=0.05)
+        worker = RecordingWorker(duration=0.0)
+        await scheduler.run(make_urls("slow.example.com", 3), worker)
+
+        starts = [started for started, _ in worker.started]
+        gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+        assert all(gap >= 0.045 for gap in gaps)
+
+    @pytest.mark.asyncio
+    async def test_robots_disallow_and_crawl_delay(self):
+        parser = RobotFileParser()
+        parser.parse(["User-agent: *", "Disallow: /private", "Crawl-delay: 1"])
+        robots = RobotsCache(user_agent="TestBot")
+        robots._store("https://news.example.com", parser)
+        scheduler = PolitenessScheduler(max_concurrency=5, domain_concurrency=5, domain_min_delay=0.0, robots=robots)
+        worker = RecordingWorker(duration=0.0)
+
+        urls = ["https://news.example.com/private/a", "https://news.example.com/a", "https://news.example.com/b"]
+        disallowed = await scheduler.run(urls, worker)
+
+        assert disallowed == ["https://news.example.com/private/a"]
+        assert [url for _, url in worker.started] == urls[1:]
+        assert worker.started[1][0] - worker.started[0][0] >= 0.95
+
+    @pytest.mark.asyncio
+    async def test_streamed_urls_start_on_arrival(self):
+        scheduler = PolitenessScheduler(max_concurrency=5, domain_concurrency=5, domain_min_delay=0.0)
+        worker = RecordingWorker(duration=0.0)
+        produced = []
+
+        async def url_stream():
+            for url in make_urls("a.example.com", 2) + make_urls("b.example.com", 1):
+                produced.append(time.monotonic())
+                yield url
+                await asyncio.sleep(0.05)
+
+        await scheduler.run(url_stream(), worker)
+        assert len(worker.started) == 3
+        # The first URL is scraped long before the last one is produced
+        assert worker.started[0][0] < produced[-1]
+
+    @pytest.mark.asyncio
+    async def test_idle_slots_are_swept(self, monkeypatch):
+        monkeypatch.setattr(politeness, "SLOT_SWEEP_INTERVAL", 0.0)
+        scheduler = PolitenessScheduler(max_concurrency=4, domain_concurrency=1, domain_min_delay=0.0)
+        await scheduler.run(make_urls("a.example.com", 2) + make_urls("b.example.com", 1), RecordingWorker(duration=0.0))
+        scheduler._slots["busy.example.com"] = politeness._DomainSlot()
+        scheduler._slots["busy.example.com"].active = 1
+        scheduler._slots["delayed.example.com"] = politeness._DomainSlot()
+        scheduler._slots["delayed.example.com"].next_allowed = time.monotonic() + 60
+
+        scheduler._sweep_slots()
+        assert set(scheduler._slots) == {"busy.example.com", "delayed.example.com"}
+
+    def test_robots_cache_is_lru(self):
+        robots = RobotsCache(user_agent="TestBot", capacity=2)
+        for origin in ("https://a.com", "https://b.com", "https://c.com"):
+            robots._store(origin, None)
+        assert list(robots._entries) == ["https://b.com", "https://c.com"]
@@ -0,0 +1,50 @@
+# File: test_query_plan_cache.py
+# Directory: tests/
+
+"""
+Unit Test for QueryPlanCache
+Test Objective:
+- Verify that query plans are memoized by normalized query, bounded in size and persisted across instances.
+Expected Results:
+- Equivalent queries (case, punctuation, spacing) share one plan.
+- Once full, the least recently used plan is evicted first.
+- A fresh cache instance loads the plans saved to disk.
+Variables Used:
+- Small plans and a temporary JSON file.
+"""
+
+import pytest
+from tools.query_plan_cache import QueryPlanCache
+
+PLAN = {"search_terms": ["albany budget"], "search_agent": "General"}
+
+class TestQueryPlanCache:
+    @pytest.mark.asyncio
+    async def test_normalized_query(self):
+        cache = QueryPlanCache()
+        await cache.put("Albany Budget!", PLAN)
+        assert await cache.get("  albany   budget ") == PLAN
+        assert await cache.get("albany zoning") is None
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_plan_is_evicted(self):
+        cache = QueryPlanCache(max_entries=2)
+        await cache.put("first", PLAN)
+        await cache.put("second", PLAN)
+        await cache.get("first")
+        await cache.put("third", PLAN)
+        assert await cache.get("second") is None
+        assert await cache.get("first") == PLAN and await cache.get("third") == PLAN
+
+    @pytest.mark.asyncio
+    async def test_plans_persist(self, tmp_path):
+        path = str(tmp_path / "query_plans.json")
+        await QueryPlanCache(path).put("albany budget", PLAN)
+        await QueryPlanCache(path).put("albany zoning", PLAN)
+
+        cache = QueryPlanCache(path, max_entries=1)
+        assert await cache.get("albany zoning") == PLAN
+        assert await cache.get("albany budget") is None
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,70 @@
+# File: test_scraper_router.py
+# Directory: tests/
+
+"""
+Unit Test for ScraperRouter and LocalScraper extraction
+Test Objective:
+- Verify that the routing table ranks scrapers per domain from recorded outcomes and persists across instances.
+- Verify that the local extractor pulls article paragraphs out of page boilerplate.
+Expected Results:
+- Domains without history use the local-first default order.
+- A scraper that keeps failing on a domain is ranked below one that succeeds.
+- A reloaded router reproduces the saved ranking.
+- Extracted text holds the article paragraphs but not navigation or comments.
+Variables Used:
+- Synthetic scrape outcomes and a small HTML page.
+"""
+
+from tools.scraping.scraper_router import ScraperRouter, DEFAULT_SCRAPER_ORDER, domain_of
+from tools.scraping.local_scraper import extract_article_text
+
+ARTICLE_TEXT = "The city council voted on the housing bill after a long debate about zoning rules."
+
+class TestScraperRouter:
+    def test_default_order_for_unknown_domain(self):
+        router = ScraperRouter()
+        assert router.rank("https://www.example.com/story") == DEFAULT_SCRAPER_ORDER
+
+    def test_failures_demote_scraper(self):
+        router = ScraperRouter()
+        url = "https://news.example.com/a"
+        for _ in range(3):
+            router.record(url, "local_scraper", False, 0.5)
+            router.record(url, "jina_scraper", True, 1.0, ARTICLE_TEXT * 30)
+        assert router.rank(url)[0] == "jina_scraper"
+        # Other domains are unaffected
+        assert router.rank("https://other.example.org/b")[0] == "local_scraper"
+
+    def test_persistence(self, tmp_path):
+        path = str(tmp_path / "routing.json")
+        router = ScraperRouter(path)
+        url = "https://www.example.com/a"
+        router.record(url, "local_scraper", False, 2.0)
+        router.record(url, "jina_scraper", True, 1.0, ARTICLE_TEXT * 30)
+        router.save()
+
+        reloaded = ScraperRouter(path)
+        assert reloaded.rank(url) == router.rank(url)
+        assert domain_of(url) in reloaded.table
+
+class TestLocalExtraction:
+    def test_extracts_article_paragraphs(self):
+        html = f"""
+        <html><head><title>Housing Bill Passes</title><script>var x = 1;</script></head>
+        <body>
+          <nav><p>Home | Politics | Opinion | Subscribe to our newsletter today</p></nav>
+          <article>
+            <p>{ARTICLE_TEXT}</p>
+            <p>{ARTICLE_TEXT} Supporters said it would lower rents.</p>
+            <div class="comments"><p>Great article, thanks for sharing this with all of us here!</p></div>
+          </article>
+        </body></html>
+        """
+        text = extract_article_text(html)
+        assert text.startswith("Housing Bill Passes")
+        assert "Supporters said it would lower rents." in text
+        assert "Subscribe" not in text
+        assert "Great article" not in text
+
+    def test_returns_none_without_paragraphs(self):
+        assert extract_article_text("<html><body><div>short</div></body></html>") is None
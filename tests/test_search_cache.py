@@ -0,0 +1,115 @@
+# File: test_search_cache.py
+# Directory: tests/
+
+"""
+Unit Test for SearchCache
+Test Objective:
+- Verify that repeated searches are served from cache, expire by TTL, and are revalidated in the background.
+Expected Results:
+- Equivalent terms (case, punctuation, spacing) share one cache entry per provider.
+- Breaking-news terms expire on the short TTL.
+- Stale entries are returned immediately while a background refresh replaces them.
+- The on-disk tier serves entries to a fresh cache instance.
+- Empty results are not cached.
+- SQLite reads and writes run outside the event loop thread.
+Variables Used:
+- A fake search function that counts calls and a controllable clock.
+"""
+
+import asyncio
+import threading
+import pytest
+from tools.searching.search_cache import SearchCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class FakeSearch:
+    def __init__(self, results=None):
+        self.calls = 0
+        self.results = results if results is not None else ["http://example.com/1"]
+
+    async def __call__(self):
+        self.calls += 1
+        return list(self.results)
+
+class TestSearchCache:
+    @pytest.mark.asyncio
+    async def test_hit_on_normalized_term(self):
+        cache = SearchCache(clock=FakeClock())
+        search = FakeSearch()
+        await cache.get_or_fetch("google_cse", "Housing Bill", search)
+        results = await cache.get_or_fetch("google_cse", "  housing   bill! ", search)
+        assert results == ["http://example.com/1"]
+        assert search.calls == 1
+
+        await cache.get_or_fetch("tavily", "housing bill", search)
+        assert search.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_breaking_terms_use_short_ttl(self):
+        clock = FakeClock()
+        cache = SearchCache(ttl=3600, breaking_ttl=60, stale_ttl=0, clock=clock)
+        search = FakeSearch()
+        await cache.get_or_fetch("google_cse", "breaking senate vote", search)
+        await cache.get_or_fetch("google_cse", "senate vote", search)
+        clock.now += 120
+        await cache.get_or_fetch("google_cse", "breaking senate vote", search)
+        await cache.get_or_fetch("google_cse", "senate vote", search)
+        assert search.calls == 3
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self):
+        clock = FakeClock()
+        cache = SearchCache(ttl=60, stale_ttl=600, clock=clock)
+        await cache.get_or_fetch("google_cse", "budget", FakeSearch(["http://old.com"]))
+        clock.now += 120
+
+        refresh = FakeSearch(["http://new.com"])
+        results = await cache.get_or_fetch("google_cse", "budget", refresh)
+        assert results == ["http://old.com"]
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert refresh.calls == 1
+        assert await cache.get_or_fetch("google_cse", "budget", refresh) == ["http://new.com"]
+        assert refresh.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_and_empty_results(self, tmp_path):
+        path = str(tmp_path / "search_cache.sqlite3")
+        clock = FakeClock()
+        await SearchCache(path=path, clock=clock).get_or_fetch("tavily", "zoning", FakeSearch())
+
+        search = FakeSearch()
+        assert await SearchCache(path=path, clock=clock).get_or_fetch("tavily", "zoning", search) == ["http://example.com/1"]
+        assert search.calls == 0
+
+        empty = FakeSearch([])
+        cache = SearchCache(path=path, clock=clock)
+        await cache.get_or_fetch("tavily", "no hits", empty)
+        await cache.get_or_fetch("tavily", "no hits", empty)
+        assert empty.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_disk_access_runs_off_the_loop(self, tmp_path):
+        cache = SearchCache(path=str(tmp_path / "search_cache.sqlite3"), clock=FakeClock())
+        threads = []
+        connect = cache._connect
+
+        def tracked_connect():
+            threads.append(threading.get_ident())
+            return connect()
+
+        cache._connect = tracked_connect
+        await cache.get_or_fetch("tavily", "zoning", FakeSearch())
+        cache._memory.clear()
+        await cache.get_or_fetch("tavily", "zoning", FakeSearch())
+        assert len(threads) == 3
+        assert threading.get_ident() not in threads
+
+if __name__ == '__main__':
+    pytest.main()
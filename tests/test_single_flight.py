@@ -0,0 +1,89 @@
+# File: test_single_flight.py
+# Directory: tests/
+
+"""
+Unit Test for SingleFlight
+Test Objective:
+- Verify that identical concurrent requests share one call and that cancellation is handled per waiter.
+Expected Results:
+- Concurrent callers with the same key trigger a single underlying call and get the same result.
+- Cancelling one waiter leaves the shared call running for the others.
+- Cancelling every waiter cancels the shared call, and a later caller starts a fresh one.
+- Exceptions reach every waiter.
+Variables Used:
+- A fake request that counts calls and can be slowed down.
+"""
+
+import asyncio
+import pytest
+from tools.single_flight import SingleFlight, request_key
+
+class FakeRequest:
+    def __init__(self, delay=0.05, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return "result"
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_coalesces_identical_requests(self):
+        flight = SingleFlight()
+        request = FakeRequest()
+        results = await asyncio.gather(*[flight.do("key", request) for _ in range(5)])
+        assert results == ["result"] * 5
+        assert request.calls == 1
+        assert not flight.in_flight("key")
+
+    @pytest.mark.asyncio
+    async def test_one_waiter_cancelled(self):
+        flight = SingleFlight()
+        request = FakeRequest()
+        leaving = asyncio.create_task(flight.do("key", request))
+        staying = asyncio.create_task(flight.do("key", request))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        assert await staying == "result"
+        assert leaving.cancelled()
+        assert request.cancelled == 0
+
+    @pytest.mark.asyncio
+    async def test_all_waiters_cancelled(self):
+        flight = SingleFlight()
+        request = FakeRequest(delay=5)
+        waiters = [asyncio.create_task(flight.do("key", request)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert request.cancelled == 1
+        assert not flight.in_flight("key")
+
+        request.delay = 0
+        assert await flight.do("key", request) == "result"
+        assert request.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_reaches_every_waiter(self):
+        flight = SingleFlight()
+        request = FakeRequest(error=ValueError("boom"))
+        results = await asyncio.gather(*[flight.do("key", request) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert request.calls == 1
+
+    def test_request_key_is_order_insensitive_for_dicts(self):
+        assert request_key("gpt-4", [{"role": "user", "content": "x"}]) == request_key(
+            "gpt-4", [{"content": "x", "role": "user"}]
+        )
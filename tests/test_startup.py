@@ -0,0 +1,59 @@
+# File: test_startup.py
+# Directory: tests/
+
+"""
+Unit Test for lazy imports and the startup warm-up
+Test Objective:
+- Verify that importing the server does not import heavy dependencies until a scraper or backend uses them.
+- Verify that prompt templates are built on first access and by the warm-up.
+- Verify that a failing warm-up step is reported without failing startup.
+Expected Results:
+- `import server` in a fresh interpreter leaves openai, neo4j, langchain and aiohttp unimported.
+- Lazily built templates format like the eagerly built ones did.
+- `warm_up` returns a timing per step, None for the step that failed.
+Variables Used:
+- A subprocess importing the server, the review prompt module and a config with an unreachable Neo4j.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import pytest
+from config.config import Config
+from tools import warmup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["openai", "neo4j", "langchain_community", "langchain_core", "aiohttp", "bs4", "jsonschema"]
+
+class TestLazyImports:
+    def test_server_import_is_light(self):
+        probe = f"import json, sys, server; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+        result = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+        assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+    def test_templates_built_on_first_access(self):
+        from prompts import review_prompt
+
+        prompt = review_prompt.REVIEW_PROMPT.format(extracted_data={"Article": {"Title": "A"}})
+        assert "'Title': 'A'" in prompt and "Entity Classification" in prompt
+        assert review_prompt.REVIEW_PROMPT is review_prompt.REVIEW_PROMPT
+        with pytest.raises(AttributeError):
+            review_prompt.MISSING_PROMPT
+
+class TestWarmUp:
+    @pytest.mark.asyncio
+    async def test_failed_step_does_not_raise(self):
+        config = Config()
+        config.TAVILY_API_KEY = config.GOOGLE_CSE_API_KEY = config.JINA_API_KEY = None
+        config.NEO4J_URI = "bolt://127.0.0.1:1"
+        config.WARMUP_TIMEOUT = 5
+
+        timings = await warmup.warm_up(config)
+
+        assert timings["imports"] is not None and timings["prompts"] is not None
+        assert timings["http"] is not None  # No backends configured: nothing to open
+        assert timings["neo4j"] is None and "graph" not in timings  # Graph warm-up needs a reachable database
+
+if __name__ == '__main__':
+    pytest.main()
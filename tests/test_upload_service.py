@@ -0,0 +1,110 @@
+# File: test_upload_service.py
+# Directory: tests/
+
+"""
+Unit Test for the single-writer knowledge graph upload service
+Test Objective:
+- Verify that payloads from several jobs are written in size- and time-bounded batches by one writer.
+- Verify that transient Neo4j errors are retried and other batch failures fall back to per-article writes.
+- Verify that hot entities shared by a batch are merged once, in key order.
+Expected Results:
+- Each submitter's future resolves with (success, message) once its batch is committed.
+- A deadlock is retried; a bad payload fails alone while the rest of its batch is committed.
+- Cancelled submissions are never written.
+Variables Used:
+- A fake uploader recording the batches it is asked to write.
+"""
+
+import asyncio
+import pytest
+from tools.database import coalesce_entities
+from tools.upload_service import UploadService
+
+class TransientError(Exception):
+    pass
+
+class FakeUploader:
+    def __init__(self, failures=None, reject=None):
+        self.batches = []
+        self.failures = list(failures or [])
+        self.reject = reject
+
+    async def prepare(self):
+        pass
+
+    async def upload_batch(self, payloads):
+        if self.failures:
+            raise self.failures.pop(0)
+        if self.reject and any(p["Article"]["Title"] == self.reject for p in payloads):
+            raise ValueError(f"Bad payload {self.reject}")
+        self.batches.append([p["Article"]["Title"] for p in payloads])
+
+def article(title, **extra):
+    return {"Article": {"Title": title}, **extra}
+
+class TestUploadService:
+    @pytest.mark.asyncio
+    async def test_batches_by_size_and_time(self):
+        uploader = FakeUploader()
+        service = UploadService(uploader, batch_size=2, flush_interval=0.05)
+        futures = [service.submit(article(title)) for title in ("a", "b", "c")]
+
+        results = await asyncio.wait_for(asyncio.gather(*futures), timeout=2)
+
+        assert uploader.batches == [["a", "b"], ["c"]]  # "c" flushed by the interval
+        assert all(success for success, _ in results)
+        assert "'a' has been merged" in results[0][1]
+        await service.close()
+        assert service.snapshot()["batches"] == 2 and service.snapshot()["articles"] == 3
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_and_isolates_bad_payload(self):
+        uploader = FakeUploader(failures=[TransientError("deadlock")], reject="bad")
+        service = UploadService(uploader, batch_size=3, flush_interval=0.01, retry_backoff=0.001)
+        futures = [service.submit(article(title)) for title in ("a", "bad", "c")]
+
+        results = await asyncio.wait_for(asyncio.gather(*futures), timeout=2)
+
+        assert [success for success, _ in results] == [True, False, True]
+        assert "Bad payload" in results[1][1]
+        assert uploader.batches == [["a"], ["c"]]
+        assert service.stats["retries"] == 1 and service.stats["failed"] == 1
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_and_priority_order(self):
+        uploader = FakeUploader()
+        service = UploadService(uploader, batch_size=10, flush_interval=0.05, weights={"interactive": 4, "bulk": 1})
+        bulk = service.submit(article("bulk"), priority="bulk")
+        dropped = service.submit(article("dropped"), priority="bulk")
+        interactive = service.submit(article("interactive"), priority="interactive")
+        dropped.cancel()
+
+        await asyncio.wait_for(asyncio.gather(bulk, interactive), timeout=2)
+
+        assert uploader.batches == [["interactive", "bulk"]]
+        await service.close()
+        with pytest.raises(RuntimeError):
+            service.submit(article("late"))
+
+def test_coalesce_entities():
+    payloads = [
+        article("a", Stakeholders=[{"Name": "Mayor", "Type": None, "Relationships": {"has_role_in": "City Hall"}}],
+                Issues=[{"Title": "Budget", "Objective": "Balance"}]),
+        article("b", Stakeholders=[{"Name": "Mayor", "Type": "Person", "Relationships": {}},
+                                   {"Name": "Comptroller", "Type": "Person"}],
+                Events=[{"Title": "Vote", "Participants": ["Mayor"]}]),
+    ]
+    entities = coalesce_entities(payloads)
+
+    assert entities["Stakeholder"] == [
+        {"key": "Comptroller", "props": {"type": "Person"}, "aliases": []},
+        {"key": "Mayor", "props": {"type": "Person"}, "aliases": []},
+    ]
+    assert entities["Institution"] == [{"key": "City Hall", "props": {}}]
+    assert entities["Issue"] == [{"key": "Budget", "props": {"objective": "Balance"}}]
+    assert entities["Event"] == [{"key": "Vote", "props": {}}]
+    assert "Organization" not in entities
+
+if __name__ == '__main__':
+    pytest.main()
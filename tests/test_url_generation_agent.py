@@ -16,7 +16,7 @@ import unittest
 from unittest.mock import patch, AsyncMock
 from models.state import SharedState
 from config.config import Config
-from agents.url_generation_agent import url_generation_agent
+from agents.url_generation_agent import url_generation_agent, parse_query_plan
 
 class TestURLGenerationAgent(unittest.IsolatedAsyncioTestCase):
 
@@ -31,5 +31,32 @@ class TestURLGenerationAgent(unittest.IsolatedAsyncioTestCase):
             self.assertIn('search term1', state.search_terms)
             self.assertIn('search term2', state.search_terms)
 
+    async def test_single_planning_call_and_memoized_plan(self):
+        state = SharedState()
+        state.user_query = "Albany Budget   Negotiations"
+        state.config = Config()
+        state.config.QUERY_PLAN_CACHE_PATH = ""
+        state.config.SEARCH_MODE = "planned"
+        plan_json = '{"search_terms": ["albany budget", "state budget deal"], "search_agent": "Contextual"}'
+        with patch('openai.ChatCompletion.acreate', new_callable=AsyncMock) as mock_openai, \
+             patch('agents.url_generation_agent.contextual_url_generation_agent', new_callable=AsyncMock) as mock_contextual:
+            mock_openai.return_value = AsyncMock(choices=[AsyncMock(message={'content': plan_json})])
+            await url_generation_agent(state)
+            self.assertEqual(mock_openai.call_count, 1)
+            mock_contextual.assert_called_once()
+            self.assertEqual(state.search_terms, ["albany budget", "state budget deal"])
+
+            # The same query (after normalization) reuses the plan without calling the LLM
+            state.user_query = "albany budget negotiations"
+            await url_generation_agent(state)
+            self.assertEqual(mock_openai.call_count, 1)
+            self.assertEqual(mock_contextual.call_count, 2)
+
+    def test_parse_query_plan(self):
+        plan = parse_query_plan('```json\n{"search_terms": ["a", " b "], "search_agent": "General"}\n```')
+        self.assertEqual(plan, {"search_terms": ["a", "b"], "search_agent": "General"})
+        self.assertEqual(parse_query_plan("term one, term two")["search_terms"], ["term one", "term two"])
+        self.assertEqual(parse_query_plan("No search terms could be generated.")["search_terms"], [])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,105 @@
+# File: test_url_records.py
+# Directory: tests/
+
+"""
+Unit Test for the per-URL record store behind SharedState
+Test Objective:
+- Verify that the list/dict views on `SharedState` behave like the containers they replace.
+- Verify that payloads beyond the memory budget spill to disk and are read back on demand.
+- Verify that payloads are released once downstream stages are done, while progress counts are kept.
+Expected Results:
+- Assigning, reading and deleting through the views updates the per-URL records.
+- Resident payload bytes stay within the budget; spilled payloads round-trip unchanged.
+- Released articles keep their content hash; uploaded URLs hold no payloads.
+Variables Used:
+- `SharedState` instances with a small memory budget and a temporary spill directory.
+"""
+
+import os
+import pytest
+from config.config import Config
+from models.state import SharedState
+from models.url_records import PayloadStore, content_hash
+
+def make_state(tmp_path, budget_mb=64):
+    config = Config()
+    config.JOB_MEMORY_BUDGET_MB = budget_mb
+    config.PAYLOAD_SPILL_DIR = str(tmp_path)
+    state = SharedState()
+    state.config = config
+    return state
+
+class TestSharedStateViews:
+    def test_views_behave_like_containers(self, tmp_path):
+        state = make_state(tmp_path)
+        state.urls_to_be_processed = ["http://a", "http://b"]
+        state.urls_to_be_processed.append("http://c")
+        state.scraper_choices["http://a"] = "beautifulsoup"
+        state.articles = {"http://a": "Article A", "http://b": "Article B"}
+        state.extracted_data["http://a"] = {"Article": {"Title": "A"}}
+        state.reviewed_data["http://a"] = state.extracted_data["http://a"]
+
+        assert list(state.urls_to_be_processed) == ["http://a", "http://b", "http://c"]
+        assert "http://c" in state.urls_to_be_processed and len(state.urls_to_be_processed) == 3
+        assert dict(state.scraper_choices) == {"http://a": "beautifulsoup"}
+        assert dict(state.articles) == {"http://a": "Article A", "http://b": "Article B"}
+        assert state.reviewed_data["http://a"] == {"Article": {"Title": "A"}}
+        assert not state.reviewed_data.get("http://b")
+
+        del state.articles["http://b"]
+        assert list(state.articles) == ["http://a"]
+        state.urls_to_be_processed = ["http://b"]
+        assert list(state.urls_to_be_processed) == ["http://b"]
+
+    def test_release_keeps_progress_and_hash(self, tmp_path):
+        state = make_state(tmp_path)
+        state.urls_to_be_processed = ["http://a", "http://b"]
+        state.articles = {"http://a": "Article A", "http://b": "Article B"}
+        state.extracted_data = {"http://a": {"n": 1}, "http://b": {"n": 2}}
+        state.release_articles()
+        state.reviewed_data["http://a"] = state.extracted_data["http://a"]
+        state.release_unreviewed()
+        state.mark_uploaded("http://a")
+
+        assert not state.articles and not state.extracted_data and not state.reviewed_data
+        assert state.records.records["http://a"].content_hash == content_hash("Article A")
+        assert state.progress() == {"urls": 2, "scraped": 2, "extracted": 2, "reviewed": 1, "uploaded": 1, "unchanged": 0}
+        assert state.records.payloads.resident_bytes == 0
+
+        state.reset()
+        assert state.progress()["urls"] == 0
+
+class TestPayloadStore:
+    def test_spills_beyond_budget(self, tmp_path):
+        store = PayloadStore(budget=100, spill_dir=str(tmp_path))
+        refs = [store.put("x" * 60), store.put({"text": "y" * 60}), store.put("z" * 60)]
+
+        assert store.resident_bytes <= 100 and store.spilled == 2
+        assert store.get(refs[0]) == "x" * 60
+        assert store.get(refs[1]) == {"text": "y" * 60}
+
+        store.release(refs[0])
+        spill_dirs = os.listdir(tmp_path)
+        assert len(os.listdir(tmp_path / spill_dirs[0])) == 1
+        store.close()
+        assert not os.listdir(tmp_path)
+
+    def test_is_resident(self, tmp_path):
+        store = PayloadStore(budget=100, spill_dir=str(tmp_path))
+        payload = {"text": "x" * 60}
+        ref = store.put(payload)
+        assert store.is_resident(ref, payload) and not store.is_resident(ref, dict(payload))
+
+        store.put("y" * 60)
+        assert store.get(ref) == payload and not store.is_resident(ref, payload)
+        store.close()
+
+    def test_state_spills_with_small_budget(self, tmp_path):
+        state = make_state(tmp_path, budget_mb=0.001)  # ~1 KB
+        state.articles = {f"http://site/{i}": "word " * 200 for i in range(5)}
+
+        assert state.records.payloads.spilled >= 4
+        assert all(text == "word " * 200 for text in state.articles.values())
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,151 @@
+# File: admission_control.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Provides the `AdmissionController` class that decides when submitted jobs may run.
+# - Runs at most `max_running` jobs at once and holds up to `max_queued` more in a queue.
+# - Queued jobs start in weighted-fair order between priority classes (interactive ahead of bulk, bulk keeps its share).
+# - Rejects submissions when the queue is full, with a Retry-After estimate, instead of accepting unbounded work.
+# - Estimates queue wait and start times from recent job durations and exposes queue depth and wait-time metrics.
+
+# Expected Inputs:
+# - `JobControl` jobs and the workflow coroutine function each job runs.
+# - Limits from the configuration (MAX_RUNNING_JOBS, MAX_QUEUED_JOBS, JOB_DURATION_ESTIMATE, PRIORITY_WEIGHTS).
+
+# Expected Outputs:
+# - An admission ticket per accepted job (running or queued, queue position, estimated start).
+# - `QueueFull` with a suggested retry delay when the job is rejected.
+# - Snapshot of running jobs, queue depth and observed wait/run times.
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from tools.fair_scheduler import FairQueue
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the moving averages of wait and run times
+SMOOTHING = 0.2
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Job queue is full; retry in {retry_after:.0f}s.")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        workflow: Callable[[Any], Awaitable[None]],
+        max_running: int = 4,
+        max_queued: int = 20,
+        duration_estimate: float = 120.0,
+        weights: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.workflow = workflow
+        self.max_running = max(1, max_running)
+        self.max_queued = max(0, max_queued)
+        self.clock = clock
+        self.avg_duration = duration_estimate  # Seeded until real jobs finish
+        self.avg_wait = 0.0
+        self.rejected = 0
+        self._running: Set = set()
+        self._queue = FairQueue(weights or {})
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(self, job) -> Dict[str, Any]:
+        """Start the job now or queue it; raises `QueueFull` when neither is possible."""
+        if len(self._running) < self.max_running and not self.queue_depth:
+            self._start(job)
+            return self.ticket(job)
+        self._prune()
+        if len(self._queue) >= self.max_queued:
+            self.rejected += 1
+            raise QueueFull(self.estimated_wait(len(self._queue)))
+        job.status = "queued"
+        self._queue.push(job.priority, job)
+        return self.ticket(job)
+
+    def ticket(self, job) -> Dict[str, Any]:
+        if job in self._running:
+            return {"status": "running", "queue_position": None, "estimated_start": job.started_at or self.clock(), "estimated_wait": 0.0}
+        if job.status != "queued":
+            return {"status": job.status, "queue_position": None, "estimated_start": None, "estimated_wait": None}
+        position = self._position(job)
+        wait = self.estimated_wait(position)
+        return {"status": "queued", "queue_position": position + 1, "estimated_start": self.clock() + wait, "estimated_wait": wait}
+
+    def estimated_wait(self, position: int) -> float:
+        """Seconds until the job at 0-based queue `position` should start."""
+        now = self.clock()
+        # Running jobs are assumed to finish after an average duration, but never in the past
+        remaining = sorted(
+            max(0.0, self.avg_duration - (now - (job.started_at or now))) for job in self._running
+        )
+        remaining += [0.0] * (self.max_running - len(remaining))
+        # Each "round" of the queue takes one average job duration per free slot
+        rounds, slot = divmod(position, self.max_running)
+        return remaining[slot] + rounds * self.avg_duration
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for job in self._queue if not job.finished)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = self.clock()
+        waiting = [now - job.created_at for job in self._queue if not job.finished]
+        return {
+            "running": len(self._running),
+            "max_running": self.max_running,
+            "queue_depth": len(waiting),
+            "queue_depth_by_priority": self._queue.depths(),
+            "max_queued": self.max_queued,
+            "oldest_wait": max(waiting, default=0.0),
+            "avg_wait": round(self.avg_wait, 3),
+            "avg_duration": round(self.avg_duration, 3),
+            "estimated_wait_for_new_job": self.estimated_wait(len(waiting)) if len(self._running) >= self.max_running else 0.0,
+            "rejected": self.rejected,
+        }
+
+    def _position(self, job) -> int:
+        # Position in the expected service order, so an interactive job may be ahead of earlier bulk jobs
+        return [queued for queued in self._queue.ordered() if not queued.finished].index(job)
+
+    def _prune(self):
+        # Jobs cancelled while queued give their place up
+        self._queue.prune(lambda job: not job.finished)
+
+    def _start(self, job):
+        self._running.add(job)
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job):
+        try:
+            await job.run(self.workflow)
+        finally:
+            self._running.discard(job)
+            if job.started_at is not None:
+                self.avg_wait = _smooth(self.avg_wait, job.started_at - job.created_at)
+                if job.status == "completed":
+                    self.avg_duration = _smooth(self.avg_duration, job.finished_at - job.started_at)
+            self._dispatch()
+
+    def _dispatch(self):
+        self._prune()
+        while self._queue and len(self._running) < self.max_running:
+            self._start(self._queue.pop())
+
+    async def shutdown(self):
+        for job in list(self._queue) + list(self._running):
+            job.cancel(reason="Server shutting down.")
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def _smooth(average: float, sample: float) -> float:
+    return (1 - SMOOTHING) * average + SMOOTHING * sample
@@ -0,0 +1,109 @@
+# File: backfill_merge_keys.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Migration for the hashed merge keys of long-text entities (see tools/merge_keys.py).
+# - Creates the merge-key indexes, then fills `text_key`/`fact_key`/`summary_key` on existing `Quote`, `Fact` and
+#   `Controversy` nodes in batches, computing each digest locally exactly as the uploader does.
+# - Reports nodes that now share a key: duplicates created earlier by whitespace or case differences.
+# - Run as `python -m tools.backfill_merge_keys [--batch-size N] [--dry-run]`; safe to re-run.
+
+# Expected Inputs:
+# - Neo4j connection details from the configuration.
+
+# Expected Outputs:
+# - Per-label counts of nodes keyed (or still pending, on a dry run), nodes with blank text, and duplicate groups.
+
+import argparse
+import asyncio
+import json
+import logging
+from typing import Dict, List
+from config.config import Config
+from tools.merge_keys import LONG_TEXT_KEYS, merge_key
+
+logger = logging.getLogger(__name__)
+
+
+def key_rows(records: List[dict]) -> List[dict]:
+    """Rows of {id, key} for the nodes whose text yields a key."""
+    rows = []
+    for record in records:
+        key = merge_key(record["text"])
+        if key is not None:
+            rows.append({"id": record["id"], "key": key})
+    return rows
+
+
+async def backfill_label(session, label: str, batch_size: int, dry_run: bool) -> Dict[str, int]:
+    text_property, key_property = LONG_TEXT_KEYS[label]
+    pending = f"MATCH (n:{label}) WHERE n.{key_property} IS NULL AND n.{text_property} IS NOT NULL"
+    counts = {"keyed": 0, "unkeyable": 0, "duplicate_groups": 0, "duplicate_nodes": 0}
+
+    if dry_run:
+        result = await session.run(f"{pending} RETURN count(n) AS pending")
+        counts["pending"] = (await result.single())["pending"]
+    else:
+        skip = 0
+        while True:
+            # Nodes whose text has no key (blank) stay unkeyed; skip past them instead of fetching them again
+            result = await session.run(
+                f"{pending} RETURN elementId(n) AS id, n.{text_property} AS text SKIP $skip LIMIT $limit",
+                skip=skip, limit=batch_size,
+            )
+            records = [record.data() async for record in result]
+            if not records:
+                break
+            rows = key_rows(records)
+            skip += len(records) - len(rows)
+            counts["unkeyable"] += len(records) - len(rows)
+            if rows:
+                await session.run(
+                    f"UNWIND $rows AS row MATCH (n:{label}) WHERE elementId(n) = row.id SET n.{key_property} = row.key",
+                    rows=rows,
+                )
+                counts["keyed"] += len(rows)
+                logger.info(f"Keyed {counts['keyed']} {label} nodes.")
+
+    result = await session.run(
+        f"MATCH (n:{label}) WHERE n.{key_property} IS NOT NULL "
+        f"WITH n.{key_property} AS key, count(*) AS nodes WHERE nodes > 1 "
+        f"RETURN count(key) AS groups, coalesce(sum(nodes), 0) AS nodes"
+    )
+    record = await result.single()
+    counts["duplicate_groups"], counts["duplicate_nodes"] = record["groups"], record["nodes"]
+    return counts
+
+
+async def backfill(config, batch_size: int = 500, dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+    from tools.database import KnowledgeGraphUploader
+
+    uploader = KnowledgeGraphUploader(config.NEO4J_URI, config.NEO4J_USER, config.NEO4J_PASSWORD)
+    try:
+        if not dry_run:
+            await uploader.ensure_indexes()
+        report = {}
+        async with uploader.driver.session() as session:
+            for label in LONG_TEXT_KEYS:
+                report[label] = await backfill_label(session, label, batch_size, dry_run)
+        return report
+    finally:
+        await uploader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create merge-key indexes and backfill keys on existing nodes.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Nodes keyed per write (default: 500).")
+    parser.add_argument("--dry-run", action="store_true", help="Only count nodes that still need a key.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(name)s:%(message)s')
+    report = asyncio.run(backfill(Config(), batch_size=args.batch_size, dry_run=args.dry_run))
+    print(json.dumps(report, indent=2))
+    for label, counts in report.items():
+        if counts["duplicate_groups"]:
+            print(f"{label}: {counts['duplicate_nodes']} nodes share {counts['duplicate_groups']} keys; "
+                  f"merge them before adding a uniqueness constraint.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,515 @@
+# File: bulk_export.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Bulk offline path for large historical backfills, bypassing transactional MERGEs:
+#   - `PayloadSpool`: with UPLOAD_MODE=export the upload service appends reviewed payloads to JSONL files in
+#     EXPORT_SPOOL_DIR instead of writing them to Neo4j;
+#   - `export`: streams spooled payloads into deduplicated node and relationship CSV files laid out for
+#     `neo4j-admin database import full` (an empty database);
+#   - `reconcile`: merges exported CSV files into an existing graph with one idempotent UNWIND/MERGE per row batch,
+#     then rebuilds the co-mention and issue-activity counters.
+# - Payloads become the same nodes, properties and relationships as ARTICLE_UPLOAD_QUERY creates, with stakeholder
+#   names resolved through the alias index and long texts keyed by their merge keys.
+# - Deduplication is an external sort: rows are sorted in runs bounded by `--run-mb`, spilled to disk and merged,
+#   so memory stays bounded however many payloads are exported.
+# - Run as `python -m tools.bulk_export export SPOOL_FILE... --output DIR` and
+#   `python -m tools.bulk_export reconcile DIR`.
+
+# Expected Inputs:
+# - JSONL files of reviewed extraction payloads (one payload per line).
+# - Neo4j connection details from the configuration (reconcile, and `--warm-aliases` on export).
+
+# Expected Outputs:
+# - `nodes/<Label>.csv` and `relationships/<Start>_<TYPE>_<End>.csv` files, `manifest.json` with row counts and the
+#   neo4j-admin command importing them.
+# - Counts of nodes and relationships merged on reconcile.
+
+import argparse
+import asyncio
+import csv
+import glob
+import heapq
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from config.config import Config
+from tools.entity_resolution import AliasIndex, resolve_stakeholders
+from tools.merge_keys import with_merge_keys
+
+logger = logging.getLogger(__name__)
+
+# Label -> (key property, other properties, properties only set when the node is created)
+NODE_SPECS = {
+    "Article": ("title", ["url", "date_published", "text", "source_url", "content_hash"], set()),
+    "Stakeholder": ("name", ["type", "aliases"], set()),
+    "Organization": ("name", [], set()),
+    "Institution": ("name", ["type"], set()),
+    "Event": ("title", ["date", "description"], set()),
+    "Issue": ("title", ["objective"], set()),
+    "Document": ("title", ["description"], set()),
+    "Quote": ("text_key", ["text", "date_recorded", "context"], {"text"}),
+    "Fact": ("fact_key", ["fact", "summary", "description"], {"fact"}),
+    "Controversy": ("summary_key", ["summary", "description", "controversy_type"], {"summary"}),
+}
+# Array properties, written with neo4j-admin's default array delimiter
+LIST_PROPERTIES = {"aliases"}
+ARRAY_DELIMITER = ";"
+# Relationship type -> properties
+RELATIONSHIP_PROPERTIES = {"HAS_ROLE_IN": ["has_role"]}
+
+
+def _key(value) -> Optional[str]:
+    return value if isinstance(value, str) and value else None
+
+
+def payload_rows(data: dict, aliases: Dict[str, set] = None) -> Iterator[Tuple]:
+    """Node rows ("node", label, key, props) and relationship rows ("rel", type, start label, start, end label,
+    end, props) of one payload with merge keys, as ARTICLE_UPLOAD_QUERY would create them."""
+    title = _key((data.get("Article") or {}).get("Title"))
+    if title is None:
+        return
+    article = data["Article"]
+    yield "node", "Article", title, {
+        "url": article.get("URL"), "date_published": article.get("Date Published"), "text": article.get("Text"),
+        "source_url": article.get("Source URL"), "content_hash": article.get("Content Hash"),
+    }
+
+    for stakeholder in data.get("Stakeholders") or []:
+        name = _key(stakeholder.get("Name"))
+        if name is None:
+            continue
+        yield "node", "Stakeholder", name, {"type": stakeholder.get("Type"), "aliases": sorted((aliases or {}).get(name, ()))}
+        yield "rel", "MENTIONED_IN", "Stakeholder", name, "Article", title, {}
+        relationships = stakeholder.get("Relationships") or {}
+        if relationships.get("is_author") is not None:
+            yield "rel", "IS_AUTHOR", "Stakeholder", name, "Article", title, {}
+        employer = _key(relationships.get("is_employed_by"))
+        if employer is not None:
+            yield "node", "Organization", employer, {}
+            yield "rel", "IS_EMPLOYED_BY", "Stakeholder", name, "Organization", employer, {}
+        institution = _key(relationships.get("has_role_in"))
+        if institution is not None:
+            yield "node", "Institution", institution, {}
+            yield "rel", "HAS_ROLE_IN", "Stakeholder", name, "Institution", institution, {
+                "has_role": relationships.get("has_role"),
+            }
+        for event in relationships.get("participated_in") or []:
+            if _key(event) is not None:
+                yield "node", "Event", event, {}
+                yield "rel", "PARTICIPATED_IN", "Stakeholder", name, "Event", event, {}
+        controversy = _key(relationships.get("related_to_key"))
+        if controversy is not None:
+            yield "node", "Controversy", controversy, {"summary": relationships.get("related_to")}
+            yield "rel", "RELATED_TO", "Stakeholder", name, "Controversy", controversy, {}
+        for quote in stakeholder.get("Quotes") or []:
+            key = _key(quote.get("Key"))
+            if key is None:
+                continue
+            yield "node", "Quote", key, {
+                "text": quote.get("Text"), "date_recorded": quote.get("Date Recorded"), "context": quote.get("Context"),
+            }
+            yield "rel", "SAID", "Stakeholder", name, "Quote", key, {}
+            yield "rel", "MENTIONED_IN", "Quote", key, "Article", title, {}
+
+    for event in data.get("Events") or []:
+        event_title = _key(event.get("Title"))
+        if event_title is None:
+            continue
+        yield "node", "Event", event_title, {"date": event.get("Date"), "description": event.get("Description")}
+        yield "rel", "MENTIONED_IN", "Event", event_title, "Article", title, {}
+        for participant in event.get("Participants") or []:
+            if _key(participant) is not None:
+                yield "node", "Stakeholder", participant, {"aliases": sorted((aliases or {}).get(participant, ()))}
+                yield "rel", "PARTICIPATED_IN", "Stakeholder", participant, "Event", event_title, {}
+
+    for fact in data.get("Facts") or []:
+        key = _key(fact.get("Key"))
+        if key is not None:
+            yield "node", "Fact", key, {
+                "fact": fact.get("Fact"), "summary": fact.get("Summary"), "description": fact.get("Description"),
+            }
+            yield "rel", "CITES", "Article", title, "Fact", key, {}
+    for issue in data.get("Issues") or []:
+        issue_title = _key(issue.get("Title"))
+        if issue_title is not None:
+            yield "node", "Issue", issue_title, {"objective": issue.get("Objective")}
+            yield "rel", "IS_ABOUT", "Article", title, "Issue", issue_title, {}
+    for document in data.get("Documents") or []:
+        document_title = _key(document.get("Document Title"))
+        if document_title is not None:
+            yield "node", "Document", document_title, {"description": document.get("Description")}
+            yield "rel", "MENTIONS", "Article", title, "Document", document_title, {}
+    for controversy in data.get("Controversies") or []:
+        key = _key(controversy.get("Key"))
+        if key is not None:
+            yield "node", "Controversy", key, {
+                "summary": controversy.get("Summary"), "description": controversy.get("Description"),
+                "controversy_type": controversy.get("Controversy Type"),
+            }
+            yield "rel", "MENTIONS", "Article", title, "Controversy", key, {}
+    for institution in data.get("Institutions") or []:
+        name = _key(institution.get("Name"))
+        if name is not None:
+            yield "node", "Institution", name, {"type": institution.get("Type")}
+            yield "rel", "MENTIONS", "Article", title, "Institution", name, {}
+
+
+def combine(props: Dict[str, Any], update: Dict[str, Any], create_only=()) -> Dict[str, Any]:
+    """Merge a later row's properties: last non-null value wins, lists are unioned, create-only values are kept."""
+    for name, value in update.items():
+        if value is None or value == []:
+            continue
+        if name in create_only and props.get(name) is not None:
+            continue
+        if isinstance(value, list):
+            props[name] = sorted(set(props.get(name) or ()) | set(value))
+        else:
+            props[name] = value
+    return props
+
+
+class ExternalSorter:
+    """Sorts (key, props) rows by key and arrival order, spilling sorted runs of at most `run_bytes` to disk."""
+
+    def __init__(self, work_dir: str, name: str, run_bytes: int):
+        self.work_dir = work_dir
+        self.name = name
+        self.run_bytes = run_bytes
+        self._buffer: List[Tuple[list, int, str]] = []
+        self._buffered_bytes = 0
+        self._runs: List[str] = []
+        self._sequence = 0
+
+    def add(self, key: list, props: dict):
+        line = json.dumps([key, self._sequence, props], ensure_ascii=False)
+        self._buffer.append((key, self._sequence, line))
+        self._sequence += 1
+        self._buffered_bytes += len(line)
+        if self._buffered_bytes >= self.run_bytes:
+            self._spill()
+
+    def _spill(self):
+        if not self._buffer:
+            return
+        self._buffer.sort(key=lambda row: (row[0], row[1]))
+        path = os.path.join(self.work_dir, f"{self.name}-{len(self._runs)}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for _, _, line in self._buffer:
+                f.write(line + "\n")
+        self._runs.append(path)
+        self._buffer, self._buffered_bytes = [], 0
+
+    @staticmethod
+    def _read_run(path: str) -> Iterator[list]:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def grouped(self) -> Iterator[Tuple[list, List[dict]]]:
+        """Distinct keys in order, each with the properties of its rows in arrival order."""
+        self._spill()
+        merged = heapq.merge(*(self._read_run(path) for path in self._runs), key=lambda row: (row[0], row[1]))
+        current, props = None, []
+        for key, _, row_props in merged:
+            if key != current:
+                if current is not None:
+                    yield current, props
+                current, props = key, []
+            props.append(row_props)
+        if current is not None:
+            yield current, props
+
+
+def _csv_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ARRAY_DELIMITER.join(value)
+    return str(value)
+
+
+def node_header(label: str) -> List[str]:
+    key, properties, _ = NODE_SPECS[label]
+    columns = [f"{name}:string[]" if name in LIST_PROPERTIES else name for name in properties]
+    return [f"{key}:ID({label})", *columns, ":LABEL"]
+
+
+def relationship_header(rel_type: str, start: str, end: str) -> List[str]:
+    return [f":START_ID({start})", f":END_ID({end})", ":TYPE", *RELATIONSHIP_PROPERTIES.get(rel_type, [])]
+
+
+class _CsvFiles:
+    """One CSV file open at a time: sorted rows arrive grouped by file."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.counts: Dict[str, int] = {}
+        self._name = None
+        self._file = None
+        self._writer = None
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, name: str, header: List[str], row: List[str]):
+        if name != self._name:
+            self.close()
+            self._name = name
+            self._file = open(os.path.join(self.directory, f"{name}.csv"), "w", encoding="utf-8", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(header)
+            self.counts[name] = 0
+        self._writer.writerow(row)
+        self.counts[name] += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = self._name = None
+
+
+def import_command(output_dir: str, manifest: dict, database: str = "neo4j") -> str:
+    files = [f"--nodes={os.path.join(output_dir, 'nodes', name + '.csv')}" for name in manifest["nodes"]]
+    files += [f"--relationships={os.path.join(output_dir, 'relationships', name + '.csv')}" for name in manifest["relationships"]]
+    return " ".join([
+        "neo4j-admin database import full", *files,
+        f"--array-delimiter='{ARRAY_DELIMITER}'", "--multiline-fields=true", database,
+    ])
+
+
+def read_payloads(paths: List[str], stats: Dict[str, int]) -> Iterator[dict]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    stats["invalid"] += 1
+
+
+def export(paths: List[str], output_dir: str, alias_index: Optional[AliasIndex] = None, run_mb: float = 256) -> dict:
+    """Write deduplicated node and relationship CSV files for the payloads in `paths`; returns the manifest."""
+    stats = {"payloads": 0, "invalid": 0}
+    work_dir = tempfile.mkdtemp(prefix="bulk-export-", dir=output_dir if os.path.isdir(output_dir) else None)
+    try:
+        run_bytes = int(run_mb * 1024 * 1024) // 2
+        nodes = ExternalSorter(work_dir, "nodes", run_bytes)
+        relationships = ExternalSorter(work_dir, "relationships", run_bytes)
+        for data in read_payloads(paths, stats):
+            aliases = {}
+            if alias_index is not None:
+                data, aliases = resolve_stakeholders(data, alias_index)
+            stats["payloads"] += 1
+            for row in payload_rows(with_merge_keys(data), aliases):
+                if row[0] == "node":
+                    nodes.add([row[1], row[2]], row[3])
+                else:
+                    # Grouped by file (type, start and end label), then by the two node keys
+                    _, rel_type, start_label, start, end_label, end, props = row
+                    relationships.add([rel_type, start_label, end_label, start, end], props)
+
+        node_files = _CsvFiles(os.path.join(output_dir, "nodes"))
+        for (label, key), updates in nodes.grouped():
+            _, properties, create_only = NODE_SPECS[label]
+            props: Dict[str, Any] = {}
+            for update in updates:
+                combine(props, update, create_only)
+            node_files.write(label, node_header(label), [key, *(_csv_value(props.get(name)) for name in properties), label])
+        node_files.close()
+
+        relationship_files = _CsvFiles(os.path.join(output_dir, "relationships"))
+        for (rel_type, start_label, end_label, start, end), updates in relationships.grouped():
+            props = {}
+            for update in updates:
+                combine(props, update)
+            relationship_files.write(
+                f"{start_label}_{rel_type}_{end_label}", relationship_header(rel_type, start_label, end_label),
+                [start, end, rel_type, *(_csv_value(props.get(name)) for name in RELATIONSHIP_PROPERTIES.get(rel_type, []))],
+            )
+        relationship_files.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    manifest = {**stats, "nodes": node_files.counts, "relationships": relationship_files.counts}
+    manifest["import_command"] = import_command(output_dir, manifest)
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _parse_csv_value(column: str, value: str):
+    if value == "":
+        return None
+    if column.endswith(":string[]"):
+        return value.split(ARRAY_DELIMITER)
+    return value
+
+
+def read_csv_rows(path: str, batch_size: int) -> Iterator[Tuple[List[str], List[List[str]]]]:
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        batch = []
+        for row in reader:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield header, batch
+                batch = []
+        if batch:
+            yield header, batch
+
+
+def node_merge_query(label: str) -> str:
+    key, _, create_only = NODE_SPECS[label]
+    query = f"UNWIND $rows AS row MERGE (n:{label} {{{key}: row.key}}) "
+    if create_only:
+        query += "ON CREATE SET " + ", ".join(f"n.{name} = row.create.{name}" for name in sorted(create_only)) + " "
+    query += "SET n += row.props"
+    if "aliases" in NODE_SPECS[label][1]:
+        query += ", n.aliases = [alias IN coalesce(n.aliases, []) WHERE NOT alias IN row.aliases] + row.aliases"
+    return query
+
+
+def relationship_merge_query(rel_type: str, start: str, end: str) -> str:
+    start_key, end_key = NODE_SPECS[start][0], NODE_SPECS[end][0]
+    return (
+        f"UNWIND $rows AS row MATCH (a:{start} {{{start_key}: row.start}}), (b:{end} {{{end_key}: row.end}}) "
+        f"MERGE (a)-[r:{rel_type}]->(b) SET r += row.props"
+    )
+
+
+def node_rows(label: str, header: List[str], rows: List[List[str]]) -> List[dict]:
+    _, properties, create_only = NODE_SPECS[label]
+    result = []
+    for row in rows:
+        values = {name: _parse_csv_value(column, value) for name, column, value in zip(properties, header[1:], row[1:])}
+        aliases = values.pop("aliases", None) or []
+        result.append({
+            "key": row[0],
+            "create": {name: values[name] for name in create_only},
+            "aliases": aliases,
+            "props": {name: value for name, value in values.items() if value is not None and name not in create_only},
+        })
+    return result
+
+
+def relationship_rows(header: List[str], rows: List[List[str]]) -> List[dict]:
+    names = header[3:]
+    return [
+        {"start": row[0], "end": row[1], "props": {name: value for name, value in zip(names, row[3:]) if value != ""}}
+        for row in rows
+    ]
+
+
+async def reconcile(config, directory: str, batch_size: int = 1000, aggregates: bool = True) -> Dict[str, Any]:
+    """Merge exported CSV files into an existing graph: all nodes first, then the relationships between them."""
+    from tools.database import KnowledgeGraphUploader
+    from tools.rebuild_aggregates import rebuild
+
+    uploader = KnowledgeGraphUploader(config.NEO4J_URI, config.NEO4J_USER, config.NEO4J_PASSWORD)
+    report = {"nodes": {}, "relationships": {}}
+    try:
+        # Indexes first, so every MERGE and MATCH below is an index lookup
+        await uploader.ensure_indexes()
+        async with uploader.driver.session() as session:
+            for path in sorted(glob.glob(os.path.join(directory, "nodes", "*.csv"))):
+                label = os.path.splitext(os.path.basename(path))[0]
+                query, merged = node_merge_query(label), 0
+                for header, rows in read_csv_rows(path, batch_size):
+                    await session.run(query, rows=node_rows(label, header, rows))
+                    merged += len(rows)
+                report["nodes"][label] = merged
+                logger.info(f"Merged {merged} {label} nodes.")
+            for path in sorted(glob.glob(os.path.join(directory, "relationships", "*.csv"))):
+                name = os.path.splitext(os.path.basename(path))[0]
+                # Labels have no underscore, relationship types may: <Start>_<TYPE>_<End>
+                start, rest = name.split("_", 1)
+                rel_type, end = rest.rsplit("_", 1)
+                query, merged = relationship_merge_query(rel_type, start, end), 0
+                for header, rows in read_csv_rows(path, batch_size):
+                    await session.run(query, rows=relationship_rows(header, rows))
+                    merged += len(rows)
+                report["relationships"][name] = merged
+                logger.info(f"Merged {merged} {name} relationships.")
+    finally:
+        await uploader.close()
+    if aggregates:
+        report["aggregates"] = await rebuild(config)
+    return report
+
+
+class PayloadSpool:
+    """Uploader of UPLOAD_MODE=export: appends payloads to this process's JSONL file for a later bulk export."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, f"reviewed-{os.getpid()}.jsonl")
+
+    async def prepare(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+    async def upload_batch(self, payloads: list):
+        lines = "".join(json.dumps(payload, ensure_ascii=False) + "\n" for payload in payloads)
+        await asyncio.to_thread(self._append, lines)
+
+    def _append(self, lines: str):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def close(self):
+        pass
+
+
+async def _warmed_alias_index(config) -> AliasIndex:
+    from tools.database import KnowledgeGraphUploader
+
+    index = AliasIndex(config.ENTITY_MATCH_THRESHOLD)
+    uploader = KnowledgeGraphUploader(config.NEO4J_URI, config.NEO4J_USER, config.NEO4J_PASSWORD)
+    try:
+        await index.warm(uploader.driver)
+    finally:
+        await uploader.close()
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk offline import of reviewed payloads into the knowledge graph.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write deduplicated CSV files for neo4j-admin import.")
+    export_parser.add_argument("inputs", nargs="+", help="JSONL files of reviewed payloads (e.g. the export spool).")
+    export_parser.add_argument("--output", required=True, help="Directory receiving the CSV files and manifest.")
+    export_parser.add_argument("--run-mb", type=float, default=256, help="Memory per sort run in MB (default: 256).")
+    export_parser.add_argument("--warm-aliases", action="store_true",
+                               help="Resolve stakeholder names against the existing graph (for reconcile).")
+    reconcile_parser = commands.add_parser("reconcile", help="Merge exported CSV files into an existing graph.")
+    reconcile_parser.add_argument("directory", help="Directory written by `export`.")
+    reconcile_parser.add_argument("--batch-size", type=int, default=1000, help="Rows merged per query (default: 1000).")
+    reconcile_parser.add_argument("--skip-aggregates", action="store_true",
+                                  help="Do not rebuild the co-mention and issue-activity counters afterwards.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(name)s:%(message)s')
+    config = Config()
+
+    if args.command == "export":
+        alias_index = None
+        if config.ENTITY_RESOLUTION:
+            alias_index = asyncio.run(_warmed_alias_index(config)) if args.warm_aliases else AliasIndex(config.ENTITY_MATCH_THRESHOLD)
+        paths = [path for pattern in args.inputs for path in sorted(glob.glob(pattern))]
+        os.makedirs(args.output, exist_ok=True)
+        manifest = export(paths, args.output, alias_index, args.run_mb)
+        print(json.dumps(manifest, indent=2))
+        print("Import into an empty database with the command above, then run `python -m tools.rebuild_aggregates`; "
+              "merge into an existing graph with `python -m tools.bulk_export reconcile`.")
+    else:
+        report = asyncio.run(reconcile(config, args.directory, args.batch_size, not args.skip_aggregates))
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
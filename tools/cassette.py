@@ -0,0 +1,452 @@
+# File: cassette.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Record/replay of a job's outbound interactions, so slow or failed production jobs can be reproduced,
+#   profiled and regression-tested offline.
+# - Record mode saves every search/scrape HTTP request (Tavily, Google CSE, Jina, direct page and robots.txt fetches),
+#   every OpenAI chat completion and every Cypher statement with its parameters, result rows and timing
+#   to a cassette file (gzip JSONL, one interaction per line).
+# - Replay mode serves the same interactions from the cassette without touching any service, either as fast as
+#   possible or at recorded speed (each call takes as long as it did when recorded).
+# - Interactions are matched on their kind and request (identical requests in recorded order), so the pipeline's
+#   own scheduling and concurrency run for real; a request missing from the cassette raises `CassetteMiss`.
+# - The cassette is process-wide (shared pools, the upload writer and coalesced calls serve every job in the process),
+#   so the CLI records and replays one job per process:
+#       python -m tools.cassette record job.jsonl.gz --query "..."
+#       python -m tools.cassette replay job.jsonl.gz --speed recorded
+#       python -m tools.cassette show job.jsonl.gz
+# - Wall-clock values that end up in requests (e.g. the upload day of undated articles) come from `wall_clock()`,
+#   which replays the recording's time so those requests match the cassette on any later day.
+# - API keys never enter the cassette: request headers are not recorded and secret query parameters are dropped.
+# - The LLM batch mode (LLM_EXECUTION_MODE="batch") goes through offline batch files and is not recorded.
+
+# Expected Inputs:
+# - A user query (record) or a cassette file (replay, show).
+
+# Expected Outputs:
+# - A cassette file holding the job's settings and interactions; a summary of interactions and time per kind.
+
+import argparse
+import asyncio
+import contextlib
+import gzip
+import json
+import logging
+import os
+import re
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from tools.single_flight import request_key
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("http", "llm", "cypher")
+REPLAY_SPEEDS = ("fast", "recorded")
+# Query parameters holding credentials (dropped from recorded requests)
+SECRET_PARAMS = {"key", "api_key", "apikey", "access_token", "token"}
+# Settings left out of the cassette's settings snapshot
+SECRET_SETTINGS = re.compile(r"(_API_KEY|_PASSWORD|_CX)$")
+# Local stores that would hide interactions while recording or add some while replaying; kept in memory instead
+LOCAL_STORE_SETTINGS = ("SEARCH_CACHE_PATH", "QUERY_PLAN_CACHE_PATH", "SCRAPER_ROUTING_PATH", "CONTENT_HASH_PATH")
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a request the cassette does not hold (or holds fewer times)."""
+
+
+class RecordedError(RuntimeError):
+    """An error recorded from a live call, raised again in replay mode."""
+
+    def __init__(self, message: str, error_type: str = "Exception", retryable: bool = False):
+        super().__init__(message)
+        self.error_type = error_type
+        self.retryable = retryable
+
+    def is_retryable(self) -> bool:
+        return self.retryable
+
+
+class RecordedObject(dict):
+    """Replayed API response: a dict with attribute access, like the client library's response objects."""
+
+    def __getattr__(self, name: str):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def recorded_objects(data: Any) -> Any:
+    if isinstance(data, dict):
+        return RecordedObject({key: recorded_objects(value) for key, value in data.items()})
+    if isinstance(data, list):
+        return [recorded_objects(item) for item in data]
+    return data
+
+
+def plain(data: Any) -> Any:
+    """JSON-safe copy of a response (values JSON cannot hold, e.g. graph temporal types, become strings)."""
+    return json.loads(json.dumps(data, default=str))
+
+
+def without_secrets(params: Optional[dict]) -> Optional[dict]:
+    if params is None:
+        return None
+    return {key: value for key, value in params.items() if key.lower() not in SECRET_PARAMS}
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str = "record", speed: str = "fast"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if speed not in REPLAY_SPEEDS:
+            raise ValueError(f"Unknown replay speed: {speed}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.meta: Dict[str, Any] = {}
+        self.entries: List[Dict[str, Any]] = []
+        self.misses = 0
+        self._queues: Dict[str, deque] = defaultdict(deque)
+        self._started = time.perf_counter()
+        if mode == "replay":
+            self._load()
+        else:
+            self.meta["recorded_at"] = time.time()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def now(self) -> float:
+        """Wall-clock time; when replaying, the recording's time plus the time since the replay started."""
+        recorded_at = self.meta.get("recorded_at")
+        if self.replaying and recorded_at is not None:
+            return recorded_at + (time.perf_counter() - self._started)
+        return time.time()
+
+    async def call(
+        self,
+        kind: str,
+        request: Dict[str, Any],
+        call: Callable[[], Awaitable[Any]],
+        encode: Callable[[Any], Any] = plain,
+        decode: Callable[[Any], Any] = recorded_objects,
+    ) -> Any:
+        """Run `call` and record it, or serve its recorded outcome in replay mode."""
+        if self.replaying:
+            return decode(await self._replay(kind, request))
+
+        entry = {"kind": kind, "request": plain(request), "started": round(time.perf_counter() - self._started, 6)}
+        started = time.perf_counter()
+        try:
+            result = await call()
+        except Exception as e:
+            entry["error"] = {"type": type(e).__name__, "message": str(e), "retryable": _is_transient(e)}
+            raise
+        else:
+            entry["response"] = encode(result)
+            return result
+        finally:
+            # Cancelled calls (BaseException) have no outcome to replay
+            if "error" in entry or "response" in entry:
+                entry["duration"] = round(time.perf_counter() - started, 6)
+                self.entries.append(entry)
+
+    async def _replay(self, kind: str, request: Dict[str, Any]) -> Any:
+        queue = self._queues.get(request_key(kind, plain(request)))
+        if not queue:
+            self.misses += 1
+            raise CassetteMiss(f"No recorded {kind} interaction for {json.dumps(request, default=str)[:200]}")
+        entry = queue.popleft()
+        if self.speed == "recorded":
+            await asyncio.sleep(entry.get("duration", 0.0))
+        error = entry.get("error")
+        if error is not None:
+            raise RecordedError(error["message"], error["type"], error.get("retryable", False))
+        return entry.get("response")
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"meta": self.meta}, separators=(",", ":"), default=str) + "\n")
+            for entry in self.entries:
+                f.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if "meta" in record:
+                    self.meta = record["meta"]
+                    continue
+                self.entries.append(record)
+                self._queues[request_key(record["kind"], record["request"])].append(record)
+
+    def unused(self) -> int:
+        """Recorded interactions not (yet) replayed."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def summary(self) -> Dict[str, Any]:
+        kinds = {kind: {"calls": 0, "errors": 0, "seconds": 0.0} for kind in KINDS}
+        for entry in self.entries:
+            stats = kinds.setdefault(entry["kind"], {"calls": 0, "errors": 0, "seconds": 0.0})
+            stats["calls"] += 1
+            stats["errors"] += "error" in entry
+            stats["seconds"] = round(stats["seconds"] + entry.get("duration", 0.0), 3)
+        summary = {"interactions": len(self.entries), "kinds": kinds}
+        if self.replaying:
+            summary.update(misses=self.misses, unused=self.unused())
+        return summary
+
+
+def _is_transient(error: BaseException) -> bool:
+    # Recorded with the error, so replayed uploads retry exactly the batches that were retried live
+    from tools.upload_service import is_transient
+
+    return is_transient(error)
+
+
+_active: Optional[Cassette] = None
+
+
+def active_cassette() -> Optional[Cassette]:
+    return _active
+
+
+def wall_clock() -> float:
+    """`time.time()`, or the recording's time while a cassette is replayed."""
+    return _active.now() if _active is not None else time.time()
+
+
+@contextlib.contextmanager
+def use_cassette(cassette: Optional[Cassette]):
+    """Route the process's outbound interactions through `cassette` (set before the event loop opens its pools)."""
+    global _active
+    previous, _active = _active, cassette
+    try:
+        yield cassette
+    finally:
+        _active = previous
+
+
+async def through_cassette(
+    kind: str,
+    request: Dict[str, Any],
+    call: Callable[[], Awaitable[Any]],
+    encode: Callable[[Any], Any] = plain,
+    decode: Callable[[Any], Any] = recorded_objects,
+) -> Any:
+    """Run `call` directly, or through the active cassette. `request` must identify the call and hold no secrets."""
+    cassette = _active
+    if cassette is None:
+        return await call()
+    return await cassette.call(kind, request, call, encode, decode)
+
+
+async def chat_completion(**request) -> Any:
+    """`openai.ChatCompletion.acreate` through the active cassette (the API key is set globally, not in `request`)."""
+    import openai
+
+    return await through_cassette("llm", request, lambda: openai.ChatCompletion.acreate(**request))
+
+
+# --- Neo4j: driver, session and transaction wrappers recording each statement with its result rows ---
+
+class CassetteRecord(dict):
+    def data(self) -> dict:
+        return dict(self)
+
+
+class CassetteResult:
+    def __init__(self, rows: List[dict]):
+        self._rows = [CassetteRecord(row) for row in rows or []]
+
+    async def __aiter__(self):
+        for record in self._rows:
+            yield record
+
+    async def single(self) -> Optional[CassetteRecord]:
+        return self._rows[0] if self._rows else None
+
+    async def data(self) -> List[dict]:
+        return [record.data() for record in self._rows]
+
+    async def consume(self):
+        return None
+
+
+async def _run_cypher(cassette: Cassette, target, query: str, parameters: Optional[dict], params: dict) -> CassetteResult:
+    params = {**(parameters or {}), **params}
+
+    async def call():
+        result = await target.run(query, **params)
+        return await result.data()
+
+    rows = await cassette.call("cypher", {"query": query, "params": params}, call, decode=lambda rows: rows)
+    return CassetteResult(rows)
+
+
+class CassetteTransaction:
+    def __init__(self, tx, cassette: Cassette):
+        self.tx = tx
+        self.cassette = cassette
+
+    async def run(self, query: str, parameters: Optional[dict] = None, **params) -> CassetteResult:
+        return await _run_cypher(self.cassette, self.tx, query, parameters, params)
+
+
+class CassetteSession:
+    def __init__(self, session, cassette: Cassette):
+        self.session = session
+        self.cassette = cassette
+
+    async def __aenter__(self):
+        if self.session is not None:
+            await self.session.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self.session is not None:
+            return await self.session.__aexit__(*exc_info)
+        return False
+
+    async def run(self, query: str, parameters: Optional[dict] = None, **params) -> CassetteResult:
+        return await _run_cypher(self.cassette, self.session, query, parameters, params)
+
+    async def execute_write(self, work, *args, **kwargs):
+        return await self._execute("execute_write", work, *args, **kwargs)
+
+    async def execute_read(self, work, *args, **kwargs):
+        return await self._execute("execute_read", work, *args, **kwargs)
+
+    async def _execute(self, method: str, work, *args, **kwargs):
+        if self.session is None:
+            # Replay: the transaction function runs once against the recorded statements
+            return await work(CassetteTransaction(None, self.cassette), *args, **kwargs)
+        return await getattr(self.session, method)(
+            lambda tx, *a, **kw: work(CassetteTransaction(tx, self.cassette), *a, **kw), *args, **kwargs
+        )
+
+
+class CassetteDriver:
+    """Neo4j driver routed through a cassette; in replay mode there is no underlying driver (no connection)."""
+
+    def __init__(self, driver, cassette: Cassette):
+        self.driver = driver
+        self.cassette = cassette
+
+    def session(self, **kwargs) -> CassetteSession:
+        return CassetteSession(self.driver.session(**kwargs) if self.driver is not None else None, self.cassette)
+
+    async def verify_connectivity(self):
+        if self.driver is not None:
+            await self.driver.verify_connectivity()
+
+    async def close(self):
+        if self.driver is not None:
+            await self.driver.close()
+
+
+# --- Running a job against a cassette ---
+
+def settings_snapshot(config) -> Dict[str, Any]:
+    return {key: value for key, value in vars(config).items() if key.isupper() and not SECRET_SETTINGS.search(key)}
+
+
+def isolate(config):
+    """Keep local stores in memory so the job's interactions depend only on the query, settings and cassette."""
+    for key in LOCAL_STORE_SETTINGS:
+        setattr(config, key, "")
+    return config
+
+
+async def run_job(config, user_query: str, url_budget: Optional[int] = None):
+    from models.state import SharedState
+    from agents.router_agent import router_agent
+    from tools.database import close_neo4j_drivers
+    from tools.http_pool import close_http_sessions
+    from tools.upload_service import close_upload_services
+
+    state = SharedState()
+    state.config = config
+    state.user_query = user_query
+    state.url_budget = url_budget or config.URL_BUDGET
+    try:
+        await router_agent(state)
+    finally:
+        await close_upload_services()
+        await close_http_sessions()
+        await close_neo4j_drivers()
+    return state
+
+
+def record(config, path: str, user_query: str, url_budget: Optional[int] = None) -> Dict[str, Any]:
+    config = isolate(config)
+    cassette = Cassette(path, "record")
+    cassette.meta.update(user_query=user_query, url_budget=url_budget, settings=settings_snapshot(config))
+    started = time.perf_counter()
+    try:
+        with use_cassette(cassette):
+            state = asyncio.run(run_job(config, user_query, url_budget))
+    finally:
+        cassette.meta["wall_seconds"] = round(time.perf_counter() - started, 3)
+        cassette.save()
+    return {**cassette.summary(), "wall_seconds": cassette.meta["wall_seconds"], "progress": state.progress()}
+
+
+def replay(config, path: str, speed: str = "fast") -> Dict[str, Any]:
+    cassette = Cassette(path, "replay", speed)
+    # The recorded settings shape the requests (models, limits, batch sizes), so they override the local ones
+    for key, value in cassette.meta.get("settings", {}).items():
+        setattr(config, key, value)
+    config = isolate(config)
+    started = time.perf_counter()
+    with use_cassette(cassette):
+        state = asyncio.run(run_job(config, cassette.meta["user_query"], cassette.meta.get("url_budget")))
+    return {
+        **cassette.summary(),
+        "speed": speed,
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "recorded_wall_seconds": cassette.meta.get("wall_seconds"),
+        "progress": state.progress(),
+    }
+
+
+def main():
+    from config.config import Config
+
+    parser = argparse.ArgumentParser(description="Record a job's outbound interactions to a cassette, or replay one.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="Run a job against the live services and record it.")
+    record_parser.add_argument("cassette", help="Cassette file to write (gzip JSONL).")
+    record_parser.add_argument("--query", required=True, help="User query of the job.")
+    record_parser.add_argument("--url-budget", type=int, default=None, help="URL budget of the job (default: URL_BUDGET).")
+    replay_parser = commands.add_parser("replay", help="Run the recorded job against the cassette.")
+    replay_parser.add_argument("cassette", help="Cassette file to replay.")
+    replay_parser.add_argument("--speed", choices=REPLAY_SPEEDS, default="fast",
+                               help="'fast' serves interactions at once; 'recorded' takes as long as the live calls did.")
+    show_parser = commands.add_parser("show", help="Summarize a cassette.")
+    show_parser.add_argument("cassette", help="Cassette file to summarize.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(name)s:%(message)s')
+
+    if args.command == "record":
+        report = record(Config(), args.cassette, args.query, args.url_budget)
+    elif args.command == "replay":
+        report = replay(Config(), args.cassette, args.speed)
+    else:
+        cassette = Cassette(args.cassette, "replay")
+        meta = {key: value for key, value in cassette.meta.items() if key != "settings"}
+        report = {"interactions": len(cassette.entries), "kinds": cassette.summary()["kinds"], "meta": meta}
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# File: compact_extraction.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Defines the compact wire format for article extraction output (short keys, positional arrays, one-letter codes).
+# - Expands compact output locally into the exact structure `KnowledgeGraphUploader.upload_batch` expects.
+# - Values the verbose format repeats for every entity (article title, quote dates, empty relationships) are filled in here
+#   instead of being generated by the model.
+
+# Expected Inputs:
+# - Parsed compact extraction output (a dict), e.g.
+#   {"a": ["Title", "URL", "mm/dd/yyyy"],
+#    "s": [["Name", "P", "Employer", "Institution", "Role", 0, ["Event"], "Controversy", [["Quote", "Context"]]]],
+#    "e": [["Title", "mm/dd/yyyy", "Description", ["Participant"]]],
+#    "f": [["Fact", "Summary", "Description"]], "i": [["Title", "Objective"]], "d": [["Title", "Description"]],
+#    "c": [["Summary", "Description", "L"]], "n": [["Name", "Type"]]}
+
+# Expected Outputs:
+# - The verbose extraction dict ("Article", "Stakeholders", "Events", ...), or the input unchanged if it is already verbose.
+
+from typing import Any, List, Optional
+
+STAKEHOLDER_TYPES = {"P": "Person", "O": "Organization"}
+CONTROVERSY_TYPES = {"L": "Legal", "S": "Social", "M": "Moral"}
+
+
+def is_compact(data) -> bool:
+    return isinstance(data, dict) and "a" in data and "Article" not in data
+
+
+def expand_extraction(data):
+    """Expand compact extraction output; verbose output and non-dicts are returned unchanged."""
+    if not is_compact(data):
+        return data
+    title, url, date = _fields(data.get("a"), 3)
+    return {
+        "Article": {"Title": title, "URL": url, "Date Published": date},
+        "Stakeholders": [_stakeholder(row, title, date) for row in _rows(data.get("s"))],
+        "Events": [
+            {"Title": t, "Date": d, "Description": desc, "Participants": _list(participants)}
+            for t, d, desc, participants in (_fields(row, 4) for row in _rows(data.get("e")))
+        ],
+        "Facts": [
+            {"Fact": fact, "Summary": summary, "Description": desc}
+            for fact, summary, desc in (_fields(row, 3) for row in _rows(data.get("f")))
+        ],
+        "Issues": [
+            {"Title": t, "Objective": objective}
+            for t, objective in (_fields(row, 2) for row in _rows(data.get("i")))
+        ],
+        "Documents": [
+            {"Document Title": t, "Description": desc}
+            for t, desc in (_fields(row, 2) for row in _rows(data.get("d")))
+        ],
+        "Controversies": [
+            {"Summary": summary, "Description": desc, "Controversy Type": CONTROVERSY_TYPES.get(kind, kind)}
+            for summary, desc, kind in (_fields(row, 3) for row in _rows(data.get("c")))
+        ],
+        "Institutions": [
+            {"Name": name, "Type": kind}
+            for name, kind in (_fields(row, 2) for row in _rows(data.get("n")))
+        ],
+    }
+
+
+def _stakeholder(row: list, article_title: Optional[str], article_date: Optional[str]) -> dict:
+    name, kind, employer, institution, role, is_author, events, controversy, quotes = _fields(row, 9)
+    return {
+        "Name": name,
+        "Type": STAKEHOLDER_TYPES.get(kind, kind),
+        "Relationships": {
+            "mentioned_in": article_title,
+            "is_employed_by": employer,
+            "has_role_in": institution,
+            "has_role": role,
+            "is_author": name if is_author else None,
+            "participated_in": _list(events),
+            "related_to": controversy,
+        },
+        "Quotes": [
+            {"Text": text, "Date Recorded": article_date, "Context": context}
+            for text, context in (_fields(quote, 2) for quote in _rows(quotes))
+        ],
+    }
+
+
+def _rows(value) -> List[list]:
+    # Tolerate a missing section or a lone row that wasn't wrapped in a list
+    if not isinstance(value, list):
+        return []
+    if value and not isinstance(value[0], list):
+        return [value]
+    return [row for row in value if isinstance(row, list)]
+
+
+def _fields(row, count: int) -> List[Any]:
+    # Missing trailing fields become None ("" is treated as missing too); extra fields are ignored
+    row = row if isinstance(row, list) else []
+    return [(row[i] if row[i] != "" else None) if i < len(row) else None for i in range(count)]
+
+
+def _list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
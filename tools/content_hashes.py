@@ -0,0 +1,120 @@
+# File: content_hashes.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Change detection for revisited URLs: remembers the content hash of every article that was uploaded, locally
+#   (SQLite at CONTENT_HASH_PATH, with an in-memory tier) and on its `Article` node (`content_hash`, `source_url`).
+# - Right after scraping, an article whose normalized text hashes to the recorded value is unchanged: it skips
+#   extraction, review and upload. A local miss falls back to the graph, so hashes recorded by other hosts count too.
+# - Changed articles go through the pipeline again; the uploader then prunes the links of the previous extraction
+#   from the same URL that the new one no longer has (see `KnowledgeGraphUploader`).
+
+# Expected Inputs:
+# - Scraped URLs with their content hash; uploaded URLs with the hash of the text they were extracted from.
+
+# Expected Outputs:
+# - Whether a scraped article is unchanged since its last upload.
+
+import logging
+import os
+import sqlite3
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CONTENT_HASH_QUERY = "MATCH (a:Article {source_url: $url}) RETURN a.content_hash AS content_hash LIMIT 1"
+
+
+class ContentHashStore:
+    def __init__(self, path: str = None, memory_size: int = 10000):
+        self.path = path
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        if self.path:
+            self._init_disk()
+
+    def get(self, url: str) -> Optional[str]:
+        digest = self._memory.get(url)
+        if digest is None and self.path:
+            digest = self._disk_get(url)
+            if digest is not None:
+                self._remember(url, digest)
+        return digest
+
+    def put(self, url: str, digest: str):
+        self._remember(url, digest)
+        if self.path:
+            self._disk_put(url, digest)
+
+    def _remember(self, url: str, digest: str):
+        self._memory.pop(url, None)
+        self._memory[url] = digest
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _init_disk(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS content_hashes (url TEXT PRIMARY KEY, content_hash TEXT NOT NULL)")
+
+    def _disk_get(self, url: str) -> Optional[str]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT content_hash FROM content_hashes WHERE url = ?", (url,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Content hash read failed: {e}")
+            return None
+        return row[0] if row else None
+
+    def _disk_put(self, url: str, digest: str):
+        try:
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO content_hashes (url, content_hash) VALUES (?, ?)", (url, digest))
+        except sqlite3.Error as e:
+            logger.error(f"Content hash write failed: {e}")
+
+
+_stores: Dict[str, ContentHashStore] = {}
+
+
+def get_content_hash_store(config) -> ContentHashStore:
+    """Process-wide store per path, shared by every job."""
+    path = config.CONTENT_HASH_PATH
+    if path not in _stores:
+        _stores[path] = ContentHashStore(path or None)
+    return _stores[path]
+
+
+async def graph_content_hash(config, url: str) -> Optional[str]:
+    from tools.database import get_neo4j_driver
+
+    try:
+        async with get_neo4j_driver(config).session() as session:
+            result = await session.run(CONTENT_HASH_QUERY, url=url)
+            record = await result.single()
+    except Exception as e:
+        logger.warning(f"Content hash lookup for {url} failed: {e}")
+        return None
+    return record["content_hash"] if record is not None else None
+
+
+async def is_unchanged(config, url: str, digest: str) -> bool:
+    """True if `url` was uploaded before with content hashing to `digest`."""
+    store = get_content_hash_store(config)
+    known = store.get(url)
+    if known is None and config.UPLOAD_MODE != "export":
+        known = await graph_content_hash(config, url)
+        if known is not None:
+            store.put(url, known)
+    return known == digest
+
+
+def record_uploaded(config, url: str, digest: Optional[str]):
+    if digest is not None:
+        get_content_hash_store(config).put(url, digest)
@@ -6,6 +6,14 @@
 # - Handles the connection and transactions with the Neo4j database.
 # - Executes Cypher queries to merge nodes and relationships.
 # - Logs details of each upload.
+# - Merges batches of articles in one transaction, merging the hot entities they share once per batch.
+# - Maps stakeholder names to canonical names through the alias index before merging, and records the aliases.
+# - Re-uploads of a changed article from the same URL are diff-merged: links of the previous extraction that the
+#   new one lacks are pruned before the new extraction is merged.
+# - Updates the co-mention and issue-activity counters (tools/graph_aggregates.py) in the same transaction.
+# - Evicts the cached graph reads (tools/graph_queries.py) of every entity a committed upload touched.
+# - Keeps one shared Neo4j driver (connection pool) per event loop; `neo4j` is imported on first use.
+# - With an active cassette (tools/cassette.py) the driver records every statement, or replays them without connecting.
 
 # Expected Inputs:
 # - Structured data to upload.
@@ -15,120 +23,287 @@
 # - Inserts data into the knowledge graph.
 # - Returns status confirmations and logs details.
 
-from neo4j import AsyncGraphDatabase
+import asyncio
 import json
+import weakref
+from tools.merge_keys import LONG_TEXT_KEYS, with_merge_keys
+from tools.entity_resolution import resolve_stakeholders
+from tools.graph_queries import entity_tags, invalidate_graph_cache
+from tools.graph_aggregates import AGGREGATE_INDEX_QUERIES, read_mentions, update_aggregates
+from tools.cassette import CassetteDriver, active_cassette
+
+_drivers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()  # event loop -> driver
+
+
+def get_neo4j_driver(config):
+    """Shared driver of the running event loop, so uploads reuse pooled connections across jobs."""
+    loop = asyncio.get_running_loop()
+    driver = _drivers.get(loop)
+    if driver is None:
+        cassette = active_cassette()
+        if cassette is not None and cassette.replaying:
+            driver = CassetteDriver(None, cassette)
+        else:
+            from neo4j import AsyncGraphDatabase
+
+            driver = AsyncGraphDatabase.driver(config.NEO4J_URI, auth=(config.NEO4J_USER, config.NEO4J_PASSWORD))
+            if cassette is not None:
+                driver = CassetteDriver(driver, cassette)
+        _drivers[loop] = driver
+    return driver
+
+
+async def close_neo4j_drivers():
+    driver = _drivers.pop(asyncio.get_running_loop(), None)
+    if driver is not None:
+        await driver.close()
+
+
+# Merges one article's extraction output with all its entities and relationships.
+# Quotes, facts and controversies are merged on the digest of their normalized text (see tools/merge_keys.py).
+ARTICLE_UPLOAD_QUERY = """
+// Create the Article node with text
+MERGE (article:Article {title: $jsonData.Article.Title})
+SET article.url = $jsonData.Article.URL,
+    article.date_published = $jsonData.Article["Date Published"],
+    article.text = $jsonData.Article.Text,
+    article.source_url = coalesce($jsonData.Article["Source URL"], article.source_url),
+    article.content_hash = coalesce($jsonData.Article["Content Hash"], article.content_hash)
+WITH article
+
+// Create Stakeholders and their relationships
+UNWIND $jsonData.Stakeholders AS stakeholderData
+MERGE (stakeholder:Stakeholder {name: stakeholderData.Name})
+SET stakeholder.type = stakeholderData.Type
+MERGE (stakeholder)-[:MENTIONED_IN]->(article)
+
+// Stakeholder Relationships
+FOREACH (_ IN CASE WHEN stakeholderData.Relationships.is_author IS NOT NULL THEN [1] ELSE [] END |
+    MERGE (stakeholder)-[:IS_AUTHOR]->(article)
+)
+FOREACH (_ IN CASE WHEN stakeholderData.Relationships.is_employed_by IS NOT NULL THEN [1] ELSE [] END |
+    MERGE (employer:Organization {name: stakeholderData.Relationships.is_employed_by})
+    MERGE (stakeholder)-[:IS_EMPLOYED_BY]->(employer)
+)
+FOREACH (_ IN CASE WHEN stakeholderData.Relationships.has_role_in IS NOT NULL THEN [1] ELSE [] END |
+    MERGE (institution:Institution {name: stakeholderData.Relationships.has_role_in})
+    MERGE (stakeholder)-[r:HAS_ROLE_IN]->(institution)
+    SET r.has_role = stakeholderData.Relationships.has_role
+)
+FOREACH (eventTitle IN stakeholderData.Relationships.participated_in |
+    MERGE (event:Event {title: eventTitle})
+    MERGE (stakeholder)-[:PARTICIPATED_IN]->(event)
+)
+FOREACH (_ IN CASE WHEN stakeholderData.Relationships.related_to_key IS NOT NULL THEN [1] ELSE [] END |
+    MERGE (controversy:Controversy {summary_key: stakeholderData.Relationships.related_to_key})
+    ON CREATE SET controversy.summary = stakeholderData.Relationships.related_to
+    MERGE (stakeholder)-[:RELATED_TO]->(controversy)
+)
+WITH article, stakeholderData, stakeholder
+
+// Create Quotes
+UNWIND stakeholderData.Quotes AS quoteData
+MERGE (quote:Quote {text_key: quoteData.Key})
+ON CREATE SET quote.text = quoteData.Text
+SET quote.date_recorded = quoteData["Date Recorded"],
+    quote.context = quoteData.Context
+MERGE (stakeholder)-[:SAID]->(quote)
+MERGE (quote)-[:MENTIONED_IN]->(article)
+WITH article
+
+// Create Events
+UNWIND $jsonData.Events AS eventData
+MERGE (event:Event {title: eventData.Title})
+SET event.date = eventData.Date,
+    event.description = eventData.Description
+MERGE (event)-[:MENTIONED_IN]->(article)
+FOREACH (participantName IN eventData.Participants |
+    MERGE (participant:Stakeholder {name: participantName})
+    MERGE (participant)-[:PARTICIPATED_IN]->(event)
+)
+WITH article
+
+// Create Facts
+UNWIND $jsonData.Facts AS factData
+MERGE (fact:Fact {fact_key: factData.Key})
+ON CREATE SET fact.fact = factData.Fact
+SET fact.summary = factData.Summary,
+    fact.description = factData.Description
+MERGE (article)-[:CITES]->(fact)
+WITH article
+
+// Create Issues
+UNWIND $jsonData.Issues AS issueData
+MERGE (issue:Issue {title: issueData.Title})
+SET issue.objective = issueData.Objective
+MERGE (article)-[:IS_ABOUT]->(issue)
+WITH article
+
+// Create Documents
+UNWIND $jsonData.Documents AS documentData
+MERGE (document:Document {title: documentData["Document Title"]})
+SET document.description = documentData.Description
+MERGE (article)-[:MENTIONS]->(document)
+WITH article
+
+// Create Controversies
+UNWIND $jsonData.Controversies AS controversyData
+MERGE (controversy:Controversy {summary_key: controversyData.Key})
+ON CREATE SET controversy.summary = controversyData.Summary
+SET controversy.description = controversyData.Description,
+    controversy.controversy_type = controversyData["Controversy Type"]
+MERGE (article)-[:MENTIONS]->(controversy)
+WITH article
+
+// Create Institutions
+UNWIND $jsonData.Institutions AS institutionData
+MERGE (institution:Institution {name: institutionData.Name})
+SET institution.type = institutionData.Type
+MERGE (article)-[:MENTIONS]->(institution)
+"""
+
+# Diff-merge of a changed article: drops its links to entities the new extraction no longer has.
+# `$keep` holds "Label|key" of every entity in the new payload; nodes themselves are left in place.
+# Only a re-upload from the same source URL is a revision: another URL with the same title (syndicated or wire copy)
+# merges into the article additively.
+PRUNE_STALE_LINKS_QUERY = """
+MATCH (article:Article {title: $title, source_url: $source_url})
+WHERE article.content_hash IS NOT NULL AND article.content_hash <> $content_hash
+CALL {
+    WITH article
+    MATCH (article)-[r:CITES|IS_ABOUT|MENTIONS]->(n)
+    WHERE NOT labels(n)[0] + "|" + coalesce(n.title, n.name, n.fact_key, n.summary_key, "") IN $keep
+    DELETE r
+    RETURN count(r) AS outgoing
+}
+CALL {
+    WITH article
+    MATCH (n)-[r:MENTIONED_IN|IS_AUTHOR]->(article)
+    WHERE NOT labels(n)[0] + "|" + coalesce(n.title, n.name, n.text_key, "") IN $keep
+    DELETE r
+    RETURN count(r) AS incoming
+}
+RETURN outgoing + incoming AS pruned
+"""
+
+# Looked up by the change detection right after scraping (tools/content_hashes.py)
+ARTICLE_INDEX_QUERIES = ["CREATE INDEX article_source_url IF NOT EXISTS FOR (n:Article) ON (n.source_url)"]
+
 
 class KnowledgeGraphUploader:
-    def __init__(self, uri: str, user: str, password: str):
-        self.driver = AsyncGraphDatabase.driver(uri, auth=(user, password))
-
-    async def upload_data(self, data: dict, state):
-        # Prepare the Cypher query
-        cypher_query = """
-        // Create the Article node with text
-        MERGE (article:Article {title: $jsonData.Article.Title})
-        SET article.url = $jsonData.Article.URL,
-            article.date_published = $jsonData.Article["Date Published"],
-            article.text = $jsonData.Article.Text
-        WITH article
-
-        // Create Stakeholders and their relationships
-        UNWIND $jsonData.Stakeholders AS stakeholderData
-        MERGE (stakeholder:Stakeholder {name: stakeholderData.Name})
-        SET stakeholder.type = stakeholderData.Type
-        MERGE (stakeholder)-[:MENTIONED_IN]->(article)
-
-        // Stakeholder Relationships
-        FOREACH (_ IN CASE WHEN stakeholderData.Relationships.is_author IS NOT NULL THEN [1] ELSE [] END |
-            MERGE (stakeholder)-[:IS_AUTHOR]->(article)
-        )
-        FOREACH (_ IN CASE WHEN stakeholderData.Relationships.is_employed_by IS NOT NULL THEN [1] ELSE [] END |
-            MERGE (employer:Organization {name: stakeholderData.Relationships.is_employed_by})
-            MERGE (stakeholder)-[:IS_EMPLOYED_BY]->(employer)
-        )
-        FOREACH (_ IN CASE WHEN stakeholderData.Relationships.has_role_in IS NOT NULL THEN [1] ELSE [] END |
-            MERGE (institution:Institution {name: stakeholderData.Relationships.has_role_in})
-            MERGE (stakeholder)-[r:HAS_ROLE_IN]->(institution)
-            SET r.has_role = stakeholderData.Relationships.has_role
-        )
-        FOREACH (eventTitle IN stakeholderData.Relationships.participated_in |
-            MERGE (event:Event {title: eventTitle})
-            MERGE (stakeholder)-[:PARTICIPATED_IN]->(event)
-        )
-        FOREACH (_ IN CASE WHEN stakeholderData.Relationships.related_to IS NOT NULL THEN [1] ELSE [] END |
-            MERGE (controversy:Controversy {summary: stakeholderData.Relationships.related_to})
-            MERGE (stakeholder)-[:RELATED_TO]->(controversy)
-        )
-        WITH article, stakeholderData, stakeholder
-
-        // Create Quotes
-        UNWIND stakeholderData.Quotes AS quoteData
-        MERGE (quote:Quote {text: quoteData.Text})
-        SET quote.date_recorded = quoteData["Date Recorded"],
-            quote.context = quoteData.Context
-        MERGE (stakeholder)-[:SAID]->(quote)
-        MERGE (quote)-[:MENTIONED_IN]->(article)
-        WITH article
-
-        // Create Events
-        UNWIND $jsonData.Events AS eventData
-        MERGE (event:Event {title: eventData.Title})
-        SET event.date = eventData.Date,
-            event.description = eventData.Description
-        MERGE (event)-[:MENTIONED_IN]->(article)
-        FOREACH (participantName IN eventData.Participants |
-            MERGE (participant:Stakeholder {name: participantName})
-            MERGE (participant)-[:PARTICIPATED_IN]->(event)
-        )
-        WITH article
-
-        // Create Facts
-        UNWIND $jsonData.Facts AS factData
-        MERGE (fact:Fact {fact: factData.Fact})
-        SET fact.summary = factData.Summary,
-            fact.description = factData.Description
-        MERGE (article)-[:CITES]->(fact)
-        WITH article
-
-        // Create Issues
-        UNWIND $jsonData.Issues AS issueData
-        MERGE (issue:Issue {title: issueData.Title})
-        SET issue.objective = issueData.Objective
-        MERGE (article)-[:IS_ABOUT]->(issue)
-        WITH article
-
-        // Create Documents
-        UNWIND $jsonData.Documents AS documentData
-        MERGE (document:Document {title: documentData["Document Title"]})
-        SET document.description = documentData.Description
-        MERGE (article)-[:MENTIONS]->(document)
-        WITH article
-
-        // Create Controversies
-        UNWIND $jsonData.Controversies AS controversyData
-        MERGE (controversy:Controversy {summary: controversyData.Summary})
-        SET controversy.description = controversyData.Description,
-            controversy.controversy_type = controversyData["Controversy Type"]
-        MERGE (article)-[:MENTIONS]->(controversy)
-        WITH article
-
-        // Create Institutions
-        UNWIND $jsonData.Institutions AS institutionData
-        MERGE (institution:Institution {name: institutionData.Name})
-        SET institution.type = institutionData.Type
-        MERGE (article)-[:MENTIONS]->(institution)
-        """
-
-        # Execute the Cypher query
-        try:
-            async with self.driver.session() as session:
-                result = await session.write_transaction(
-                    self._run_query, cypher_query, data
-                )
-                return True, f"Data from article '{data['Article']['Title']}' has been merged into the knowledge graph."
-        except Exception as e:
-            return False, str(e)
+    def __init__(self, uri: str = None, user: str = None, password: str = None, driver=None, alias_index=None):
+        # A shared driver is left open on close(); a driver of our own is closed with the uploader
+        self._owns_driver = driver is None
+        self.alias_index = alias_index
+        if driver is None:
+            from neo4j import AsyncGraphDatabase
+
+            driver = AsyncGraphDatabase.driver(uri, auth=(user, password))
+        self.driver = driver
+
+    async def close(self):
+        if self._owns_driver:
+            await self.driver.close()
+
+    async def upload_batch(self, payloads: list):
+        """Merge several articles in one write transaction; raises if the transaction fails."""
+        aliases = {}
+        if self.alias_index is not None:
+            resolved = []
+            for payload in payloads:
+                payload, seen = resolve_stakeholders(payload, self.alias_index)
+                resolved.append(payload)
+                for name, names in seen.items():
+                    aliases.setdefault(name, set()).update(names)
+            payloads = resolved
+        payloads = [with_merge_keys(payload) for payload in payloads]
+        async with self.driver.session() as session:
+            await session.execute_write(self._run_batch, payloads, aliases)
+        # After the commit, so a read issued from now on sees the new data
+        invalidate_graph_cache(set().union(*(entity_tags(payload) for payload in payloads)))
+
+    async def prepare(self):
+        """Run once before the first write: create indexes and load the alias index from the graph."""
+        await self.ensure_indexes()
+        if self.alias_index is not None:
+            await self.alias_index.warm(self.driver)
+
+    async def ensure_indexes(self):
+        """Index the merge keys and the keys the aggregate updates look up, so they are index lookups."""
+        async with self.driver.session() as session:
+            for query in MERGE_KEY_INDEX_QUERIES + AGGREGATE_INDEX_QUERIES + ARTICLE_INDEX_QUERIES:
+                await session.run(query)
 
     @staticmethod
-    async def _run_query(tx, query, json_data):
-        await tx.run(query, jsonData=json_data)
+    async def _run_batch(tx, payloads, aliases=None):
+        titles = sorted({(payload.get("Article") or {}).get("Title") for payload in payloads} - {None})
+        before = await read_mentions(tx, titles)
+        # Hot entities shared by many articles are merged once per batch, in key order, before the articles
+        for label, rows in coalesce_entities(payloads, aliases).items():
+            await tx.run(HOT_ENTITY_QUERIES[label], rows=rows)
+        for payload in payloads:
+            article = payload.get("Article") or {}
+            if article.get("Content Hash") and article.get("Source URL") and article.get("Title"):
+                await tx.run(
+                    PRUNE_STALE_LINKS_QUERY, title=article["Title"], source_url=article["Source URL"],
+                    content_hash=article["Content Hash"],
+                    keep=sorted(f"{label}|{key}" for label, key in entity_tags(payload)),
+                )
+            await tx.run(ARTICLE_UPLOAD_QUERY, jsonData=payload)
+        await update_aggregates(tx, titles, before)
+
+
+MERGE_KEY_INDEX_QUERIES = [
+    f"CREATE INDEX {label.lower()}_{key} IF NOT EXISTS FOR (n:{label}) ON (n.{key})"
+    for label, (_, key) in LONG_TEXT_KEYS.items()
+]
+
+
+# One MERGE per distinct key; `row.props` holds the coalesced non-null properties.
+# Stakeholders also collect the other names they were extracted as (warms the alias index after a restart).
+HOT_ENTITY_QUERIES = {
+    "Stakeholder": (
+        "UNWIND $rows AS row MERGE (n:Stakeholder {name: row.key}) SET n += row.props, "
+        "n.aliases = [alias IN coalesce(n.aliases, []) WHERE NOT alias IN row.aliases] + row.aliases"
+    ),
+    "Institution": "UNWIND $rows AS row MERGE (n:Institution {name: row.key}) SET n += row.props",
+    "Organization": "UNWIND $rows AS row MERGE (n:Organization {name: row.key}) SET n += row.props",
+    "Issue": "UNWIND $rows AS row MERGE (n:Issue {title: row.key}) SET n += row.props",
+    "Event": "UNWIND $rows AS row MERGE (n:Event {title: row.key}) SET n += row.props",
+}
+
+
+def coalesce_entities(payloads: list, aliases: dict = None) -> dict:
+    """Distinct hot-entity keys across the payloads, with the last non-null value of each property."""
+    entities = {label: {} for label in HOT_ENTITY_QUERIES}
+
+    def add(label, key, **props):
+        if not isinstance(key, str) or not key:
+            return
+        merged = entities[label].setdefault(key, {})
+        merged.update({name: value for name, value in props.items() if value is not None})
+
+    for data in payloads:
+        for stakeholder in data.get("Stakeholders") or []:
+            add("Stakeholder", stakeholder.get("Name"), type=stakeholder.get("Type"))
+            relationships = stakeholder.get("Relationships") or {}
+            add("Organization", relationships.get("is_employed_by"))
+            add("Institution", relationships.get("has_role_in"))
+            for title in relationships.get("participated_in") or []:
+                add("Event", title)
+        for event in data.get("Events") or []:
+            add("Event", event.get("Title"), date=event.get("Date"), description=event.get("Description"))
+            for name in event.get("Participants") or []:
+                add("Stakeholder", name)
+        for issue in data.get("Issues") or []:
+            add("Issue", issue.get("Title"), objective=issue.get("Objective"))
+        for institution in data.get("Institutions") or []:
+            add("Institution", institution.get("Name"), type=institution.get("Type"))
+    # Sorted keys give every batch the same lock order
+    coalesced = {
+        label: [{"key": key, "props": rows[key]} for key in sorted(rows)]
+        for label, rows in entities.items() if rows
+    }
+    for row in coalesced.get("Stakeholder", []):
+        row["aliases"] = sorted((aliases or {}).get(row["key"], ()))
+    return coalesced
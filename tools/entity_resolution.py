@@ -0,0 +1,273 @@
+# File: entity_resolution.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - In-process alias index mapping extracted stakeholder names ("Sen. Jane Doe", "Senator Doe", "J. Doe") to the
+#   canonical name of the `Stakeholder` node they refer to, so they are MERGEd into one node.
+# - Names are normalized (case, punctuation, titles such as "Sen." or "Mayor") into tokens; a blocking index on
+#   tokens and token prefixes narrows every lookup to a small candidate set, so lookups stay fast with hundreds
+#   of thousands of names. Organization names keep their titles ("Office of the Governor" is not "Office of the
+#   Attorney General", "New York City Council" is not "New York City").
+# - A candidate matches when the names agree token by token (same surname, other tokens equal or initials) or,
+#   failing that, when their normalized forms are nearly identical while their given names agree (so only surname
+#   or single-token typos are corrected: "Mary Kelly" never resolves to "Mark Kelly"); ambiguous names are left as they are.
+# - A person never resolves to an organization or the other way round ("Ford" the company is not "Gerald Ford");
+#   names without a known type match either, and also match an organization by its full name.
+# - Warmed from the graph (names and recorded aliases of every `Stakeholder`) and updated on every upload.
+
+# Expected Inputs:
+# - Stakeholder names from extraction payloads; existing names and aliases from Neo4j.
+
+# Expected Outputs:
+# - Canonical names, and payload copies with every stakeholder name replaced by its canonical name.
+
+import logging
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Titles and honorifics dropped before matching
+TITLES = {
+    "sen", "senator", "rep", "representative", "assemblymember", "assemblyman", "assemblywoman", "councilmember",
+    "councilman", "councilwoman", "council", "member", "gov", "governor", "lt", "lieutenant", "mayor", "comptroller",
+    "commissioner", "president", "vice", "speaker", "leader", "majority", "minority", "attorney", "general", "ag",
+    "judge", "justice", "chief", "secretary", "sec", "dr", "mr", "mrs", "ms", "mx", "hon", "honorable", "the",
+    "jr", "sr", "ii", "iii", "iv", "d", "r",
+}
+# Blocks larger than this are too common to narrow anything down (e.g. the token "john")
+MAX_BLOCK_SIZE = 2000
+# Two candidates scoring within this margin are treated as a tie (ambiguous)
+FUZZY_MARGIN = 0.03
+
+_NON_WORD = re.compile(r"[^\w\s]")
+# Stakeholder types that must agree for two names to match
+KINDS = {"person", "organization"}
+
+
+def name_tokens(name: str, kind: Optional[str] = None) -> List[str]:
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    tokens = _NON_WORD.sub(" ", text).split()
+    if kind == "organization":
+        # Titles are part of what tells offices and bodies apart
+        return tokens
+    meaningful = [token for token in tokens if token not in TITLES]
+    # A name made only of titles ("The Mayor") is kept as it is rather than matching everything
+    return meaningful or tokens
+
+
+def _token_match(short: str, long: str) -> bool:
+    return short == long or (len(short) == 1 and long.startswith(short))
+
+
+def stakeholder_kind(stakeholder_type) -> Optional[str]:
+    """"person", "organization" or None (unknown) for a stakeholder `Type`."""
+    if not isinstance(stakeholder_type, str):
+        return None
+    kind = stakeholder_type.strip().casefold()
+    return kind if kind in KINDS else None
+
+
+def kinds_agree(a: Optional[str], b: Optional[str]) -> bool:
+    return a is None or b is None or a == b
+
+
+def compatible(query: List[str], candidate: List[str]) -> bool:
+    """True if every query token matches a distinct candidate token in order and the surnames are equal."""
+    if not query or len(query) > len(candidate) or query[-1] != candidate[-1]:
+        return False
+    position = 0
+    for token in query[:-1]:
+        while position < len(candidate) - 1 and not _token_match(token, candidate[position]):
+            position += 1
+        if position >= len(candidate) - 1:
+            return False
+        position += 1
+    return True
+
+
+def same_given_names(query: List[str], candidate: List[str]) -> bool:
+    """True if the names differ at most in their surname, so a fuzzy match can only correct a surname typo."""
+    if len(query) != len(candidate):
+        return False
+    return all(_token_match(a, b) or _token_match(b, a) for a, b in zip(query[:-1], candidate[:-1]))
+
+
+class AliasIndex:
+    def __init__(self, threshold: float = 0.88):
+        self.threshold = threshold
+        self._names: List[Tuple[str, List[str], str]] = []  # id -> (canonical name, tokens, normalized)
+        self._kinds: List[Optional[str]] = []  # id -> stakeholder kind
+        self._exact: Dict[str, int] = {}  # normalized alias -> id
+        self._blocks: Dict[str, Set[int]] = {}  # token or "prefix:" -> ids
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, name: str, aliases: Iterable[str] = (), kind: Optional[str] = None) -> str:
+        """Register a canonical name (and aliases pointing to it); returns the canonical name."""
+        tokens = name_tokens(name, kind)
+        normalized = " ".join(tokens)
+        if not normalized:
+            return name
+        entry = self._exact.get(normalized)
+        if entry is None:
+            entry = len(self._names)
+            self._names.append((name, tokens, normalized))
+            self._kinds.append(kind)
+            self._exact[normalized] = entry
+            for key in self._block_keys(tokens):
+                self._blocks.setdefault(key, set()).add(entry)
+        elif not kinds_agree(kind, self._kinds[entry]):
+            # Same normalized name as a stakeholder of the other kind: kept apart, under its own name
+            return name
+        elif self._kinds[entry] is None:
+            self._kinds[entry] = kind
+        for alias in aliases or ():
+            self._add_alias(entry, alias)
+        return self._names[entry][0]
+
+    def _add_alias(self, entry: int, alias: str):
+        alias_normalized = " ".join(name_tokens(alias, self._kinds[entry]))
+        if alias_normalized:
+            self._exact.setdefault(alias_normalized, entry)
+
+    def resolve(self, name: str, kind: Optional[str] = None) -> Optional[str]:
+        """Canonical name for `name` (of stakeholder `kind`), or None if it matches no known name (or several)."""
+        entry = self._resolve_entry(name, kind)
+        return None if entry is None else self._names[entry][0]
+
+    def canonicalize(self, name: str, kind: Optional[str] = None) -> str:
+        """Resolve `name`, registering it (as alias of its match, or as a new canonical name)."""
+        entry = self._resolve_entry(name, kind)
+        if entry is None:
+            return self.add(name, kind=kind)
+        canonical = self._names[entry][0]
+        if canonical != name:
+            self._add_alias(entry, name)
+        return canonical
+
+    def _resolve_entry(self, name: str, kind: Optional[str]) -> Optional[int]:
+        tokens = name_tokens(name, kind)
+        normalized = " ".join(tokens)
+        if not normalized:
+            return None
+        entry = None
+        if kind is None:
+            # An untyped name (e.g. an event participant) may be an organization registered under its full name
+            entry = self._exact.get(" ".join(name_tokens(name, "organization")))
+            if entry is not None and self._kinds[entry] != "organization":
+                entry = None
+        if entry is None:
+            entry = self._exact.get(normalized)
+            if entry is not None and not kinds_agree(kind, self._kinds[entry]):
+                entry = None
+        if entry is None:
+            entry = self._match(tokens, normalized, kind)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def _block_keys(self, tokens: List[str]) -> Set[str]:
+        keys = set()
+        for token in tokens:
+            if len(token) > 1:
+                keys.add(token)
+                keys.add("prefix:" + token[:3])
+        return keys
+
+    def _candidates(self, tokens: List[str]) -> Set[int]:
+        # The smallest usable block: usually the surname, which narrows the search the most
+        blocks = [self._blocks[key] for key in self._block_keys(tokens) if key in self._blocks]
+        blocks = [block for block in blocks if len(block) <= MAX_BLOCK_SIZE]
+        if not blocks:
+            return set()
+        return min(blocks, key=len)
+
+    def _match(self, tokens: List[str], normalized: str, kind: Optional[str] = None) -> Optional[int]:
+        candidates = {entry for entry in self._candidates(tokens) if kinds_agree(kind, self._kinds[entry])}
+        if not candidates:
+            return None
+        matches = {
+            entry for entry in candidates
+            if compatible(tokens, self._names[entry][1]) or compatible(self._names[entry][1], tokens)
+        }
+        if len(matches) == 1:
+            return matches.pop()
+        if len(matches) > 1:
+            return None  # "Doe" when there are several Does
+        # Fuzzy fallback; the cheap upper bounds rule out most candidates before the full ratio
+        matcher = SequenceMatcher(None)
+        matcher.set_seq2(normalized)
+        cutoff = self.threshold - FUZZY_MARGIN
+        scored = []
+        for entry in candidates:
+            if not same_given_names(tokens, self._names[entry][1]):
+                continue
+            matcher.set_seq1(self._names[entry][2])
+            if matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff:
+                score = matcher.ratio()
+                if score >= cutoff:
+                    scored.append((score, entry))
+        if not scored:
+            return None
+        scored.sort(reverse=True)
+        best_score, best = scored[0]
+        if best_score < self.threshold:
+            return None
+        if len(scored) > 1 and best_score - scored[1][0] < FUZZY_MARGIN:
+            return None
+        return best
+
+    async def warm(self, driver, batch_size: int = 10000) -> int:
+        """Load every stakeholder name and its recorded aliases from the graph."""
+        loaded = 0
+        async with driver.session() as session:
+            skip = 0
+            while True:
+                result = await session.run(
+                    "MATCH (s:Stakeholder) RETURN s.name AS name, s.aliases AS aliases, s.type AS type "
+                    "ORDER BY s.name SKIP $skip LIMIT $limit",
+                    skip=skip, limit=batch_size,
+                )
+                records = [record.data() async for record in result]
+                for record in records:
+                    if isinstance(record["name"], str):
+                        self.add(record["name"], record["aliases"] or [], stakeholder_kind(record.get("type")))
+                        loaded += 1
+                if len(records) < batch_size:
+                    break
+                skip += batch_size
+        logger.info(f"Alias index warmed with {loaded} stakeholder names.")
+        return loaded
+
+
+def resolve_stakeholders(data: dict, index: AliasIndex) -> Tuple[dict, Dict[str, Set[str]]]:
+    """Copy of the payload with canonical stakeholder names, and the aliases seen per canonical name."""
+    aliases: Dict[str, Set[str]] = {}
+
+    def canonical(name, stakeholder_type=None):
+        if not isinstance(name, str) or not name.strip():
+            return name
+        resolved = index.canonicalize(name, stakeholder_kind(stakeholder_type))
+        if resolved != name:
+            aliases.setdefault(resolved, set()).add(name)
+        return resolved
+
+    data = dict(data)
+    data["Stakeholders"] = [
+        {**stakeholder, "Name": canonical(stakeholder.get("Name"), stakeholder.get("Type"))}
+        for stakeholder in data.get("Stakeholders") or []
+    ]
+    data["Events"] = [
+        {**event, "Participants": [canonical(name) for name in event.get("Participants") or []]}
+        for event in data.get("Events") or []
+    ]
+    return data, aliases
@@ -0,0 +1,74 @@
+# File: extraction_schema.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Defines the JSON schema of the article extraction output expected by `KnowledgeGraphUploader.upload_batch`.
+# - Validates extracted data so malformed LLM output can be rejected before review and upload.
+
+# Expected Inputs:
+# - Parsed extraction output (a dict).
+
+# Expected Outputs:
+# - True if the data matches the schema, False otherwise.
+
+from functools import lru_cache
+
+_STRING = {"type": ["string", "null"]}
+_STRING_LIST = {"type": ["array", "null"], "items": {"type": "string"}}
+# The prompt allows any list to be omitted or null; downstream code reads them as `data.get(...) or []`
+_NULLABLE_ARRAY = ["array", "null"]
+
+EXTRACTION_SCHEMA = {
+    "type": "object",
+    "required": ["Article"],
+    "properties": {
+        "Article": {
+            "type": "object",
+            "required": ["Title"],
+            "properties": {"Title": {"type": "string", "minLength": 1}, "URL": _STRING, "Date Published": _STRING},
+        },
+        "Stakeholders": {
+            "type": _NULLABLE_ARRAY,
+            "items": {
+                "type": "object",
+                "required": ["Name"],
+                "properties": {
+                    "Name": {"type": "string"},
+                    "Type": _STRING,
+                    "Relationships": {
+                        "type": ["object", "null"],
+                        "properties": {"participated_in": _STRING_LIST},
+                    },
+                    "Quotes": {
+                        "type": _NULLABLE_ARRAY,
+                        "items": {"type": "object", "required": ["Text"], "properties": {"Text": {"type": "string"}}},
+                    },
+                },
+            },
+        },
+        "Events": {
+            "type": _NULLABLE_ARRAY,
+            "items": {
+                "type": "object",
+                "required": ["Title"],
+                "properties": {"Title": {"type": "string"}, "Participants": _STRING_LIST},
+            },
+        },
+        "Facts": {"type": _NULLABLE_ARRAY, "items": {"type": "object", "required": ["Fact"]}},
+        "Issues": {"type": _NULLABLE_ARRAY, "items": {"type": "object", "required": ["Title"]}},
+        "Documents": {"type": _NULLABLE_ARRAY, "items": {"type": "object", "required": ["Document Title"]}},
+        "Controversies": {"type": _NULLABLE_ARRAY, "items": {"type": "object", "required": ["Summary"]}},
+        "Institutions": {"type": _NULLABLE_ARRAY, "items": {"type": "object", "required": ["Name"]}},
+    },
+}
+
+@lru_cache(maxsize=1)
+def get_validator():
+    # Built on first use so importing the agents does not pay for jsonschema
+    from jsonschema import Draft7Validator
+
+    return Draft7Validator(EXTRACTION_SCHEMA)
+
+
+def is_valid_extraction(data) -> bool:
+    return isinstance(data, dict) and get_validator().is_valid(data)
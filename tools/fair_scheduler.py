@@ -0,0 +1,178 @@
+# File: fair_scheduler.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Provides weighted-fair scheduling between job priority classes ("interactive" and "bulk").
+# - `FairQueue` holds items per priority class and hands them out in weighted-fair order, so a higher-weight class
+#   goes first while every class still gets its weighted share when all classes are backlogged.
+# - `WeightedFairPool` is a process-wide worker pool per pipeline stage (search, scrape, llm, upload): a fixed number
+#   of slots granted to waiting callers through a `FairQueue`.
+# - The caller's priority class is taken from the job running in the current task.
+
+# Expected Inputs:
+# - Pool capacities per stage and weights per priority class from the configuration
+#   (STAGE_CONCURRENCY, PRIORITY_WEIGHTS).
+
+# Expected Outputs:
+# - Async context managers granting a stage slot to the calling job.
+# - Per-stage snapshots of active slots, waiters and grants per priority class.
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from tools.job_control import current_priority
+
+PRIORITY_CLASSES = ("interactive", "bulk")
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parse "name=number,..." into {name: number}, ignoring malformed entries."""
+    values = {}
+    for entry in (spec or "").split(","):
+        name, _, value = entry.partition("=")
+        try:
+            values[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return values
+
+
+class FairQueue:
+    """Per-class FIFO queues served by weighted fair queuing (start-time virtual clock)."""
+
+    def __init__(self, weights: Dict[str, float]):
+        self.weights = dict(weights)
+        self._queues: Dict[str, deque] = {}
+        self._virtual: Dict[str, float] = {}  # Virtual finish time of each class's last grant
+        self._now = 0.0  # Virtual start time of the last grant
+
+    def push(self, priority: str, item: Any):
+        self._queues.setdefault(priority, deque()).append(item)
+
+    def pop(self) -> Any:
+        priority = self._next_class(self._now, self._virtual)
+        if priority is None:
+            raise IndexError("pop from an empty FairQueue")
+        self.charge(priority)
+        item = self._queues[priority].popleft()
+        if not self._queues[priority]:
+            del self._queues[priority]
+        return item
+
+    def charge(self, priority: str):
+        """Account one grant to `priority` (also for grants that never had to queue)."""
+        start = max(self._virtual.get(priority, 0.0), self._now)
+        self._virtual[priority] = start + 1.0 / self._weight(priority)
+        self._now = start
+
+    def preference(self, priorities: List[str]) -> List[str]:
+        """Classes ordered by which should be served next, for pulling work from an external queue."""
+        return sorted(priorities, key=lambda p: (max(self._virtual.get(p, 0.0), self._now) + 1.0 / self._weight(p), -self._weight(p)))
+
+    def prune(self, keep: Callable[[Any], bool]):
+        for priority in list(self._queues):
+            self._queues[priority] = deque(item for item in self._queues[priority] if keep(item))
+            if not self._queues[priority]:
+                del self._queues[priority]
+
+    def ordered(self) -> List[Any]:
+        """Items in the order they would be served if nothing else arrived."""
+        queues = {priority: list(items) for priority, items in self._queues.items()}
+        virtual, now, order = dict(self._virtual), self._now, []
+        while queues:
+            priority = self._next_class(now, virtual, queues)
+            start = max(virtual.get(priority, 0.0), now)
+            virtual[priority], now = start + 1.0 / self._weight(priority), start
+            order.append(queues[priority].pop(0))
+            if not queues[priority]:
+                del queues[priority]
+        return order
+
+    def depths(self) -> Dict[str, int]:
+        return {priority: len(items) for priority, items in self._queues.items()}
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._queues.values())
+
+    def __iter__(self) -> Iterator[Any]:
+        for items in list(self._queues.values()):
+            yield from list(items)
+
+    def _weight(self, priority: str) -> float:
+        return max(self.weights.get(priority, 1.0), 1e-6)
+
+    def _next_class(self, now: float, virtual: Dict[str, float], queues: Optional[Dict] = None) -> Optional[str]:
+        # The backlogged class whose next grant would finish first in virtual time
+        backlogged = [priority for priority, items in (queues or self._queues).items() if items]
+        if not backlogged:
+            return None
+        return min(backlogged, key=lambda p: (max(virtual.get(p, 0.0), now) + 1.0 / self._weight(p), -self._weight(p)))
+
+
+class WeightedFairPool:
+    def __init__(self, name: str, capacity: int, weights: Dict[str, float]):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.active = 0
+        self.granted: Dict[str, int] = {}
+        self._waiters = FairQueue(weights)
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[str] = None):
+        priority = priority or current_priority()
+        if self.active < self.capacity and not len(self._waiters):
+            self.active += 1
+            self._waiters.charge(priority)
+        else:
+            granted = asyncio.get_running_loop().create_future()
+            self._waiters.push(priority, granted)
+            try:
+                await granted
+            except asyncio.CancelledError:
+                if granted.done() and not granted.cancelled():
+                    # The slot was handed over just as the caller was cancelled: pass it on
+                    self._release()
+                else:
+                    self._waiters.prune(lambda waiter: waiter is not granted)
+                raise
+        self.granted[priority] = self.granted.get(priority, 0) + 1
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        self.active -= 1
+        self._waiters.prune(lambda waiter: not waiter.done())
+        while self.active < self.capacity and len(self._waiters):
+            self.active += 1
+            self._waiters.pop().set_result(None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "waiting": self._waiters.depths(),
+            "granted": dict(self.granted),
+        }
+
+
+_pools: Dict[str, WeightedFairPool] = {}
+
+
+def get_stage_pool(stage: str, config) -> WeightedFairPool:
+    """Process-wide pool for a stage, shared by every job so priorities hold across jobs."""
+    if stage not in _pools:
+        capacities = parse_weights(config.STAGE_CONCURRENCY)
+        _pools[stage] = WeightedFairPool(stage, int(capacities.get(stage, 4)), parse_weights(config.PRIORITY_WEIGHTS))
+    return _pools[stage]
+
+
+def stage_slot(stage: str, config):
+    """`async with stage_slot("llm", config):` runs the block in a slot of the stage's pool."""
+    return get_stage_pool(stage, config).slot()
+
+
+def stage_snapshot() -> Dict[str, Dict[str, Any]]:
+    return {stage: pool.snapshot() for stage, pool in _pools.items()}
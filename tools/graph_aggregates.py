@@ -0,0 +1,173 @@
+# File: graph_aggregates.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Pre-aggregated counters kept in the knowledge graph so "who is mentioned together with whom" and "which issues
+#   are trending" are answered from the counters (O(result)) instead of scanning MENTIONED_IN/IS_ABOUT:
+#   - `(:Stakeholder)-[:CO_MENTIONED {weight}]->(:Stakeholder)`: number of articles mentioning both stakeholders,
+#     stored once per pair, from the lower to the higher name;
+#   - `(:Issue)-[:ACTIVITY_ON]->(:IssueDay {issue, day, mentions})`: number of articles about the issue per day.
+# - Updated incrementally in the upload transaction: the mentions of each article are read before and after the
+#   merge and only the difference is applied, so re-uploading an article never counts it twice, and links pruned
+#   from a changed article are subtracted again.
+# - An article's day is its publication date (ISO `YYYY-MM-DD`), or the upload day when that cannot be parsed;
+#   it is stored as `activity_day` together with `aggregated = true` once the article is counted.
+# - tools/rebuild_aggregates.py recomputes every counter from scratch, dating articles with the same rule
+#   (`article_day`) so a rebuild gives the counts the incremental updates would have.
+
+# Expected Inputs:
+# - The open write transaction of an upload batch and the titles of its articles.
+
+# Expected Outputs:
+# - Updated co-mention weights, issue-day counts and article activity days.
+
+from datetime import datetime, timezone
+from itertools import combinations
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+from tools.cassette import wall_clock
+
+AGGREGATE_INDEX_QUERIES = [
+    "CREATE INDEX article_title IF NOT EXISTS FOR (n:Article) ON (n.title)",
+    "CREATE INDEX stakeholder_name IF NOT EXISTS FOR (n:Stakeholder) ON (n.name)",
+    "CREATE INDEX issue_title IF NOT EXISTS FOR (n:Issue) ON (n.title)",
+    "CREATE INDEX issueday_issue_day IF NOT EXISTS FOR (n:IssueDay) ON (n.issue, n.day)",
+    "CREATE INDEX issueday_day IF NOT EXISTS FOR (n:IssueDay) ON (n.day)",
+]
+
+# Stakeholders and issues currently linked to each article
+ARTICLE_MENTIONS_QUERY = """
+UNWIND $titles AS title
+MATCH (article:Article {title: title})
+OPTIONAL MATCH (stakeholder:Stakeholder)-[:MENTIONED_IN]->(article)
+WITH article, title, collect(DISTINCT stakeholder.name) AS stakeholders
+OPTIONAL MATCH (article)-[:IS_ABOUT]->(issue:Issue)
+RETURN title, stakeholders, collect(DISTINCT issue.title) AS issues, article.date_published AS date_published,
+       article.activity_day AS activity_day, coalesce(article.aggregated, false) AS aggregated
+"""
+
+CO_MENTION_QUERY = """
+UNWIND $rows AS row
+MATCH (a:Stakeholder {name: row.a}), (b:Stakeholder {name: row.b})
+MERGE (a)-[r:CO_MENTIONED]->(b)
+ON CREATE SET r.weight = 0
+SET r.weight = r.weight + row.delta
+WITH r WHERE r.weight <= 0
+DELETE r
+"""
+
+ISSUE_DAY_QUERY = """
+UNWIND $rows AS row
+MATCH (issue:Issue {title: row.issue})
+MERGE (day:IssueDay {issue: row.issue, day: row.day})
+ON CREATE SET day.mentions = 0
+SET day.mentions = day.mentions + row.delta
+MERGE (issue)-[:ACTIVITY_ON]->(day)
+WITH day WHERE day.mentions <= 0
+DETACH DELETE day
+"""
+
+ARTICLE_DAY_QUERY = """
+UNWIND $rows AS row
+MATCH (article:Article {title: row.title})
+SET article.activity_day = row.day, article.aggregated = true
+"""
+
+# Publication date formats seen in extraction output besides ISO 8601
+DATE_FORMATS = ("%B %d, %Y", "%b %d, %Y", "%b. %d, %Y", "%d %B %Y", "%m/%d/%Y")
+
+
+class ArticleMentions(NamedTuple):
+    stakeholders: FrozenSet[str]
+    issues: FrozenSet[str]
+    day: Optional[str]
+
+
+NOT_COUNTED = ArticleMentions(frozenset(), frozenset(), None)
+
+
+def activity_day(value) -> Optional[str]:
+    """ISO day of a publication date, or None if it cannot be parsed."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    text = value.strip()
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).date().isoformat()
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def current_day() -> str:
+    """Today's ISO day, through the cassette clock so a replayed upload sends the rows it was recorded with."""
+    return datetime.fromtimestamp(wall_clock(), timezone.utc).date().isoformat()
+
+
+def article_day(record: dict, today: str) -> str:
+    """The publication day, else the day already recorded for the article, else `today` (the upload day)."""
+    return activity_day(record["date_published"]) or record["activity_day"] or today
+
+
+def counted_mentions(record: dict) -> ArticleMentions:
+    """What the counters already include for an article (nothing if it was never counted)."""
+    if not record["aggregated"]:
+        return NOT_COUNTED
+    return ArticleMentions(frozenset(record["stakeholders"]), frozenset(record["issues"]), record["activity_day"])
+
+
+def current_mentions(record: dict, today: str) -> ArticleMentions:
+    return ArticleMentions(frozenset(record["stakeholders"]), frozenset(record["issues"]), article_day(record, today))
+
+
+def aggregate_deltas(
+    before: Dict[str, ArticleMentions], after: Dict[str, ArticleMentions]
+) -> Tuple[List[dict], List[dict], List[dict]]:
+    """Co-mention, issue-day and article-day rows turning the counts of `before` into those of `after`."""
+    pairs: Dict[Tuple[str, str], int] = {}
+    days: Dict[Tuple[str, str], int] = {}
+    for title, now in after.items():
+        then = before.get(title, NOT_COUNTED)
+        counted_pairs = set(combinations(sorted(then.stakeholders), 2))
+        current_pairs = set(combinations(sorted(now.stakeholders), 2))
+        for pair in current_pairs - counted_pairs:
+            pairs[pair] = pairs.get(pair, 0) + 1
+        for pair in counted_pairs - current_pairs:
+            pairs[pair] = pairs.get(pair, 0) - 1
+        counted = {(issue, then.day) for issue in then.issues if then.day}
+        current = {(issue, now.day) for issue in now.issues}
+        for key in current - counted:
+            days[key] = days.get(key, 0) + 1
+        for key in counted - current:
+            days[key] = days.get(key, 0) - 1
+    # Sorted rows give every batch the same lock order
+    return (
+        [{"a": a, "b": b, "delta": delta} for (a, b), delta in sorted(pairs.items()) if delta],
+        [{"issue": issue, "day": day, "delta": delta} for (issue, day), delta in sorted(days.items()) if delta],
+        [{"title": title, "day": now.day} for title, now in sorted(after.items())],
+    )
+
+
+async def read_mentions(tx, titles: List[str]) -> Dict[str, dict]:
+    result = await tx.run(ARTICLE_MENTIONS_QUERY, titles=titles)
+    records = [record.data() async for record in result]
+    return {record["title"]: record for record in records}
+
+
+async def update_aggregates(tx, titles: List[str], before: Dict[str, dict]):
+    """Apply the counter changes of the articles merged since `before` was read (same transaction)."""
+    today = current_day()
+    after = await read_mentions(tx, titles)
+    pair_rows, day_rows, article_rows = aggregate_deltas(
+        {title: counted_mentions(record) for title, record in before.items()},
+        {title: current_mentions(record, today) for title, record in after.items()},
+    )
+    if pair_rows:
+        await tx.run(CO_MENTION_QUERY, rows=pair_rows)
+    if day_rows:
+        await tx.run(ISSUE_DAY_QUERY, rows=day_rows)
+    if article_rows:
+        await tx.run(ARTICLE_DAY_QUERY, rows=article_rows)
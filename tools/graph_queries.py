@@ -0,0 +1,349 @@
+# File: graph_queries.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Read queries over the knowledge graph for the advisor front end: a stakeholder's neighborhood, the timeline
+#   of an issue, the lookup of a quote by its text, and the issues trending over the last days.
+# - Co-mentions and issue activity are read from the counters maintained on upload (tools/graph_aggregates.py).
+# - Runs parameterized Cypher on the shared Neo4j driver and caches the results per event loop (LRU, GRAPH_CACHE_SIZE).
+# - Every cached result is tagged with the entity keys it was built from; the uploader invalidates the tags of the
+#   entities each committed batch touched, so only the results that can have changed are evicted.
+# - Writes made by other processes (pipeline workers) are not seen by this cache; GRAPH_CACHE_TTL bounds how long
+#   such a result can stay stale.
+
+# Expected Inputs:
+# - Stakeholder names, issue titles, quote texts and trending windows from API requests.
+# - Payloads committed by `KnowledgeGraphUploader`, for invalidation.
+
+# Expected Outputs:
+# - JSON-serializable query results (None when the entity does not exist).
+# - Hit, miss and invalidation counters of the cache.
+
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+from tools.merge_keys import merge_key
+from tools.single_flight import SingleFlight, request_key
+
+# An entity tag: (label, merge key of the node), e.g. ("Stakeholder", "Jane Doe")
+Tag = Tuple[str, str]
+
+# Property each label is merged on
+ENTITY_KEYS = {
+    "Article": "title",
+    "Stakeholder": "name",
+    "Organization": "name",
+    "Institution": "name",
+    "Event": "title",
+    "Issue": "title",
+    "Document": "title",
+    "Quote": "text_key",
+    "Fact": "fact_key",
+    "Controversy": "summary_key",
+}
+
+# Tag of every issue-day counter: any change can reorder the trending issues
+ISSUE_ACTIVITY_TAG: Tag = ("IssueDay", "*")
+
+STAKEHOLDER_NEIGHBORHOOD_QUERY = """
+MATCH (s:Stakeholder {name: $name})
+CALL {
+    WITH s
+    MATCH (s)-[r]->(n)
+    WHERE NOT n:Article AND NOT n:Quote AND type(r) <> 'CO_MENTIONED'
+    RETURN collect({relationship: type(r), label: labels(n)[0], node: properties(n)})[..$limit] AS connections
+}
+CALL {
+    WITH s
+    MATCH (s)-[:MENTIONED_IN]->(a:Article)
+    WITH a ORDER BY a.date_published DESC
+    RETURN collect(a {.title, .url, .date_published})[..$limit] AS articles
+}
+CALL {
+    WITH s
+    MATCH (s)-[co:CO_MENTIONED]-(other:Stakeholder)
+    WITH other, co.weight AS articles ORDER BY articles DESC, other.name
+    RETURN collect({name: other.name, type: other.type, articles: articles})[..$limit] AS co_mentioned
+}
+RETURN s {.name, .type, .aliases} AS stakeholder, connections, articles, co_mentioned
+"""
+
+ISSUE_TIMELINE_QUERY = """
+MATCH (i:Issue {title: $title})
+CALL {
+    WITH i
+    MATCH (a:Article)-[:IS_ABOUT]->(i)
+    WITH a ORDER BY a.date_published DESC LIMIT $limit
+    OPTIONAL MATCH (s:Stakeholder)-[:MENTIONED_IN]->(a)
+    WITH a, collect(DISTINCT s.name) AS stakeholders
+    OPTIONAL MATCH (e:Event)-[:MENTIONED_IN]->(a)
+    WITH a, stakeholders, collect(DISTINCT e {.title, .date}) AS events
+    ORDER BY a.date_published DESC
+    RETURN collect({title: a.title, url: a.url, date_published: a.date_published,
+                    stakeholders: stakeholders, events: events}) AS articles
+}
+CALL {
+    WITH i
+    MATCH (i)-[:ACTIVITY_ON]->(d:IssueDay)
+    WITH d ORDER BY d.day DESC LIMIT $limit
+    RETURN collect(d {.day, .mentions}) AS activity
+}
+RETURN i {.title, .objective} AS issue, articles, activity
+"""
+
+QUOTE_LOOKUP_QUERY = """
+MATCH (q:Quote {text_key: $key})
+OPTIONAL MATCH (s:Stakeholder)-[:SAID]->(q)
+WITH q, collect(DISTINCT s.name) AS speakers
+OPTIONAL MATCH (q)-[:MENTIONED_IN]->(a:Article)
+RETURN q {.text, .context, .date_recorded} AS quote, speakers, collect(DISTINCT a {.title, .url, .date_published}) AS articles
+"""
+
+TRENDING_ISSUES_QUERY = """
+MATCH (d:IssueDay)
+WHERE d.day >= $since
+WITH d.issue AS issue, sum(d.mentions) AS mentions
+ORDER BY mentions DESC, issue
+LIMIT $limit
+RETURN collect({issue: issue, mentions: mentions}) AS issues
+"""
+
+
+def entity_tag(label: str, node: dict) -> Optional[Tag]:
+    key = node.get(ENTITY_KEYS.get(label, ""))
+    return (label, key) if isinstance(key, str) and key else None
+
+
+def entity_tags(data: dict) -> Set[Tag]:
+    """Tags of every node an upload of `data` (with merge keys, see tools/merge_keys.py) MERGEs."""
+    tags: Set[Tag] = set()
+
+    def add(label, key):
+        if isinstance(key, str) and key:
+            tags.add((label, key))
+
+    add("Article", (data.get("Article") or {}).get("Title"))
+    for stakeholder in data.get("Stakeholders") or []:
+        add("Stakeholder", stakeholder.get("Name"))
+        relationships = stakeholder.get("Relationships") or {}
+        add("Organization", relationships.get("is_employed_by"))
+        add("Institution", relationships.get("has_role_in"))
+        add("Controversy", relationships.get("related_to_key"))
+        for title in relationships.get("participated_in") or []:
+            add("Event", title)
+        for quote in stakeholder.get("Quotes") or []:
+            add("Quote", quote.get("Key"))
+    for event in data.get("Events") or []:
+        add("Event", event.get("Title"))
+        for name in event.get("Participants") or []:
+            add("Stakeholder", name)
+    for fact in data.get("Facts") or []:
+        add("Fact", fact.get("Key"))
+    for issue in data.get("Issues") or []:
+        add("Issue", issue.get("Title"))
+        tags.add(ISSUE_ACTIVITY_TAG)
+    for document in data.get("Documents") or []:
+        add("Document", document.get("Document Title"))
+    for controversy in data.get("Controversies") or []:
+        add("Controversy", controversy.get("Key"))
+    for institution in data.get("Institutions") or []:
+        add("Institution", institution.get("Name"))
+    return tags
+
+
+class _Entry:
+    __slots__ = ("value", "tags", "expires")
+
+    def __init__(self, value: Any, tags: Set[Tag], expires: float):
+        self.value = value
+        self.tags = tags
+        self.expires = expires
+
+
+class GraphReadCache:
+    def __init__(self, max_entries: int = 1000, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()  # Least recently used first
+        self._by_tag: Dict[Tag, Set[str]] = {}
+        self._flight = SingleFlight()
+        # Tags invalidated while reads were in flight, so a result read before the write is not cached after it
+        self._loading = 0
+        self._sequence = 0
+        self._invalidated: Dict[Tag, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[Tuple[Any, Set[Tag]]]]) -> Any:
+        """Cached value of `key`, or the value `load()` returns along with the tags it depends on."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            self._remove(key)
+        self.misses += 1
+        # Concurrent misses of the same key share one query
+        return await self._flight.do(key, lambda: self._load(key, load))
+
+    async def _load(self, key: str, load) -> Any:
+        started = self._sequence
+        self._loading += 1
+        try:
+            value, tags = await load()
+            if not any(self._invalidated.get(tag, started) > started for tag in tags):
+                self._store(key, value, tags)
+            return value
+        finally:
+            self._loading -= 1
+            if not self._loading:
+                self._invalidated.clear()
+
+    def _store(self, key: str, value: Any, tags: Set[Tag]):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(value, tags, time.monotonic() + self.ttl)
+        for tag in tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def invalidate(self, tags: Iterable[Tag]) -> int:
+        """Evict every result that depends on one of `tags`; returns the number of results evicted."""
+        evicted = 0
+        self._sequence += 1
+        for tag in tags:
+            if self._loading:
+                self._invalidated[tag] = self._sequence
+            for key in list(self._by_tag.get(tag, ())):
+                self._remove(key)
+                evicted += 1
+        self.invalidations += evicted
+        return evicted
+
+    def clear(self):
+        self._entries.clear()
+        self._by_tag.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "tags": len(self._by_tag),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+async def _fetch(driver, query: str, **params) -> Optional[dict]:
+    async with driver.session() as session:
+        result = await session.run(query, **params)
+        record = await result.single()
+    return record.data() if record is not None else None
+
+
+class GraphReader:
+    def __init__(self, driver, cache: GraphReadCache):
+        self.driver = driver
+        self.cache = cache
+
+    async def stakeholder_neighborhood(self, name: str, limit: int = 50) -> Optional[dict]:
+        async def load():
+            data = await _fetch(self.driver, STAKEHOLDER_NEIGHBORHOOD_QUERY, name=name, limit=limit)
+            tags = {("Stakeholder", name)}
+            if data is not None:
+                tags.update(("Article", article["title"]) for article in data["articles"] if article["title"])
+                tags.update(("Stakeholder", other["name"]) for other in data["co_mentioned"] if other["name"])
+                for connection in data["connections"]:
+                    tag = entity_tag(connection["label"], connection["node"])
+                    if tag is not None:
+                        tags.add(tag)
+            return data, tags
+
+        return await self.cache.get_or_load(request_key("stakeholder_neighborhood", name, limit), load)
+
+    async def issue_timeline(self, title: str, limit: int = 100) -> Optional[dict]:
+        async def load():
+            data = await _fetch(self.driver, ISSUE_TIMELINE_QUERY, title=title, limit=limit)
+            tags = {("Issue", title)}
+            if data is not None:
+                for article in data["articles"]:
+                    if article["title"]:
+                        tags.add(("Article", article["title"]))
+                    tags.update(("Stakeholder", name) for name in article["stakeholders"] if name)
+                    tags.update(("Event", event["title"]) for event in article["events"] if event["title"])
+            return data, tags
+
+        return await self.cache.get_or_load(request_key("issue_timeline", title, limit), load)
+
+    async def trending_issues(self, days: int = 7, limit: int = 20) -> dict:
+        since = (datetime.now(timezone.utc).date() - timedelta(days=days - 1)).isoformat()
+
+        async def load():
+            data = await _fetch(self.driver, TRENDING_ISSUES_QUERY, since=since, limit=limit)
+            return {"since": since, **(data or {"issues": []})}, {ISSUE_ACTIVITY_TAG}
+
+        return await self.cache.get_or_load(request_key("trending_issues", since, limit), load)
+
+    async def quote_lookup(self, text: str) -> Optional[dict]:
+        # Quotes are merged on the digest of their normalized text, so any spelling of the quote finds it
+        key = merge_key(text)
+        if key is None:
+            return None
+
+        async def load():
+            data = await _fetch(self.driver, QUOTE_LOOKUP_QUERY, key=key)
+            return data, {("Quote", key)}
+
+        return await self.cache.get_or_load(request_key("quote_lookup", key), load)
+
+
+_readers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()  # event loop -> reader
+
+
+def get_graph_reader(config) -> GraphReader:
+    """The reader of the running event loop, on the shared Neo4j driver."""
+    loop = asyncio.get_running_loop()
+    reader = _readers.get(loop)
+    if reader is None:
+        from tools.database import get_neo4j_driver
+
+        reader = GraphReader(get_neo4j_driver(config), GraphReadCache(config.GRAPH_CACHE_SIZE, config.GRAPH_CACHE_TTL))
+        _readers[loop] = reader
+    return reader
+
+
+def invalidate_graph_cache(tags: Iterable[Tag]) -> int:
+    """Evict cached reads of the running event loop that depend on the given entities."""
+    try:
+        reader = _readers.get(asyncio.get_running_loop())
+    except RuntimeError:
+        return 0
+    return reader.cache.invalidate(tags) if reader is not None else 0
+
+
+def graph_cache_snapshot() -> Optional[Dict[str, Any]]:
+    try:
+        reader = _readers.get(asyncio.get_running_loop())
+    except RuntimeError:
+        return None
+    return reader.cache.snapshot() if reader is not None else None
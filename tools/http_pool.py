@@ -0,0 +1,60 @@
+# File: http_pool.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Provides one shared `aiohttp` client session per event loop for the fixed API hosts (Tavily, Google CSE, Jina),
+#   so their connections are kept alive across requests and jobs instead of being set up for every call.
+# - `aiohttp` is imported on first use, so importing the server does not pay for it.
+# - `warm_http_pool` opens connections to the API hosts ahead of the first request.
+
+# Expected Inputs:
+# - URLs to warm up (base URLs of the configured backends).
+
+# Expected Outputs:
+# - A ready-to-use `aiohttp.ClientSession`; closed by `close_http_sessions` on shutdown.
+
+import asyncio
+import logging
+import weakref
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+# Keep-alive connections per host in the shared pool
+CONNECTIONS_PER_HOST = 16
+
+_sessions: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()  # event loop -> session
+
+
+def get_http_session():
+    """Shared session of the running event loop (sessions cannot be used across loops)."""
+    import aiohttp
+
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit_per_host=CONNECTIONS_PER_HOST))
+        _sessions[loop] = session
+    return session
+
+
+async def warm_http_pool(urls: Iterable[str], timeout: float = 5.0):
+    """Open a keep-alive connection to each host; failures only mean the first real request pays for the setup."""
+    import aiohttp
+
+    session = get_http_session()
+
+    async def touch(url: str):
+        try:
+            async with session.head(url, timeout=aiohttp.ClientTimeout(total=timeout)):
+                pass
+        except Exception as e:
+            logger.debug(f"Warm-up request to {url} failed: {e}")
+
+    await asyncio.gather(*(touch(url) for url in urls))
+
+
+async def close_http_sessions():
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
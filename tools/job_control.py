@@ -0,0 +1,217 @@
+# File: job_control.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Provides the `JobControl` class that runs one workflow job as a cancellable task.
+# - Enforces a per-job wall-clock deadline and token/cost budgets across every stage.
+# - Cancelling a job (explicitly, on deadline or on budget) cancels the workflow task, which tears down
+#   all in-flight scrapes, LLM calls and Neo4j transactions and releases their semaphores and connections.
+# - Records partial results (how far each stage got) when a job does not run to completion.
+
+# Expected Inputs:
+# - Job ID, the job's `SharedState`, its priority class and optional deadline/budget limits.
+# - LLM usage reported by the agents through `charge_llm_usage` while the job runs.
+
+# Expected Outputs:
+# - Job status ("pending", "queued", "running", "completed", "failed", "cancelled", "timed_out", "over_budget").
+# - Token and cost usage plus a partial-results summary.
+
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+from models.state import SharedState
+
+logger = logging.getLogger(__name__)
+
+# The job whose workflow is running in the current task (copied into every task it spawns)
+current_job: ContextVar[Optional["JobControl"]] = ContextVar("current_job", default=None)
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled", "timed_out", "over_budget")
+
+
+def parse_prices(spec: str) -> Dict[str, tuple]:
+    """Parse "model=input:output,..." (USD per 1K tokens) into {model: (input, output)}."""
+    prices = {}
+    for entry in (spec or "").split(","):
+        if "=" not in entry:
+            continue
+        model, _, rates = entry.partition("=")
+        prompt_rate, _, completion_rate = rates.partition(":")
+        try:
+            prices[model.strip()] = (float(prompt_rate), float(completion_rate or prompt_rate))
+        except ValueError:
+            logger.warning(f"Ignoring malformed LLM price entry: {entry}")
+    return prices
+
+
+class JobControl:
+    def __init__(
+        self,
+        job_id: str,
+        state,
+        deadline: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        max_cost: Optional[float] = None,
+        prices: Optional[Dict[str, tuple]] = None,
+        priority: str = "interactive",
+    ):
+        self.job_id = job_id
+        self.state = state
+        self.priority = priority  # Priority class used by the admission queue and the stage pools
+        self.deadline = deadline or None  # Seconds of wall-clock time once running; None = no deadline
+        self.max_tokens = max_tokens or None
+        self.max_cost = max_cost or None
+        self.prices = prices or {}
+        self.status = "pending"
+        self.reason: Optional[str] = None
+        self.tokens_used = 0
+        self.cost_used = 0.0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.partial_results: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[tuple] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    async def run(self, workflow: Callable[[Any], Awaitable[None]]):
+        """Run `workflow(state)` under this job's deadline and budgets; never raises for job-level failures."""
+        if self.finished:
+            # Cancelled before it got to run
+            return
+        self.status = "running"
+        self.started_at = time.time()
+        self._task = asyncio.create_task(self._bound(workflow))
+        timer = None
+        if self.deadline:
+            timer = asyncio.get_running_loop().call_later(
+                self.deadline, self.cancel, "timed_out", f"Deadline of {self.deadline:g}s exceeded."
+            )
+        try:
+            await self._task
+            self._finish("completed", None)
+        except asyncio.CancelledError:
+            if self._stop is None:
+                # The caller itself was cancelled (e.g. server shutdown): stop the workflow too
+                self._task.cancel()
+                self._finish("cancelled", "Job runner was cancelled.")
+                raise
+            self._finish(*self._stop)
+        except Exception as e:
+            logger.error(f"Job {self.job_id} failed: {e}")
+            self._finish("failed", str(e))
+        finally:
+            if timer:
+                timer.cancel()
+
+    async def _bound(self, workflow):
+        # Runs in the workflow task's own context, so every task it spawns sees this job
+        current_job.set(self)
+        await workflow(self.state)
+
+    def cancel(self, status: str = "cancelled", reason: str = "Cancelled by request.") -> bool:
+        """Stop the job now; returns False if it had already finished or was already being stopped."""
+        if self.finished or self._stop is not None:
+            return False
+        self._stop = (status, reason)
+        if self._task is None:
+            # Nothing in flight yet (e.g. still queued): finish right away
+            self._finish(status, reason)
+        else:
+            self._task.cancel()
+        return True
+
+    def charge(self, model: str, prompt_tokens: int, completion_tokens: int):
+        self.tokens_used += prompt_tokens + completion_tokens
+        prompt_rate, completion_rate = self.prices.get(model, (0.0, 0.0))
+        self.cost_used += (prompt_tokens * prompt_rate + completion_tokens * completion_rate) / 1000
+        if self.max_tokens and self.tokens_used > self.max_tokens:
+            self.cancel("over_budget", f"Token budget of {self.max_tokens} exceeded ({self.tokens_used} used).")
+        elif self.max_cost and self.cost_used > self.max_cost:
+            self.cancel("over_budget", f"Cost budget of ${self.max_cost:g} exceeded (${self.cost_used:.4f} used).")
+
+    def _finish(self, status: str, reason: Optional[str]):
+        self.status = status
+        self.reason = reason
+        self.finished_at = time.time()
+        if status != "completed":
+            self.partial_results = self._progress()
+            self.state.add_log(f"Job {status}: {reason} Partial results: {self.partial_results}", level="WARNING")
+        # Finished jobs stay in the status history; keep their records but not their payloads
+        self.state.release_payloads()
+
+    def _progress(self) -> Dict[str, Any]:
+        # Counted from the URL records, so payloads released along the way still count
+        progress = self.state.progress()
+        return {
+            "stopped_at": self.state.next_step,
+            "urls": progress["urls"],
+            "articles": progress["scraped"],
+            "extracted": progress["extracted"],
+            "reviewed": progress["reviewed"],
+            "uploaded": progress["uploaded"],
+            "unchanged": progress["unchanged"],
+            "upload_complete": self.state.upload_complete,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "priority": self.priority,
+            "status": self.status,
+            "reason": self.reason,
+            "next_step": self.state.next_step,
+            "upload_complete": self.state.upload_complete,
+            "articles_uploaded": self.state.progress()["uploaded"],
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "deadline": self.deadline,
+            "tokens_used": self.tokens_used,
+            "max_tokens": self.max_tokens,
+            "cost_used": round(self.cost_used, 6),
+            "max_cost": self.max_cost,
+            "partial_results": self.partial_results,
+        }
+
+
+def job_from_request(job_id: str, request: Dict[str, Any], config, prices: Optional[Dict[str, tuple]] = None) -> "JobControl":
+    """Build a job from a start_search request body; request limits override the configured defaults."""
+    def limit(key, default):
+        return default if request.get(key) is None else request[key]
+
+    state = SharedState()
+    state.config = config
+    state.user_query = request["user_query"]
+    state.url_budget = request.get("url_budget") or config.URL_BUDGET
+    return JobControl(
+        job_id,
+        state,
+        deadline=limit("deadline_seconds", config.JOB_DEADLINE_SECONDS),
+        max_tokens=limit("max_tokens", config.JOB_MAX_TOKENS),
+        max_cost=limit("max_cost_usd", config.JOB_MAX_COST_USD),
+        prices=prices if prices is not None else parse_prices(config.LLM_PRICES),
+        priority=request.get("priority") or "interactive",
+    )
+
+
+def current_priority(default: str = "interactive") -> str:
+    """Priority class of the job running in the current task (work outside any job counts as interactive)."""
+    job = current_job.get()
+    return job.priority if job is not None else default
+
+
+def charge_llm_usage(model: str, response):
+    """Charge a chat completion's token usage to the job running in the current task, if any."""
+    job = current_job.get()
+    if job is None:
+        return
+    usage = response.get("usage") if hasattr(response, "get") else None
+    if not usage:
+        return
+    job.charge(model, int(usage.get("prompt_tokens", 0)), int(usage.get("completion_tokens", 0)))
@@ -0,0 +1,313 @@
+# File: job_queue.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Defines the `JobQueue` interface for a durable job queue shared by the API process and worker processes.
+# - Provides `SQLiteJobQueue`, the single-host backend (one SQLite file in WAL mode, safe across processes).
+# - Workers claim jobs under a lease and renew it with heartbeats; jobs of a worker that dies are re-queued
+#   once the lease expires (up to a maximum number of attempts).
+# - A worker whose lease was taken over (it stalled past the lease and the job was re-claimed) is told so by its next
+#   heartbeat (`LeaseLost`); its status and log lines are no longer written to the job.
+# - Stores per-job status summaries and log lines so the API can serve status and logs for any worker.
+# - Other backends (e.g. a networked queue for multi-host setups) plug in through `JOB_QUEUE_BACKEND`.
+# - Queue methods are blocking; callers on an event loop run them through `asyncio.to_thread`.
+
+# Expected Inputs:
+# - Job payloads (the start_search request), priority classes, worker IDs and lease durations.
+# - Status summaries, log lines and cancel requests.
+
+# Expected Outputs:
+# - Claimed jobs for workers; job records, logs and queue statistics for the API.
+
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """The job is no longer leased to this worker (re-claimed by another worker or given up)."""
+
+
+class JobQueue:
+    """Interface every job queue backend implements."""
+
+    def enqueue(self, job_id: str, payload: Dict[str, Any], priority: str = "interactive"):
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, lease: float, priorities: List[str]) -> Optional[Dict[str, Any]]:
+        """Claim the oldest claimable job, trying priority classes in the given order."""
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: str, worker_id: str, lease: float, summary: Dict[str, Any], logs: List[str]) -> bool:
+        """Renew the lease, store the summary and append new log lines; returns whether cancellation was requested.
+
+        Raises `LeaseLost` (writing nothing) if the job is no longer running under this worker's lease.
+        """
+        raise NotImplementedError
+
+    def finish(self, job_id: str, worker_id: str, status: str, summary: Dict[str, Any], logs: List[str]):
+        raise NotImplementedError
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a queued job or flag a running one; returns the job's status, or None if unknown."""
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def logs(self, job_id: str, since: int = 0) -> List[str]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(JobQueue):
+    def __init__(self, path: str, max_attempts: int = 3, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    priority TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    worker TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    summary TEXT
+                );
+                CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, created_at);
+                CREATE TABLE IF NOT EXISTS job_logs (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    line TEXT NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                );
+                """
+            )
+
+    def enqueue(self, job_id: str, payload: Dict[str, Any], priority: str = "interactive"):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, payload, priority, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, json.dumps(payload), priority, self.clock()),
+            )
+
+    def claim(self, worker_id: str, lease: float, priorities: List[str]) -> Optional[Dict[str, Any]]:
+        now = self.clock()
+        with closing(self._connect()) as conn:
+            # IMMEDIATE takes the write lock up front, so two workers can't claim the same row
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._fail_exhausted(conn, now)
+                row = None
+                for priority in priorities:
+                    row = conn.execute(
+                        "SELECT * FROM jobs WHERE priority = ? AND cancel_requested = 0 AND "
+                        "(status = 'queued' OR (status = 'running' AND lease_expires < ?)) "
+                        "ORDER BY created_at LIMIT 1",
+                        (priority, now),
+                    ).fetchone()
+                    if row is not None:
+                        break
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                if row["status"] == "running":
+                    logger.warning(f"Lease of job {row['id']} held by {row['worker']} expired; re-queuing.")
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                    "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                    (worker_id, now + lease, now, row["id"]),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        job = self._record(row)
+        job["status"] = "running"
+        job["attempts"] += 1
+        return job
+
+    def _fail_exhausted(self, conn: sqlite3.Connection, now: float):
+        # Jobs whose workers keep dying are given up instead of being retried forever
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', finished_at = ?, "
+            "summary = json_object('reason', 'Worker lease expired too many times.') "
+            "WHERE status = 'running' AND lease_expires < ? AND attempts >= ?",
+            (now, now, self.max_attempts),
+        )
+        # Running jobs whose cancellation was never picked up by a (dead) worker
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? "
+            "WHERE status = 'running' AND lease_expires < ? AND cancel_requested = 1",
+            (now, now),
+        )
+
+    def heartbeat(self, job_id: str, worker_id: str, lease: float, summary: Dict[str, Any], logs: List[str]) -> bool:
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                renewed = conn.execute(
+                    "UPDATE jobs SET lease_expires = ?, summary = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                    (self.clock() + lease, json.dumps(summary), job_id, worker_id),
+                ).rowcount
+                if not renewed:
+                    raise LeaseLost(f"Job {job_id} is no longer leased to worker {worker_id}.")
+                self._append_logs(conn, job_id, logs)
+                row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return bool(row and row["cancel_requested"])
+
+    def finish(self, job_id: str, worker_id: str, status: str, summary: Dict[str, Any], logs: List[str]):
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                finished = conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, summary = ?, lease_expires = NULL "
+                    "WHERE id = ? AND worker = ?",
+                    (status, self.clock(), json.dumps(summary), job_id, worker_id),
+                ).rowcount
+                if finished:
+                    self._append_logs(conn, job_id, logs)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _append_logs(conn: sqlite3.Connection, job_id: str, logs: List[str]):
+        if not logs:
+            return
+        start = conn.execute("SELECT COALESCE(MAX(seq) + 1, 0) FROM job_logs WHERE job_id = ?", (job_id,)).fetchone()[0]
+        conn.executemany(
+            "INSERT INTO job_logs (job_id, seq, line) VALUES (?, ?, ?)",
+            [(job_id, start + offset, line) for offset, line in enumerate(logs)],
+        )
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = 'cancelled', finished_at = ?, cancel_requested = 1 "
+                    "WHERE id = ? AND status = 'queued'",
+                    (self.clock(), job_id),
+                )
+                # A running job is stopped by its worker at the next heartbeat
+                conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+                row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return row["status"] if row else None
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = self._record(row)
+            if job["status"] == "queued":
+                job["queue_position"] = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at <= ? AND "
+                    "(priority = ? OR priority = 'interactive')",
+                    (row["created_at"], row["priority"]),
+                ).fetchone()[0]
+        return job
+
+    def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._record(row) for row in rows]
+
+    def logs(self, job_id: str, since: int = 0) -> List[str]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT line FROM job_logs WHERE job_id = ? AND seq >= ? ORDER BY seq", (job_id, since)
+            ).fetchall()
+        return [row["line"] for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        now = self.clock()
+        with closing(self._connect()) as conn:
+            depth = {
+                row["priority"]: row["count"]
+                for row in conn.execute(
+                    "SELECT priority, COUNT(*) AS count FROM jobs WHERE status = 'queued' GROUP BY priority"
+                )
+            }
+            running = conn.execute(
+                "SELECT COUNT(*) AS count, COUNT(DISTINCT worker) AS workers FROM jobs "
+                "WHERE status = 'running' AND lease_expires >= ?",
+                (now,),
+            ).fetchone()
+            oldest = conn.execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            avg_wait = conn.execute(
+                "SELECT AVG(started_at - created_at) FROM "
+                "(SELECT started_at, created_at FROM jobs WHERE started_at IS NOT NULL ORDER BY started_at DESC LIMIT 50)"
+            ).fetchone()[0]
+        return {
+            "running": running["count"],
+            "busy_workers": running["workers"],
+            "queue_depth": sum(depth.values()),
+            "queue_depth_by_priority": depth,
+            "oldest_wait": now - oldest if oldest is not None else 0.0,
+            "avg_wait": round(avg_wait or 0.0, 3),
+        }
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["summary"] = json.loads(job["summary"]) if job["summary"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+
+JOB_QUEUE_BACKENDS = {"sqlite": lambda config: SQLiteJobQueue(config.JOB_QUEUE_PATH, max_attempts=config.JOB_MAX_ATTEMPTS)}
+
+
+def get_job_queue(config) -> JobQueue:
+    """Backend named by JOB_QUEUE_BACKEND: a registered name or a "package.module:factory" taking the config."""
+    backend = config.JOB_QUEUE_BACKEND
+    if backend in JOB_QUEUE_BACKENDS:
+        return JOB_QUEUE_BACKENDS[backend](config)
+    module_name, _, factory_name = backend.partition(":")
+    if not factory_name:
+        raise ValueError(f"Unknown job queue backend: {backend}")
+    return getattr(importlib.import_module(module_name), factory_name)(config)
@@ -0,0 +1,154 @@
+# File: llm_batch.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Provides the `BatchLLMClient` class for offline execution of chat completions through an OpenAI-compatible batch API.
+# - Writes requests to a JSONL file, uploads it, creates a batch, polls until it finishes and streams the results back.
+# - Used by the extraction and review stages for large backfills that would otherwise hit per-minute rate limits.
+# - Charges the token usage of each result to the job running in the current task, like realtime completions.
+
+# Expected Inputs:
+# - A list of (custom_id, chat completion request body) pairs.
+# - Batch API base URL, API key, polling interval and working directory from the configuration.
+
+# Expected Outputs:
+# - An async stream of (custom_id, assistant message or None, error or None) tuples.
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
+from tools.job_control import charge_llm_usage
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+
+
+class BatchLLMClient:
+    def __init__(
+        self,
+        api_base: str,
+        api_key: str,
+        work_dir: str = "llm_batches",
+        poll_interval: float = 30.0,
+        completion_window: str = "24h",
+    ):
+        self.api_base = api_base.rstrip("/")
+        self.api_key = api_key
+        self.work_dir = work_dir
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+
+    async def run(self, requests: List[Tuple[str, dict]], name: str = "batch") -> AsyncIterator[Tuple[str, Optional[str], Optional[str]]]:
+        """Submit the requests as one batch and yield each result as the output file is read."""
+        import aiohttp
+
+        path = self.write_requests(requests, name)
+        models = {custom_id: body.get("model") for custom_id, body in requests}
+        async with aiohttp.ClientSession(headers=self._headers()) as session:
+            batch_id = await self.submit(session, path)
+            logger.info(f"Submitted LLM batch {batch_id} with {len(requests)} requests from {path}.")
+            batch = await self.wait(session, batch_id)
+            if batch.get("status") != "completed":
+                logger.error(f"LLM batch {batch_id} ended with status {batch.get('status')}.")
+            seen = set()
+            for file_key in ("output_file_id", "error_file_id"):
+                if batch.get(file_key):
+                    async for custom_id, content, error in self._read_results(session, batch[file_key], models):
+                        seen.add(custom_id)
+                        yield custom_id, content, error
+            # Requests absent from both files (e.g. expired batch) are reported as failures
+            for custom_id, _ in requests:
+                if custom_id not in seen:
+                    yield custom_id, None, f"no result (batch status {batch.get('status')})"
+
+    def write_requests(self, requests: List[Tuple[str, dict]], name: str) -> str:
+        os.makedirs(self.work_dir, exist_ok=True)
+        path = os.path.join(self.work_dir, f"{name}-{int(time.time() * 1000)}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for custom_id, body in requests:
+                f.write(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": CHAT_COMPLETIONS_ENDPOINT,
+                    "body": body,
+                }) + "\n")
+        return path
+
+    async def submit(self, session: "aiohttp.ClientSession", path: str) -> str:
+        import aiohttp
+
+        form = aiohttp.FormData()
+        form.add_field("purpose", "batch")
+        with open(path, "rb") as f:
+            form.add_field("file", f.read(), filename=os.path.basename(path), content_type="application/jsonl")
+        async with session.post(f"{self.api_base}/files", data=form) as response:
+            response.raise_for_status()
+            input_file_id = (await response.json())["id"]
+
+        payload = {
+            "input_file_id": input_file_id,
+            "endpoint": CHAT_COMPLETIONS_ENDPOINT,
+            "completion_window": self.completion_window,
+        }
+        async with session.post(f"{self.api_base}/batches", json=payload) as response:
+            response.raise_for_status()
+            return (await response.json())["id"]
+
+    async def wait(self, session: "aiohttp.ClientSession", batch_id: str) -> dict:
+        while True:
+            async with session.get(f"{self.api_base}/batches/{batch_id}") as response:
+                response.raise_for_status()
+                batch = await response.json()
+            if batch.get("status") in TERMINAL_STATUSES:
+                return batch
+            await asyncio.sleep(self.poll_interval)
+
+    async def _read_results(self, session: "aiohttp.ClientSession", file_id: str, models: Dict[str, str]):
+        async with session.get(f"{self.api_base}/files/{file_id}/content") as response:
+            response.raise_for_status()
+            async for raw_line in response.content:
+                line = raw_line.strip()
+                if line:
+                    record = json.loads(line)
+                    charge_result_usage(record, models)
+                    yield parse_result(record)
+
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+
+def parse_result(record: dict) -> Tuple[str, Optional[str], Optional[str]]:
+    custom_id = record.get("custom_id")
+    if record.get("error"):
+        return custom_id, None, str(record["error"])
+    response = record.get("response") or {}
+    if response.get("status_code") != 200:
+        return custom_id, None, f"HTTP {response.get('status_code')}: {response.get('body')}"
+    try:
+        return custom_id, response["body"]["choices"][0]["message"]["content"].strip(), None
+    except (KeyError, IndexError, TypeError) as e:
+        return custom_id, None, f"malformed response: {e}"
+
+
+def charge_result_usage(record: dict, models: Dict[str, str]):
+    body = (record.get("response") or {}).get("body")
+    if isinstance(body, dict):
+        charge_llm_usage(body.get("model") or models.get(record.get("custom_id")), body)
+
+
+def get_batch_llm_client(config) -> BatchLLMClient:
+    return BatchLLMClient(
+        api_base=config.LLM_BATCH_API_BASE,
+        api_key=config.OPENAI_API_KEY,
+        work_dir=config.LLM_BATCH_DIR,
+        poll_interval=config.LLM_BATCH_POLL_INTERVAL,
+        completion_window=config.LLM_BATCH_COMPLETION_WINDOW,
+    )
@@ -0,0 +1,64 @@
+# File: merge_keys.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Defines the merge keys of long-text graph entities (`Quote.text`, `Fact.fact`, `Controversy.summary`).
+# - A merge key is the SHA-256 digest of the normalized text: short enough for an index entry, and equal for texts
+#   that differ only in whitespace, letter case or typographic quotes and dashes.
+# - `with_merge_keys` adds the keys to an extraction payload right before upload, so MERGE on these labels is an
+#   index lookup on the key property.
+
+# Expected Inputs:
+# - Extraction payloads (the extraction schema) or single texts.
+
+# Expected Outputs:
+# - Hex digests, and payload copies carrying a `Key` next to each long text.
+
+import hashlib
+import re
+import unicodedata
+from typing import Optional
+
+# Label -> (text property, key property); the key properties are indexed (see KnowledgeGraphUploader.ensure_indexes)
+LONG_TEXT_KEYS = {
+    "Quote": ("text", "text_key"),
+    "Fact": ("fact", "fact_key"),
+    "Controversy": ("summary", "summary_key"),
+}
+
+_WHITESPACE = re.compile(r"\s+")
+_TYPOGRAPHIC = str.maketrans({
+    "‘": "'", "’": "'", "‚": "'", "‛": "'",
+    "“": '"', "”": '"', "„": '"', "‟": '"',
+    "–": "-", "—": "-", "−": "-",
+})
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).translate(_TYPOGRAPHIC)
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+def merge_key(text) -> Optional[str]:
+    if not isinstance(text, str) or not text.strip():
+        return None
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def with_merge_keys(data: dict) -> dict:
+    """Copy of the payload with a `Key` on every quote, fact and controversy (the stored payload is left as is)."""
+    data = dict(data)
+    stakeholders = []
+    for stakeholder in data.get("Stakeholders") or []:
+        stakeholder = dict(stakeholder)
+        relationships = dict(stakeholder.get("Relationships") or {})
+        relationships["related_to_key"] = merge_key(relationships.get("related_to"))
+        stakeholder["Relationships"] = relationships
+        stakeholder["Quotes"] = [{**quote, "Key": merge_key(quote.get("Text"))} for quote in stakeholder.get("Quotes") or []]
+        stakeholders.append(stakeholder)
+    data["Stakeholders"] = stakeholders
+    data["Facts"] = [{**fact, "Key": merge_key(fact.get("Fact"))} for fact in data.get("Facts") or []]
+    data["Controversies"] = [
+        {**controversy, "Key": merge_key(controversy.get("Summary"))} for controversy in data.get("Controversies") or []
+    ]
+    return data
@@ -0,0 +1,83 @@
+# File: model_cascade.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Runs an LLM stage through a ladder of models, cheapest first.
+# - Escalates to the next model only when the output fails the stage's parse/schema/confidence check or the call errors.
+# - Records per-stage escalation metrics so the ladders can be tuned.
+
+# Expected Inputs:
+# - Stage name, ordered list of model names, a coroutine function calling one model and a parse function.
+
+# Expected Outputs:
+# - The parsed output of the first accepted model (or None plus the raw output of the strongest model).
+# - Per-stage counts of calls, escalations and the model that produced the accepted output.
+
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CascadeMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, stage: str, model: str, level: int, accepted: bool):
+        with self._lock:
+            stats = self._stages.setdefault(stage, {"calls": 0, "escalations": 0, "rejected": 0, "models": {}})
+            stats["calls"] += 1
+            if level > 0:
+                stats["escalations"] += 1
+            if not accepted:
+                stats["rejected"] += 1
+            stats["models"][model] = stats["models"].get(model, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                stage: {
+                    **stats,
+                    "models": dict(stats["models"]),
+                    "escalation_rate": stats["escalations"] / stats["calls"] if stats["calls"] else 0.0,
+                }
+                for stage, stats in self._stages.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+
+
+cascade_metrics = CascadeMetrics()
+
+
+async def run_cascade(
+    stage: str,
+    models: List[str],
+    call: Callable[[str], Awaitable[str]],
+    parse: Callable[[str], Optional[Any]],
+) -> Tuple[Optional[Any], Optional[str]]:
+    """Return (parsed, raw) from the first model whose output `parse` accepts.
+
+    `parse` returns None to reject an output. If even the last model's output is rejected,
+    the result is (None, raw output of the last model). An error from the last model is raised.
+    """
+    for level, model in enumerate(models):
+        last = level == len(models) - 1
+        try:
+            raw = await call(model)
+        except Exception as e:
+            if last:
+                cascade_metrics.record(stage, model, level, accepted=False)
+                raise
+            logger.warning(f"{stage}: {model} failed ({e}); escalating to {models[level + 1]}.")
+            continue
+        parsed = parse(raw)
+        if parsed is not None or last:
+            cascade_metrics.record(stage, model, level, accepted=parsed is not None)
+            return parsed, raw
+        logger.info(f"{stage}: output of {model} rejected; escalating to {models[level + 1]}.")
+    return None, None
@@ -0,0 +1,98 @@
+# File: query_plan_cache.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Provides the `QueryPlanCache` class that memoizes query plans (search terms + search engine choice).
+# - Keys plans on the normalized user query and persists them to a JSON file across restarts.
+# - Keeps at most `max_entries` plans, evicting the least recently used one first.
+# - Reads and writes the JSON file in a worker thread so the event loop never blocks on disk.
+
+# Expected Inputs:
+# - User queries and the plans produced for them.
+# - Path of the JSON file holding the plans and the maximum number of plans to keep.
+
+# Expected Outputs:
+# - The previously produced plan for a query, if any.
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+from tools.searching.search_cache import normalize_term
+
+logger = logging.getLogger(__name__)
+
+
+class QueryPlanCache:
+    def __init__(self, path: str = None, max_entries: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.plans: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._loaded = not path
+
+    async def get(self, user_query: str) -> Optional[Dict]:
+        await self._ensure_loaded()
+        key = normalize_term(user_query)
+        with self._lock:
+            plan = self.plans.pop(key, None)
+            if plan is None:
+                return None
+            self.plans[key] = plan
+        return dict(plan)
+
+    async def put(self, user_query: str, plan: Dict):
+        await self._ensure_loaded()
+        with self._lock:
+            key = normalize_term(user_query)
+            self.plans.pop(key, None)
+            self.plans[key] = dict(plan)
+            self._evict()
+            snapshot = json.dumps(self.plans)
+        if self.path:
+            await asyncio.to_thread(self._save, snapshot)
+
+    async def _ensure_loaded(self):
+        if not self._loaded:
+            self._loaded = True
+            await asyncio.to_thread(self.load)
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load query plans from {self.path}: {e}")
+            return
+        with self._lock:
+            # Plans stored while the file was loading are the most recent ones
+            loaded.update(self.plans)
+            self.plans = loaded
+            self._evict()
+
+    def _evict(self):
+        while len(self.plans) > self.max_entries:
+            del self.plans[next(iter(self.plans))]
+
+    def _save(self, snapshot: str):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not save query plans to {self.path}: {e}")
+
+
+_caches: Dict[str, QueryPlanCache] = {}
+
+
+def get_query_plan_cache(config) -> QueryPlanCache:
+    path = config.QUERY_PLAN_CACHE_PATH
+    if path not in _caches:
+        _caches[path] = QueryPlanCache(path or None, max_entries=config.QUERY_PLAN_CACHE_SIZE)
+    return _caches[path]
@@ -0,0 +1,141 @@
+# File: rebuild_aggregates.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Recomputes the co-mention and issue-activity counters (see tools/graph_aggregates.py) from the MENTIONED_IN and
+#   IS_ABOUT relationships, e.g. after deploying them on an existing graph or to repair drift.
+# - Gives every article its activity day and marks it counted, deletes the existing counters, then recomputes
+#   them page by page (stakeholders and issues in name order), each page in its own transaction.
+# - Articles are dated like in the upload transaction; undated articles not counted yet get the day of the rebuild.
+# - Run as `python -m tools.rebuild_aggregates [--batch-size N]` while no uploads are running; safe to re-run.
+
+# Expected Inputs:
+# - Neo4j connection details from the configuration.
+
+# Expected Outputs:
+# - Counts of articles dated, counters deleted, co-mention pairs and issue days written.
+
+import argparse
+import asyncio
+import json
+import logging
+from typing import Dict, List
+from config.config import Config
+from tools.graph_aggregates import article_day, current_day
+
+logger = logging.getLogger(__name__)
+
+UNCOUNTED_ARTICLES_QUERY = """
+MATCH (article:Article) WHERE article.aggregated IS NULL
+RETURN elementId(article) AS id, article.date_published AS date_published, article.activity_day AS activity_day
+LIMIT $limit
+"""
+
+MARK_ARTICLES_QUERY = """
+UNWIND $rows AS row
+MATCH (article:Article) WHERE elementId(article) = row.id
+SET article.activity_day = row.day, article.aggregated = true
+"""
+
+DELETE_CO_MENTIONS_QUERY = "MATCH ()-[r:CO_MENTIONED]->() WITH r LIMIT $limit DELETE r RETURN count(*) AS deleted"
+DELETE_ISSUE_DAYS_QUERY = "MATCH (d:IssueDay) WITH d LIMIT $limit DETACH DELETE d RETURN count(*) AS deleted"
+
+PAGE_QUERIES = {
+    "Stakeholder": "MATCH (n:Stakeholder) WHERE n.name > $after RETURN n.name AS key ORDER BY key LIMIT $limit",
+    "Issue": "MATCH (n:Issue) WHERE n.title > $after RETURN n.title AS key ORDER BY key LIMIT $limit",
+}
+
+# Each pair is written from its lower name, so every pair is counted once
+REBUILD_CO_MENTIONS_QUERY = """
+UNWIND $keys AS name
+MATCH (a:Stakeholder {name: name})-[:MENTIONED_IN]->(article:Article)<-[:MENTIONED_IN]-(b:Stakeholder)
+WHERE a.name < b.name
+WITH a, b, count(DISTINCT article) AS weight
+MERGE (a)-[r:CO_MENTIONED]->(b)
+SET r.weight = weight
+RETURN count(r) AS written
+"""
+
+REBUILD_ISSUE_DAYS_QUERY = """
+UNWIND $keys AS title
+MATCH (issue:Issue {title: title})<-[:IS_ABOUT]-(article:Article)
+WHERE article.activity_day IS NOT NULL
+WITH issue, article.activity_day AS day, count(DISTINCT article) AS mentions
+MERGE (d:IssueDay {issue: issue.title, day: day})
+SET d.mentions = mentions
+MERGE (issue)-[:ACTIVITY_ON]->(d)
+RETURN count(d) AS written
+"""
+
+
+def article_day_rows(records: List[dict], today: str) -> List[dict]:
+    """Rows of {id, day}, with the day an upload on `today` would have given each article."""
+    return [{"id": record["id"], "day": article_day(record, today)} for record in records]
+
+
+async def _single(session, query: str, **params) -> dict:
+    result = await session.run(query, **params)
+    return (await result.single()).data()
+
+
+async def mark_articles(session, batch_size: int) -> int:
+    marked = 0
+    while True:
+        result = await session.run(UNCOUNTED_ARTICLES_QUERY, limit=batch_size)
+        records = [record.data() async for record in result]
+        if not records:
+            return marked
+        await session.run(MARK_ARTICLES_QUERY, rows=article_day_rows(records, current_day()))
+        marked += len(records)
+        logger.info(f"Dated {marked} articles.")
+
+
+async def delete_all(session, query: str, batch_size: int) -> int:
+    deleted = 0
+    while True:
+        count = (await _single(session, query, limit=batch_size))["deleted"]
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+async def rebuild_pages(session, label: str, query: str, batch_size: int) -> int:
+    written, after = 0, ""
+    while True:
+        result = await session.run(PAGE_QUERIES[label], after=after, limit=batch_size)
+        keys = [record["key"] async for record in result]
+        if not keys:
+            return written
+        written += (await _single(session, query, keys=keys))["written"]
+        after = keys[-1]
+        logger.info(f"Rebuilt counters up to {label} {after!r}.")
+
+
+async def rebuild(config, batch_size: int = 500) -> Dict[str, int]:
+    from tools.database import KnowledgeGraphUploader
+
+    uploader = KnowledgeGraphUploader(config.NEO4J_URI, config.NEO4J_USER, config.NEO4J_PASSWORD)
+    try:
+        await uploader.ensure_indexes()
+        async with uploader.driver.session() as session:
+            return {
+                "articles_dated": await mark_articles(session, batch_size),
+                "co_mentions_deleted": await delete_all(session, DELETE_CO_MENTIONS_QUERY, batch_size),
+                "issue_days_deleted": await delete_all(session, DELETE_ISSUE_DAYS_QUERY, batch_size),
+                "co_mention_pairs": await rebuild_pages(session, "Stakeholder", REBUILD_CO_MENTIONS_QUERY, batch_size),
+                "issue_days": await rebuild_pages(session, "Issue", REBUILD_ISSUE_DAYS_QUERY, batch_size),
+            }
+    finally:
+        await uploader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute the co-mention and issue-activity counters.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Nodes handled per transaction (default: 500).")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(name)s:%(message)s')
+    print(json.dumps(asyncio.run(rebuild(Config(), batch_size=args.batch_size)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
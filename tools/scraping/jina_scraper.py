@@ -4,6 +4,7 @@
 # Overall Role and Purpose:
 # - Implements the `JinaScraper` class for simple text extraction from URLs.
 # - Correctly utilizes Jina's Reader API for full text extraction.
+# - Coalesces concurrent scrapes of the same URL into a single request.
 
 # Expected Inputs:
 # - URL to scrape.
@@ -11,7 +12,13 @@
 # Expected Outputs:
 # - Extracted text content from the webpage.
 
-import aiohttp
+from tools.cassette import through_cassette
+from tools.http_pool import get_http_session
+from tools.single_flight import SingleFlight
+from tools.searching.rank_fusion import normalize_url
+
+# Shared by all jobs so identical in-flight scrapes hit Jina once
+_in_flight = SingleFlight()
 
 class JinaScraper:
     def __init__(self, api_key: str):
@@ -19,6 +26,9 @@ class JinaScraper:
         self.base_url = 'https://r.jina.ai/'
 
     async def scrape(self, url: str) -> str:
+        return await _in_flight.do(normalize_url(url), lambda: self._scrape(url))
+
+    async def _scrape(self, url: str) -> str:
         # Construct the Jina Reader API URL
         reader_url = self.base_url + url
 
@@ -27,11 +37,13 @@ class JinaScraper:
             'X-Return-Format': 'text',
         }
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(reader_url, headers=headers) as response:
+        async def fetch():
+            async with get_http_session().get(reader_url, headers=headers) as response:
                 if response.status == 200:
                     text = await response.text()
                     return text
                 else:
                     # Log the error or handle it as needed
                     return None
+
+        return await through_cassette("http", {"url": reader_url, "format": "text"}, fetch)
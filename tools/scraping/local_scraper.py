@@ -0,0 +1,114 @@
+# File: local_scraper.py
+# Directory: my_app/tools/scraping/
+
+# Overall Role and Purpose:
+# - Implements the `LocalScraper` class that fetches a page directly and extracts the article body locally.
+# - Avoids the extra hop through a hosted reader service for pages that are plain HTML articles.
+# - Coalesces concurrent scrapes of the same URL into a single request.
+
+# Expected Inputs:
+# - URL to scrape.
+# - Optional user agent string and request timeout.
+
+# Expected Outputs:
+# - Extracted article text (title followed by paragraphs), or None if the fetch or extraction fails.
+
+import logging
+import re
+from typing import Optional
+
+from tools.cassette import through_cassette
+from tools.single_flight import SingleFlight
+from tools.searching.rank_fusion import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Elements that never hold article text
+NOISE_TAGS = ["script", "style", "noscript", "nav", "footer", "header", "aside", "form", "iframe", "svg", "button"]
+# Class/id fragments that mark boilerplate blocks (menus, share bars, comments, ads)
+NOISE_PATTERN = re.compile(
+    r"comment|share|social|promo|advert|sponsor|newsletter|subscribe|related|sidebar|footer|cookie|banner|popup|menu",
+    re.IGNORECASE,
+)
+MIN_PARAGRAPH_LENGTH = 40
+
+# Shared by all jobs so identical in-flight scrapes fetch the page once
+_in_flight = SingleFlight()
+
+
+class LocalScraper:
+    def __init__(self, user_agent: str = None, timeout: float = 15.0):
+        self.user_agent = user_agent
+        self.timeout = timeout
+
+    async def scrape(self, url: str) -> Optional[str]:
+        return await _in_flight.do(normalize_url(url), lambda: self._scrape(url))
+
+    async def _scrape(self, url: str) -> Optional[str]:
+        html = await through_cassette("http", {"url": url, "user_agent": self.user_agent}, lambda: self._fetch(url))
+        return extract_article_text(html) if html is not None else None
+
+    async def _fetch(self, url: str) -> Optional[str]:
+        import aiohttp
+
+        headers = {"User-Agent": self.user_agent} if self.user_agent else {}
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(url, headers=headers) as response:
+                if response.status != 200:
+                    logger.debug(f"LocalScraper got HTTP {response.status} for {url}")
+                    return None
+                content_type = response.headers.get("Content-Type", "")
+                if "html" not in content_type.lower():
+                    return None
+                return await response.text(errors="replace")
+
+
+def extract_article_text(html: str) -> Optional[str]:
+    """Readability-style extraction: pick the block with the densest paragraph text."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text(strip=True) if soup.title else ""
+
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+    for tag in soup.find_all(attrs={"class": NOISE_PATTERN}) + soup.find_all(attrs={"id": NOISE_PATTERN}):
+        if tag.name not in ("body", "html", "article", "main") and not tag.decomposed:
+            tag.decompose()
+
+    candidate = soup.find("article") or soup.find("main")
+    if candidate is None or len(_paragraphs(candidate)) < 2:
+        candidate = _densest_block(soup)
+    if candidate is None:
+        return None
+
+    paragraphs = _paragraphs(candidate)
+    if not paragraphs:
+        return None
+    return "\n\n".join([title] + paragraphs if title else paragraphs)
+
+
+def _paragraphs(node) -> list:
+    texts = []
+    for p in node.find_all("p"):
+        text = " ".join(p.get_text(" ", strip=True).split())
+        if len(text) >= MIN_PARAGRAPH_LENGTH:
+            texts.append(text)
+    return texts
+
+
+def _densest_block(soup):
+    # Score each paragraph's parent by the amount of paragraph text it directly holds
+    parents = {}
+    scores = {}
+    for p in soup.find_all("p"):
+        text_length = len(p.get_text(strip=True))
+        if text_length < MIN_PARAGRAPH_LENGTH or p.parent is None:
+            continue
+        key = id(p.parent)
+        parents[key] = p.parent
+        scores[key] = scores.get(key, 0) + text_length
+    if not scores:
+        return None
+    return parents[max(scores, key=scores.get)]
@@ -0,0 +1,278 @@
+# File: politeness.py
+# Directory: my_app/tools/scraping/
+
+# Overall Role and Purpose:
+# - Implements the `PolitenessScheduler` class that dispatches scrape work per domain.
+# - Keeps one queue per domain and interleaves domains round-robin so no single publisher is hammered.
+# - Enforces a per-domain concurrency limit and minimum delay between requests, shared by all jobs in the process.
+# - Implements the `RobotsCache` class, an LRU cache of parsed robots.txt files (including crawl-delay).
+
+# Expected Inputs:
+# - URLs to scrape (a list or an async stream) and an async worker that scrapes a single URL.
+# - Concurrency, delay and robots.txt settings from the configuration.
+
+# Expected Outputs:
+# - Every allowed URL handed to the worker, at a pace each domain tolerates.
+# - The list of URLs skipped because robots.txt disallows them.
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+from tools.cassette import RecordedError, through_cassette
+
+logger = logging.getLogger(__name__)
+
+# How often a blocked dispatcher re-checks domains whose slots are held by other jobs
+POLL_INTERVAL = 0.05
+# How often idle domain slots (nothing in flight, delay passed) are dropped, so the slot table stays small
+SLOT_SWEEP_INTERVAL = 60.0
+
+
+class RobotsCache:
+    def __init__(self, user_agent: str, capacity: int = 512, ttl: float = 86400.0, timeout: float = 10.0):
+        self.user_agent = user_agent
+        self.capacity = capacity
+        self.ttl = ttl
+        self.timeout = timeout
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # origin -> (parser, fetched_at)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def get(self, url: str) -> Optional[RobotFileParser]:
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        entry = self._entries.get(origin)
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            self._entries.move_to_end(origin)
+            return entry[0]
+
+        # Several URLs of the same origin share one robots.txt fetch
+        if origin in self._in_flight:
+            return await asyncio.shield(self._in_flight[origin])
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[origin] = future
+        try:
+            parser = await self._fetch(origin)
+        except BaseException as e:
+            # Waiters get a plain error (never CancelledError) and fall back to allowing the URL
+            future.set_exception(RuntimeError(f"robots.txt fetch for {origin} failed: {e!r}"))
+            future.exception()  # Mark retrieved so an unawaited failure is not reported
+            raise
+        finally:
+            del self._in_flight[origin]
+        self._store(origin, parser)
+        future.set_result(parser)
+        return parser
+
+    async def can_fetch(self, url: str) -> bool:
+        try:
+            parser = await self.get(url)
+        except Exception as e:
+            logger.debug(f"robots.txt unavailable for {url}: {e}")
+            return True
+        return parser is None or parser.can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url: str) -> float:
+        parsed = urlparse(url)
+        entry = self._entries.get(f"{parsed.scheme}://{parsed.netloc}")
+        if not entry or entry[0] is None:
+            return 0.0
+        delay = entry[0].crawl_delay(self.user_agent)
+        return float(delay) if delay else 0.0
+
+    async def _fetch(self, origin: str) -> Optional[RobotFileParser]:
+        import aiohttp
+
+        parser = RobotFileParser(f"{origin}/robots.txt")
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async def fetch():
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(parser.url, headers={"User-Agent": self.user_agent}) as response:
+                    text = await response.text(errors="replace") if response.status < 400 else ""
+                    return {"status": response.status, "text": text}
+
+        try:
+            fetched = await through_cassette("http", {"url": parser.url, "user_agent": self.user_agent}, fetch)
+        except (aiohttp.ClientError, asyncio.TimeoutError, RecordedError) as e:
+            logger.debug(f"Could not fetch {parser.url}: {e}")
+            return None
+        if fetched["status"] in (401, 403):
+            parser.disallow_all = True
+        elif fetched["status"] >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(fetched["text"].splitlines())
+        return parser
+
+    def _store(self, origin: str, parser: Optional[RobotFileParser]):
+        self._entries[origin] = (parser, time.monotonic())
+        self._entries.move_to_end(origin)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+
+class _DomainSlot:
+    def __init__(self):
+        self.active = 0
+        self.next_allowed = 0.0
+
+    def wait_time(self, concurrency: int) -> Optional[float]:
+        """Seconds until a request may start, or None when blocked on concurrency."""
+        if self.active >= concurrency:
+            return None
+        return max(0.0, self.next_allowed - time.monotonic())
+
+    def idle(self, now: float) -> bool:
+        """Nothing in flight and the delay has passed: dropping the slot loses no state."""
+        return self.active == 0 and self.next_allowed <= now
+
+
+class PolitenessScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = 5,
+        domain_concurrency: int = 2,
+        domain_min_delay: float = 1.0,
+        robots: RobotsCache = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.domain_concurrency = domain_concurrency
+        self.domain_min_delay = domain_min_delay
+        self.robots = robots
+        # Domain slots are shared by every job in the process; idle ones are swept out periodically
+        self._slots: Dict[str, _DomainSlot] = {}
+        self._last_sweep = time.monotonic()
+
+    async def run(self, urls: Union[Iterable[str], AsyncIterable[str]], worker: Callable[[str], Awaitable]) -> List[str]:
+        """Run `worker` for every URL as it arrives; returns the URLs skipped because robots.txt disallows them."""
+        queues: "OrderedDict[str, deque]" = OrderedDict()
+        disallowed: List[str] = []
+        arrived = asyncio.Event()
+        feeder = asyncio.create_task(self._feed(urls, queues, disallowed, arrived))
+        running = set()
+        arrival = None
+        try:
+            while not feeder.done() or queues or running:
+                wait = self._launch_ready(queues, running, worker)
+                # Wake up when a task finishes, a URL arrives, a delayed domain becomes ready,
+                # or after a short poll when domains are blocked by slots held elsewhere
+                timeout = None
+                if queues:
+                    timeout = POLL_INTERVAL if wait is None else wait
+                waiters = set(running)
+                arrival = None
+                if not feeder.done():
+                    arrived.clear()
+                    arrival = asyncio.create_task(arrived.wait())
+                    waiters |= {feeder, arrival}
+                if not waiters:
+                    await asyncio.sleep(timeout)
+                    continue
+                done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if arrival is not None and not arrival.done():
+                    arrival.cancel()
+                for task in done & running:
+                    running.discard(task)
+                    if not task.cancelled() and task.exception():
+                        logger.error(f"Scrape task failed: {task.exception()}")
+        finally:
+            pending = {task for task in running | {feeder, arrival} if task is not None and not task.done()}
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        if not feeder.cancelled() and feeder.exception():
+            logger.error(f"URL stream failed: {feeder.exception()}")
+        return disallowed
+
+    async def _feed(self, urls, queues, disallowed: List[str], arrived: asyncio.Event):
+        """Admit URLs into their domain queues as they arrive, checking robots.txt concurrently."""
+        async def admit(url):
+            if self.robots is not None and not await self.robots.can_fetch(url):
+                disallowed.append(url)
+                return
+            queues.setdefault(urlparse(url).netloc.lower(), deque()).append(url)
+            arrived.set()
+
+        admissions = []
+        try:
+            if hasattr(urls, "__aiter__"):
+                async for url in urls:
+                    admissions.append(asyncio.create_task(admit(url)))
+            else:
+                admissions = [asyncio.create_task(admit(url)) for url in urls]
+            await asyncio.gather(*admissions)
+        finally:
+            for task in admissions:
+                task.cancel()
+
+    def _launch_ready(self, queues, running: set, worker) -> Optional[float]:
+        """Start one request per ready domain in round-robin order; returns the shortest delay still pending."""
+        shortest_wait = None
+        self._sweep_slots()
+        for domain in list(queues):
+            if len(running) >= self.max_concurrency:
+                break
+            slot = self._slots.setdefault(domain, _DomainSlot())
+            wait = slot.wait_time(self.domain_concurrency)
+            if wait is None:
+                continue
+            if wait > 0:
+                shortest_wait = wait if shortest_wait is None else min(shortest_wait, wait)
+                continue
+            url = queues[domain].popleft()
+            slot.active += 1
+            slot.next_allowed = time.monotonic() + self._delay_for(url)
+            running.add(asyncio.create_task(self._run_one(slot, url, worker)))
+            # Rotate so the next pass starts with a different domain
+            if queues[domain]:
+                queues.move_to_end(domain)
+            else:
+                del queues[domain]
+        return shortest_wait
+
+    def _sweep_slots(self):
+        now = time.monotonic()
+        if now - self._last_sweep < SLOT_SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        for domain in [domain for domain, slot in self._slots.items() if slot.idle(now)]:
+            del self._slots[domain]
+
+    def _delay_for(self, url: str) -> float:
+        crawl_delay = self.robots.crawl_delay(url) if self.robots is not None else 0.0
+        return max(self.domain_min_delay, crawl_delay)
+
+    @staticmethod
+    async def _run_one(slot: _DomainSlot, url: str, worker):
+        try:
+            await worker(url)
+        finally:
+            slot.active -= 1
+
+
+_schedulers: Dict[tuple, PolitenessScheduler] = {}
+
+
+def get_politeness_scheduler(config) -> PolitenessScheduler:
+    """Process-wide scheduler so per-domain limits hold across concurrent jobs."""
+    key = (
+        config.SCRAPE_MAX_CONCURRENCY,
+        config.SCRAPE_DOMAIN_CONCURRENCY,
+        config.SCRAPE_DOMAIN_MIN_DELAY,
+        config.RESPECT_ROBOTS_TXT,
+    )
+    if key not in _schedulers:
+        robots = None
+        if config.RESPECT_ROBOTS_TXT:
+            robots = RobotsCache(config.USER_AGENT, capacity=config.ROBOTS_CACHE_SIZE, ttl=config.ROBOTS_CACHE_TTL)
+        _schedulers[key] = PolitenessScheduler(
+            max_concurrency=config.SCRAPE_MAX_CONCURRENCY,
+            domain_concurrency=config.SCRAPE_DOMAIN_CONCURRENCY,
+            domain_min_delay=config.SCRAPE_DOMAIN_MIN_DELAY,
+            robots=robots,
+        )
+    return _schedulers[key]
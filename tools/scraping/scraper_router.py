@@ -0,0 +1,129 @@
+# File: scraper_router.py
+# Directory: my_app/tools/scraping/
+
+# Overall Role and Purpose:
+# - Implements the `ScraperRouter` class, a per-domain routing table for the available scrapers.
+# - Records success rate, latency and content quality of every scrape attempt per domain and scraper.
+# - Ranks scrapers for a URL so the best one is tried first and the others serve as fallbacks.
+# - Persists the table to a JSON file so routing keeps improving across restarts.
+
+# Expected Inputs:
+# - URLs to route and the outcome of each scrape attempt.
+# - Path of the JSON file holding the routing table.
+
+# Expected Outputs:
+# - An ordered list of scraper names for each URL.
+# - The routing table written to disk.
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Default preference when a domain has no history: local first, hosted reader next, heavy loader last
+DEFAULT_SCRAPER_ORDER = ["local_scraper", "jina_scraper", "web_base_loader_scraper"]
+# Content length (in characters) at which an article counts as fully extracted
+FULL_ARTICLE_LENGTH = 2000
+# Latency (in seconds) that costs half of a scraper's score
+LATENCY_HALF_SCORE = 5.0
+
+
+def domain_of(url: str) -> str:
+    netloc = urlparse(url).netloc.lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    return netloc
+
+
+def content_quality(content: Optional[str]) -> float:
+    """Rough 0..1 quality score: long, prose-like text scores high; empty or markup-heavy text scores low."""
+    if not content:
+        return 0.0
+    words = content.split()
+    if not words:
+        return 0.0
+    length_score = min(len(content) / FULL_ARTICLE_LENGTH, 1.0)
+    wordlike = sum(1 for word in words if word.isalpha())
+    return length_score * (wordlike / len(words))
+
+
+class ScraperRouter:
+    def __init__(self, path: str = None, scrapers: List[str] = None):
+        self.path = path
+        self.scrapers = list(scrapers or DEFAULT_SCRAPER_ORDER)
+        # {domain: {scraper: {"attempts", "successes", "latency", "quality"}}}
+        self.table: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def rank(self, url: str) -> List[str]:
+        """Return scraper names ordered from most to least promising for the URL's domain."""
+        with self._lock:
+            stats = self.table.get(domain_of(url), {})
+            scored = [(self._score(stats.get(name)), -index, name) for index, name in enumerate(self.scrapers)]
+        scored.sort(reverse=True)
+        return [name for _, _, name in scored]
+
+    def record(self, url: str, scraper: str, success: bool, latency: float, content: Optional[str] = None):
+        domain = domain_of(url)
+        with self._lock:
+            entry = self.table.setdefault(domain, {}).setdefault(
+                scraper, {"attempts": 0, "successes": 0, "latency": 0.0, "quality": 0.0}
+            )
+            entry["attempts"] += 1
+            entry["latency"] += latency
+            if success:
+                entry["successes"] += 1
+                entry["quality"] += content_quality(content)
+            self._dirty = True
+
+    def _score(self, entry: Optional[Dict[str, float]]) -> float:
+        if not entry or not entry["attempts"]:
+            # Untried scrapers get an optimistic prior so every scraper is explored once per domain
+            return 0.5
+        attempts = entry["attempts"]
+        # Laplace-smoothed success rate keeps a single failure from blacklisting a scraper
+        success_rate = (entry["successes"] + 1) / (attempts + 2)
+        quality = entry["quality"] / entry["successes"] if entry["successes"] else 0.0
+        mean_latency = entry["latency"] / attempts
+        latency_factor = LATENCY_HALF_SCORE / (LATENCY_HALF_SCORE + mean_latency)
+        return success_rate * (0.5 + 0.5 * quality) * latency_factor
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.table = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load scraper routing table from {self.path}: {e}")
+            self.table = {}
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            snapshot = json.dumps(self.table)
+            self._dirty = False
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not save scraper routing table to {self.path}: {e}")
+
+
+_routers: Dict[str, ScraperRouter] = {}
+
+
+def get_scraper_router(path: str) -> ScraperRouter:
+    """Process-wide router per table path so concurrent jobs learn from each other."""
+    if path not in _routers:
+        _routers[path] = ScraperRouter(path)
+    return _routers[path]
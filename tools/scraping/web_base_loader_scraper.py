@@ -11,13 +11,19 @@
 # Expected Outputs:
 # - Extracted content from the webpage, potentially including structured data.
 
-from langchain_community.document_loaders import WebBaseLoader
+from tools.cassette import through_cassette
 
 class WebBaseLoaderScraper:
     def __init__(self):
         pass
 
     async def scrape(self, url: str) -> str:
+        return await through_cassette("http", {"url": url, "loader": "web_base_loader"}, lambda: self._scrape(url))
+
+    async def _scrape(self, url: str) -> str:
+        # Imported on first use: langchain_community is slow to import and this scraper is the last resort
+        from langchain_community.document_loaders import WebBaseLoader
+
         # Use WebBaseLoader to scrape complex sites
         loader = WebBaseLoader(url)
         docs = loader.load()
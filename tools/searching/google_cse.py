@@ -4,6 +4,7 @@
 # Overall Role and Purpose:
 # - Provides the `GoogleCSE` class to perform searches using the Google Custom Search Engine API.
 # - Used by the General URL Generation Agent.
+# - Coalesces concurrent identical searches into a single API call.
 
 # Expected Inputs:
 # - Search query string.
@@ -12,19 +13,29 @@
 # Expected Outputs:
 # - List of URLs resulting from the search.
 
-import aiohttp
 import logging
 import asyncio
 from typing import List
+from tools.cassette import through_cassette, without_secrets
+from tools.http_pool import get_http_session
+from tools.single_flight import SingleFlight
+from tools.searching.search_cache import normalize_term
 
 logger = logging.getLogger(__name__)
 
+# Shared by all jobs so identical in-flight searches spend one unit of quota
+_in_flight = SingleFlight()
+
 class GoogleCSE:
     def __init__(self, api_key: str, cx: str):
         self.api_key = api_key
         self.cx = cx
 
     async def search(self, query: str) -> List[str]:
+        results = await _in_flight.do(f"{self.cx}:{normalize_term(query)}", lambda: self._search(query))
+        return list(results)
+
+    async def _search(self, query: str) -> List[str]:
         url = "https://www.googleapis.com/customsearch/v1"
         params = {
             "key": self.api_key,
@@ -32,11 +43,14 @@ class GoogleCSE:
             "q": query,
             "num": 10  # Max number of results per page
         }
+
+        async def fetch():
+            async with get_http_session().get(url, params=params, timeout=10) as response:
+                return await response.json()
+
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, timeout=10) as response:
-                    data = await response.json()
-                    return [item['link'] for item in data.get('items', [])]
+            data = await through_cassette("http", {"url": url, "params": without_secrets(params)}, fetch)
+            return [item['link'] for item in data.get('items', [])]
         except asyncio.TimeoutError:
             logger.error("Google CSE API request timed out.")
             return []
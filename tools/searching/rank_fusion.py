@@ -0,0 +1,53 @@
+# File: rank_fusion.py
+# Directory: my_app/tools/searching/
+
+# Overall Role and Purpose:
+# - Merges ranked URL lists from several search terms and engines with reciprocal-rank fusion (RRF).
+# - Deduplicates URLs by a normalized form (scheme, host, tracking parameters, fragments, trailing slashes).
+
+# Expected Inputs:
+# - Ranked lists of URLs, best result first.
+# - The maximum number of URLs to keep.
+
+# Expected Outputs:
+# - A single list of distinct URLs ordered by fused score.
+
+from typing import Dict, List
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Standard RRF damping constant; higher values flatten the advantage of top ranks
+RRF_K = 60
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "cmpid", "smid", "ocid"}
+
+
+def normalize_url(url: str) -> str:
+    parsed = urlparse(url.strip())
+    netloc = parsed.netloc.lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+    path = parsed.path.rstrip("/") or "/"
+    # http and https copies of a page are the same article
+    return urlunparse(("https", netloc, path, "", query, ""))
+
+
+def reciprocal_rank_fusion(ranked_lists: List[List[str]], limit: int = None, k: int = RRF_K) -> List[str]:
+    scores: Dict[str, float] = {}
+    representative: Dict[str, str] = {}
+    for ranked in ranked_lists:
+        seen = set()
+        for rank, url in enumerate(ranked, start=1):
+            key = normalize_url(url)
+            # A URL repeated within one list only counts at its best rank
+            if key in seen:
+                continue
+            seen.add(key)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            representative.setdefault(key, url)
+    fused = sorted(scores, key=lambda key: scores[key], reverse=True)
+    if limit is not None:
+        fused = fused[:limit]
+    return [representative[key] for key in fused]
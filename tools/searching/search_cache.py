@@ -0,0 +1,165 @@
+# File: search_cache.py
+# Directory: my_app/tools/searching/
+
+# Overall Role and Purpose:
+# - Provides the `SearchCache` class, a TTL cache for search results from Google CSE and Tavily.
+# - Keys entries on provider + normalized search term.
+# - Keeps an in-memory tier backed by an on-disk SQLite tier that survives restarts.
+# - Serves stale entries while refreshing them in the background (stale-while-revalidate).
+# - SQLite reads and writes run in a worker thread so a locked or slow database file never blocks the event loop.
+
+# Expected Inputs:
+# - Provider name, search term and a coroutine function that performs the live search.
+# - TTL settings from the configuration.
+
+# Expected Outputs:
+# - Lists of URLs, served from cache when fresh enough and fetched live otherwise.
+
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BREAKING_KEYWORDS = ["breaking", "latest", "today", "live", "now", "update", "tonight"]
+
+
+def normalize_term(term: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", term.lower()).split())
+
+
+class SearchCache:
+    def __init__(
+        self,
+        path: str = None,
+        ttl: float = 21600.0,
+        breaking_ttl: float = 900.0,
+        stale_ttl: float = 86400.0,
+        memory_size: int = 2048,
+        breaking_keywords: List[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.breaking_ttl = breaking_ttl
+        self.stale_ttl = stale_ttl
+        self.memory_size = memory_size
+        self.breaking_keywords = set(breaking_keywords or DEFAULT_BREAKING_KEYWORDS)
+        self.clock = clock
+        self._memory: Dict[str, Tuple[List[str], float]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        if self.path:
+            self._init_disk()
+
+    def ttl_for(self, term: str) -> float:
+        """Breaking-news terms expire quickly; everything else keeps the longer TTL."""
+        words = set(normalize_term(term).split())
+        return self.breaking_ttl if words & self.breaking_keywords else self.ttl
+
+    async def get_or_fetch(self, provider: str, term: str, fetch: Callable[[], Awaitable[List[str]]]) -> List[str]:
+        key = f"{provider}:{normalize_term(term)}"
+        entry = await self._lookup(key)
+        if entry is not None:
+            results, stored_at = entry
+            age = self.clock() - stored_at
+            ttl = self.ttl_for(term)
+            if age < ttl:
+                return results
+            if age < ttl + self.stale_ttl:
+                self._refresh_in_background(key, fetch)
+                return results
+
+        results = await fetch()
+        await self._store(key, results)
+        return results
+
+    async def _lookup(self, key: str) -> Optional[Tuple[List[str], float]]:
+        entry = self._memory.get(key)
+        if entry is None and self.path:
+            entry = await asyncio.to_thread(self._disk_get, key)
+            if entry is not None:
+                self._remember(key, entry)
+        return entry
+
+    async def _store(self, key: str, results: List[str]):
+        # Empty results usually mean the provider failed; don't pin them for a whole TTL
+        if not results:
+            return
+        entry = (results, self.clock())
+        self._remember(key, entry)
+        if self.path:
+            await asyncio.to_thread(self._disk_put, key, entry)
+
+    def _remember(self, key: str, entry: Tuple[List[str], float]):
+        self._memory.pop(key, None)
+        self._memory[key] = entry
+        while len(self._memory) > self.memory_size:
+            del self._memory[next(iter(self._memory))]
+
+    def _refresh_in_background(self, key: str, fetch):
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                await self._store(key, await fetch())
+            except Exception as e:
+                logger.error(f"Background refresh of search cache entry '{key}' failed: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _init_disk(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache (key TEXT PRIMARY KEY, results TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    def _disk_get(self, key: str) -> Optional[Tuple[List[str], float]]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT results, stored_at FROM search_cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Search cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _disk_put(self, key: str, entry: Tuple[List[str], float]):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, results, stored_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(entry[0]), entry[1]),
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Search cache write failed: {e}")
+
+
+_caches: Dict[str, SearchCache] = {}
+
+
+def get_search_cache(config) -> SearchCache:
+    """Process-wide cache so every job shares hits and quota savings."""
+    path = config.SEARCH_CACHE_PATH
+    if path not in _caches:
+        _caches[path] = SearchCache(
+            path=path or None,
+            ttl=config.SEARCH_CACHE_TTL,
+            breaking_ttl=config.SEARCH_CACHE_BREAKING_TTL,
+            stale_ttl=config.SEARCH_CACHE_STALE_TTL,
+        )
+    return _caches[path]
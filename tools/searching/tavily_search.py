@@ -4,6 +4,7 @@
 # Overall Role and Purpose:
 # - Provides the `TavilySearch` class to perform context-specific searches using the Tavily API.
 # - Used by the Contextual URL Generation Agent.
+# - Coalesces concurrent identical searches into a single API call.
 
 # Expected Inputs:
 # - Search query string.
@@ -12,13 +13,23 @@
 # Expected Outputs:
 # - List of URLs resulting from the search.
 
-import aiohttp
+from tools.cassette import through_cassette
+from tools.http_pool import get_http_session
+from tools.single_flight import SingleFlight
+from tools.searching.search_cache import normalize_term
+
+# Shared by all jobs so identical in-flight searches make one API call
+_in_flight = SingleFlight()
 
 class TavilySearch:
     def __init__(self, api_key: str):
         self.api_key = api_key
 
     async def search(self, query: str) -> list:
+        results = await _in_flight.do(normalize_term(query), lambda: self._search(query))
+        return list(results)
+
+    async def _search(self, query: str) -> list:
         url = "https://api.tavily.com/search"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -26,8 +37,11 @@ class TavilySearch:
         params = {
             "query": query,
         }
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, params=params) as response:
-                data = await response.json()
-                results = [item["url"] for item in data.get("results", [])]
-                return results
+
+        async def fetch():
+            async with get_http_session().get(url, headers=headers, params=params) as response:
+                return await response.json()
+
+        data = await through_cassette("http", {"url": url, "params": params}, fetch)
+        results = [item["url"] for item in data.get("results", [])]
+        return results
@@ -0,0 +1,59 @@
+# File: single_flight.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Provides the `SingleFlight` class that coalesces identical in-flight requests.
+# - Concurrent callers with the same key share one underlying call and all receive its result.
+# - A caller that is cancelled only detaches itself; the shared call is cancelled once no caller is left.
+
+# Expected Inputs:
+# - A request key (already normalized by the caller) and a coroutine function performing the request.
+
+# Expected Outputs:
+# - The result (or exception) of the single shared call.
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _, key=key, call=call: self._forget(key, call))
+        call.waiters += 1
+        try:
+            # Shield so one waiter's cancellation doesn't cancel the call for everyone else
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is waiting any more: drop the call so new callers start a fresh one
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+def request_key(*parts: Any) -> str:
+    """Stable digest of arbitrary JSON-serializable request parts (e.g. model, messages, parameters)."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
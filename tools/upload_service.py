@@ -0,0 +1,215 @@
+# File: upload_service.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Single writer for the knowledge graph: every job's reviewed payloads go into one process-wide queue
+#   instead of each job MERGEing the same hot nodes in its own transactions.
+# - Flushes the queue in batches bounded by size (UPLOAD_BATCH_SIZE) and age (UPLOAD_FLUSH_INTERVAL); each batch
+#   is one transaction that merges the entities shared by its articles once, in a fixed key order.
+# - Retries transient Neo4j errors (deadlocks, lock timeouts, lost connections) with backoff; when a batch fails
+#   for another reason its articles are retried one by one so one bad payload does not fail the others.
+# - Interactive jobs' payloads are taken into batches ahead of bulk ones (weighted-fair, as in the stage pools).
+# - With UPLOAD_MODE=export the batches are appended to a JSONL spool for the bulk offline import instead.
+
+# Expected Inputs:
+# - Reviewed payloads submitted by `knowledge_graph_uploader_agent`, with the submitting job's priority class.
+
+# Expected Outputs:
+# - A future per payload, resolved with (success, message) once its batch is committed or has failed.
+# - Counters of batches, articles, retries and failures.
+
+import asyncio
+import logging
+import time
+import weakref
+from typing import Any, Dict, Optional
+from tools.fair_scheduler import FairQueue, parse_weights
+from tools.job_control import current_priority
+
+logger = logging.getLogger(__name__)
+
+# Error class names treated as transient when the error does not say so itself
+TRANSIENT_ERRORS = {"TransientError", "ServiceUnavailable", "SessionExpired"}
+
+
+def is_transient(error: BaseException) -> bool:
+    retryable = getattr(error, "is_retryable", None)
+    if callable(retryable):
+        try:
+            return bool(retryable())
+        except Exception:
+            pass
+    return type(error).__name__ in TRANSIENT_ERRORS
+
+
+class _PendingUpload:
+    __slots__ = ("data", "future", "enqueued_at")
+
+    def __init__(self, data: dict, future: asyncio.Future, enqueued_at: float):
+        self.data = data
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+
+class UploadService:
+    def __init__(
+        self,
+        uploader,
+        batch_size: int = 20,
+        flush_interval: float = 0.5,
+        max_retries: int = 5,
+        retry_backoff: float = 0.5,
+        weights: Optional[Dict[str, float]] = None,
+    ):
+        self.uploader = uploader
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.stats = {"batches": 0, "articles": 0, "retries": 0, "failed": 0}
+        self._pending = FairQueue(weights or {})
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._writer: Optional[asyncio.Task] = None
+        self._prepared = False
+
+    def submit(self, data: dict, priority: Optional[str] = None) -> asyncio.Future:
+        """Queue a payload; the future resolves with (success, message) once it is committed or has failed."""
+        if self._closing:
+            raise RuntimeError("Upload service is closed.")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.push(priority or current_priority(), _PendingUpload(data, future, loop.time()))
+        self._wakeup.set()
+        if self._writer is None or self._writer.done():
+            self._writer = loop.create_task(self._run())
+        return future
+
+    async def prepare(self):
+        """Indexes and alias index ready before the first write (also called by the startup warm-up)."""
+        if not self._prepared:
+            await self.uploader.prepare()
+            self._prepared = True
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": self._pending.depths()}
+
+    async def close(self):
+        """Flush what is queued, then stop the writer."""
+        self._closing = True
+        self._wakeup.set()
+        if self._writer is not None:
+            await self._writer
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Drop uploads whose job was cancelled before they were written
+            self._pending.prune(lambda item: not item.future.done())
+            if not len(self._pending):
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Wait for a full batch, but no longer than the flush interval after the oldest payload arrived
+            deadline = min(item.enqueued_at for item in self._pending) + self.flush_interval
+            while len(self._pending) < self.batch_size and not self._closing and loop.time() < deadline:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+            batch = [self._pending.pop() for _ in range(min(self.batch_size, len(self._pending)))]
+            await self._flush([item for item in batch if not item.future.done()])
+
+    async def _flush(self, batch: list):
+        if not batch:
+            return
+        try:
+            await self._write([item.data for item in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch[0], False, str(e))
+                return
+            logger.warning(f"Upload batch of {len(batch)} articles failed ({e}); retrying them one by one.")
+            for item in batch:
+                await self._flush([item])
+            return
+        for item in batch:
+            self._resolve(item, True, f"Data from article '{title_of(item.data)}' has been merged into the knowledge graph.")
+
+    async def _write(self, payloads: list):
+        attempt = 0
+        while True:
+            try:
+                await self.prepare()
+                started = time.perf_counter()
+                await self.uploader.upload_batch(payloads)
+                self.stats["batches"] += 1
+                logger.debug(f"Committed {len(payloads)} articles in {time.perf_counter() - started:.2f}s.")
+                return
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient(e):
+                    raise
+                attempt += 1
+                self.stats["retries"] += 1
+                delay = self.retry_backoff * (2 ** (attempt - 1))
+                logger.info(f"Transient error writing {len(payloads)} articles ({e}); retry {attempt} in {delay:.2f}s.")
+                await asyncio.sleep(delay)
+
+    def _resolve(self, item: _PendingUpload, success: bool, message: str):
+        self.stats["articles" if success else "failed"] += 1
+        if not item.future.done():
+            item.future.set_result((success, message))
+
+
+def title_of(data: dict) -> Optional[str]:
+    return ((data or {}).get("Article") or {}).get("Title")
+
+
+_services: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()  # event loop -> service
+
+
+def get_upload_service(config) -> UploadService:
+    """The process's upload service on the running event loop (one writer per loop)."""
+    loop = asyncio.get_running_loop()
+    service = _services.get(loop)
+    if service is None:
+        if config.UPLOAD_MODE == "export":
+            from tools.bulk_export import PayloadSpool
+
+            # Historical backfills: payloads go to a JSONL spool for the bulk export instead of the graph
+            uploader = PayloadSpool(config.EXPORT_SPOOL_DIR)
+        else:
+            from tools.database import KnowledgeGraphUploader, get_neo4j_driver
+            from tools.entity_resolution import AliasIndex
+
+            uploader = KnowledgeGraphUploader(
+                driver=get_neo4j_driver(config),
+                alias_index=AliasIndex(config.ENTITY_MATCH_THRESHOLD) if config.ENTITY_RESOLUTION else None,
+            )
+        service = UploadService(
+            uploader,
+            batch_size=config.UPLOAD_BATCH_SIZE,
+            flush_interval=config.UPLOAD_FLUSH_INTERVAL,
+            max_retries=config.UPLOAD_MAX_RETRIES,
+            retry_backoff=config.UPLOAD_RETRY_BACKOFF,
+            weights=parse_weights(config.PRIORITY_WEIGHTS),
+        )
+        _services[loop] = service
+    return service
+
+
+def upload_snapshot() -> Optional[Dict[str, Any]]:
+    try:
+        service = _services.get(asyncio.get_running_loop())
+    except RuntimeError:
+        return None
+    return service.snapshot() if service is not None else None
+
+
+async def close_upload_services():
+    service = _services.pop(asyncio.get_running_loop(), None)
+    if service is not None:
+        await service.close()
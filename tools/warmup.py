@@ -0,0 +1,97 @@
+# File: warmup.py
+# Directory: my_app/tools/
+
+# Overall Role and Purpose:
+# - Optional warm-up run at startup of the API process and of pipeline workers (WARMUP_ON_STARTUP).
+# - Imports the dependencies the default pipeline needs, builds the prompt templates and the schema validator,
+#   pre-opens the shared HTTP and Neo4j connection pools and loads the stakeholder alias index from the graph,
+#   so the first request does not pay for any of it.
+# - Every step is bounded by WARMUP_TIMEOUT and only logged when it fails; a failed warm-up never blocks startup.
+
+# Expected Inputs:
+# - `Config` with the API keys of the configured backends and the Neo4j connection details.
+
+# Expected Outputs:
+# - Seconds spent per warm-up step (None for a step that failed or timed out).
+
+import asyncio
+import importlib
+import logging
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Imported by the default pipeline on its first job; the WebBaseLoader scraper (langchain_community) stays lazy
+WARM_IMPORTS = ["openai", "aiohttp", "bs4", "neo4j"]
+
+
+def warm_imports(modules: List[str] = None):
+    for module in modules or WARM_IMPORTS:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            logger.warning(f"Warm-up could not import {module}: {e}")
+
+
+def warm_prompts():
+    from prompts.lazy_templates import warm_prompt_templates
+    from prompts.query_planning_prompt import planning_system_prompt
+    from tools.extraction_schema import get_validator
+
+    # Import the prompt modules so their templates are registered, then build them all
+    for module in ("prompts.query_planning_prompt", "prompts.article_extraction_prompt", "prompts.review_prompt"):
+        importlib.import_module(module)
+    warm_prompt_templates()
+    planning_system_prompt()
+    get_validator()
+
+
+def warm_up_urls(config) -> List[str]:
+    """API hosts of the configured backends (those with credentials)."""
+    urls = []
+    if config.TAVILY_API_KEY:
+        urls.append("https://api.tavily.com/")
+    if config.GOOGLE_CSE_API_KEY:
+        urls.append("https://www.googleapis.com/")
+    if config.JINA_API_KEY:
+        urls.append("https://r.jina.ai/")
+    return urls
+
+
+async def warm_neo4j(config):
+    from tools.database import get_neo4j_driver
+
+    await get_neo4j_driver(config).verify_connectivity()
+
+
+async def warm_graph(config):
+    from tools.upload_service import get_upload_service
+
+    # Merge-key indexes and the stakeholder alias index, otherwise built before the first upload
+    await get_upload_service(config).prepare()
+
+
+async def warm_up(config) -> Dict[str, Optional[float]]:
+    from tools.http_pool import warm_http_pool
+
+    timings: Dict[str, Optional[float]] = {}
+
+    async def step(name: str, work):
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(work(), timeout=config.WARMUP_TIMEOUT)
+            timings[name] = round(time.perf_counter() - started, 4)
+        except Exception as e:
+            timings[name] = None
+            logger.warning(f"Warm-up step {name} failed: {e!r}")
+
+    # Imports and template building are CPU-bound and run in a thread so the event loop stays responsive
+    await step("imports", lambda: asyncio.to_thread(warm_imports))
+    await step("prompts", lambda: asyncio.to_thread(warm_prompts))
+    await step("http", lambda: warm_http_pool(warm_up_urls(config), timeout=config.WARMUP_TIMEOUT))
+    await step("neo4j", lambda: warm_neo4j(config))
+    if timings["neo4j"] is not None:
+        await step("graph", lambda: warm_graph(config))
+    logger.info(f"Warm-up finished: {timings}")
+    return timings
@@ -0,0 +1,151 @@
+# File: worker.py
+# Directory: POLITICAL_ADVISOR/
+
+# Overall Role and Purpose:
+# - Runs pipeline workers separately from the API process (`server.py` with JOB_EXECUTION="queue").
+# - Each worker process claims jobs from the durable job queue, runs the workflow under the job's deadline and budgets,
+#   and reports status, logs and cancellation through the queue.
+# - Queue calls block on the backend (e.g. SQLite locks), so they run in a worker thread and never stall running jobs.
+# - Start as many processes as there are cores (`--processes`), on one host or on several hosts sharing the queue backend.
+
+# Expected Inputs:
+# - `Config` with JOB_QUEUE_BACKEND/JOB_QUEUE_PATH and the WORKER_* settings.
+
+# Expected Outputs:
+# - Jobs from the queue run to completion (or cancellation) with their status and logs stored in the queue.
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import uuid
+from typing import Dict, Optional
+from config.config import Config
+from agents.router_agent import run_workflow
+from tools.job_control import JobControl, job_from_request, parse_prices
+from tools.job_queue import JobQueue, LeaseLost, get_job_queue
+from tools.fair_scheduler import PRIORITY_CLASSES, FairQueue, parse_weights
+from tools.database import close_neo4j_drivers
+from tools.http_pool import close_http_sessions
+from tools.upload_service import close_upload_services
+from tools.warmup import warm_up
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineWorker:
+    def __init__(self, config: Config, queue: JobQueue, worker_id: str = None, concurrency: int = None):
+        self.config = config
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.concurrency = concurrency or config.WORKER_CONCURRENCY
+        self.prices = parse_prices(config.LLM_PRICES)
+        # Decides which priority class to pull next so bulk work keeps its weighted share
+        self._fair = FairQueue(parse_weights(config.PRIORITY_WEIGHTS))
+        self._running: Dict[str, asyncio.Task] = {}
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        stop = stop or asyncio.Event()
+        logger.info(f"Worker {self.worker_id} started with concurrency {self.concurrency}.")
+        if self.config.WARMUP_ON_STARTUP:
+            await warm_up(self.config)
+        try:
+            while not stop.is_set():
+                claimed = None
+                if len(self._running) < self.concurrency:
+                    claimed = await asyncio.to_thread(
+                        self.queue.claim,
+                        self.worker_id, self.config.WORKER_LEASE_SECONDS, self._fair.preference(list(PRIORITY_CLASSES))
+                    )
+                if claimed is not None:
+                    self._fair.charge(claimed["priority"])
+                    task = asyncio.create_task(self.run_job(claimed))
+                    self._running[claimed["id"]] = task
+                    task.add_done_callback(lambda _, job_id=claimed["id"]: self._running.pop(job_id, None))
+                    continue
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.config.WORKER_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Let running jobs finish on a graceful stop; their leases keep them from being claimed twice
+            if self._running:
+                await asyncio.gather(*self._running.values(), return_exceptions=True)
+            await close_upload_services()
+            await close_http_sessions()
+            await close_neo4j_drivers()
+            logger.info(f"Worker {self.worker_id} stopped.")
+
+    async def run_job(self, claimed: dict):
+        job = job_from_request(claimed["id"], claimed["payload"], self.config, self.prices)
+        job.state.add_log(f"Claimed by worker {self.worker_id} (attempt {claimed['attempts']}).", level="INFO")
+        runner = asyncio.create_task(job.run(run_workflow))
+        sent = 0
+        lease_lost = False
+        while not runner.done():
+            await asyncio.wait({runner}, timeout=self.config.WORKER_HEARTBEAT_INTERVAL)
+            if runner.done():
+                break
+            logs = job.state.logs[sent:]
+            sent += len(logs)
+            try:
+                cancel_requested = await asyncio.to_thread(
+                    self.queue.heartbeat, job.job_id, self.worker_id, self.config.WORKER_LEASE_SECONDS, job.summary(), logs
+                )
+                if cancel_requested:
+                    job.cancel()
+            except LeaseLost:
+                # Another worker re-claimed the job after this one stalled past its lease: stop the duplicate run
+                logger.warning(f"Lost the lease on job {job.job_id}; cancelling it on worker {self.worker_id}.")
+                lease_lost = True
+                job.cancel(reason="Lease lost to another worker.")
+                break
+            except Exception as e:
+                # The lease outlives a few missed heartbeats; keep working
+                sent -= len(logs)
+                logger.error(f"Heartbeat for job {job.job_id} failed: {e}")
+        await runner
+        if lease_lost:
+            return job
+        await asyncio.to_thread(self.queue.finish, job.job_id, self.worker_id, job.status, job.summary(), job.state.logs[sent:])
+        return job
+
+
+def run_worker_process(concurrency: Optional[int] = None):
+    logging.basicConfig(
+        filename='worker.log',
+        level=logging.INFO,
+        format='%(asctime)s %(process)d %(levelname)s:%(name)s:%(message)s',
+    )
+    config = Config()
+    worker = PipelineWorker(config, get_job_queue(config), concurrency=concurrency)
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run pipeline workers that pull jobs from the job queue.")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes to start (default: WORKER_PROCESSES).")
+    parser.add_argument("--concurrency", type=int, default=None, help="Jobs per process (default: WORKER_CONCURRENCY).")
+    args = parser.parse_args()
+    processes = args.processes or Config().WORKER_PROCESSES
+    if processes <= 1:
+        run_worker_process(args.concurrency)
+        return
+    children = [multiprocessing.Process(target=run_worker_process, args=(args.concurrency,)) for _ in range(processes)]
+    for child in children:
+        child.start()
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        for child in children:
+            child.join()
+
+
+if __name__ == "__main__":
+    main()